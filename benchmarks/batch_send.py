@@ -0,0 +1,97 @@
+"""
+Бенчмарк batch API провайдера: SMS по одному запросу против пачек.
+
+Сообщения отправляются HttpSmsChannelSender.send_batch на локальную имитацию
+API провайдера (notifications.testing.LocalHTTPProvider), которая тратит
+--response-ms на каждый запрос независимо от числа сообщений в нем. Так
+провайдеры с лимитом запросов в секунду ограничивают пропускную способность
+числом запросов, а не сообщений.
+
+Запуск из корня репозитория:
+
+    python benchmarks/batch_send.py --messages 1000 --batch-size 100
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django() -> None:
+    """Настраивает Django."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "notification_service.settings")
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+    import django
+
+    django.setup()
+
+
+def run_mode(batch_size: int, options: argparse.Namespace) -> dict:
+    """Отправляет сообщения с заданным размером пачки и возвращает результаты."""
+    from notifications.channels import HttpSmsChannelSender, HTTPTransport
+    from notifications.models import Notification
+    from notifications.testing import LocalHTTPProvider, ProviderResponse
+
+    notifications = [
+        Notification(to_phone=f"+1555{i:07d}", body=f"Your code is {i}")
+        for i in range(options.messages)
+    ]
+
+    with LocalHTTPProvider(response_delay=options.response_ms / 1000) as provider:
+
+        def respond(request):
+            if not request.path.endswith("/batch"):
+                return ProviderResponse()
+            return ProviderResponse(
+                json={"results": [{"status": 202} for _ in request.json["messages"]]},
+            )
+
+        provider.responder = respond
+        transport = HTTPTransport()
+        sender = HttpSmsChannelSender(
+            transport=transport,
+            base_url=provider.base_url,
+            batch_size=batch_size,
+        )
+
+        started = time.perf_counter()
+        results = sender.send_batch(notifications)
+        elapsed = time.perf_counter() - started
+        transport.close()
+
+        return {
+            "elapsed_s": elapsed,
+            "messages_per_s": sum(result.success for result in results) / elapsed,
+            "requests": len(provider.requests),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=1000, help="Messages per mode")
+    parser.add_argument("--batch-size", type=int, default=100, help="Messages per batch request")
+    parser.add_argument("--response-ms", type=float, default=5, help="Provider time per request")
+    options = parser.parse_args()
+
+    setup_django()
+    # Журнал каждого отправленного сообщения искажает замер
+    logging.disable(logging.INFO)
+    print(f"{options.messages} messages, provider {options.response_ms:g} ms per request")
+    for name, batch_size in (("single", 0), ("batch", options.batch_size)):
+        result = run_mode(batch_size, options)
+        print(
+            f"{name:>6}: {result['elapsed_s']:.2f} s, {result['messages_per_s']:.0f} msg/s, "
+            f"{result['requests']} requests",
+        )
+
+
+if __name__ == "__main__":
+    main()
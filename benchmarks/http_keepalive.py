@@ -0,0 +1,145 @@
+"""
+Бенчмарк HTTP-адаптеров провайдеров: новое соединение на запрос против keep-alive.
+
+Запросы отправляются на локальную имитацию API провайдера
+(notifications.testing.LocalHTTPProvider), которая на каждое новое соединение
+ждет --handshake-ms (стоимость TCP + TLS до провайдера), а на каждый запрос -
+--response-ms.
+
+Режимы:
+- naive: http.client.HTTPConnection на каждый запрос
+- pooled: HttpSmsChannelSender поверх HTTPTransport (keep-alive пул процесса)
+- async: AsyncHTTPTransport, --concurrency корутин отправляют одновременно
+
+Запуск из корня репозитория:
+
+    python benchmarks/http_keepalive.py --messages 300 --handshake-ms 20
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django() -> None:
+    """Настраивает Django."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "notification_service.settings")
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+    import django
+
+    django.setup()
+
+
+def run_mode(mode: str, options: argparse.Namespace) -> dict:
+    """Отправляет сообщения в одном режиме и возвращает результаты."""
+    from notifications.channels import AsyncHTTPTransport, HttpSmsChannelSender, HTTPTransport
+    from notifications.models import Notification
+    from notifications.testing import LocalHTTPProvider
+
+    notifications = [
+        Notification(to_phone=f"+1555000{i:04d}", body=f"Your code is {i}")
+        for i in range(options.messages)
+    ]
+    latencies: list[float] = []
+
+    with LocalHTTPProvider(
+        handshake_delay=options.handshake_ms / 1000,
+        response_delay=options.response_ms / 1000,
+    ) as provider:
+        started = time.perf_counter()
+        if mode == "naive":
+            for notification in notifications:
+                sent = time.perf_counter()
+                connection = http.client.HTTPConnection(provider.host, provider.port)
+                connection.request(
+                    "POST",
+                    "/v1/messages",
+                    body=json.dumps({"to": notification.to_phone, "text": notification.body}),
+                    headers={"Content-Type": "application/json", "Connection": "close"},
+                )
+                connection.getresponse().read()
+                connection.close()
+                latencies.append(time.perf_counter() - sent)
+        elif mode == "pooled":
+            transport = HTTPTransport()
+            sender = HttpSmsChannelSender(transport=transport, base_url=f"{provider.base_url}/v1")
+            for notification in notifications:
+                sent = time.perf_counter()
+                sender.send(notification)
+                latencies.append(time.perf_counter() - sent)
+            transport.close()
+        else:
+
+            async def send_all():
+                pending = list(reversed(notifications))
+                async with AsyncHTTPTransport(
+                    max_connections_per_host=options.concurrency,
+                ) as transport:
+
+                    async def worker():
+                        while pending:
+                            notification = pending.pop()
+                            sent = time.perf_counter()
+                            await transport.request(
+                                "POST",
+                                f"{provider.base_url}/v1/messages",
+                                json={"to": notification.to_phone, "text": notification.body},
+                            )
+                            latencies.append(time.perf_counter() - sent)
+
+                    await asyncio.gather(*(worker() for _ in range(options.concurrency)))
+
+            asyncio.run(send_all())
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "elapsed_s": elapsed,
+            "messages_per_s": len(provider.requests) / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "connections": provider.sessions,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=300, help="Messages per mode")
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=20,
+        help="Simulated connection setup time (TCP + TLS)",
+    )
+    parser.add_argument("--response-ms", type=float, default=2, help="Provider processing time")
+    parser.add_argument("--concurrency", type=int, default=10, help="Connections in async mode")
+    options = parser.parse_args()
+
+    setup_django()
+    # Журнал каждого отправленного сообщения искажает замер
+    logging.disable(logging.INFO)
+    print(
+        f"{options.messages} messages, connection setup {options.handshake_ms:g} ms, "
+        f"provider {options.response_ms:g} ms",
+    )
+    for mode in ("naive", "pooled", "async"):
+        result = run_mode(mode, options)
+        print(
+            f"{mode:>6}: {result['elapsed_s']:.2f} s, {result['messages_per_s']:.0f} msg/s, "
+            f"latency p50 {result['p50_ms']:.1f} ms, {result['connections']} connections",
+        )
+
+
+if __name__ == "__main__":
+    main()
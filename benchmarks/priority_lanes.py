@@ -0,0 +1,180 @@
+"""
+Бенчмарк очередей приоритетов: ожидание срочных уведомлений под пакетной рассылкой.
+
+В брокер (memory://, в процессе) сначала публикуется пакетная рассылка, затем
+с равным интервалом - срочные уведомления. Публикация идет через
+enqueue_notifications / enqueue_notification с очередью из notification_queue,
+как в сервисе. Воркеры - потоки, которые забирают сообщения из своих очередей
+и имитируют отправку паузой --send-ms.
+
+Режимы:
+- single: NOTIFICATION_PRIORITY_QUEUES=false, все воркеры слушают одну очередь
+- lanes: NOTIFICATION_PRIORITY_QUEUES=true, --critical-workers воркеров слушают
+  notifications.critical, остальные - notifications.bulk
+
+Измеряется время от публикации срочного уведомления до начала его отправки.
+
+Запуск из корня репозитория:
+
+    python benchmarks/priority_lanes.py --bulk 2000 --critical 50 --workers 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django() -> None:
+    """Настраивает Django с брокером в памяти процесса."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "notification_service.settings")
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+    import django
+
+    django.setup()
+
+
+def run_mode(mode: str, options: argparse.Namespace) -> dict:
+    """Выполняет нагрузку в одном режиме и возвращает результаты."""
+    from celery import current_app
+    from django.test import override_settings
+    from kombu import Exchange, Queue
+
+    from notifications.dispatch import (
+        enqueue_notification,
+        enqueue_notifications,
+        notification_queue,
+    )
+    from notifications.models import Notification
+
+    with override_settings(
+        NOTIFICATION_PRIORITY_QUEUES=mode == "lanes",
+        NOTIFICATION_CHANNEL_QUEUES=False,
+        NOTIFICATION_BATCH_MAX_SIZE=1,
+        NOTIFICATION_DISPATCH_MODE="direct",
+    ):
+        default_queue = current_app.conf.task_default_queue
+        critical_queue = notification_queue(Notification.PRIORITY_CRITICAL) or default_queue
+        bulk_queue = notification_queue(Notification.PRIORITY_BULK) or default_queue
+
+        if mode == "lanes":
+            assignments = [critical_queue] * options.critical_workers
+            assignments += [bulk_queue] * (options.workers - options.critical_workers)
+        else:
+            assignments = [default_queue] * options.workers
+
+        published: dict[str, float] = {}
+        waits: list[float] = []
+        results_lock = threading.Lock()
+        bulk_done = threading.Event()
+        critical_done = threading.Event()
+        bulk_consumed = [0]
+        bulk_finished_at = [0.0]
+
+        with current_app.connection_for_write() as connection:
+            for name in {critical_queue, bulk_queue}:
+                Queue(name, Exchange(name, type="direct"), routing_key=name)(
+                    connection.default_channel,
+                ).declare()
+
+        def worker(queue_name: str):
+            with current_app.connection_for_read() as connection:
+                queue = connection.SimpleQueue(queue_name)
+                try:
+                    while not (bulk_done.is_set() and critical_done.is_set()):
+                        try:
+                            message = queue.get(block=True, timeout=0.01)
+                        except queue.Empty:
+                            continue
+                        notification_id = message.payload[0][0]
+                        started = time.perf_counter()
+                        message.ack()
+                        time.sleep(options.send_ms / 1000)
+                        with results_lock:
+                            if notification_id.startswith("critical"):
+                                waits.append(started - published[notification_id])
+                                if len(waits) == options.critical:
+                                    critical_done.set()
+                            else:
+                                bulk_consumed[0] += 1
+                                if bulk_consumed[0] == options.bulk:
+                                    bulk_finished_at[0] = time.perf_counter()
+                                    bulk_done.set()
+                finally:
+                    queue.close()
+
+        threads = [threading.Thread(target=worker, args=(queue,)) for queue in assignments]
+        for thread in threads:
+            thread.start()
+
+        started = time.perf_counter()
+        enqueue_notifications(
+            [f"bulk-{i}" for i in range(options.bulk)],
+            queue=notification_queue(Notification.PRIORITY_BULK),
+        )
+        for i in range(options.critical):
+            notification_id = f"critical-{i}"
+            with results_lock:
+                published[notification_id] = time.perf_counter()
+            enqueue_notification(
+                notification_id,
+                queue=notification_queue(Notification.PRIORITY_CRITICAL),
+            )
+            time.sleep(options.critical_interval_ms / 1000)
+
+        for thread in threads:
+            thread.join()
+
+    waits.sort()
+    return {
+        "critical_p50_ms": statistics.median(waits) * 1000,
+        "critical_p95_ms": waits[int(len(waits) * 0.95) - 1] * 1000,
+        "critical_max_ms": waits[-1] * 1000,
+        "bulk_drain_s": bulk_finished_at[0] - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--bulk", type=int, default=2000, help="Bulk notifications published first")
+    parser.add_argument("--critical", type=int, default=50, help="Critical notifications")
+    parser.add_argument(
+        "--critical-interval-ms",
+        type=float,
+        default=10,
+        help="Pause between critical notifications",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Worker threads in total")
+    parser.add_argument(
+        "--critical-workers",
+        type=int,
+        default=1,
+        help="Workers dedicated to the critical lane (lanes mode)",
+    )
+    parser.add_argument("--send-ms", type=float, default=2, help="Simulated send time")
+    options = parser.parse_args()
+
+    setup_django()
+    print(
+        f"{options.bulk} bulk + {options.critical} critical notifications, "
+        f"{options.workers} workers, send {options.send_ms:g} ms",
+    )
+    for mode in ("single", "lanes"):
+        result = run_mode(mode, options)
+        print(
+            f"{mode:>7}: critical wait p50 {result['critical_p50_ms']:.1f} ms, "
+            f"p95 {result['critical_p95_ms']:.1f} ms, max {result['critical_max_ms']:.1f} ms; "
+            f"bulk drained in {result['bulk_drain_s']:.2f} s",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Бенчмарк отправки email: новая SMTP-сессия на письмо против пула соединений.
+
+Письма отправляются на локальный SMTP-сервер (notifications.testing.LocalSMTPServer),
+который перед приветствием ждет --handshake-ms: так имитируется стоимость
+TCP + TLS + AUTH у реального провайдера.
+
+Режимы:
+- naive: smtplib.SMTP на каждое письмо (как django.core.mail без общего соединения)
+- pooled: SmtpEmailChannelSender.send по одному письму через пул
+- batch: SmtpEmailChannelSender.send_batch пачками по --batch-size
+
+Запуск из корня репозитория:
+
+    python benchmarks/smtp_throughput.py --messages 500 --handshake-ms 20
+"""
+
+import argparse
+import logging
+import os
+import smtplib
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django() -> None:
+    """Настраивает Django."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "notification_service.settings")
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+    import django
+
+    django.setup()
+
+
+def run_mode(mode: str, options: argparse.Namespace) -> dict:
+    """Отправляет письма в одном режиме и возвращает результаты."""
+    from notifications.channels import SMTPConnectionPool, SmtpEmailChannelSender
+    from notifications.models import Notification
+    from notifications.testing import LocalSMTPServer
+
+    notifications = [
+        Notification(to_email=f"user{i}@example.com", subject="Code", body=f"Your code is {i}")
+        for i in range(options.messages)
+    ]
+
+    with LocalSMTPServer(handshake_delay=options.handshake_ms / 1000) as server:
+        pool = SMTPConnectionPool(
+            server.host,
+            server.port,
+            max_messages_per_connection=options.max_messages_per_connection,
+        )
+        sender = SmtpEmailChannelSender(pool=pool, from_email="noreply@example.com")
+
+        started = time.perf_counter()
+        if mode == "naive":
+            for notification in notifications:
+                with smtplib.SMTP(server.host, server.port) as smtp:
+                    smtp.send_message(sender._build_message(notification))
+        elif mode == "pooled":
+            for notification in notifications:
+                sender.send(notification)
+        else:
+            for offset in range(0, len(notifications), options.batch_size):
+                sender.send_batch(notifications[offset : offset + options.batch_size])
+        elapsed = time.perf_counter() - started
+        pool.close()
+
+        return {
+            "elapsed_s": elapsed,
+            "messages_per_s": len(server.messages) / elapsed,
+            "sessions": server.sessions,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=500, help="Messages per mode")
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=20,
+        help="Simulated session setup time (TLS + AUTH)",
+    )
+    parser.add_argument("--batch-size", type=int, default=50, help="Messages per send_batch")
+    parser.add_argument(
+        "--max-messages-per-connection",
+        type=int,
+        default=100,
+        help="Messages per SMTP session before reconnect",
+    )
+    options = parser.parse_args()
+
+    setup_django()
+    # Журнал каждого отправленного письма искажает замер
+    logging.disable(logging.INFO)
+    print(f"{options.messages} messages, session setup {options.handshake_ms:g} ms")
+    for mode in ("naive", "pooled", "batch"):
+        result = run_mode(mode, options)
+        print(
+            f"{mode:>6}: {result['elapsed_s']:.2f} s, "
+            f"{result['messages_per_s']:.0f} msg/s, {result['sessions']} sessions",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Бенчмарк записей воркеров в SQLite: режим по умолчанию против SQLITE_HIGH_CONCURRENCY.
+
+Для каждого режима запускается отдельный процесс с собственным временным
+файлом БД. В процессе несколько потоков-воркеров отправляют уведомления через
+NotificationService (каналы заменены мгновенной заглушкой, поэтому измеряются
+только записи в БД: in_progress, попытка доставки, итоговый статус).
+
+Запуск из корня репозитория:
+
+    python benchmarks/sqlite_writes.py --notifications 2000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Записей в БД на одно уведомление в режиме immediate:
+# in_progress, попытка доставки, итоговый статус
+WRITES_PER_NOTIFICATION = 3
+
+MODES = {
+    "default": "false",
+    "high-concurrency": "true",
+}
+
+
+def run_workload(notifications_count: int, workers: int) -> dict:
+    """Выполняет нагрузку в текущем процессе и возвращает результаты."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "notification_service.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import OperationalError, close_old_connections, connection
+
+    from notifications.channels import ChannelResult, ChannelSender
+    from notifications.models import Notification
+    from notifications.services import NotificationService
+
+    class InstantSender(ChannelSender):
+        def is_available(self, notification):
+            return True
+
+        def send(self, notification):
+            return ChannelResult(success=True)
+
+    call_command("migrate", verbosity=0)
+    notifications = Notification.objects.bulk_create(
+        [
+            Notification(to_email="bench@example.com", body="Benchmark", channels=["email"])
+            for _ in range(notifications_count)
+        ],
+    )
+
+    pending = list(notifications)
+    pending_lock = threading.Lock()
+    errors: list[str] = []
+
+    def worker():
+        service = NotificationService(persistence_mode=NotificationService.PERSISTENCE_IMMEDIATE)
+        service.channel_senders = {"email": InstantSender()}
+        try:
+            while True:
+                with pending_lock:
+                    if not pending:
+                        return
+                    notification = pending.pop()
+                try:
+                    service.send_notification(notification)
+                except OperationalError as e:
+                    errors.append(str(e))
+        finally:
+            close_old_connections()
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    delivered = Notification.objects.filter(status=Notification.STATUS_DELIVERED).count()
+    return {
+        "elapsed": elapsed,
+        "delivered": delivered,
+        "errors": len(errors),
+        "writes_per_sec": delivered * WRITES_PER_NOTIFICATION / elapsed,
+    }
+
+
+def run_mode(mode: str, notifications_count: int, workers: int) -> dict:
+    """Запускает нагрузку в отдельном процессе с чистой БД."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "SQLITE_PATH": str(Path(tmp) / "bench.sqlite3"),
+            "SQLITE_HIGH_CONCURRENCY": MODES[mode],
+            "DATABASE_ENGINE": "sqlite",
+            "DJANGO_LOG_LEVEL": "ERROR",
+        }
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--worker",
+                "--notifications",
+                str(notifications_count),
+                "--workers",
+                str(workers),
+            ],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_workload(args.notifications, args.workers)))
+        return
+
+    print(f"{args.notifications} notifications, {args.workers} worker threads")
+    print(f"{'mode':<18}{'writes/sec':>12}{'seconds':>10}{'delivered':>11}{'errors':>8}")
+    results = {}
+    for mode in MODES:
+        result = results[mode] = run_mode(mode, args.notifications, args.workers)
+        print(
+            f"{mode:<18}{result['writes_per_sec']:>12.0f}{result['elapsed']:>10.2f}"
+            f"{result['delivered']:>11}{result['errors']:>8}",
+        )
+
+    gain = results["high-concurrency"]["writes_per_sec"] / results["default"]["writes_per_sec"]
+    print(f"gain: x{gain:.1f}")
+
+
+if __name__ == "__main__":
+    main()
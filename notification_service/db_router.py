@@ -0,0 +1,89 @@
+from collections.abc import Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+PIN_CACHE_PREFIX = "db:primary-pin"
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+def replica_configured() -> bool:
+    """Проверяет, настроена ли реплика для чтения."""
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def pin_to_primary(keys: Iterable[str]) -> None:
+    """
+    Закрепляет чтения по ключам за основной БД на DATABASE_REPLICA_PIN_SECONDS.
+
+    Вызывается после записи (например, создания уведомления), чтобы следующий
+    запрос клиента не прочитал с отстающей реплики состояние до записи.
+
+    Args:
+        keys: Ключи закрепления, например UUID уведомлений
+    """
+    if replica_configured():
+        caches["default"].set_many(
+            {f"{PIN_CACHE_PREFIX}:{key}": True for key in keys},
+            timeout=settings.DATABASE_REPLICA_PIN_SECONDS,
+        )
+
+
+@contextmanager
+def read_from_replica(pin_key: str | None = None):
+    """
+    Направляет чтения внутри блока на реплику.
+
+    Чтения остаются на основной БД, если реплика не настроена или ключ
+    закреплен вызовом pin_to_primary.
+
+    Args:
+        pin_key: Ключ, по которому проверяется закрепление за основной БД
+
+    Yields:
+        True, если чтения блока могут идти на реплику
+    """
+    use_replica = replica_configured()
+    if use_replica and pin_key is not None:
+        use_replica = not caches["default"].get(f"{PIN_CACHE_PREFIX}:{pin_key}")
+
+    token = _replica_reads.set(use_replica)
+    try:
+        yield use_replica
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Роутер основной БД и реплики.
+
+    Все записи и чтения по умолчанию идут в основную БД: воркеры читают
+    только что созданные уведомления и не должны зависеть от задержки реплики.
+    На реплику уходят только чтения внутри read_from_replica (просмотр статуса
+    и список уведомлений) вне транзакции на основной БД.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -83,12 +85,52 @@ WSGI_APPLICATION = "notification_service.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DATABASE_ENGINE: "sqlite" (по умолчанию) или "postgresql". Для PostgreSQL
+# соединения переиспользуются (CONN_MAX_AGE) и проверяются перед использованием;
+# при заданном POSTGRES_REPLICA_HOST чтения статуса и списка уведомлений идут на реплику
+DATABASE_ENGINE = os.getenv("DATABASE_ENGINE", "sqlite")
+
+if DATABASE_ENGINE == "postgresql":
+    _postgres = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("POSTGRES_DB", "notifications"),
+        "USER": os.getenv("POSTGRES_USER", "notifications"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+        "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+        "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DATABASE_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {"connect_timeout": int(os.getenv("DATABASE_CONNECT_TIMEOUT", "5"))},
     }
-}
+    DATABASES = {"default": _postgres}
+    if os.getenv("POSTGRES_REPLICA_HOST"):
+        DATABASES["replica"] = {
+            **_postgres,
+            "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+            "PORT": os.getenv("POSTGRES_REPLICA_PORT", _postgres["PORT"]),
+            "TEST": {"MIRROR": "default"},
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+        }
+    }
+
+# Режим SQLite для нескольких конкурентных воркеров на одном узле: WAL,
+# synchronous=NORMAL, busy_timeout и mmap для каждого соединения, а записи
+# воркеров группируются потоком-писателем в общие коммиты
+SQLITE_HIGH_CONCURRENCY = os.getenv("SQLITE_HIGH_CONCURRENCY", "false").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Максимум записей в одном групповом коммите и ожидание следующих записей (секунды)
+SQLITE_WRITER_MAX_BATCH = int(os.getenv("SQLITE_WRITER_MAX_BATCH", "100"))
+SQLITE_WRITER_MAX_DELAY = float(os.getenv("SQLITE_WRITER_MAX_DELAY", "0.002"))
+
+DATABASE_ROUTERS = ["notification_service.db_router.PrimaryReplicaRouter"]
+# Сколько секунд после создания уведомления его статус читается с основной БД
+DATABASE_REPLICA_PIN_SECONDS = float(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "5"))
 
 
 # Password validation
@@ -158,6 +200,245 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+# Задача подтверждается после выполнения: при падении воркера сообщение
+# возвращается в очередь. Prefetch 1, чтобы воркер не держал неподтвержденные
+# сообщения, которые ему некогда обрабатывать
+CELERY_TASK_ACKS_LATE = os.getenv("CELERY_TASK_ACKS_LATE", "true").lower() == "true"
+CELERY_TASK_REJECT_ON_WORKER_LOST = CELERY_TASK_ACKS_LATE
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.getenv("CELERY_WORKER_PREFETCH_MULTIPLIER", "1"))
+
+# Notifications
+# Максимальное количество уведомлений в одном запросе POST /api/notifications/bulk/
+NOTIFICATION_BULK_MAX_ITEMS = int(os.getenv("NOTIFICATION_BULK_MAX_ITEMS", "1000"))
+# Публикация задач отправки: "direct" - сразу из API, "outbox" - запись в таблицу
+# outbox в транзакции создания уведомления и публикация командой relay_outbox,
+# "database" - без брокера, воркеры run_delivery_workers забирают pending из БД
+NOTIFICATION_DISPATCH_MODE = os.getenv("NOTIFICATION_DISPATCH_MODE", "direct")
+# Очередь в БД: сколько уведомлений воркер забирает за раз и пауза при пустой очереди, сек
+NOTIFICATION_DB_QUEUE_BATCH_SIZE = int(os.getenv("NOTIFICATION_DB_QUEUE_BATCH_SIZE", "20"))
+NOTIFICATION_DB_QUEUE_POLL_INTERVAL = float(os.getenv("NOTIFICATION_DB_QUEUE_POLL_INTERVAL", "1"))
+# Размер пачки relay_outbox и пауза между опросами пустого outbox, сек
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", "500"))
+NOTIFICATION_OUTBOX_POLL_INTERVAL = float(os.getenv("NOTIFICATION_OUTBOX_POLL_INTERVAL", "0.5"))
+# Аренда уведомления воркером, сек: должна превышать время доставки по всем каналам.
+# Уведомления с истекшей арендой reaper возвращает в очередь пачками (не более
+# MAX_BATCHES пачек за запуск) каждые NOTIFICATION_LEASE_REAPER_INTERVAL секунд
+NOTIFICATION_LEASE_SECONDS = int(os.getenv("NOTIFICATION_LEASE_SECONDS", "300"))
+NOTIFICATION_LEASE_REAPER_BATCH_SIZE = int(os.getenv("NOTIFICATION_LEASE_REAPER_BATCH_SIZE", "500"))
+NOTIFICATION_LEASE_REAPER_MAX_BATCHES = int(
+    os.getenv("NOTIFICATION_LEASE_REAPER_MAX_BATCHES", "20")
+)
+NOTIFICATION_LEASE_REAPER_INTERVAL = float(os.getenv("NOTIFICATION_LEASE_REAPER_INTERVAL", "60"))
+
+# Повтор цепочки каналов после временных ошибок: максимум прогонов (1 - без
+# повторов), экспоненциальная пауза с разбросом от BASE_DELAY до MAX_DELAY сек
+# и срок от создания уведомления, после которого повторов нет, сек.
+# MAX_DELAY должен быть меньше visibility_timeout брокера Redis (1 час)
+NOTIFICATION_RETRY_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_RETRY_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_BASE_DELAY = float(os.getenv("NOTIFICATION_RETRY_BASE_DELAY", "30"))
+NOTIFICATION_RETRY_MAX_DELAY = float(os.getenv("NOTIFICATION_RETRY_MAX_DELAY", "1800"))
+NOTIFICATION_RETRY_DEADLINE = float(os.getenv("NOTIFICATION_RETRY_DEADLINE", "86400"))
+
+# Планировщик отложенных уведомлений (run_scheduler): размер пачки, пауза между
+# опросами индекса, сек, и срок аренды лидерства, сек (должен быть больше паузы)
+NOTIFICATION_SCHEDULER_BATCH_SIZE = int(os.getenv("NOTIFICATION_SCHEDULER_BATCH_SIZE", "500"))
+NOTIFICATION_SCHEDULER_INTERVAL = float(os.getenv("NOTIFICATION_SCHEDULER_INTERVAL", "1"))
+NOTIFICATION_SCHEDULER_LEADER_TTL = float(os.getenv("NOTIFICATION_SCHEDULER_LEADER_TTL", "15"))
+
+# prune_notifications: уведомлений в одной транзакции удаления и ограничение
+# скорости удаления, строк/сек (0 - без ограничения)
+NOTIFICATION_PRUNE_BATCH_SIZE = int(os.getenv("NOTIFICATION_PRUNE_BATCH_SIZE", "1000"))
+NOTIFICATION_PRUNE_MAX_ROWS_PER_SECOND = float(
+    os.getenv("NOTIFICATION_PRUNE_MAX_ROWS_PER_SECOND", "5000"),
+)
+
+CELERY_BEAT_SCHEDULE = {
+    "reap-expired-leases": {
+        "task": "notifications.tasks.reap_expired_leases_task",
+        "schedule": NOTIFICATION_LEASE_REAPER_INTERVAL,
+    },
+}
+# Размер страницы GET /api/notifications/ по умолчанию и максимальный
+NOTIFICATION_LIST_PAGE_SIZE = int(os.getenv("NOTIFICATION_LIST_PAGE_SIZE", "100"))
+NOTIFICATION_LIST_MAX_PAGE_SIZE = int(os.getenv("NOTIFICATION_LIST_MAX_PAGE_SIZE", "1000"))
+# Размер пачки задач, публикуемых в брокер через одно соединение
+NOTIFICATION_ENQUEUE_CHUNK_SIZE = int(os.getenv("NOTIFICATION_ENQUEUE_CHUNK_SIZE", "500"))
+# Пакетная обработка: при размере > 1 уведомления отправляются задачей
+# send_notifications_batch_task пачками до NOTIFICATION_BATCH_MAX_SIZE штук,
+# неполная пачка публикуется через NOTIFICATION_BATCH_MAX_AGE секунд
+NOTIFICATION_BATCH_MAX_SIZE = int(os.getenv("NOTIFICATION_BATCH_MAX_SIZE", "1"))
+NOTIFICATION_BATCH_MAX_AGE = float(os.getenv("NOTIFICATION_BATCH_MAX_AGE", "0.05"))
+# Очереди Celery: при NOTIFICATION_PRIORITY_QUEUES задачи отправки публикуются
+# в очереди приоритетов <prefix>.critical/normal/bulk, при NOTIFICATION_CHANNEL_QUEUES
+# очередь дополнительно делится по основному каналу (<prefix>.normal.telegram).
+# Воркеры должны слушать эти очереди (celery worker -Q ...), см. README
+NOTIFICATION_QUEUE_PREFIX = os.getenv("NOTIFICATION_QUEUE_PREFIX", "notifications")
+NOTIFICATION_PRIORITY_QUEUES = os.getenv("NOTIFICATION_PRIORITY_QUEUES", "false").lower() == "true"
+NOTIFICATION_CHANNEL_QUEUES = os.getenv("NOTIFICATION_CHANNEL_QUEUES", "false").lower() == "true"
+# Режим записи результатов доставки: "immediate" - каждая попытка и смена статуса
+# пишутся сразу, "coalesced" - попытки буферизуются и сохраняются вместе с итоговым
+# статусом одной транзакцией
+NOTIFICATION_PERSISTENCE_MODE = os.getenv("NOTIFICATION_PERSISTENCE_MODE", "immediate")
+# Режим прохода по каналам: "sequential" - строго по очереди, "hedged" - следующий
+# канал запускается, если текущий не ответил за NOTIFICATION_HEDGE_DELAY секунд,
+# "batched" - пачка уведомлений отправляется через send_batch адаптеров, группами
+# по текущему каналу (одиночные уведомления - как sequential)
+NOTIFICATION_DELIVERY_MODE = os.getenv("NOTIFICATION_DELIVERY_MODE", "sequential")
+NOTIFICATION_HEDGE_DELAY = float(os.getenv("NOTIFICATION_HEDGE_DELAY", "2.0"))
+
+# Кэш идемпотентности: последние request_id хранятся в LRU процесса с TTL.
+# NOTIFICATION_IDEMPOTENCY_CACHE_ALIAS - алиас общего кэша (например, "default"
+# с REDIS_CACHE_URL), чтобы повторы обслуживались без БД на любом процессе API
+NOTIFICATION_IDEMPOTENCY_CACHE_SIZE = int(os.getenv("NOTIFICATION_IDEMPOTENCY_CACHE_SIZE", "10000"))
+NOTIFICATION_IDEMPOTENCY_CACHE_TTL = float(os.getenv("NOTIFICATION_IDEMPOTENCY_CACHE_TTL", "300"))
+NOTIFICATION_IDEMPOTENCY_CACHE_ALIAS = os.getenv("NOTIFICATION_IDEMPOTENCY_CACHE_ALIAS") or None
+
+# Write-through кэш статусов для GET /api/notifications/{id}/. Кэш должен быть общим
+# для API и воркеров (например, "default" с REDIS_CACHE_URL), поэтому по умолчанию
+# выключен: с LocMemCache API не увидит обновлений из процесса воркера
+NOTIFICATION_STATUS_CACHE_ALIAS = os.getenv("NOTIFICATION_STATUS_CACHE_ALIAS") or None
+NOTIFICATION_STATUS_CACHE_TTL = float(os.getenv("NOTIFICATION_STATUS_CACHE_TTL", "3600"))
+
+# События изменения статуса для SSE и long-poll: "memory" - только в пределах процесса,
+# "redis" - Redis Pub/Sub между воркерами и процессами API
+NOTIFICATION_STATUS_EVENTS_BACKEND = os.getenv("NOTIFICATION_STATUS_EVENTS_BACKEND", "memory")
+NOTIFICATION_STATUS_EVENTS_REDIS_URL = os.getenv(
+    "NOTIFICATION_STATUS_EVENTS_REDIS_URL", CELERY_BROKER_URL
+)
+# Максимальное время ожидания long-poll (?wait=) и длительность одного SSE-потока, сек
+NOTIFICATION_LONG_POLL_MAX_WAIT = float(os.getenv("NOTIFICATION_LONG_POLL_MAX_WAIT", "60"))
+NOTIFICATION_STATUS_STREAM_TIMEOUT = float(os.getenv("NOTIFICATION_STATUS_STREAM_TIMEOUT", "300"))
+NOTIFICATION_STATUS_STREAM_KEEPALIVE = float(
+    os.getenv("NOTIFICATION_STATUS_STREAM_KEEPALIVE", "15")
+)
+
+# Circuit breaker для каналов доставки. Хранилище состояния: "memory" - в памяти
+# процесса, "cache" - в кэше Django (общее для всех воркеров при RedisCache)
+NOTIFICATION_CIRCUIT_BREAKER_ENABLED = (
+    os.getenv("NOTIFICATION_CIRCUIT_BREAKER_ENABLED", "false").lower() == "true"
+)
+NOTIFICATION_CIRCUIT_BREAKER_STORE = os.getenv("NOTIFICATION_CIRCUIT_BREAKER_STORE", "memory")
+NOTIFICATION_CIRCUIT_BREAKER_CACHE_ALIAS = "default"
+NOTIFICATION_CIRCUIT_BREAKER_FAILURE_RATE = float(
+    os.getenv("NOTIFICATION_CIRCUIT_BREAKER_FAILURE_RATE", "0.5"),
+)
+NOTIFICATION_CIRCUIT_BREAKER_MIN_REQUESTS = int(
+    os.getenv("NOTIFICATION_CIRCUIT_BREAKER_MIN_REQUESTS", "20"),
+)
+NOTIFICATION_CIRCUIT_BREAKER_WINDOW = float(os.getenv("NOTIFICATION_CIRCUIT_BREAKER_WINDOW", "60"))
+NOTIFICATION_CIRCUIT_BREAKER_OPEN_DURATION = float(
+    os.getenv("NOTIFICATION_CIRCUIT_BREAKER_OPEN_DURATION", "30"),
+)
+NOTIFICATION_CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(
+    os.getenv("NOTIFICATION_CIRCUIT_BREAKER_HALF_OPEN_PROBES", "1"),
+)
+
+# Лимиты скорости отправки (token bucket) в формате "канал=в_секунду[:емкость],...",
+# например "sms=10:20,telegram=30". NOTIFICATION_RECIPIENT_RATE_LIMITS ограничивает
+# поток одному получателю канала (например, "telegram=1:3"). Хранилище корзин:
+# "memory" - в памяти процесса, "redis" - общее для всех воркеров. Если токена нет
+# дольше NOTIFICATION_RATE_LIMIT_MAX_WAIT секунд, уведомление откладывается
+NOTIFICATION_RATE_LIMITS = os.getenv("NOTIFICATION_RATE_LIMITS", "")
+NOTIFICATION_RECIPIENT_RATE_LIMITS = os.getenv("NOTIFICATION_RECIPIENT_RATE_LIMITS", "")
+NOTIFICATION_RATE_LIMIT_BACKEND = os.getenv("NOTIFICATION_RATE_LIMIT_BACKEND", "memory")
+NOTIFICATION_RATE_LIMIT_REDIS_URL = os.getenv(
+    "NOTIFICATION_RATE_LIMIT_REDIS_URL", CELERY_BROKER_URL
+)
+NOTIFICATION_RATE_LIMIT_MAX_WAIT = float(os.getenv("NOTIFICATION_RATE_LIMIT_MAX_WAIT", "2.0"))
+
+# Объединение уведомлений перед отправкой. NOTIFICATION_DEDUP_WINDOW - окно в секундах,
+# в котором уведомление с тем же получателем, темой и текстом не отправляется повторно
+# (0 - выключено). Окно: "memory" - в памяти процесса, "cache" - в кэше Django (общее
+# для всех воркеров при RedisCache). NOTIFICATION_DIGEST_MIN_SIZE - с какого числа
+# уведомлений одному получателю в пачке отправлять вместо них одну сводку (0 - выключено)
+NOTIFICATION_DEDUP_WINDOW = float(os.getenv("NOTIFICATION_DEDUP_WINDOW", "0"))
+NOTIFICATION_DEDUP_STORE = os.getenv("NOTIFICATION_DEDUP_STORE", "memory")
+NOTIFICATION_DEDUP_CACHE_ALIAS = "default"
+NOTIFICATION_DIGEST_MIN_SIZE = int(os.getenv("NOTIFICATION_DIGEST_MIN_SIZE", "0"))
+NOTIFICATION_DIGEST_SUBJECT = os.getenv("NOTIFICATION_DIGEST_SUBJECT", "Уведомлений: {count}")
+
+# Сводка собирается из пачки: задача send_notification_task видит одно уведомление,
+# поэтому сводки требуют пакетной отправки или очереди в БД
+if (
+    NOTIFICATION_DIGEST_MIN_SIZE > 1
+    and NOTIFICATION_BATCH_MAX_SIZE <= 1
+    and NOTIFICATION_DISPATCH_MODE != "database"
+):
+    raise ImproperlyConfigured(
+        "NOTIFICATION_DIGEST_MIN_SIZE requires NOTIFICATION_BATCH_MAX_SIZE > 1 "
+        "or NOTIFICATION_DISPATCH_MODE=database",
+    )
+
+# Порядок каналов для уведомлений без явного списка channels: "static" -
+# DEFAULT_CHANNELS как есть, "adaptive" - по сглаженной статистике успеха и времени
+NOTIFICATION_ROUTING_POLICY = os.getenv("NOTIFICATION_ROUTING_POLICY", "static")
+NOTIFICATION_ROUTING_EWMA_ALPHA = float(os.getenv("NOTIFICATION_ROUTING_EWMA_ALPHA", "0.05"))
+NOTIFICATION_ROUTING_EXPLORATION = float(os.getenv("NOTIFICATION_ROUTING_EXPLORATION", "0.3"))
+# Как часто воркер публикует статистику каналов для GET /api/channels/stats/ (секунды)
+NOTIFICATION_ROUTING_STATS_PUBLISH_INTERVAL = float(
+    os.getenv("NOTIFICATION_ROUTING_STATS_PUBLISH_INTERVAL", "10"),
+)
+
+# Адаптеры каналов: "stub" - имитация отправки (для разработки), "smtp" - отправка
+# через SMTP-сервер EMAIL_HOST с пулом постоянных соединений
+NOTIFICATION_EMAIL_SENDER = os.getenv("NOTIFICATION_EMAIL_SENDER", "stub")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "false").lower() == "true"
+EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "false").lower() == "true"
+EMAIL_TIMEOUT = float(os.getenv("EMAIL_TIMEOUT", "10"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "notifications@localhost")
+# Пул SMTP-соединений процесса: максимум сессий, писем на сессию до переподключения
+# и простой в секундах, после которого сессия проверяется NOOP перед отправкой
+NOTIFICATION_SMTP_POOL_SIZE = int(os.getenv("NOTIFICATION_SMTP_POOL_SIZE", "4"))
+NOTIFICATION_SMTP_MAX_MESSAGES_PER_CONNECTION = int(
+    os.getenv("NOTIFICATION_SMTP_MAX_MESSAGES_PER_CONNECTION", "100"),
+)
+NOTIFICATION_SMTP_HEALTH_CHECK_INTERVAL = float(
+    os.getenv("NOTIFICATION_SMTP_HEALTH_CHECK_INTERVAL", "30"),
+)
+# SMS и Telegram: "stub" - имитация отправки, "http" - HTTP API провайдера
+NOTIFICATION_SMS_SENDER = os.getenv("NOTIFICATION_SMS_SENDER", "stub")
+SMS_API_BASE_URL = os.getenv("SMS_API_BASE_URL", "http://localhost:8080/v1")
+SMS_API_KEY = os.getenv("SMS_API_KEY", "")
+# Сообщений в одном запросе к batch API SMS-провайдера (0 - по одному запросу на SMS)
+SMS_API_BATCH_SIZE = int(os.getenv("SMS_API_BATCH_SIZE", "0"))
+NOTIFICATION_TELEGRAM_SENDER = os.getenv("NOTIFICATION_TELEGRAM_SENDER", "stub")
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org")
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+# Пул keep-alive HTTP-соединений процесса к API провайдеров: максимум соединений
+# к одному хосту, таймауты соединения и ответа, простой до закрытия (секунды)
+NOTIFICATION_HTTP_MAX_CONNECTIONS_PER_HOST = int(
+    os.getenv("NOTIFICATION_HTTP_MAX_CONNECTIONS_PER_HOST", "10"),
+)
+NOTIFICATION_HTTP_CONNECT_TIMEOUT = float(os.getenv("NOTIFICATION_HTTP_CONNECT_TIMEOUT", "3"))
+NOTIFICATION_HTTP_READ_TIMEOUT = float(os.getenv("NOTIFICATION_HTTP_READ_TIMEOUT", "10"))
+NOTIFICATION_HTTP_IDLE_TIMEOUT = float(os.getenv("NOTIFICATION_HTTP_IDLE_TIMEOUT", "30"))
+
+# Cache
+# По умолчанию кэш локальный для процесса. Для состояния, общего для всех
+# воркеров (circuit breaker и т.п.), укажите REDIS_CACHE_URL
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }
+
+# Закрепление чтений за основной БД (read-your-writes) хранится в кэше "default":
+# с локальным кэшем процесса оно не действовало бы на другие процессы API
+if "replica" in DATABASES and not REDIS_CACHE_URL:
+    raise ImproperlyConfigured("POSTGRES_REPLICA_HOST requires a shared cache: set REDIS_CACHE_URL")
 
 # Logging
 LOGGING = {
@@ -0,0 +1,198 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def sqlite_high_concurrency_enabled(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Проверяет, включен ли режим SQLite для конкурентных воркеров."""
+    return (
+        settings.SQLITE_HIGH_CONCURRENCY
+        and settings.DATABASES[using]["ENGINE"] == "django.db.backends.sqlite3"
+    )
+
+
+def configure_sqlite_connection(sender, connection, **kwargs) -> None:
+    """
+    Настраивает новое соединение SQLite (обработчик сигнала connection_created).
+
+    - journal_mode=WAL: читатели не блокируют писателя и наоборот;
+    - synchronous=NORMAL: fsync только на checkpoint, в WAL это не грозит
+      повреждением БД, а лишь потерей последних коммитов при отключении питания;
+    - busy_timeout: ожидание блокировки вместо немедленного "database is locked";
+    - mmap_size: чтение страниц БД через отображение в память.
+    """
+    if connection.vendor != "sqlite" or not settings.SQLITE_HIGH_CONCURRENCY:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+
+
+class SQLiteWriter:
+    """
+    Писатель с групповым коммитом.
+
+    SQLite допускает одного писателя, и каждый COMMIT в WAL - это запись
+    и (на checkpoint) fsync журнала. Вместо того чтобы потоки-воркеры
+    конкурировали за блокировку мелкими транзакциями, они передают функции
+    записи в поток писателя. Писатель собирает до max_batch функций (ожидая
+    не дольше max_delay после первой) и выполняет их в одной транзакции,
+    каждую в своей точке сохранения: ошибка одной записи не откатывает остальные.
+    Вызывающий поток ждет коммита, поэтому после submit запись уже в БД.
+    """
+
+    def __init__(
+        self,
+        max_batch: int = 100,
+        max_delay: float = 0.002,
+        using: str = DEFAULT_DB_ALIAS,
+    ):
+        """
+        Инициализирует писатель.
+
+        Args:
+            max_batch: Максимум функций записи в одном коммите
+            max_delay: Сколько секунд ждать следующих записей после первой
+            using: Алиас БД
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.using = using
+        self._queue: queue.Queue[tuple[Callable[[], Any], Future]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, write: Callable[[], T]) -> T:
+        """
+        Выполняет функцию записи в потоке писателя и ждет коммита.
+
+        Если вызывающий код уже внутри транзакции, запись выполняется сразу в
+        ней: перенос в другой поток нарушил бы атомарность этой транзакции.
+
+        Args:
+            write: Функция, выполняющая запросы на запись
+
+        Returns:
+            Результат функции записи
+
+        Raises:
+            Exception: Исключение функции записи или ошибка коммита
+        """
+        if threading.current_thread() is self._thread or connections[self.using].in_atomic_block:
+            return write()
+
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((write, future))
+        return future.result()
+
+    def _ensure_started(self) -> None:
+        # Поток создается лениво: после fork (prefork-пул Celery) у дочернего
+        # процесса будет собственный писатель
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="sqlite-writer",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(
+                        (
+                            self._queue.get(timeout=remaining)
+                            if remaining > 0
+                            else self._queue.get_nowait()
+                        ),
+                    )
+                except queue.Empty:
+                    break
+
+            close_old_connections()
+            self._commit(batch)
+
+    def _commit(self, batch: list[tuple[Callable[[], Any], Future]]) -> None:
+        results: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            with transaction.atomic(using=self.using):
+                for write, future in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            results.append((future, write(), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            logger.error(f"SQLite group commit of {len(batch)} writes failed: {e}", exc_info=True)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_writer: SQLiteWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_sqlite_writer() -> SQLiteWriter | None:
+    """
+    Возвращает писатель процесса или None, если режим SQLite выключен.
+
+    Returns:
+        Общий для процесса SQLiteWriter
+    """
+    global _writer
+
+    if not sqlite_high_concurrency_enabled():
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = SQLiteWriter(
+                max_batch=settings.SQLITE_WRITER_MAX_BATCH,
+                max_delay=settings.SQLITE_WRITER_MAX_DELAY,
+            )
+        return _writer
+
+
+def submit_write(write: Callable[[], T]) -> T:
+    """
+    Выполняет запись в БД через писатель процесса, если режим SQLite включен.
+
+    Все записи воркеров (отправка, захват и возврат очереди в БД, истечение
+    срока, reaper, объединение дубликатов) идут через эту функцию, поэтому
+    в режиме SQLITE_HIGH_CONCURRENCY в БД пишет только поток писателя.
+
+    Args:
+        write: Функция, выполняющая запросы на запись
+
+    Returns:
+        Результат функции записи
+    """
+    writer = get_sqlite_writer()
+    if writer is None:
+        return write()
+    return writer.submit(write)
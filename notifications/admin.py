@@ -11,6 +11,8 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ["status", "used_channel", "created_at"]
     search_fields = ["id", "request_id", "to_email", "to_phone", "to_telegram_chat_id"]
     readonly_fields = ["id", "created_at", "updated_at"]
+    # Не считаем COUNT(*) по всей таблице на каждой странице
+    show_full_result_count = False
     fieldsets = (
         (
             "Основная информация",
@@ -1,12 +1,36 @@
-from .base import ChannelResult, ChannelSender
+from .base import (
+    ERROR_PERMANENT,
+    ERROR_RATE_LIMITED,
+    ERROR_TRANSIENT,
+    AsyncChannelSender,
+    ChannelResult,
+    ChannelSender,
+    send_async,
+)
 from .email_channel import EmailChannelSender
-from .sms_channel import SmsChannelSender
-from .telegram_channel import TelegramChannelSender
+from .http_transport import AsyncHTTPTransport, HTTPResponse, HTTPTransport
+from .registry import build_channel_senders
+from .sms_channel import HttpSmsChannelSender, SmsChannelSender
+from .smtp import SMTPConnectionPool, SmtpEmailChannelSender
+from .telegram_channel import HttpTelegramChannelSender, TelegramChannelSender
 
 __all__ = [
+    "ERROR_PERMANENT",
+    "ERROR_RATE_LIMITED",
+    "ERROR_TRANSIENT",
+    "AsyncChannelSender",
+    "AsyncHTTPTransport",
     "ChannelSender",
     "ChannelResult",
     "EmailChannelSender",
+    "HTTPResponse",
+    "HTTPTransport",
+    "HttpSmsChannelSender",
+    "HttpTelegramChannelSender",
+    "SMTPConnectionPool",
     "SmsChannelSender",
+    "SmtpEmailChannelSender",
     "TelegramChannelSender",
+    "build_channel_senders",
+    "send_async",
 ]
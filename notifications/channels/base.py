@@ -1,18 +1,43 @@
+import asyncio
+import inspect
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import Protocol, runtime_checkable
 
 from notifications.models import Notification
 
 logger = logging.getLogger(__name__)
 
 
+# Класс ошибки отправки: временная (сбой провайдера, таймаут) стоит повтора,
+# постоянная (нет адреса, адрес отклонен) - нет
+ERROR_TRANSIENT = "transient"
+ERROR_PERMANENT = "permanent"
+# Отправка не выполнялась из-за лимита скорости канала: уведомление откладывается
+# на retry_after секунд без перехода к резервным каналам
+ERROR_RATE_LIMITED = "rate_limited"
+
+
 @dataclass
 class ChannelResult:
-    """Результат попытки отправки через канал."""
+    """
+    Результат попытки отправки через канал.
+
+    Ошибка без error_class считается постоянной: повторяются только отправки,
+    которые адаптер явно пометил как временные.
+    """
 
     success: bool
     error_message: str | None = None
+    error_class: str | None = None
+    # Подсказка провайдера, через сколько секунд повторять (например, Retry-After)
+    retry_after: float | None = None
+
+    @property
+    def is_transient(self) -> bool:
+        """Неуспешная отправка, которую стоит повторить позже."""
+        return not self.success and self.error_class == ERROR_TRANSIENT
 
     def __str__(self) -> str:
         if self.success:
@@ -49,6 +74,22 @@ class ChannelSender(ABC):
         """
         pass
 
+    def send_batch(self, notifications: list[Notification]) -> list[ChannelResult]:
+        """
+        Отправляет пачку уведомлений через канал.
+
+        По умолчанию уведомления отправляются по одному. Адаптеры провайдеров,
+        которые принимают много сообщений за один вызов (или одну сессию),
+        переопределяют метод.
+
+        Args:
+            notifications: Уведомления, для которых канал доступен
+
+        Returns:
+            Результаты в порядке уведомлений
+        """
+        return [self.send(notification) for notification in notifications]
+
     def get_unavailable_reason(self, notification: Notification) -> str:
         """
         Возвращает причину недоступности канала.
@@ -60,3 +101,45 @@ class ChannelSender(ABC):
             Строка с описанием причины недоступности
         """
         return f"Channel {self.__class__.__name__} is not available"
+
+
+@runtime_checkable
+class AsyncChannelSender(Protocol):
+    """
+    Протокол асинхронного адаптера канала.
+
+    Отличается от ChannelSender только тем, что send - корутина. Такие адаптеры
+    можно по-настоящему отменить в режиме hedged, синхронные адаптеры
+    выполняются в пуле потоков и при отмене лишь перестают ожидаться.
+    """
+
+    def is_available(self, notification: Notification) -> bool:
+        """Проверяет, доступен ли канал для данного уведомления."""
+        ...
+
+    def get_unavailable_reason(self, notification: Notification) -> str:
+        """Возвращает причину недоступности канала."""
+        ...
+
+    async def send(self, notification: Notification) -> ChannelResult:
+        """Отправляет уведомление через канал."""
+        ...
+
+
+async def send_async(
+    sender: ChannelSender | AsyncChannelSender,
+    notification: Notification,
+) -> ChannelResult:
+    """
+    Отправляет уведомление через синхронный или асинхронный адаптер.
+
+    Args:
+        sender: Адаптер канала
+        notification: Уведомление для отправки
+
+    Returns:
+        ChannelResult с результатом отправки
+    """
+    if inspect.iscoroutinefunction(sender.send):
+        return await sender.send(notification)
+    return await asyncio.to_thread(sender.send, notification)
@@ -1,7 +1,12 @@
 import logging
 import random
 
-from notifications.channels.base import ChannelResult, ChannelSender
+from notifications.channels.base import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    ChannelResult,
+    ChannelSender,
+)
 from notifications.models import Notification
 
 logger = logging.getLogger(__name__)
@@ -29,7 +34,11 @@ class EmailChannelSender(ChannelSender):
         if not self.is_available(notification):
             reason = self.get_unavailable_reason(notification)
             logger.warning(f"Email channel unavailable: {reason}")
-            return ChannelResult(success=False, error_message=reason)
+            return ChannelResult(
+                success=False,
+                error_message=reason,
+                error_class=ERROR_PERMANENT,
+            )
 
         logger.info(
             f"Attempting to send email to {notification.to_email} "
@@ -41,7 +50,11 @@ class EmailChannelSender(ChannelSender):
         if random.random() < 0.2:
             error_msg = "Email service temporarily unavailable"
             logger.error(f"Email send failed: {error_msg}")
-            return ChannelResult(success=False, error_message=error_msg)
+            return ChannelResult(
+                success=False,
+                error_message=error_msg,
+                error_class=ERROR_TRANSIENT,
+            )
 
         # Успешная отправка
         logger.info(
@@ -0,0 +1,486 @@
+import asyncio
+import http.client
+import json
+import logging
+import os
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils import timezone
+
+from notifications.channels.base import ERROR_PERMANENT, ERROR_TRANSIENT, ChannelResult
+
+logger = logging.getLogger(__name__)
+
+# Ошибки сети и протокола: запрос не дошел или ответ не получен
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException, asyncio.IncompleteReadError)
+
+# Ошибки записи запроса в keep-alive соединение, закрытое сервером по простою.
+# Запрос повторяется в новом соединении, только если от сервера ничего не получено:
+# при ошибке записи или закрытии соединения до строки статуса (RemoteDisconnected).
+# Обрыв после начала ответа не повторяется - провайдер мог уже обработать запрос
+# (у Telegram sendMessage нет ключа идемпотентности); повтор остается политике повторов
+STALE_CONNECTION_ERRORS = (ConnectionResetError, BrokenPipeError)
+
+# Ответы провайдера, после которых отправку стоит повторить
+TRANSIENT_STATUSES = {408, 425, 429}
+
+# Ключ пула соединений: (схема, хост, порт)
+HostKey = tuple[str, str, int]
+
+
+@dataclass
+class HTTPResponse:
+    """Ответ HTTP API провайдера, прочитанный целиком."""
+
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self):
+        """Разбирает тело как JSON; невалидное тело - None."""
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def retry_after(self) -> float | None:
+        """Значение заголовка Retry-After в секундах (число или HTTP-дата)."""
+        value = self.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - timezone.now()).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def provider_result(response: HTTPResponse, retry_after: float | None = None) -> ChannelResult:
+    """
+    Переводит ответ провайдера в результат отправки.
+
+    2xx - успех; 408, 425, 429 и 5xx - временная ошибка; остальные 4xx -
+    постоянная (неверный адрес, заблокированный бот, ошибка авторизации).
+
+    Args:
+        response: Ответ провайдера
+        retry_after: Подсказка повтора из тела ответа (по умолчанию Retry-After)
+
+    Returns:
+        ChannelResult с результатом отправки
+    """
+    if response.ok:
+        return ChannelResult(success=True)
+
+    transient = response.status in TRANSIENT_STATUSES or response.status >= 500
+    body = response.body[:200].decode(errors="replace")
+    return ChannelResult(
+        success=False,
+        error_message=f"HTTP {response.status}: {body}",
+        error_class=ERROR_TRANSIENT if transient else ERROR_PERMANENT,
+        retry_after=retry_after if retry_after is not None else response.retry_after(),
+    )
+
+
+def transport_error_result(error: Exception) -> ChannelResult:
+    """Результат отправки при сетевой ошибке: запрос стоит повторить."""
+    return ChannelResult(
+        success=False,
+        error_message=f"Provider request failed: {error!r}",
+        error_class=ERROR_TRANSIENT,
+    )
+
+
+def _prepare(
+    url: str,
+    payload: object | None,
+    headers: dict[str, str] | None,
+) -> tuple[HostKey, str, bytes | None, dict[str, str]]:
+    """Разбирает URL и готовит тело и заголовки запроса."""
+    parts = urlsplit(url)
+    scheme = parts.scheme or "http"
+    port = parts.port or (443 if scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    request_headers = {"Accept": "application/json"}
+    body = None
+    if payload is not None:
+        body = json.dumps(payload).encode()
+        request_headers["Content-Type"] = "application/json"
+    request_headers.update(headers or {})
+    return (scheme, parts.hostname or "localhost", port), path, body, request_headers
+
+
+class _IdleConnections:
+    """Простаивающие соединения одного хоста (LIFO) и лимит открытых."""
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.connections: list = []
+
+    def pop_fresh(self, idle_timeout: float, close) -> object | None:
+        """Возвращает самое свежее соединение; простоявшие дольше idle_timeout закрывает."""
+        while self.connections:
+            connection, last_used = self.connections.pop()
+            if time.monotonic() - last_used < idle_timeout:
+                return connection
+            close(connection)
+        return None
+
+
+class HTTPTransport:
+    """
+    Пул keep-alive HTTP-соединений процесса для адаптеров провайдеров.
+
+    Установка соединения (TCP, TLS) к API провайдера стоит одного-двух сетевых
+    обменов, поэтому соединения не закрываются после ответа и переиспользуются.
+    К одному хосту одновременно открыто не больше max_connections_per_host
+    соединений; поток, которому не хватило соединения, ждет. Соединение,
+    простоявшее дольше idle_timeout, закрывается: серверы сами закрывают
+    keep-alive по простою, и запрос в такое соединение теряет время на ошибку.
+    Если переиспользованное соединение оказалось закрыто сервером, запрос один
+    раз повторяется в новом.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        idle_timeout: float = 30.0,
+    ):
+        """
+        Инициализирует транспорт.
+
+        Args:
+            max_connections_per_host: Максимум одновременно открытых соединений к хосту
+            connect_timeout: Таймаут установки соединения в секундах
+            read_timeout: Таймаут ожидания ответа в секундах
+            idle_timeout: Простой в секундах, после которого соединение закрывается
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.connections_opened = 0
+        self._hosts: dict[HostKey, _IdleConnections] = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        json: object | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> HTTPResponse:
+        """
+        Выполняет запрос через соединение из пула.
+
+        Args:
+            method: HTTP-метод
+            url: Полный URL
+            json: Тело запроса (сериализуется в JSON)
+            headers: Дополнительные заголовки
+
+        Returns:
+            Ответ провайдера
+
+        Raises:
+            OSError, http.client.HTTPException: Сетевая ошибка или таймаут
+        """
+        key, path, body, request_headers = _prepare(url, json, headers)
+        host = self._host(key)
+        with host.slots:
+            while True:
+                with self._lock:
+                    connection = host.pop_fresh(self.idle_timeout, self._close)
+                reused = connection is not None
+                if connection is None:
+                    connection = self._connect(key)
+                try:
+                    try:
+                        connection.request(method, path, body=body, headers=request_headers)
+                    except STALE_CONNECTION_ERRORS as e:
+                        if not reused:
+                            raise
+                        self._stale(connection, key, e)
+                        continue
+                    try:
+                        raw = connection.getresponse()
+                    except http.client.RemoteDisconnected as e:
+                        if not reused:
+                            raise
+                        self._stale(connection, key, e)
+                        continue
+                    response = HTTPResponse(
+                        status=raw.status,
+                        headers={name.lower(): value for name, value in raw.getheaders()},
+                        body=raw.read(),
+                    )
+                except BaseException:
+                    self._close(connection)
+                    raise
+
+                if raw.will_close:
+                    self._close(connection)
+                else:
+                    with self._lock:
+                        host.connections.append((connection, time.monotonic()))
+                return response
+
+    def close(self) -> None:
+        """Закрывает простаивающие соединения."""
+        with self._lock:
+            hosts = list(self._hosts.values())
+            idle = [connection for host in hosts for connection, _ in host.connections]
+            for host in hosts:
+                host.connections = []
+        for connection in idle:
+            self._close(connection)
+
+    def _host(self, key: HostKey) -> _IdleConnections:
+        with self._lock:
+            if key not in self._hosts:
+                self._hosts[key] = _IdleConnections(
+                    threading.BoundedSemaphore(self.max_connections_per_host),
+                )
+            return self._hosts[key]
+
+    def _connect(self, key: HostKey) -> http.client.HTTPConnection:
+        scheme, hostname, port = key
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(
+                hostname,
+                port,
+                timeout=self.connect_timeout,
+                context=ssl.create_default_context(),
+            )
+        else:
+            connection = http.client.HTTPConnection(hostname, port, timeout=self.connect_timeout)
+        connection.connect()
+        # Таймаут установки соединения короче: недоступный хост выясняется быстро,
+        # а медленный ответ провайдера ждется дольше
+        connection.sock.settimeout(self.read_timeout)
+        self.connections_opened += 1
+        logger.debug(f"Opened HTTP connection to {hostname}:{port}")
+        return connection
+
+    def _stale(
+        self,
+        connection: http.client.HTTPConnection,
+        key: HostKey,
+        error: Exception,
+    ) -> None:
+        """Закрывает keep-alive соединение, закрытое сервером до ответа."""
+        self._close(connection)
+        logger.debug(f"Keep-alive connection to {key[1]} was closed: {error!r}")
+
+    @staticmethod
+    def _close(connection: http.client.HTTPConnection) -> None:
+        connection.close()
+
+
+class AsyncHTTPTransport:
+    """
+    Асинхронный клиент с keep-alive поверх asyncio streams (HTTP/1.1).
+
+    Соединения привязаны к циклу событий, поэтому клиент создается и
+    используется внутри одного цикла; пул, лимит соединений на хост, таймауты
+    и повтор на закрытом сервером соединении - как у HTTPTransport.
+    Поддерживаются ответы с Content-Length и chunked.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 10,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        idle_timeout: float = 30.0,
+    ):
+        """Инициализирует клиент; параметры как у HTTPTransport."""
+        self.max_connections_per_host = max_connections_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self.connections_opened = 0
+        self._hosts: dict[HostKey, _IdleConnections] = {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        json: object | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> HTTPResponse:
+        """
+        Выполняет запрос через соединение из пула.
+
+        Raises:
+            OSError, asyncio.IncompleteReadError: Сетевая ошибка или таймаут
+        """
+        key, path, body, request_headers = _prepare(url, json, headers)
+        request_headers.setdefault("Host", key[1])
+        request_headers["Content-Length"] = str(len(body or b""))
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in request_headers.items()
+        )
+        data = head.encode("latin-1") + b"\r\n" + (body or b"")
+
+        host = self._host(key)
+        async with host.slots:
+            while True:
+                connection = host.pop_fresh(self.idle_timeout, self._close)
+                reused = connection is not None
+                if connection is None:
+                    connection = await self._connect(key)
+                reader, writer = connection
+                try:
+                    try:
+                        writer.write(data)
+                        await writer.drain()
+                    except STALE_CONNECTION_ERRORS as e:
+                        if not reused:
+                            raise
+                        self._stale(connection, key, e)
+                        continue
+                    try:
+                        response, keep_alive = await asyncio.wait_for(
+                            self._read_response(reader),
+                            self.read_timeout,
+                        )
+                    except http.client.RemoteDisconnected as e:
+                        if not reused:
+                            raise
+                        self._stale(connection, key, e)
+                        continue
+                except BaseException:
+                    self._close(connection)
+                    raise
+
+                if keep_alive:
+                    host.connections.append((connection, time.monotonic()))
+                else:
+                    self._close(connection)
+                return response
+
+    async def aclose(self) -> None:
+        """Закрывает простаивающие соединения."""
+        for host in self._hosts.values():
+            idle, host.connections = host.connections, []
+            for connection, _ in idle:
+                self._close(connection)
+
+    async def __aenter__(self) -> "AsyncHTTPTransport":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _host(self, key: HostKey) -> _IdleConnections:
+        if key not in self._hosts:
+            self._hosts[key] = _IdleConnections(asyncio.Semaphore(self.max_connections_per_host))
+        return self._hosts[key]
+
+    def _stale(self, connection, key: HostKey, error: Exception) -> None:
+        """Закрывает keep-alive соединение, закрытое сервером до ответа."""
+        self._close(connection)
+        logger.debug(f"Keep-alive connection to {key[1]} was closed: {error!r}")
+
+    async def _connect(self, key: HostKey):
+        scheme, hostname, port = key
+        connection = await asyncio.wait_for(
+            asyncio.open_connection(
+                hostname,
+                port,
+                ssl=ssl.create_default_context() if scheme == "https" else None,
+            ),
+            self.connect_timeout,
+        )
+        self.connections_opened += 1
+        logger.debug(f"Opened HTTP connection to {hostname}:{port}")
+        return connection
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> tuple[HTTPResponse, bool]:
+        status_line = await reader.readline()
+        if not status_line:
+            # Как в http.client: сервер закрыл соединение, ничего не ответив
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+        version, status, _ = status_line.decode("latin-1").split(" ", 2)
+
+        headers: dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+            keep_alive = True
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+            keep_alive = True
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        connection_header = headers.get("connection", "").lower()
+        if connection_header == "close":
+            keep_alive = False
+        elif version == "HTTP/1.0" and connection_header != "keep-alive":
+            keep_alive = False
+        return HTTPResponse(status=int(status), headers=headers, body=body), keep_alive
+
+    @staticmethod
+    def _close(connection) -> None:
+        connection[1].close()
+
+
+_transport: HTTPTransport | None = None
+_transport_pid: int | None = None
+_transport_lock = threading.Lock()
+
+
+def get_http_transport() -> HTTPTransport:
+    """
+    Возвращает HTTP-транспорт текущего процесса.
+
+    Транспорт пересоздается в дочернем процессе после fork (prefork-воркеры
+    Celery): сокеты родителя в дочернем процессе не используются.
+    """
+    global _transport, _transport_pid
+    with _transport_lock:
+        if _transport is None or _transport_pid != os.getpid():
+            _transport = HTTPTransport(
+                max_connections_per_host=settings.NOTIFICATION_HTTP_MAX_CONNECTIONS_PER_HOST,
+                connect_timeout=settings.NOTIFICATION_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.NOTIFICATION_HTTP_READ_TIMEOUT,
+                idle_timeout=settings.NOTIFICATION_HTTP_IDLE_TIMEOUT,
+            )
+            _transport_pid = os.getpid()
+        return _transport
@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from notifications.channels.base import ChannelSender
+from notifications.channels.email_channel import EmailChannelSender
+from notifications.channels.sms_channel import HttpSmsChannelSender, SmsChannelSender
+from notifications.channels.smtp import SmtpEmailChannelSender
+from notifications.channels.telegram_channel import HttpTelegramChannelSender, TelegramChannelSender
+
+SENDER_STUB = "stub"
+SENDER_SMTP = "smtp"
+SENDER_HTTP = "http"
+
+
+def build_channel_senders() -> dict[str, ChannelSender]:
+    """
+    Создает адаптеры каналов согласно настройкам.
+
+    Returns:
+        Словарь канал → адаптер
+    """
+    email_sender: ChannelSender = EmailChannelSender()
+    if settings.NOTIFICATION_EMAIL_SENDER == SENDER_SMTP:
+        email_sender = SmtpEmailChannelSender()
+
+    sms_sender: ChannelSender = SmsChannelSender()
+    if settings.NOTIFICATION_SMS_SENDER == SENDER_HTTP:
+        sms_sender = HttpSmsChannelSender()
+
+    telegram_sender: ChannelSender = TelegramChannelSender()
+    if settings.NOTIFICATION_TELEGRAM_SENDER == SENDER_HTTP:
+        telegram_sender = HttpTelegramChannelSender()
+
+    return {
+        "email": email_sender,
+        "sms": sms_sender,
+        "telegram": telegram_sender,
+    }
@@ -1,7 +1,22 @@
 import logging
 import random
 
-from notifications.channels.base import ChannelResult, ChannelSender
+from django.conf import settings
+
+from notifications.channels.base import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    ChannelResult,
+    ChannelSender,
+)
+from notifications.channels.http_transport import (
+    TRANSPORT_ERRORS,
+    HTTPResponse,
+    HTTPTransport,
+    get_http_transport,
+    provider_result,
+    transport_error_result,
+)
 from notifications.models import Notification
 
 logger = logging.getLogger(__name__)
@@ -29,7 +44,11 @@ class SmsChannelSender(ChannelSender):
         if not self.is_available(notification):
             reason = self.get_unavailable_reason(notification)
             logger.warning(f"SMS channel unavailable: {reason}")
-            return ChannelResult(success=False, error_message=reason)
+            return ChannelResult(
+                success=False,
+                error_message=reason,
+                error_class=ERROR_PERMANENT,
+            )
 
         logger.info(
             f"Attempting to send SMS to {notification.to_phone} "
@@ -41,7 +60,11 @@ class SmsChannelSender(ChannelSender):
         if random.random() < 0.25:
             error_msg = "SMS provider API error"
             logger.error(f"SMS send failed: {error_msg}")
-            return ChannelResult(success=False, error_message=error_msg)
+            return ChannelResult(
+                success=False,
+                error_message=error_msg,
+                error_class=ERROR_TRANSIENT,
+            )
 
         # Успешная отправка
         logger.info(
@@ -49,3 +72,169 @@ class SmsChannelSender(ChannelSender):
             f"for notification {notification.id}",
         )
         return ChannelResult(success=True)
+
+
+class HttpSmsChannelSender(SmsChannelSender):
+    """
+    Канал SMS через HTTP API провайдера.
+
+    Запрос: POST {base_url}/messages с JSON {"to", "text"} и ключом API в
+    Authorization. ID уведомления передается в Idempotency-Key, чтобы повтор
+    после обрыва соединения не отправил SMS дважды.
+
+    Если batch_size больше нуля, send_batch отправляет сообщения пачками через
+    POST {base_url}/messages/batch (см. send_batch).
+    """
+
+    def __init__(
+        self,
+        transport: HTTPTransport | None = None,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        batch_size: int | None = None,
+    ):
+        """
+        Инициализирует адаптер.
+
+        Args:
+            transport: HTTP-транспорт (по умолчанию пул процесса)
+            base_url: Базовый URL API (по умолчанию SMS_API_BASE_URL)
+            api_key: Ключ API (по умолчанию SMS_API_KEY)
+            batch_size: Сообщений в одном запросе к batch API, 0 - без batch API
+                (по умолчанию SMS_API_BATCH_SIZE)
+        """
+        self.transport = transport or get_http_transport()
+        self.base_url = (base_url or settings.SMS_API_BASE_URL).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.SMS_API_KEY
+        self.batch_size = batch_size if batch_size is not None else settings.SMS_API_BATCH_SIZE
+
+    def send(self, notification: Notification) -> ChannelResult:
+        """Отправляет SMS через API провайдера."""
+        if not self.is_available(notification):
+            return ChannelResult(
+                success=False,
+                error_message=self.get_unavailable_reason(notification),
+                error_class=ERROR_PERMANENT,
+            )
+
+        try:
+            response = self.transport.request(
+                "POST",
+                f"{self.base_url}/messages",
+                json={"to": notification.to_phone, "text": notification.body},
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Idempotency-Key": str(notification.id),
+                },
+            )
+        except TRANSPORT_ERRORS as e:
+            logger.warning(f"SMS provider request failed: {e!r}")
+            return transport_error_result(e)
+
+        result = provider_result(response)
+        if result.success:
+            logger.info(
+                f"SMS sent successfully to {notification.to_phone} "
+                f"for notification {notification.id}",
+            )
+        else:
+            logger.warning(f"SMS send failed: {result.error_message}")
+        return result
+
+    def send_batch(self, notifications: list[Notification]) -> list[ChannelResult]:
+        """
+        Отправляет пачку SMS через batch API провайдера.
+
+        Тело запроса - {"messages": [{"id", "to", "text"}, ...]} не больше
+        batch_size сообщений; id - ключ идемпотентности сообщения. Ответ -
+        {"results": [{"status", "error"}, ...]} в том же порядке, status каждого
+        сообщения разбирается как HTTP-статус. Ошибка всего запроса относится
+        ко всем сообщениям пачки.
+
+        Args:
+            notifications: Уведомления для отправки
+
+        Returns:
+            Результаты в порядке уведомлений
+        """
+        if not self.batch_size:
+            return super().send_batch(notifications)
+
+        results: list[ChannelResult | None] = [None] * len(notifications)
+        ready = []
+        for index, notification in enumerate(notifications):
+            if self.is_available(notification):
+                ready.append((index, notification))
+            else:
+                results[index] = ChannelResult(
+                    success=False,
+                    error_message=self.get_unavailable_reason(notification),
+                    error_class=ERROR_PERMANENT,
+                )
+
+        for offset in range(0, len(ready), self.batch_size):
+            chunk = ready[offset : offset + self.batch_size]
+            chunk_results = self._send_chunk([notification for _, notification in chunk])
+            for (index, _), result in zip(chunk, chunk_results, strict=True):
+                results[index] = result
+        return results  # type: ignore[return-value]
+
+    def _send_chunk(self, notifications: list[Notification]) -> list[ChannelResult]:
+        """Отправляет одну пачку одним запросом к batch API."""
+        try:
+            response = self.transport.request(
+                "POST",
+                f"{self.base_url}/messages/batch",
+                json={
+                    "messages": [
+                        {
+                            "id": str(notification.id),
+                            "to": notification.to_phone,
+                            "text": notification.body,
+                        }
+                        for notification in notifications
+                    ],
+                },
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        except TRANSPORT_ERRORS as e:
+            logger.warning(f"SMS provider batch request failed: {e!r}")
+            return [transport_error_result(e)] * len(notifications)
+
+        if not response.ok:
+            logger.warning(f"SMS batch of {len(notifications)} failed: HTTP {response.status}")
+            return [provider_result(response)] * len(notifications)
+
+        payload = response.json()
+        items = payload.get("results") if isinstance(payload, dict) else None
+        if not isinstance(items, list) or len(items) != len(notifications):
+            logger.error(f"Malformed SMS batch response: {response.body[:200]!r}")
+            # Сообщения могли уйти: повтор безопасен благодаря id сообщений
+            result = ChannelResult(
+                success=False,
+                error_message="Malformed batch response",
+                error_class=ERROR_TRANSIENT,
+            )
+            return [result] * len(notifications)
+
+        results = [self._item_result(item) for item in items]
+        delivered = sum(result.success for result in results)
+        logger.info(f"SMS batch sent: {delivered} of {len(notifications)} accepted")
+        return results
+
+    @staticmethod
+    def _item_result(item) -> ChannelResult:
+        """Переводит результат одного сообщения из ответа batch API."""
+        try:
+            status = int(item.get("status", 500))
+        except (AttributeError, TypeError, ValueError):
+            logger.error(f"Malformed SMS batch item: {item!r:.200}")
+            # Как и для ответа целиком: сообщение могло уйти, повтор безопасен
+            return ChannelResult(
+                success=False,
+                error_message="Malformed batch response item",
+                error_class=ERROR_TRANSIENT,
+            )
+        return provider_result(
+            HTTPResponse(status=status, body=str(item.get("error", "")).encode()),
+        )
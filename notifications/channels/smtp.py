@@ -0,0 +1,311 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from email.message import EmailMessage
+
+from django.conf import settings
+
+from notifications.channels.base import ERROR_PERMANENT, ERROR_TRANSIENT, ChannelResult
+from notifications.channels.email_channel import EmailChannelSender
+from notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых SMTP-сессию нельзя использовать дальше
+SESSION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class PooledSMTPConnection:
+    """SMTP-сессия из пула со счетчиком отправленных писем."""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def send_message(self, message: EmailMessage) -> None:
+        """Отправляет письмо в текущей сессии."""
+        self.smtp.send_message(message)
+        self.messages_sent += 1
+
+    def is_alive(self) -> bool:
+        """Проверяет сессию командой NOOP."""
+        try:
+            return self.smtp.noop()[0] == 250
+        except SESSION_ERRORS:
+            return False
+
+    def close(self) -> None:
+        """Завершает сессию, не дожидаясь ответа на QUIT от мертвого сервера."""
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """
+    Пул постоянных SMTP-соединений процесса.
+
+    Установка сессии (TCP, TLS, EHLO, AUTH) стоит нескольких сетевых обменов,
+    поэтому соединения переиспользуются между письмами. Одновременно открыто
+    не больше max_connections сессий; поток, которому не хватило сессии, ждет.
+    Соединение, простоявшее дольше health_check_interval, перед выдачей
+    проверяется NOOP и при ошибке пересоздается. После
+    max_messages_per_connection писем сессия закрывается: многие серверы
+    ограничивают число писем на соединение.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        use_tls: bool = False,
+        use_ssl: bool = False,
+        timeout: float = 10.0,
+        max_connections: int = 4,
+        max_messages_per_connection: int = 100,
+        health_check_interval: float = 30.0,
+    ):
+        """
+        Инициализирует пул.
+
+        Args:
+            host: Хост SMTP-сервера
+            port: Порт SMTP-сервера
+            username: Логин (пустой - без AUTH)
+            password: Пароль
+            use_tls: Включать STARTTLS после EHLO
+            use_ssl: Подключаться по SMTPS (TLS с первого байта)
+            timeout: Таймаут сетевых операций в секундах
+            max_connections: Максимум одновременно открытых сессий
+            max_messages_per_connection: Писем на сессию до переподключения
+            health_check_interval: Простой в секундах, после которого сессия
+                проверяется перед использованием
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.health_check_interval = health_check_interval
+        self._idle: list[PooledSMTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledSMTPConnection]:
+        """
+        Выдает SMTP-сессию на время блока.
+
+        Если в блоке произошла ошибка сессии, соединение закрывается и в пул
+        не возвращается.
+        """
+        with self._slots:
+            connection = self._checkout()
+            try:
+                yield connection
+            except SESSION_ERRORS:
+                connection.close()
+                raise
+            except BaseException:
+                self._checkin(connection)
+                raise
+            self._checkin(connection)
+
+    def is_exhausted(self, connection: PooledSMTPConnection) -> bool:
+        """Проверяет, исчерпан ли лимит писем сессии."""
+        return connection.messages_sent >= self.max_messages_per_connection
+
+    def close(self) -> None:
+        """Закрывает простаивающие соединения."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _checkout(self) -> PooledSMTPConnection:
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for < self.health_check_interval or connection.is_alive():
+                return connection
+            logger.info("Idle SMTP connection is dead, reconnecting")
+            connection.close()
+
+    def _checkin(self, connection: PooledSMTPConnection) -> None:
+        if self.is_exhausted(connection):
+            connection.close()
+            return
+        connection.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+
+    def _connect(self) -> PooledSMTPConnection:
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        logger.debug(f"Opened SMTP connection to {self.host}:{self.port}")
+        return PooledSMTPConnection(smtp)
+
+
+_pool: SMTPConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """
+    Возвращает пул SMTP-соединений текущего процесса.
+
+    Пул пересоздается в дочернем процессе после fork (prefork-воркеры Celery):
+    сокеты родителя в дочернем процессе не используются.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = SMTPConnectionPool(
+                host=settings.EMAIL_HOST,
+                port=settings.EMAIL_PORT,
+                username=settings.EMAIL_HOST_USER,
+                password=settings.EMAIL_HOST_PASSWORD,
+                use_tls=settings.EMAIL_USE_TLS,
+                use_ssl=settings.EMAIL_USE_SSL,
+                timeout=settings.EMAIL_TIMEOUT,
+                max_connections=settings.NOTIFICATION_SMTP_POOL_SIZE,
+                max_messages_per_connection=settings.NOTIFICATION_SMTP_MAX_MESSAGES_PER_CONNECTION,
+                health_check_interval=settings.NOTIFICATION_SMTP_HEALTH_CHECK_INTERVAL,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+class SmtpEmailChannelSender(EmailChannelSender):
+    """
+    Канал Email через SMTP с пулом постоянных соединений.
+
+    Ответы 5xx и отказ в адресате - постоянные ошибки, 4xx и обрыв сессии -
+    временные. Если сессия оборвалась (сервер перезапущен, соединение закрыто
+    по простою), оставшиеся письма один раз отправляются в новой сессии.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool | None = None, from_email: str | None = None):
+        """
+        Инициализирует адаптер.
+
+        Args:
+            pool: Пул SMTP-соединений (по умолчанию пул процесса)
+            from_email: Адрес отправителя (по умолчанию DEFAULT_FROM_EMAIL)
+        """
+        self.pool = pool or get_smtp_pool()
+        self.from_email = from_email or settings.DEFAULT_FROM_EMAIL
+
+    def send(self, notification: Notification) -> ChannelResult:
+        """Отправляет email через сессию из пула."""
+        return self.send_batch([notification])[0]
+
+    def send_batch(self, notifications: list[Notification]) -> list[ChannelResult]:
+        """
+        Отправляет пачку писем в одной SMTP-сессии.
+
+        Args:
+            notifications: Уведомления для отправки
+
+        Returns:
+            Результаты в порядке уведомлений
+        """
+        results: list[ChannelResult | None] = [None] * len(notifications)
+        remaining = []
+        for index, notification in enumerate(notifications):
+            if self.is_available(notification):
+                remaining.append((index, notification))
+            else:
+                results[index] = ChannelResult(
+                    success=False,
+                    error_message=self.get_unavailable_reason(notification),
+                    error_class=ERROR_PERMANENT,
+                )
+
+        error: Exception | None = None
+        session_retries = 1
+        while remaining:
+            try:
+                # Сессия меняется, когда исчерпан лимит писем на соединение
+                with self.pool.connection() as connection:
+                    while remaining and not self.pool.is_exhausted(connection):
+                        index, notification = remaining[0]
+                        results[index] = self._send_message(connection, notification)
+                        remaining.pop(0)
+            except SESSION_ERRORS as e:
+                error = e
+                if not session_retries:
+                    break
+                logger.warning(f"SMTP session failed: {e}, retrying on a new connection")
+                session_retries -= 1
+
+        for index, _ in remaining:
+            results[index] = ChannelResult(
+                success=False,
+                error_message=f"SMTP connection failed: {error}",
+                error_class=ERROR_TRANSIENT,
+            )
+        return results  # type: ignore[return-value]
+
+    def _send_message(
+        self,
+        connection: PooledSMTPConnection,
+        notification: Notification,
+    ) -> ChannelResult:
+        """Отправляет одно письмо; ошибки сессии пробрасываются выше."""
+        try:
+            connection.send_message(self._build_message(notification))
+        except smtplib.SMTPRecipientsRefused as e:
+            logger.warning(f"Email to {notification.to_email} refused: {e.recipients}")
+            return ChannelResult(
+                success=False,
+                error_message=f"Recipient refused: {notification.to_email}",
+                error_class=ERROR_PERMANENT,
+            )
+        except smtplib.SMTPResponseException as e:
+            logger.warning(f"Email to {notification.to_email} failed: {e.smtp_code} {e.smtp_error}")
+            return ChannelResult(
+                success=False,
+                error_message=f"SMTP {e.smtp_code}: {e.smtp_error!r}",
+                error_class=ERROR_PERMANENT if e.smtp_code >= 500 else ERROR_TRANSIENT,
+            )
+
+        logger.info(
+            f"Email sent successfully to {notification.to_email} "
+            f"for notification {notification.id}",
+        )
+        return ChannelResult(success=True)
+
+    def _build_message(self, notification: Notification) -> EmailMessage:
+        """Формирует письмо; Message-ID из UUID позволяет получателю отсечь дубли."""
+        message = EmailMessage()
+        message["From"] = self.from_email
+        message["To"] = notification.to_email
+        message["Subject"] = notification.subject or ""
+        domain = self.from_email.rpartition("@")[2] or "localhost"
+        message["Message-ID"] = f"<{notification.id}@{domain}>"
+        message.set_content(notification.body)
+        return message
@@ -1,7 +1,21 @@
 import logging
 import random
 
-from notifications.channels.base import ChannelResult, ChannelSender
+from django.conf import settings
+
+from notifications.channels.base import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    ChannelResult,
+    ChannelSender,
+)
+from notifications.channels.http_transport import (
+    TRANSPORT_ERRORS,
+    HTTPTransport,
+    get_http_transport,
+    provider_result,
+    transport_error_result,
+)
 from notifications.models import Notification
 
 logger = logging.getLogger(__name__)
@@ -29,7 +43,11 @@ class TelegramChannelSender(ChannelSender):
         if not self.is_available(notification):
             reason = self.get_unavailable_reason(notification)
             logger.warning(f"Telegram channel unavailable: {reason}")
-            return ChannelResult(success=False, error_message=reason)
+            return ChannelResult(
+                success=False,
+                error_message=reason,
+                error_class=ERROR_PERMANENT,
+            )
 
         logger.info(
             f"Attempting to send Telegram message to {notification.to_telegram_chat_id} "
@@ -41,7 +59,12 @@ class TelegramChannelSender(ChannelSender):
         if random.random() < 0.3:
             error_msg = "Telegram Bot API timeout"
             logger.error(f"Telegram send failed: {error_msg}")
-            return ChannelResult(success=False, error_message=error_msg)
+            return ChannelResult(
+                success=False,
+                error_message=error_msg,
+                error_class=ERROR_TRANSIENT,
+                retry_after=30,
+            )
 
         # Успешная отправка
         logger.info(
@@ -49,3 +72,65 @@ class TelegramChannelSender(ChannelSender):
             f"for notification {notification.id}",
         )
         return ChannelResult(success=True)
+
+
+class HttpTelegramChannelSender(TelegramChannelSender):
+    """
+    Канал Telegram через Bot API (sendMessage).
+
+    Ошибка 429 несет в parameters.retry_after время, через которое Bot API
+    примет следующий запрос; оно передается в retry_after результата.
+    """
+
+    def __init__(
+        self,
+        transport: HTTPTransport | None = None,
+        base_url: str | None = None,
+        bot_token: str | None = None,
+    ):
+        """
+        Инициализирует адаптер.
+
+        Args:
+            transport: HTTP-транспорт (по умолчанию пул процесса)
+            base_url: Базовый URL Bot API (по умолчанию TELEGRAM_API_BASE_URL)
+            bot_token: Токен бота (по умолчанию TELEGRAM_BOT_TOKEN)
+        """
+        self.transport = transport or get_http_transport()
+        self.base_url = (base_url or settings.TELEGRAM_API_BASE_URL).rstrip("/")
+        self.bot_token = bot_token if bot_token is not None else settings.TELEGRAM_BOT_TOKEN
+
+    def send(self, notification: Notification) -> ChannelResult:
+        """Отправляет сообщение через Bot API."""
+        if not self.is_available(notification):
+            return ChannelResult(
+                success=False,
+                error_message=self.get_unavailable_reason(notification),
+                error_class=ERROR_PERMANENT,
+            )
+
+        try:
+            response = self.transport.request(
+                "POST",
+                f"{self.base_url}/bot{self.bot_token}/sendMessage",
+                json={"chat_id": notification.to_telegram_chat_id, "text": notification.body},
+            )
+        except TRANSPORT_ERRORS as e:
+            logger.warning(f"Telegram Bot API request failed: {e!r}")
+            return transport_error_result(e)
+
+        payload = response.json()
+        parameters = payload.get("parameters") if isinstance(payload, dict) else None
+        retry_after = parameters.get("retry_after") if isinstance(parameters, dict) else None
+        if isinstance(retry_after, bool) or not isinstance(retry_after, int | float):
+            # Некорректная подсказка игнорируется: остается заголовок Retry-After
+            retry_after = None
+        result = provider_result(response, retry_after=retry_after)
+        if result.success:
+            logger.info(
+                f"Telegram message sent successfully to {notification.to_telegram_chat_id} "
+                f"for notification {notification.id}",
+            )
+        else:
+            logger.warning(f"Telegram send failed: {result.error_message}")
+        return result
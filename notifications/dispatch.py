@@ -0,0 +1,494 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notification_service.sqlite import submit_write
+from notifications.models import DeliveryAttempt, Notification, OutboxMessage
+from notifications.services.status_cache import get_status_cache
+from notifications.tasks import send_notification_task, send_notifications_batch_task
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_DIRECT = "direct"
+DISPATCH_OUTBOX = "outbox"
+DISPATCH_DATABASE = "database"
+
+
+class NotificationBatchAccumulator:
+    """
+    Накопитель UUID уведомлений на стороне продюсера.
+
+    Собирает UUID в пачку и публикует ее одной задачей, когда пачка достигает
+    max_size элементов или с момента добавления первого элемента проходит
+    max_age секунд (сброс по таймеру в фоновом потоке). Если публикация не
+    удалась, пачка возвращается в накопитель и публикуется повторно по таймеру.
+    При завершении процесса накопители сбрасываются (см. flush_batch_accumulators).
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        max_age: float,
+        publish: Callable[[list[str]], object],
+    ):
+        """
+        Инициализирует накопитель.
+
+        Args:
+            max_size: Максимальный размер пачки
+            max_age: Максимальное время ожидания пачки в секундах
+            publish: Функция публикации пачки UUID
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        self._publish = publish
+        self._lock = threading.Lock()
+        self._pending: list[str] = []
+        self._timer: threading.Timer | None = None
+
+    def add(self, notification_id: str) -> None:
+        """Добавляет UUID уведомления в текущую пачку."""
+        batch = None
+        with self._lock:
+            self._pending.append(str(notification_id))
+            if len(self._pending) >= self.max_size:
+                batch = self._drain()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_age, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if batch:
+            self._publish_batch(batch)
+
+    def flush(self) -> None:
+        """Публикует накопленную пачку, не дожидаясь заполнения."""
+        with self._lock:
+            batch = self._drain()
+
+        if batch:
+            self._publish_batch(batch)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _drain(self) -> list[str]:
+        """Забирает накопленные UUID. Вызывается под блокировкой."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _publish_batch(self, batch: list[str]) -> None:
+        """Публикует пачку, при ошибке возвращая UUID в накопитель."""
+        try:
+            self._publish(batch)
+        except Exception as e:
+            # Уведомления в pending без аренды reaper не найдет, поэтому пачка
+            # не теряется, а ждет следующего сброса
+            logger.error(f"Failed to publish batch of {len(batch)} notifications: {e}")
+            with self._lock:
+                self._pending = batch + self._pending
+                if self._timer is None:
+                    self._timer = threading.Timer(self.max_age, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+
+_accumulators: dict[str | None, NotificationBatchAccumulator] = {}
+_accumulator_lock = threading.Lock()
+
+
+def get_batch_accumulator(queue: str | None = None) -> NotificationBatchAccumulator:
+    """
+    Возвращает накопитель пачек текущего процесса для очереди queue.
+
+    У каждой очереди свой накопитель, поэтому пачка не смешивает уведомления
+    разных приоритетов.
+    """
+    with _accumulator_lock:
+        if not _accumulators:
+            atexit.register(flush_batch_accumulators)
+        if queue not in _accumulators:
+            _accumulators[queue] = NotificationBatchAccumulator(
+                max_size=settings.NOTIFICATION_BATCH_MAX_SIZE,
+                max_age=settings.NOTIFICATION_BATCH_MAX_AGE,
+                publish=lambda batch: send_notifications_batch_task.apply_async(
+                    (batch,),
+                    queue=queue,
+                ),
+            )
+        return _accumulators[queue]
+
+
+def flush_batch_accumulators() -> None:
+    """
+    Публикует пачки всех накопителей процесса.
+
+    Вызывается при завершении процесса (atexit): таймер сброса работает в
+    daemon-потоке и не успел бы опубликовать последнюю пачку. UUID, которые
+    не удалось опубликовать и при завершении, пишутся в лог.
+    """
+    with _accumulator_lock:
+        accumulators = list(_accumulators.values())
+    for accumulator in accumulators:
+        accumulator.flush()
+        if len(accumulator):
+            logger.error(
+                f"Notifications left unpublished on shutdown: {', '.join(accumulator._pending)}",
+            )
+
+
+def notification_queue(
+    priority: str | None = None,
+    channels: list[str] | None = None,
+) -> str | None:
+    """
+    Возвращает очередь Celery для задачи отправки уведомления.
+
+    При NOTIFICATION_PRIORITY_QUEUES задачи раскладываются по очередям
+    приоритетов (notifications.critical, notifications.normal, notifications.bulk),
+    и пакетная рассылка не задерживает срочные уведомления. При
+    NOTIFICATION_CHANNEL_QUEUES очередь дополнительно делится по основному
+    (первому) каналу уведомления, например notifications.normal.telegram:
+    медленный пул одного канала не занимает воркеры остальных. Уведомления без
+    явного списка каналов остаются в очереди приоритета.
+
+    Args:
+        priority: Приоритет уведомления (по умолчанию normal)
+        channels: Каналы уведомления в порядке приоритета
+
+    Returns:
+        Имя очереди или None - очередь Celery по умолчанию
+    """
+    parts = [settings.NOTIFICATION_QUEUE_PREFIX]
+    if settings.NOTIFICATION_PRIORITY_QUEUES:
+        parts.append(priority or Notification.PRIORITY_NORMAL)
+    if settings.NOTIFICATION_CHANNEL_QUEUES and channels:
+        parts.append(channels[0])
+    if len(parts) == 1:
+        return None
+    return ".".join(parts)
+
+
+def notification_queues() -> list[str]:
+    """
+    Возвращает все очереди задач отправки при текущих настройках.
+
+    Пустой список - задачи публикуются в очередь Celery по умолчанию.
+    """
+    if not settings.NOTIFICATION_PRIORITY_QUEUES and not settings.NOTIFICATION_CHANNEL_QUEUES:
+        return []
+    priorities = [None]
+    if settings.NOTIFICATION_PRIORITY_QUEUES:
+        priorities = [priority for priority, _ in Notification.PRIORITY_CHOICES]
+    channel_lists: list[list[str] | None] = [None]
+    if settings.NOTIFICATION_CHANNEL_QUEUES:
+        channel_lists += [[channel] for channel, _ in DeliveryAttempt.CHANNEL_CHOICES]
+
+    queues = []
+    for priority in priorities:
+        for channels in channel_lists:
+            queue = notification_queue(priority, channels)
+            if queue is not None and queue not in queues:
+                queues.append(queue)
+    return queues
+
+
+def enqueue_notification(notification_id: str, queue: str | None = None) -> None:
+    """
+    Ставит уведомление в очередь на отправку.
+
+    При NOTIFICATION_BATCH_MAX_SIZE > 1 UUID попадает в накопитель и
+    публикуется пачкой, иначе публикуется отдельная задача. В режиме
+    database публиковать нечего: очередью служит сама таблица уведомлений.
+
+    Args:
+        notification_id: UUID уведомления
+        queue: Очередь Celery (см. notification_queue)
+    """
+    if settings.NOTIFICATION_DISPATCH_MODE == DISPATCH_DATABASE:
+        # Уведомление заберет воркер run_delivery_workers
+        return
+    if settings.NOTIFICATION_BATCH_MAX_SIZE > 1:
+        get_batch_accumulator(queue).add(str(notification_id))
+    else:
+        send_notification_task.apply_async((str(notification_id),), queue=queue)
+
+
+def enqueue_routed(notifications: Iterable[tuple[str, str, list[str]]]) -> int:
+    """
+    Публикует задачи отправки, раскладывая уведомления по очередям.
+
+    Args:
+        notifications: Кортежи (UUID, приоритет, каналы) уведомлений
+
+    Returns:
+        Количество поставленных в очередь уведомлений
+    """
+    ids_by_queue: dict[str | None, list[str]] = defaultdict(list)
+    for notification_id, priority, channels in notifications:
+        ids_by_queue[notification_queue(priority, channels)].append(notification_id)
+    return sum(enqueue_notifications(ids, queue=queue) for queue, ids in ids_by_queue.items())
+
+
+def enqueue_notifications(notification_ids: Iterable[str], queue: str | None = None) -> int:
+    """
+    Публикует задачи отправки уведомлений в брокер пачками.
+
+    Задачи одной пачки публикуются через один producer из пула Celery,
+    поэтому соединение с брокером и канал не пересоздаются на каждую задачу.
+    При NOTIFICATION_BATCH_MAX_SIZE > 1 UUID упаковываются в задачи
+    send_notifications_batch_task по NOTIFICATION_BATCH_MAX_SIZE штук.
+
+    Args:
+        notification_ids: UUID уведомлений для отправки
+        queue: Очередь Celery для всех задач (см. notification_queue)
+
+    Returns:
+        Количество поставленных в очередь уведомлений
+    """
+    ids = [str(notification_id) for notification_id in notification_ids]
+    if settings.NOTIFICATION_DISPATCH_MODE == DISPATCH_DATABASE:
+        return len(ids)
+    batch_size = settings.NOTIFICATION_BATCH_MAX_SIZE
+
+    if batch_size > 1:
+        task = send_notifications_batch_task
+        messages = [(ids[i : i + batch_size],) for i in range(0, len(ids), batch_size)]
+    else:
+        task = send_notification_task
+        messages = [(notification_id,) for notification_id in ids]
+
+    chunk_size = settings.NOTIFICATION_ENQUEUE_CHUNK_SIZE
+    for start in range(0, len(messages), chunk_size):
+        chunk = messages[start : start + chunk_size]
+        with task.app.producer_or_acquire() as producer:
+            for args in chunk:
+                task.apply_async(args, producer=producer, queue=queue)
+        logger.debug(f"Enqueued chunk of {len(chunk)} {task.name} messages")
+
+    return len(ids)
+
+
+def schedule_retries(notifications: Iterable[Notification]) -> int:
+    """
+    Планирует повторную отправку уведомлений, которые сервис вернул в pending.
+
+    Каждый повтор публикуется отдельной задачей с ETA = next_attempt_at. В режиме
+    database публиковать нечего: воркер заберет уведомление после next_attempt_at.
+    Если публикация не удалась, уведомление вернет reaper по истечении аренды.
+
+    Args:
+        notifications: Уведомления после NotificationService
+
+    Returns:
+        Количество запланированных повторов
+    """
+    retries = [
+        notification
+        for notification in notifications
+        if notification.status == Notification.STATUS_PENDING and notification.next_attempt_at
+    ]
+    if not retries or settings.NOTIFICATION_DISPATCH_MODE == DISPATCH_DATABASE:
+        return len(retries)
+
+    with send_notification_task.app.producer_or_acquire() as producer:
+        for notification in retries:
+            send_notification_task.apply_async(
+                (str(notification.id),),
+                eta=notification.next_attempt_at,
+                producer=producer,
+                queue=notification_queue(notification.priority, notification.channels),
+            )
+    logger.info(f"Scheduled {len(retries)} notification retries")
+    return len(retries)
+
+
+def uses_outbox() -> bool:
+    """Проверяет, публикуются ли задачи через transactional outbox."""
+    return settings.NOTIFICATION_DISPATCH_MODE == DISPATCH_OUTBOX
+
+
+def add_to_outbox(notification_ids: Iterable[str]) -> None:
+    """
+    Записывает уведомления в outbox.
+
+    Вызывается в транзакции, создающей уведомления: запись в outbox
+    фиксируется (или откатывается) вместе с ними.
+
+    Args:
+        notification_ids: UUID уведомлений
+    """
+    OutboxMessage.objects.bulk_create(
+        [OutboxMessage(notification_id=notification_id) for notification_id in notification_ids],
+    )
+
+
+def relay_outbox(batch_size: int | None = None) -> int:
+    """
+    Публикует одну пачку записей outbox в брокер.
+
+    Записи выбираются в порядке создания и удаляются в той же транзакции
+    после публикации. На PostgreSQL строки блокируются с SKIP LOCKED, поэтому
+    несколько relay могут работать параллельно. Если публикация упала,
+    транзакция откатывается и записи будут опубликованы повторно (at-least-once).
+
+    Args:
+        batch_size: Размер пачки (по умолчанию NOTIFICATION_OUTBOX_BATCH_SIZE)
+
+    Returns:
+        Количество опубликованных уведомлений
+    """
+    batch_size = batch_size or settings.NOTIFICATION_OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        queryset = OutboxMessage.objects.order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            # Приоритет и каналы читаются JOIN-ом, но блокируются только строки outbox
+            queryset = queryset.select_for_update(
+                skip_locked=True,
+                of=("self",) if connection.features.has_select_for_update_of else (),
+            )
+        messages = list(
+            queryset.values_list(
+                "id",
+                "notification_id",
+                "notification__priority",
+                "notification__channels",
+            )[:batch_size],
+        )
+        if not messages:
+            return 0
+
+        enqueue_routed(message[1:] for message in messages)
+        OutboxMessage.objects.filter(id__in=[message[0] for message in messages]).delete()
+
+    logger.info(f"Relayed {len(messages)} outbox messages")
+    return len(messages)
+
+
+def reap_expired_leases(batch_size: int | None = None) -> int:
+    """
+    Возвращает в очередь одну пачку уведомлений с истекшей арендой.
+
+    Аренда истекает, если воркер упал после захвата уведомления или перехода
+    в in_progress. Такие уведомления сбрасываются в pending без владельца и
+    публикуются заново тем же способом, что и новые: задачей в брокер, строкой
+    outbox (в той же транзакции) или, в режиме database, самим сбросом claimed_by.
+    Выборка идет по частичному индексу notification_lease_idx, поэтому не
+    зависит от числа уведомлений в терминальных статусах. Доставка at-least-once:
+    воркер, переживший истечение аренды, может отправить уведомление повторно.
+
+    Args:
+        batch_size: Размер пачки (по умолчанию NOTIFICATION_LEASE_REAPER_BATCH_SIZE)
+
+    Returns:
+        Количество возвращенных в очередь уведомлений
+    """
+    batch_size = batch_size or settings.NOTIFICATION_LEASE_REAPER_BATCH_SIZE
+    now = timezone.now()
+    expired = Notification.objects.filter(
+        status__in=Notification.ACTIVE_STATUSES,
+        lease_expires_at__lt=now,
+    )
+
+    def reap() -> tuple[int, list]:
+        with transaction.atomic():
+            queryset = expired.order_by("lease_expires_at")
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            rows = list(queryset.values_list("id", "priority", "channels")[:batch_size])
+            if not rows:
+                return 0, []
+            ids = [notification_id for notification_id, _, _ in rows]
+
+            # Повтор условия не дает сбросить уведомление, которое воркер успел
+            # завершить или продлить между выборкой и обновлением
+            expired.filter(id__in=ids).update(
+                status=Notification.STATUS_PENDING,
+                claimed_by=None,
+                lease_expires_at=None,
+                updated_at=now,
+            )
+            # Публикуются только действительно сброшенные строки: завершенное
+            # воркером уведомление повторная задача отправила бы еще раз
+            reset = set(
+                Notification.objects.filter(
+                    id__in=ids,
+                    status=Notification.STATUS_PENDING,
+                    lease_expires_at__isnull=True,
+                    updated_at=now,
+                ).values_list("id", flat=True),
+            )
+            rows = [row for row in rows if row[0] in reset]
+            if not rows:
+                return 0, []
+            ids = [notification_id for notification_id, _, _ in rows]
+            # Как и в relay_outbox, публикация внутри транзакции: если брокер
+            # недоступен, сброс откатится и пачка будет найдена снова
+            if uses_outbox():
+                add_to_outbox(ids)
+            else:
+                enqueue_routed(rows)
+        return len(ids), ids
+
+    reaped, ids = submit_write(reap)
+    if not ids:
+        return 0
+    status_cache = get_status_cache()
+    if status_cache is not None:
+        status_cache.invalidate(ids)
+    logger.warning(f"Re-enqueued {reaped} notifications with expired leases")
+    return reaped
+
+
+def dispatch_due_notifications(batch_size: int | None = None) -> int:
+    """
+    Переводит одну пачку наступивших отложенных уведомлений в очередь отправки.
+
+    Уведомления в статусе scheduled с send_at <= now выбираются по частичному
+    индексу notification_schedule_idx в порядке send_at, переводятся в pending
+    условным UPDATE и публикуются так же, как новые. В памяти одновременно
+    только batch_size UUID, поэтому накопившийся backlog разбирается пачками.
+
+    Args:
+        batch_size: Размер пачки (по умолчанию NOTIFICATION_SCHEDULER_BATCH_SIZE)
+
+    Returns:
+        Количество переведенных в очередь уведомлений
+    """
+    batch_size = batch_size or settings.NOTIFICATION_SCHEDULER_BATCH_SIZE
+    due = Notification.objects.filter(
+        status=Notification.STATUS_SCHEDULED,
+        send_at__lte=timezone.now(),
+    )
+
+    with transaction.atomic():
+        queryset = due.order_by("send_at")
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        rows = list(queryset.values_list("id", "priority", "channels")[:batch_size])
+        if not rows:
+            return 0
+        ids = [notification_id for notification_id, _, _ in rows]
+
+        dispatched = due.filter(id__in=ids).update(status=Notification.STATUS_PENDING)
+        # Как и в relay_outbox, публикация внутри транзакции: если брокер
+        # недоступен, пачка останется scheduled и будет выбрана снова
+        if uses_outbox():
+            add_to_outbox(ids)
+        else:
+            enqueue_routed(rows)
+
+    status_cache = get_status_cache()
+    if status_cache is not None:
+        status_cache.invalidate(ids)
+    logger.info(f"Dispatched {dispatched} scheduled notifications")
+    return dispatched
@@ -0,0 +1,61 @@
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.dispatch import notification_queues
+from notifications.models import Notification
+from notifications.services.queue_lag import broker_queue_depths, measure_lane_lag
+
+
+def parse_max_lag(value: str) -> tuple[str, float]:
+    """Разбирает порог вида critical=5 (приоритет=секунды)."""
+    priority, _, seconds = value.partition("=")
+    priorities = [choice for choice, _ in Notification.PRIORITY_CHOICES]
+    if priority not in priorities:
+        raise CommandError(f"Unknown priority {priority!r}, expected one of {priorities}")
+    try:
+        return priority, float(seconds)
+    except ValueError:
+        raise CommandError(f"Invalid max lag {value!r}, expected e.g. critical=5") from None
+
+
+class Command(BaseCommand):
+    """
+    Показывает отставание очередей по приоритетам.
+
+    С порогами --max-lag завершается ошибкой, если очередь отстает больше
+    допустимого, поэтому подходит для healthcheck и мониторинга.
+    """
+
+    help = "Report per-priority queue lag and fail if it exceeds the given thresholds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-lag",
+            action="append",
+            default=[],
+            metavar="PRIORITY=SECONDS",
+            help="Fail if the oldest ready notification of a priority waits longer",
+        )
+        parser.add_argument(
+            "--broker",
+            action="store_true",
+            help="Also report message counts of the broker queues",
+        )
+
+    def handle(self, *args, **options):
+        thresholds = dict(parse_max_lag(value) for value in options["max_lag"])
+
+        exceeded = []
+        for lane in measure_lane_lag():
+            self.stdout.write(f"{lane.priority}: {lane.pending} pending, lag {lane.lag:.1f}s")
+            max_lag = thresholds.get(lane.priority)
+            if max_lag is not None and lane.lag > max_lag:
+                exceeded.append(f"{lane.priority} lag {lane.lag:.1f}s > {max_lag:g}s")
+
+        if options["broker"]:
+            queues = [current_app.conf.task_default_queue, *notification_queues()]
+            for queue, depth in broker_queue_depths(queues).items():
+                self.stdout.write(f"queue {queue}: {'missing' if depth is None else depth}")
+
+        if exceeded:
+            raise CommandError("Queue lag exceeded: " + ", ".join(exceeded))
@@ -0,0 +1,81 @@
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notifications.services.retention import ARCHIVE_NDJSON, ARCHIVE_WRITERS, NotificationPruner
+
+DURATION_UNITS = {"d": "days", "h": "hours", "m": "minutes"}
+
+
+def parse_duration(value: str) -> timedelta:
+    """Разбирает длительность вида 30d, 12h или 90m."""
+    match = re.fullmatch(r"(\d+)([dhm])", value.strip())
+    if not match:
+        raise CommandError(f"Invalid duration {value!r}, expected e.g. 30d, 12h or 90m")
+    amount, unit = match.groups()
+    return timedelta(**{DURATION_UNITS[unit]: int(amount)})
+
+
+class Command(BaseCommand):
+    """
+    Удаляет старые завершенные уведомления вместе с попытками доставки.
+
+    Удаление идет пачками по одной транзакции с ограничением скорости;
+    прерванный запуск можно просто повторить.
+    """
+
+    help = "Delete (and optionally archive) finished notifications older than a cutoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            required=True,
+            help="Age of notifications to delete, e.g. 30d, 12h or 90m",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NOTIFICATION_PRUNE_BATCH_SIZE,
+            help="Notifications deleted per transaction",
+        )
+        parser.add_argument(
+            "--max-rows-per-second",
+            type=float,
+            default=settings.NOTIFICATION_PRUNE_MAX_ROWS_PER_SECOND,
+            help="Delete rate limit (0 disables throttling)",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            help="Archive notifications with their attempts to this directory before deleting",
+        )
+        parser.add_argument(
+            "--archive-format",
+            choices=sorted(ARCHIVE_WRITERS),
+            default=ARCHIVE_NDJSON,
+            help="Archive file format: gzip-compressed NDJSON or Parquet (requires pyarrow)",
+        )
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - parse_duration(options["older_than"])
+
+        archive = None
+        if options["archive_dir"]:
+            try:
+                archive = ARCHIVE_WRITERS[options["archive_format"]](options["archive_dir"])
+            except ImportError as e:
+                raise CommandError(str(e)) from e
+
+        pruner = NotificationPruner(
+            older_than=older_than,
+            batch_size=options["batch_size"],
+            max_rows_per_second=options["max_rows_per_second"],
+            archive=archive,
+        )
+        deleted = pruner.run()
+
+        self.stdout.write(
+            f"Deleted {deleted} notifications created before {older_than.isoformat()}",
+        )
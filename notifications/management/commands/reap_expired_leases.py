@@ -0,0 +1,59 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import reap_expired_leases
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Возвращает в очередь уведомления с истекшей арендой.
+
+    Для развертываний без Celery beat (например, NOTIFICATION_DISPATCH_MODE=database).
+    """
+
+    help = "Re-enqueue notifications whose worker lease has expired"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NOTIFICATION_LEASE_REAPER_BATCH_SIZE,
+            help="Number of notifications re-enqueued per transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.NOTIFICATION_LEASE_REAPER_INTERVAL,
+            help="Seconds to sleep when no expired leases are left",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Reap all expired leases and exit",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+        while True:
+            try:
+                reaped = reap_expired_leases(batch_size)
+            except Exception as e:
+                logger.error(f"Lease reaper failed: {e}", exc_info=True)
+                if options["once"]:
+                    raise
+                time.sleep(options["interval"])
+                continue
+
+            total += reaped
+            if reaped < batch_size:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(f"Re-enqueued {total} notifications")
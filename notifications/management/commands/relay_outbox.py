@@ -0,0 +1,56 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import relay_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Публикует задачи отправки из transactional outbox в брокер."""
+
+    help = "Relay outbox rows to the Celery broker in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NOTIFICATION_OUTBOX_BATCH_SIZE,
+            help="Number of outbox rows published per transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.NOTIFICATION_OUTBOX_POLL_INTERVAL,
+            help="Seconds to sleep when the outbox is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the outbox and exit",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total = 0
+        while True:
+            try:
+                relayed = relay_outbox(batch_size)
+            except Exception as e:
+                # Брокер недоступен: записи остались в outbox, повторим позже
+                logger.error(f"Outbox relay failed: {e}", exc_info=True)
+                if options["once"]:
+                    raise
+                time.sleep(options["interval"])
+                continue
+
+            total += relayed
+            if relayed < batch_size:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(f"Relayed {total} notifications")
@@ -0,0 +1,66 @@
+import logging
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.services.db_queue import DatabaseNotificationQueue, DeliveryWorker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Запускает воркеры очереди уведомлений в БД (NOTIFICATION_DISPATCH_MODE=database)."""
+
+    help = "Deliver pending notifications straight from the database, without a broker"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of worker threads",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NOTIFICATION_DB_QUEUE_BATCH_SIZE,
+            help="Notifications claimed by a worker at a time",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.NOTIFICATION_DB_QUEUE_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            logger.info("Stopping delivery workers")
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        queue = DatabaseNotificationQueue(batch_size=options["batch_size"])
+        workers = [
+            DeliveryWorker(queue, stop_event, poll_interval=options["interval"], name=str(i))
+            for i in range(options["concurrency"])
+        ]
+        threads = [
+            threading.Thread(target=worker.run, name=f"delivery-worker-{i}")
+            for i, worker in enumerate(workers)
+        ]
+        self.stdout.write(
+            f"Started {len(threads)} delivery workers, queue depth: {queue.depth()}",
+        )
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+        self.stdout.write(f"Processed {sum(worker.processed for worker in workers)} notifications")
@@ -0,0 +1,87 @@
+import logging
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.dispatch import dispatch_due_notifications
+from notifications.services.leader import LeaderElection
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LEADER_NAME = "scheduler"
+
+
+class Command(BaseCommand):
+    """
+    Планировщик отложенных уведомлений (send_at).
+
+    Команду можно запускать на нескольких узлах: уведомления публикует только
+    лидер, остальные ждут и забирают лидерство, если аренда лидера истекла.
+    """
+
+    help = "Dispatch scheduled notifications when their send_at time comes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NOTIFICATION_SCHEDULER_BATCH_SIZE,
+            help="Notifications dispatched per transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.NOTIFICATION_SCHEDULER_INTERVAL,
+            help="Seconds between polls when nothing is due",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Dispatch everything that is due and exit",
+        )
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            logger.info("Stopping scheduler")
+            stop_event.set()
+
+        if not options["once"]:
+            signal.signal(signal.SIGINT, stop)
+            signal.signal(signal.SIGTERM, stop)
+
+        batch_size = options["batch_size"]
+        election = LeaderElection(
+            SCHEDULER_LEADER_NAME, ttl=settings.NOTIFICATION_SCHEDULER_LEADER_TTL
+        )
+        total = 0
+        try:
+            while not stop_event.is_set():
+                # Лидерство продлевается перед каждой пачкой
+                if not election.try_acquire():
+                    if options["once"]:
+                        self.stdout.write("Another scheduler is the leader, exiting")
+                        return
+                    stop_event.wait(options["interval"])
+                    continue
+
+                try:
+                    dispatched = dispatch_due_notifications(batch_size)
+                except Exception as e:
+                    logger.error(f"Scheduler dispatch failed: {e}", exc_info=True)
+                    if options["once"]:
+                        raise
+                    dispatched = 0
+
+                total += dispatched
+                if dispatched < batch_size:
+                    if options["once"]:
+                        break
+                    stop_event.wait(options["interval"])
+        finally:
+            election.release()
+
+        self.stdout.write(f"Dispatched {total} scheduled notifications")
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_delivery_attempt_attempted_at_default"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="deliveryattempt",
+            name="status",
+            field=models.CharField(
+                choices=[("success", "Success"), ("failed", "Failed"), ("cancelled", "Cancelled")],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_delivery_attempt_cancelled_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="deliveryattempt",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("success", "Success"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                    ("skipped", "Skipped"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
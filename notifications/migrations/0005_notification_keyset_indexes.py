@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0004_delivery_attempt_skipped_status"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notificatio_created_46ad24_idx",
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["created_at", "id"], name="notificatio_created_a853cd_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["status", "created_at", "id"], name="notificatio_status_d29d8f_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0006_outbox_message"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="claimed_by",
+            field=models.CharField(
+                blank=True,
+                help_text="Воркер, забравший уведомление из очереди в БД",
+                max_length=255,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("claimed_by__isnull", True), ("status", "pending")),
+                fields=["created_at", "id"],
+                name="notification_queue_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0007_notification_db_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Срок аренды воркера; после него уведомление возвращается в очередь",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="claimed_by",
+            field=models.CharField(
+                blank=True,
+                help_text="Воркер, владеющий уведомлением (забрал из очереди или начал отправку)",
+                max_length=255,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(
+                    ("lease_expires_at__isnull", False), ("status__in", ["pending", "in_progress"])
+                ),
+                fields=["lease_expires_at"],
+                name="notification_lease_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-17 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0008_notification_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                blank=True, help_text="Время запланированного повтора отправки", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="retry_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Сколько раз цепочка каналов повторялась после временных ошибок",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.11 on 2026-10-17 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0009_notification_retry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderLease",
+            fields=[
+                ("name", models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ("owner", models.CharField(max_length=255)),
+                ("expires_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="send_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Время отложенной отправки; до него уведомление в статусе scheduled",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("pending", "Pending"),
+                    ("in_progress", "In Progress"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status", "scheduled")),
+                fields=["status", "send_at"],
+                name="notification_schedule_idx",
+            ),
+        ),
+    ]
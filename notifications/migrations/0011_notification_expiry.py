@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-17 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0010_notification_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Срок актуальности; после него уведомление не отправляется (статус expired)",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("pending", "Pending"),
+                    ("in_progress", "In Progress"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                    ("expired", "Expired"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
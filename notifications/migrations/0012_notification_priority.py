@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-17 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0011_notification_expiry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="priority",
+            field=models.CharField(
+                choices=[("critical", "Critical"), ("normal", "Normal"), ("bulk", "Bulk")],
+                default="normal",
+                help_text="Приоритет: определяет очередь Celery (critical, normal, bulk)",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.11 on 2026-10-17 05:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0012_notification_priority"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("pending", "Pending"),
+                    ("in_progress", "In Progress"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                    ("expired", "Expired"),
+                    ("coalesced", "Coalesced"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="CoalescedNotification",
+            fields=[
+                (
+                    "notification",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="coalesced_into",
+                        serialize=False,
+                        to="notifications.notification",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "digest",
+                    models.ForeignKey(
+                        help_text="Первое такое же уведомление (для дубликата) или сводка",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="coalesced",
+                        to="notifications.notification",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-17 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0013_notification_coalescing"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["used_channel", "created_at", "id"], name="notificatio_used_ch_c94b77_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["to_email", "created_at", "id"], name="notificatio_to_emai_15d13b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["to_phone", "created_at", "id"], name="notificatio_to_phon_2c5bb4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["to_telegram_chat_id", "created_at", "id"],
+                name="notificatio_to_tele_97b083_idx",
+            ),
+        ),
+    ]
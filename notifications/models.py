@@ -1,23 +1,45 @@
 import uuid
+from datetime import datetime
 
 from django.db import models
+from django.utils import timezone
 
 
 class Notification(models.Model):
     """Модель уведомления."""
 
+    STATUS_SCHEDULED = "scheduled"
     STATUS_PENDING = "pending"
     STATUS_IN_PROGRESS = "in_progress"
     STATUS_DELIVERED = "delivered"
     STATUS_FAILED = "failed"
+    STATUS_EXPIRED = "expired"
+    STATUS_COALESCED = "coalesced"
 
     STATUS_CHOICES = [
+        (STATUS_SCHEDULED, "Scheduled"),
         (STATUS_PENDING, "Pending"),
         (STATUS_IN_PROGRESS, "In Progress"),
         (STATUS_DELIVERED, "Delivered"),
         (STATUS_FAILED, "Failed"),
+        (STATUS_EXPIRED, "Expired"),
+        (STATUS_COALESCED, "Coalesced"),
     ]
 
+    PRIORITY_CRITICAL = "critical"
+    PRIORITY_NORMAL = "normal"
+    PRIORITY_BULK = "bulk"
+
+    PRIORITY_CHOICES = [
+        (PRIORITY_CRITICAL, "Critical"),
+        (PRIORITY_NORMAL, "Normal"),
+        (PRIORITY_BULK, "Bulk"),
+    ]
+
+    # Статусы, после которых уведомление больше не обрабатывается
+    TERMINAL_STATUSES = [STATUS_DELIVERED, STATUS_FAILED, STATUS_EXPIRED, STATUS_COALESCED]
+    ACTIVE_STATUSES = [STATUS_PENDING, STATUS_IN_PROGRESS]
+
     id: models.UUIDField = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)  # type: ignore[assignment]
     request_id: models.CharField | None = models.CharField(  # type: ignore[assignment]
         max_length=255,
@@ -42,12 +64,48 @@ class Notification(models.Model):
         default=STATUS_PENDING,
         db_index=True,
     )
+    priority: models.CharField = models.CharField(  # type: ignore[assignment]
+        max_length=20,
+        choices=PRIORITY_CHOICES,
+        default=PRIORITY_NORMAL,
+        help_text="Приоритет: определяет очередь Celery (critical, normal, bulk)",
+    )
     used_channel: models.CharField | None = models.CharField(  # type: ignore[assignment]
         max_length=20,
         null=True,
         blank=True,
         help_text="Канал, через который успешно доставлено уведомление",
     )
+    claimed_by: models.CharField | None = models.CharField(  # type: ignore[assignment]
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text="Воркер, владеющий уведомлением (забрал из очереди или начал отправку)",
+    )
+    send_at: models.DateTimeField | None = models.DateTimeField(  # type: ignore[assignment]
+        null=True,
+        blank=True,
+        help_text="Время отложенной отправки; до него уведомление в статусе scheduled",
+    )
+    expires_at: models.DateTimeField | None = models.DateTimeField(  # type: ignore[assignment]
+        null=True,
+        blank=True,
+        help_text="Срок актуальности; после него уведомление не отправляется (статус expired)",
+    )
+    retry_count: models.PositiveIntegerField = models.PositiveIntegerField(  # type: ignore[assignment]
+        default=0,
+        help_text="Сколько раз цепочка каналов повторялась после временных ошибок",
+    )
+    next_attempt_at: models.DateTimeField | None = models.DateTimeField(  # type: ignore[assignment]
+        null=True,
+        blank=True,
+        help_text="Время запланированного повтора отправки",
+    )
+    lease_expires_at: models.DateTimeField | None = models.DateTimeField(  # type: ignore[assignment]
+        null=True,
+        blank=True,
+        help_text="Срок аренды воркера; после него уведомление возвращается в очередь",
+    )
     created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)  # type: ignore[assignment]
     updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)  # type: ignore[assignment]
 
@@ -56,9 +114,50 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["request_id"]),
-            models.Index(fields=["created_at"]),
+            # Keyset пагинация списка: (created_at, id) и с фильтром по статусу
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["status", "created_at", "id"]),
+            # Фильтры списка по каналу и получателю; фильтр recipient - OR по трем
+            # полям, каждое со своим индексом в порядке пагинации
+            models.Index(fields=["used_channel", "created_at", "id"]),
+            models.Index(fields=["to_email", "created_at", "id"]),
+            models.Index(fields=["to_phone", "created_at", "id"]),
+            models.Index(fields=["to_telegram_chat_id", "created_at", "id"]),
+            # Очередь в БД: только ожидающие и никем не забранные уведомления
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status="pending", claimed_by__isnull=True),
+                name="notification_queue_idx",
+            ),
+            # Планировщик: только ожидающие send_at уведомления в порядке времени отправки
+            models.Index(
+                fields=["status", "send_at"],
+                condition=models.Q(status="scheduled"),
+                name="notification_schedule_idx",
+            ),
+            # Поиск просроченных аренд: только незавершенные уведомления,
+            # терминальные строки в индекс не попадают
+            models.Index(
+                fields=["lease_expires_at"],
+                condition=models.Q(
+                    status__in=["pending", "in_progress"],
+                    lease_expires_at__isnull=False,
+                ),
+                name="notification_lease_idx",
+            ),
         ]
 
+    @classmethod
+    def initial_status(cls, send_at: datetime | None) -> str:
+        """Статус нового уведомления: scheduled для send_at в будущем, иначе pending."""
+        if send_at is not None and send_at > timezone.now():
+            return cls.STATUS_SCHEDULED
+        return cls.STATUS_PENDING
+
+    def is_expired(self, now: datetime | None = None) -> bool:
+        """Истек ли срок актуальности уведомления к моменту now (по умолчанию сейчас)."""
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
     def __str__(self) -> str:
         return f"Notification {self.id} - {self.status}"
 
@@ -68,10 +167,14 @@ class DeliveryAttempt(models.Model):
 
     STATUS_SUCCESS = "success"
     STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_SKIPPED = "skipped"
 
     STATUS_CHOICES = [
         (STATUS_SUCCESS, "Success"),
         (STATUS_FAILED, "Failed"),
+        (STATUS_CANCELLED, "Cancelled"),
+        (STATUS_SKIPPED, "Skipped"),
     ]
 
     CHANNEL_EMAIL = "email"
@@ -93,7 +196,8 @@ class DeliveryAttempt(models.Model):
     channel: models.CharField = models.CharField(max_length=20, choices=CHANNEL_CHOICES)  # type: ignore[assignment]
     status: models.CharField = models.CharField(max_length=20, choices=STATUS_CHOICES)  # type: ignore[assignment]
     error_message: models.TextField | None = models.TextField(null=True, blank=True)  # type: ignore[assignment]
-    attempted_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)  # type: ignore[assignment]
+    # Время фактической попытки, а не записи в БД: попытки могут сохраняться пачкой
+    attempted_at: models.DateTimeField = models.DateTimeField(default=timezone.now, editable=False)  # type: ignore[assignment]
 
     class Meta:
         ordering = ["attempted_at"]
@@ -104,3 +208,68 @@ class DeliveryAttempt(models.Model):
 
     def __str__(self) -> str:
         return f"Attempt {self.id} - {self.channel} - {self.status}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Запись transactional outbox: уведомление, ожидающее публикации задачи в брокер.
+
+    Создается в одной транзакции с уведомлением и удаляется командой
+    relay_outbox после публикации.
+    """
+
+    id: models.BigAutoField = models.BigAutoField(primary_key=True)  # type: ignore[assignment]
+    notification: models.ForeignKey = models.ForeignKey(  # type: ignore[assignment]
+        Notification,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)  # type: ignore[assignment]
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return f"Outbox {self.id} - notification {self.notification_id}"
+
+
+class CoalescedNotification(models.Model):
+    """
+    Связь уведомления в статусе coalesced с уведомлением, доставленным вместо него.
+
+    Отдельная таблица, а не поле уведомления: связь нужна только объединенным
+    уведомлениям и не утяжеляет вставку новых.
+    """
+
+    notification: models.OneToOneField = models.OneToOneField(  # type: ignore[assignment]
+        Notification,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="coalesced_into",
+    )
+    digest: models.ForeignKey = models.ForeignKey(  # type: ignore[assignment]
+        Notification,
+        on_delete=models.CASCADE,
+        related_name="coalesced",
+        help_text="Первое такое же уведомление (для дубликата) или сводка",
+    )
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)  # type: ignore[assignment]
+
+    def __str__(self) -> str:
+        return f"Notification {self.notification_id} coalesced into {self.digest_id}"
+
+
+class LeaderLease(models.Model):
+    """
+    Аренда лидерства фонового процесса.
+
+    Одна строка на роль (например, планировщик): процесс, записавший себя в
+    owner, считается лидером до expires_at и продлевает аренду, пока работает.
+    """
+
+    name: models.CharField = models.CharField(max_length=100, primary_key=True)  # type: ignore[assignment]
+    owner: models.CharField = models.CharField(max_length=255)  # type: ignore[assignment]
+    expires_at: models.DateTimeField = models.DateTimeField()  # type: ignore[assignment]
+
+    def __str__(self) -> str:
+        return f"{self.name} - {self.owner}"
@@ -0,0 +1,93 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class NotificationKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) пагинация уведомлений по (created_at, id) от новых к старым.
+
+    Курсор хранит ключ последней строки страницы, следующая страница выбирается
+    условием по индексу (created_at, id) вместо OFFSET, поэтому стоимость любой
+    страницы одинакова. Общее количество записей не считается.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, page_size: int = 100):
+        """
+        Инициализирует пагинацию.
+
+        Args:
+            page_size: Количество записей на странице
+        """
+        self.page_size = page_size
+        self.next_key: tuple[datetime, uuid.UUID] | None = None
+        self.request = None
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list:
+        """
+        Возвращает страницу, начиная после ключа из курсора.
+
+        Args:
+            queryset: Отфильтрованный QuerySet уведомлений
+            request: Запрос с необязательным параметром cursor
+
+        Returns:
+            Записи страницы
+        """
+        self.request = request
+        queryset = queryset.order_by("-created_at", "-id")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, last_id = self.decode_cursor(cursor)
+            # Первое условие задает границу диапазона индекса, второе отсекает
+            # уже выданные строки с тем же created_at
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=last_id),
+            )
+
+        page = list(queryset[: self.page_size + 1])
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            self.next_key = (page[-1].created_at, page[-1].id)
+        return page
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self) -> str | None:
+        """Возвращает ссылку на следующую страницу или None для последней."""
+        if self.next_key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.next_key))
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, notification_id: uuid.UUID) -> str:
+        """Кодирует ключ строки в непрозрачный курсор."""
+        payload = json.dumps([created_at.isoformat(), str(notification_id)])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple[datetime, uuid.UUID]:
+        """
+        Декодирует курсор.
+
+        Raises:
+            NotFound: Курсор поврежден
+        """
+        try:
+            created_at, notification_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), uuid.UUID(notification_id)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message) from None
@@ -1,6 +1,11 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
-from notifications.models import DeliveryAttempt, Notification
+from notifications.models import CoalescedNotification, DeliveryAttempt, Notification
 
 
 class DeliveryAttemptSerializer(serializers.ModelSerializer):
@@ -11,6 +16,50 @@ class DeliveryAttemptSerializer(serializers.ModelSerializer):
         fields = ["channel", "status", "error_message", "attempted_at"]
 
 
+class NotificationBulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Списочный сериализатор для пакетного создания уведомлений.
+
+    В отличие от стандартного ListSerializer не отклоняет весь пакет из-за
+    одного невалидного элемента: ошибки сохраняются поэлементно в item_errors,
+    а на месте невалидного элемента в validated_data остается None.
+    """
+
+    def to_internal_value(self, data):
+        """Валидирует каждый элемент списка независимо."""
+        if not isinstance(data, list):
+            message = self.error_messages["not_a_list"].format(input_type=type(data).__name__)
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]},
+                code="not_a_list",
+            )
+
+        if not data:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages["empty"]]},
+                code="empty",
+            )
+
+        max_items = settings.NOTIFICATION_BULK_MAX_ITEMS
+        if len(data) > max_items:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [f"Too many items. Maximum: {max_items}"]},
+                code="max_length",
+            )
+
+        self.item_errors = []
+        validated_items = []
+        for item in data:
+            try:
+                validated_items.append(self.child.run_validation(item))
+                self.item_errors.append({})
+            except serializers.ValidationError as exc:
+                validated_items.append(None)
+                self.item_errors.append(exc.detail)
+
+        return validated_items
+
+
 class NotificationCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания уведомления."""
 
@@ -26,6 +75,12 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
         allow_empty=False,
         help_text="Список каналов в порядке приоритета",
     )
+    ttl_seconds = serializers.IntegerField(
+        min_value=1,
+        required=False,
+        write_only=True,
+        help_text="Срок актуальности в секундах от send_at (или от создания)",
+    )
 
     class Meta:
         model = Notification
@@ -37,10 +92,20 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
             "subject",
             "body",
             "channels",
+            "priority",
+            "send_at",
+            "expires_at",
+            "ttl_seconds",
         ]
+        list_serializer_class = NotificationBulkCreateListSerializer
 
     def validate(self, attrs):
-        """Проверяет, что указан хотя бы один контакт."""
+        """
+        Проверяет, что указан хотя бы один контакт, и вычисляет expires_at.
+
+        ttl_seconds переводится в expires_at (от send_at, если он задан),
+        поэтому в модель попадает только абсолютный срок.
+        """
         to_email = attrs.get("to_email")
         to_phone = attrs.get("to_phone")
         to_telegram_chat_id = attrs.get("to_telegram_chat_id")
@@ -51,6 +116,20 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
                 "(to_email, to_phone, or to_telegram_chat_id)",
             )
 
+        ttl_seconds = attrs.pop("ttl_seconds", None)
+        if ttl_seconds is not None:
+            if attrs.get("expires_at"):
+                raise serializers.ValidationError(
+                    "Specify either expires_at or ttl_seconds, not both",
+                )
+            start = attrs.get("send_at") or timezone.now()
+            attrs["expires_at"] = start + timedelta(seconds=ttl_seconds)
+
+        send_at = attrs.get("send_at")
+        expires_at = attrs.get("expires_at")
+        if send_at and expires_at and expires_at <= send_at:
+            raise serializers.ValidationError({"expires_at": "Must be later than send_at"})
+
         return attrs
 
     def validate_channels(self, value):
@@ -73,10 +152,60 @@ class NotificationResponseSerializer(serializers.ModelSerializer):
         fields = ["id", "status", "used_channel"]
 
 
+class NotificationListQuerySerializer(serializers.Serializer):
+    """Сериализатор параметров GET /api/notifications/."""
+
+    status = serializers.ChoiceField(choices=Notification.STATUS_CHOICES, required=False)
+    used_channel = serializers.ChoiceField(choices=DeliveryAttempt.CHANNEL_CHOICES, required=False)
+    created_after = serializers.DateTimeField(required=False, help_text="created_at >= значения")
+    created_before = serializers.DateTimeField(required=False, help_text="created_at < значения")
+    recipient = serializers.CharField(
+        required=False,
+        help_text="Email, телефон или Telegram chat ID получателя",
+    )
+    include_body = serializers.BooleanField(required=False, default=False)
+    page_size = serializers.IntegerField(required=False, min_value=1)
+    cursor = serializers.CharField(required=False)
+
+    def validate_page_size(self, value):
+        """Ограничивает размер страницы."""
+        return min(value, settings.NOTIFICATION_LIST_MAX_PAGE_SIZE)
+
+
+class NotificationListSerializer(serializers.ModelSerializer):
+    """
+    Сокращенный сериализатор для списка уведомлений.
+
+    Поле body выводится, только если в context передан include_body=True.
+    """
+
+    class Meta:
+        model = Notification
+        fields = [
+            "id",
+            "status",
+            "subject",
+            "body",
+            "to_email",
+            "to_phone",
+            "to_telegram_chat_id",
+            "channels",
+            "used_channel",
+            "created_at",
+            "updated_at",
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get("include_body"):
+            self.fields.pop("body")
+
+
 class NotificationDetailSerializer(serializers.ModelSerializer):
     """Сериализатор для детального просмотра уведомления."""
 
-    attempts = DeliveryAttemptSerializer(many=True, read_only=True)
+    attempts = serializers.SerializerMethodField()
+    digest = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
@@ -90,7 +219,31 @@ class NotificationDetailSerializer(serializers.ModelSerializer):
             "to_telegram_chat_id",
             "channels",
             "used_channel",
+            "digest",
             "created_at",
             "updated_at",
             "attempts",
         ]
+
+    def get_digest(self, notification: Notification) -> str | None:
+        """
+        Возвращает UUID уведомления, доставленного вместо этого (для coalesced).
+
+        Для остальных статусов связи нет, и запрос к БД не выполняется.
+        """
+        if notification.status != Notification.STATUS_COALESCED:
+            return None
+        link = CoalescedNotification.objects.filter(notification=notification).first()
+        return str(link.digest_id) if link else None
+
+    def get_attempts(self, notification: Notification) -> list:
+        """
+        Возвращает попытки доставки.
+
+        Уже сериализованные попытки можно передать через context["attempts"],
+        тогда запрос к БД не выполняется (используется кэшем статусов).
+        """
+        attempts = self.context.get("attempts")
+        if attempts is None:
+            attempts = DeliveryAttemptSerializer(notification.attempts.all(), many=True).data
+        return attempts
@@ -1,3 +1,36 @@
+from .bulk_ingest import BulkItemResult, BulkNotificationIngestService
+from .circuit_breaker import (
+    CacheCircuitStateStore,
+    CircuitBreaker,
+    CircuitStateStore,
+    InMemoryCircuitStateStore,
+)
+from .db_queue import DatabaseNotificationQueue, DeliveryWorker
 from .notification_service import NotificationService
+from .rate_limit import (
+    ChannelRateLimiter,
+    InMemoryTokenBucketStore,
+    RateLimitedChannelSender,
+    RedisTokenBucketStore,
+    TokenBucketStore,
+)
+from .routing import AdaptiveChannelRouter, ChannelStatsTracker
 
-__all__ = ["NotificationService"]
+__all__ = [
+    "AdaptiveChannelRouter",
+    "BulkItemResult",
+    "BulkNotificationIngestService",
+    "CacheCircuitStateStore",
+    "ChannelRateLimiter",
+    "ChannelStatsTracker",
+    "CircuitBreaker",
+    "CircuitStateStore",
+    "DatabaseNotificationQueue",
+    "DeliveryWorker",
+    "InMemoryCircuitStateStore",
+    "InMemoryTokenBucketStore",
+    "NotificationService",
+    "RateLimitedChannelSender",
+    "RedisTokenBucketStore",
+    "TokenBucketStore",
+]
@@ -0,0 +1,188 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.db import transaction
+
+from notifications.models import Notification, OutboxMessage
+from notifications.services.idempotency import IdempotencyRecord, get_idempotency_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkItemResult:
+    """Результат обработки одного элемента пакетного запроса."""
+
+    RESULT_CREATED = "created"
+    RESULT_DUPLICATE = "duplicate"
+    RESULT_INVALID = "invalid"
+
+    index: int
+    result: str
+    id: str | None = None
+    status: str | None = None
+    errors: Any = field(default=None)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Возвращает представление результата для ответа API."""
+        data: dict[str, Any] = {"index": self.index, "result": self.result}
+        if self.result == self.RESULT_INVALID:
+            data["errors"] = self.errors
+        else:
+            data["id"] = self.id
+            data["status"] = self.status
+        return data
+
+
+class BulkNotificationIngestService:
+    """Сервис пакетного создания уведомлений."""
+
+    def __init__(self, write_outbox: bool = False):
+        """
+        Инициализирует сервис.
+
+        Args:
+            write_outbox: Записывать созданные уведомления в outbox в той же транзакции
+        """
+        self.write_outbox = write_outbox
+
+    def ingest(
+        self,
+        validated_items: list[dict[str, Any] | None],
+        item_errors: list[Any],
+    ) -> list[BulkItemResult]:
+        """
+        Создает уведомления пакетом.
+
+        Логика работы:
+        1. Ищет request_id в кэше идемпотентности, оставшиеся - одним IN-запросом
+        2. Повторы request_id внутри пакета считаются дубликатами первого вхождения
+        3. Новые уведомления записываются одним bulk_create (и, если включено,
+           записи outbox для уведомлений без отложенной отправки - в той же транзакции)
+        4. Если конкурентный запрос успел вставить тот же request_id,
+           элемент помечается как duplicate, а не падает с IntegrityError
+
+        Args:
+            validated_items: Провалидированные данные (None для невалидных элементов)
+            item_errors: Ошибки валидации по элементам
+
+        Returns:
+            Список результатов в порядке элементов запроса
+        """
+        results: list[BulkItemResult | None] = [None] * len(validated_items)
+
+        idempotency_cache = get_idempotency_cache()
+        request_ids = {
+            item["request_id"] for item in validated_items if item and item.get("request_id")
+        }
+        existing: dict[str, Notification | IdempotencyRecord] = {}
+        for request_id in request_ids:
+            cached = idempotency_cache.get(request_id)
+            if cached is not None:
+                existing[request_id] = cached
+
+        missing = request_ids - existing.keys()
+        if missing:
+            existing.update(
+                (notification.request_id, notification)
+                for notification in Notification.objects.filter(
+                    request_id__in=missing,
+                ).only("id", "request_id", "status", "used_channel")
+            )
+
+        new_notifications: list[Notification] = []
+        new_indexes: list[int] = []
+        pending_by_request_id: dict[str, Notification] = {}
+        batch_duplicates: list[tuple[int, str]] = []
+
+        for index, item in enumerate(validated_items):
+            if item is None:
+                results[index] = BulkItemResult(
+                    index=index,
+                    result=BulkItemResult.RESULT_INVALID,
+                    errors=item_errors[index],
+                )
+                continue
+
+            request_id = item.get("request_id")
+            if request_id and request_id in existing:
+                results[index] = self._duplicate(index, existing[request_id])
+                continue
+            if request_id and request_id in pending_by_request_id:
+                batch_duplicates.append((index, request_id))
+                continue
+
+            notification = Notification(
+                **item,
+                status=Notification.initial_status(item.get("send_at")),
+            )
+            new_notifications.append(notification)
+            new_indexes.append(index)
+            if request_id:
+                pending_by_request_id[request_id] = notification
+
+        winners: dict[str, Notification] = {}
+        if new_notifications:
+            with transaction.atomic():
+                Notification.objects.bulk_create(new_notifications, ignore_conflicts=True)
+                if pending_by_request_id:
+                    winners = {
+                        notification.request_id: notification
+                        for notification in Notification.objects.filter(
+                            request_id__in=pending_by_request_id.keys(),
+                        ).only("id", "request_id", "status", "used_channel")
+                    }
+                if self.write_outbox:
+                    OutboxMessage.objects.bulk_create(
+                        [
+                            OutboxMessage(notification_id=notification.id)
+                            for notification in new_notifications
+                            if self._is_winner(notification, winners)
+                            and notification.status == Notification.STATUS_PENDING
+                        ],
+                    )
+
+        for index, notification in zip(new_indexes, new_notifications, strict=True):
+            if not self._is_winner(notification, winners):
+                # Конкурентный запрос успел создать уведомление с тем же request_id
+                results[index] = self._duplicate(index, winners[notification.request_id])
+            else:
+                results[index] = BulkItemResult(
+                    index=index,
+                    result=BulkItemResult.RESULT_CREATED,
+                    id=str(notification.id),
+                    status=notification.status,
+                )
+
+        for index, request_id in batch_duplicates:
+            winner = winners.get(request_id, pending_by_request_id[request_id])
+            results[index] = self._duplicate(index, winner)
+
+        for request_id, notification in pending_by_request_id.items():
+            notification = winners.get(request_id, notification)
+            idempotency_cache.set(request_id, IdempotencyRecord.from_notification(notification))
+
+        logger.info(
+            f"Bulk ingest: {len(validated_items)} items, "
+            f"{sum(1 for r in results if r and r.result == BulkItemResult.RESULT_CREATED)} created",
+        )
+        return [result for result in results if result is not None]
+
+    @staticmethod
+    def _is_winner(notification: Notification, winners: dict[str, Notification]) -> bool:
+        """Проверяет, что уведомление вставлено этим запросом, а не конкурентным."""
+        if not notification.request_id:
+            return True
+        winner = winners.get(notification.request_id)
+        return winner is None or winner.id == notification.id
+
+    @staticmethod
+    def _duplicate(index: int, notification: Notification | IdempotencyRecord) -> BulkItemResult:
+        """Формирует результат для дубликата по request_id."""
+        return BulkItemResult(
+            index=index,
+            result=BulkItemResult.RESULT_DUPLICATE,
+            id=str(notification.id),
+            status=notification.status,
+        )
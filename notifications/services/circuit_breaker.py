@@ -0,0 +1,438 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitStateStore(ABC):
+    """
+    Хранилище состояния circuit breaker.
+
+    Хранит состояние цепи каждого канала и счетчики успехов/ошибок по временным
+    корзинам (buckets) скользящего окна. Общее хранилище позволяет всем
+    воркерам видеть одно и то же состояние канала.
+    """
+
+    @abstractmethod
+    def get_state(self, channel: str) -> tuple[str, float]:
+        """
+        Возвращает состояние цепи канала.
+
+        Args:
+            channel: Название канала
+
+        Returns:
+            Кортеж (состояние, время последнего перехода)
+        """
+
+    @abstractmethod
+    def set_state(self, channel: str, state: str, changed_at: float) -> None:
+        """Сохраняет состояние цепи канала."""
+
+    @abstractmethod
+    def begin_half_open(self, channel: str, opened_at: float, ttl: float) -> bool:
+        """
+        Переводит цепь из open в half-open, если она все еще разомкнута в opened_at.
+
+        Переход выполняет только один воркер: остальные, увидевшие то же
+        истекшее состояние open, получают False и не перезаписывают состояние,
+        которое к этому моменту мог изменить результат пробного вызова.
+
+        Args:
+            channel: Название канала
+            opened_at: Время размыкания цепи, которое видел воркер
+            ttl: Время жизни отметки о переходе в секундах
+
+        Returns:
+            True если переход выполнил этот воркер
+        """
+
+    @abstractmethod
+    def record(self, channel: str, bucket: int, success: bool, ttl: float) -> None:
+        """
+        Учитывает результат вызова в корзине скользящего окна.
+
+        Args:
+            channel: Название канала
+            bucket: Номер временной корзины
+            success: Успешен ли вызов
+            ttl: Время жизни корзины в секундах
+        """
+
+    @abstractmethod
+    def get_counts(self, channel: str, buckets: list[int]) -> tuple[int, int]:
+        """
+        Суммирует счетчики по корзинам.
+
+        Returns:
+            Кортеж (успехи, ошибки)
+        """
+
+    @abstractmethod
+    def acquire_probe(self, channel: str, changed_at: float, limit: int, ttl: float) -> bool:
+        """
+        Занимает слот пробного вызова в состоянии half-open.
+
+        Args:
+            channel: Название канала
+            changed_at: Время размыкания цепи (слоты считаются отдельно для каждого размыкания)
+            limit: Максимальное количество пробных вызовов
+            ttl: Время жизни счетчика в секундах
+
+        Returns:
+            True если слот получен
+        """
+
+    @abstractmethod
+    def release_probe(self, channel: str, changed_at: float) -> None:
+        """Освобождает слот пробного вызова, который так и не был выполнен."""
+
+
+class InMemoryCircuitStateStore(CircuitStateStore):
+    """Хранилище состояния в памяти процесса."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Инициализирует пустое хранилище.
+
+        Args:
+            clock: Источник времени для срока действия слотов пробных вызовов
+        """
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._states: dict[str, tuple[str, float]] = {}
+        self._buckets: dict[tuple[str, int], list[int]] = {}
+        # (канал, время размыкания цепи) → (занято слотов, срок действия по clock)
+        self._probes: dict[tuple[str, float], tuple[int, float]] = {}
+
+    def get_state(self, channel: str) -> tuple[str, float]:
+        return self._states.get(channel, (CircuitBreaker.STATE_CLOSED, 0.0))
+
+    def set_state(self, channel: str, state: str, changed_at: float) -> None:
+        with self._lock:
+            self._states[channel] = (state, changed_at)
+            self._probes = {
+                key: value
+                for key, value in self._probes.items()
+                if key[0] != channel or key[1] == changed_at
+            }
+
+    def begin_half_open(self, channel: str, opened_at: float, ttl: float) -> bool:
+        with self._lock:
+            if self._states.get(channel) != (CircuitBreaker.STATE_OPEN, opened_at):
+                return False
+            self._states[channel] = (CircuitBreaker.STATE_HALF_OPEN, opened_at)
+            return True
+
+    def record(self, channel: str, bucket: int, success: bool, ttl: float) -> None:
+        with self._lock:
+            counts = self._buckets.setdefault((channel, bucket), [0, 0])
+            counts[0 if success else 1] += 1
+            # Удаляем устаревшие корзины, чтобы память не росла
+            if len(self._buckets) > 1024:
+                newest = max(key[1] for key in self._buckets)
+                self._buckets = {
+                    key: value for key, value in self._buckets.items() if newest - key[1] < 1024
+                }
+
+    def get_counts(self, channel: str, buckets: list[int]) -> tuple[int, int]:
+        successes = failures = 0
+        with self._lock:
+            for bucket in buckets:
+                counts = self._buckets.get((channel, bucket))
+                if counts:
+                    successes += counts[0]
+                    failures += counts[1]
+        return successes, failures
+
+    def acquire_probe(self, channel: str, changed_at: float, limit: int, ttl: float) -> bool:
+        with self._lock:
+            key = (channel, changed_at)
+            now = self.clock()
+            count, expires_at = self._probes.get(key, (0, now + ttl))
+            if expires_at <= now:
+                # Как и счетчик в кэше: слоты пробных вызовов, не вернувших
+                # результат за ttl, освобождаются
+                count, expires_at = 0, now + ttl
+            if count >= limit:
+                return False
+            self._probes[key] = (count + 1, expires_at)
+            return True
+
+    def release_probe(self, channel: str, changed_at: float) -> None:
+        with self._lock:
+            key = (channel, changed_at)
+            if key in self._probes:
+                count, expires_at = self._probes[key]
+                self._probes[key] = (max(count - 1, 0), expires_at)
+
+
+class CacheCircuitStateStore(CircuitStateStore):
+    """
+    Хранилище состояния в кэше Django.
+
+    С RedisCache состояние общее для всех воркеров; все счетчики обновляются
+    атомарными add/incr, поэтому в тестах подходит LocMemCache.
+    """
+
+    KEY_PREFIX = "notifications:circuit"
+
+    def __init__(self, cache_alias: str = "default"):
+        """
+        Инициализирует хранилище.
+
+        Args:
+            cache_alias: Алиас кэша из settings.CACHES
+        """
+        self.cache = caches[cache_alias]
+
+    def get_state(self, channel: str) -> tuple[str, float]:
+        value = self.cache.get(f"{self.KEY_PREFIX}:{channel}:state")
+        if value is None:
+            return CircuitBreaker.STATE_CLOSED, 0.0
+        return value[0], value[1]
+
+    def set_state(self, channel: str, state: str, changed_at: float) -> None:
+        self.cache.set(f"{self.KEY_PREFIX}:{channel}:state", (state, changed_at), timeout=None)
+
+    def begin_half_open(self, channel: str, opened_at: float, ttl: float) -> bool:
+        # add атомарен: отметку для данного размыкания создает только один воркер
+        if not self.cache.add(f"{self.KEY_PREFIX}:{channel}:half-open:{opened_at}", 1, ttl):
+            return False
+        self.set_state(channel, CircuitBreaker.STATE_HALF_OPEN, opened_at)
+        return True
+
+    def record(self, channel: str, bucket: int, success: bool, ttl: float) -> None:
+        key = f"{self.KEY_PREFIX}:{channel}:{bucket}:{'ok' if success else 'fail'}"
+        self._incr(key, ttl)
+
+    def get_counts(self, channel: str, buckets: list[int]) -> tuple[int, int]:
+        keys = [
+            f"{self.KEY_PREFIX}:{channel}:{bucket}:{kind}"
+            for bucket in buckets
+            for kind in ("ok", "fail")
+        ]
+        values = self.cache.get_many(keys)
+        successes = sum(value for key, value in values.items() if key.endswith(":ok"))
+        failures = sum(value for key, value in values.items() if key.endswith(":fail"))
+        return successes, failures
+
+    def acquire_probe(self, channel: str, changed_at: float, limit: int, ttl: float) -> bool:
+        key = f"{self.KEY_PREFIX}:{channel}:probes:{changed_at}"
+        return self._incr(key, ttl) <= limit
+
+    def release_probe(self, channel: str, changed_at: float) -> None:
+        try:
+            self.cache.decr(f"{self.KEY_PREFIX}:{channel}:probes:{changed_at}")
+        except ValueError:
+            # Счетчик уже истек
+            pass
+
+    def _incr(self, key: str, ttl: float) -> int:
+        """Атомарно увеличивает счетчик, создавая его при необходимости."""
+        self.cache.add(key, 0, timeout=ttl)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Ключ истек между add и incr
+            self.cache.add(key, 1, timeout=ttl)
+            return 1
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker для канала доставки.
+
+    Состояния:
+    - closed: вызовы разрешены, результаты учитываются в скользящем окне.
+      Если в окне набралось не меньше min_requests вызовов и доля ошибок
+      не меньше failure_rate_threshold - цепь размыкается (open).
+    - open: вызовы запрещены в течение open_duration секунд.
+    - half_open: разрешено не больше half_open_probes пробных вызовов.
+      Успешный пробный вызов замыкает цепь, ошибка снова размыкает.
+      Время перехода в half-open остается временем размыкания, поэтому
+      все воркеры делят одни и те же слоты пробных вызовов.
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        channel: str,
+        store: CircuitStateStore,
+        failure_rate_threshold: float = 0.5,
+        min_requests: int = 20,
+        window: float = 60.0,
+        buckets: int = 10,
+        open_duration: float = 30.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Инициализирует circuit breaker.
+
+        Args:
+            channel: Название канала
+            store: Хранилище состояния
+            failure_rate_threshold: Доля ошибок для размыкания цепи
+            min_requests: Минимальное количество вызовов в окне для оценки доли ошибок
+            window: Длина скользящего окна в секундах
+            buckets: Количество корзин в окне
+            open_duration: Время в состоянии open в секундах
+            half_open_probes: Количество пробных вызовов в состоянии half-open
+            clock: Источник времени (unix time, общий для всех воркеров)
+        """
+        self.channel = channel
+        self.store = store
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.bucket_size = window / buckets
+        self.buckets = buckets
+        self.open_duration = open_duration
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние цепи с учетом истечения open_duration."""
+        state, changed_at = self.store.get_state(self.channel)
+        if state == self.STATE_OPEN and self.clock() - changed_at >= self.open_duration:
+            return self.STATE_HALF_OPEN
+        return state
+
+    def allow_request(self) -> bool:
+        """
+        Проверяет, можно ли вызвать канал.
+
+        Returns:
+            True если вызов разрешен (в том числе как пробный)
+        """
+        state, changed_at = self.store.get_state(self.channel)
+        if state == self.STATE_CLOSED:
+            return True
+
+        now = self.clock()
+        if state == self.STATE_OPEN:
+            if now - changed_at < self.open_duration:
+                return False
+            if self.store.begin_half_open(self.channel, changed_at, ttl=self.open_duration):
+                logger.info(f"Circuit for channel {self.channel} -> {self.STATE_HALF_OPEN}")
+
+        return self.store.acquire_probe(
+            self.channel,
+            changed_at,
+            self.half_open_probes,
+            ttl=self.open_duration,
+        )
+
+    def release_probe(self) -> None:
+        """
+        Возвращает слот пробного вызова, разрешенного allow_request, но не выполненного.
+
+        Вызывается, если канал не был вызван (отправка отложена лимитом скорости,
+        хеджированная отправка не запущена или отменена): без этого в состоянии
+        half-open слот оставался бы занятым до истечения его ttl.
+        """
+        state, changed_at = self.store.get_state(self.channel)
+        if state != self.STATE_CLOSED:
+            self.store.release_probe(self.channel, changed_at)
+
+    def record_success(self) -> None:
+        """Учитывает успешный вызов."""
+        state, _ = self.store.get_state(self.channel)
+        now = self.clock()
+        if state != self.STATE_CLOSED:
+            self._transition(self.STATE_CLOSED, now)
+        self.store.record(self.channel, self._bucket(now), True, ttl=self.window * 2)
+
+    def record_failure(self) -> None:
+        """Учитывает ошибку вызова и при необходимости размыкает цепь."""
+        state, changed_at = self.store.get_state(self.channel)
+        now = self.clock()
+        if state != self.STATE_CLOSED:
+            # Пробный вызов не удался - снова размыкаем цепь
+            self._transition(self.STATE_OPEN, now)
+            return
+
+        self.store.record(self.channel, self._bucket(now), False, ttl=self.window * 2)
+
+        successes, failures = self.store.get_counts(
+            self.channel, self._window_buckets(now, changed_at)
+        )
+        total = successes + failures
+        if total >= self.min_requests and failures / total >= self.failure_rate_threshold:
+            logger.warning(
+                f"Circuit for channel {self.channel} opened: "
+                f"{failures}/{total} failures in {self.window}s window",
+            )
+            self._transition(self.STATE_OPEN, now)
+
+    def _transition(self, state: str, changed_at: float) -> None:
+        """Переводит цепь в новое состояние."""
+        logger.info(f"Circuit for channel {self.channel} -> {state}")
+        self.store.set_state(self.channel, state, changed_at)
+
+    def _bucket(self, now: float) -> int:
+        """Возвращает номер корзины для момента времени."""
+        return int(now // self.bucket_size)
+
+    def _window_buckets(self, now: float, closed_at: float) -> list[int]:
+        """Корзины текущего окна, начиная с момента последнего замыкания цепи."""
+        current = self._bucket(now)
+        first = max(current - self.buckets + 1, self._bucket(closed_at))
+        return list(range(first, current + 1))
+
+
+_memory_store: InMemoryCircuitStateStore | None = None
+
+
+def get_circuit_state_store() -> CircuitStateStore:
+    """
+    Возвращает хранилище состояния согласно NOTIFICATION_CIRCUIT_BREAKER_STORE.
+
+    Хранилище в памяти одно на процесс, чтобы состояние сохранялось между
+    экземплярами NotificationService.
+    """
+    global _memory_store
+    if settings.NOTIFICATION_CIRCUIT_BREAKER_STORE == "cache":
+        return CacheCircuitStateStore(settings.NOTIFICATION_CIRCUIT_BREAKER_CACHE_ALIAS)
+    if _memory_store is None:
+        _memory_store = InMemoryCircuitStateStore()
+    return _memory_store
+
+
+def build_circuit_breakers(channels: list[str]) -> dict[str, CircuitBreaker]:
+    """
+    Создает circuit breaker для каждого канала согласно настройкам.
+
+    Args:
+        channels: Названия каналов
+
+    Returns:
+        Словарь канал → CircuitBreaker (пустой, если circuit breaker выключен)
+    """
+    if not settings.NOTIFICATION_CIRCUIT_BREAKER_ENABLED:
+        return {}
+
+    store = get_circuit_state_store()
+    return {
+        channel: CircuitBreaker(
+            channel,
+            store,
+            failure_rate_threshold=settings.NOTIFICATION_CIRCUIT_BREAKER_FAILURE_RATE,
+            min_requests=settings.NOTIFICATION_CIRCUIT_BREAKER_MIN_REQUESTS,
+            window=settings.NOTIFICATION_CIRCUIT_BREAKER_WINDOW,
+            open_duration=settings.NOTIFICATION_CIRCUIT_BREAKER_OPEN_DURATION,
+            half_open_probes=settings.NOTIFICATION_CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+        )
+        for channel in channels
+    }
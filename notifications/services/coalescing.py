@@ -0,0 +1,379 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from notification_service.sqlite import submit_write
+from notifications.models import CoalescedNotification, Notification
+from notifications.services.leases import lease_deadline
+from notifications.services.status_cache import get_status_cache
+from notifications.services.status_events import build_status_event, get_status_event_broker
+
+logger = logging.getLogger(__name__)
+
+# Поля уведомления, которые меняет объединение с дубликатом или сводкой
+COALESCED_FIELDS = [
+    "status",
+    "claimed_by",
+    "lease_expires_at",
+    "next_attempt_at",
+    "updated_at",
+]
+
+# Итоговые статусы, при которых хэш уведомления освобождается: оно не доставлено,
+# и следующее такое же уведомление должно быть отправлено
+RELEASED_STATUSES = [Notification.STATUS_FAILED, Notification.STATUS_EXPIRED]
+
+# Порядок приоритетов: сводка получает наивысший приоритет своих уведомлений
+PRIORITY_ORDER = [priority for priority, _ in Notification.PRIORITY_CHOICES]
+
+
+def recipient_key(notification: Notification) -> tuple[str | None, str | None, str | None]:
+    """Адреса получателя уведомления во всех каналах."""
+    return (notification.to_email, notification.to_phone, notification.to_telegram_chat_id)
+
+
+def content_hash(notification: Notification) -> str:
+    """Хэш получателя, темы и текста уведомления для поиска точных дубликатов."""
+    payload = [*recipient_key(notification), notification.subject, notification.body]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode()).hexdigest()
+
+
+class DedupStore(ABC):
+    """Окно недавно отправленных уведомлений: хэш содержимого → UUID уведомления."""
+
+    @abstractmethod
+    def claim(self, key: str, notification_id: str, ttl: float) -> str:
+        """
+        Закрепляет хэш за уведомлением на ttl секунд, если он еще свободен.
+
+        Args:
+            key: Хэш содержимого уведомления
+            notification_id: UUID уведомления
+            ttl: Длина окна в секундах
+
+        Returns:
+            UUID уведомления, за которым закреплен хэш (notification_id,
+            если хэш был свободен или уже принадлежал этому уведомлению)
+        """
+
+    @abstractmethod
+    def release(self, key: str, notification_id: str) -> None:
+        """Освобождает хэш, если он закреплен за уведомлением notification_id."""
+
+
+class InMemoryDedupStore(DedupStore):
+    """Окно в памяти процесса: дубликаты находятся в пределах одного воркера."""
+
+    def __init__(self, max_size: int = 100000, clock: Callable[[], float] = time.monotonic):
+        """
+        Инициализирует пустое окно.
+
+        Args:
+            max_size: Максимальное количество хэшей (самые старые вытесняются)
+            clock: Источник времени в секундах
+        """
+        self.max_size = max_size
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def claim(self, key: str, notification_id: str, ttl: float) -> str:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+            self._entries[key] = (now + ttl, notification_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return notification_id
+
+    def release(self, key: str, notification_id: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == notification_id:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheDedupStore(DedupStore):
+    """
+    Окно в кэше Django: при RedisCache дубликаты находятся на всех воркерах.
+
+    Хэш закрепляется атомарным cache.add (SET NX в Redis).
+    """
+
+    KEY_PREFIX = "notifications:dedup"
+
+    def __init__(self, alias: str):
+        """
+        Инициализирует окно.
+
+        Args:
+            alias: Алиас кэша из settings.CACHES
+        """
+        self.cache = caches[alias]
+
+    def claim(self, key: str, notification_id: str, ttl: float) -> str:
+        cache_key = f"{self.KEY_PREFIX}:{key}"
+        try:
+            if self.cache.add(cache_key, notification_id, timeout=ttl):
+                return notification_id
+            # Запись могла истечь между add и get - тогда уведомление не дубликат
+            return self.cache.get(cache_key) or notification_id
+        except Exception as e:
+            # Недоступный кэш не должен останавливать доставку: дубликат будет отправлен
+            logger.warning(f"Dedup window check failed, delivering notification: {e}")
+            return notification_id
+
+    def release(self, key: str, notification_id: str) -> None:
+        cache_key = f"{self.KEY_PREFIX}:{key}"
+        try:
+            # Не атомарно: хэш, закрепленный между get и delete за другим
+            # уведомлением, будет освобожден, и возможен один лишний дубликат
+            if self.cache.get(cache_key) == notification_id:
+                self.cache.delete(cache_key)
+        except Exception as e:
+            logger.warning(f"Dedup window release failed: {e}")
+
+
+class NotificationCoalescer:
+    """
+    Этап объединения уведомлений перед отправкой.
+
+    Точные дубликаты (тот же получатель, тема и текст в пределах окна
+    dedup_window) не отправляются: им ставится статус coalesced и связь
+    CoalescedNotification с первым уведомлением. Если в пачке digest_min_size
+    или больше уведомлений одному получателю с одинаковыми каналами, вместо
+    них создается и отправляется одна сводка, а исходные уведомления
+    получают статус coalesced и связь со сводкой.
+    """
+
+    def __init__(
+        self,
+        store: DedupStore,
+        dedup_window: float = 0.0,
+        digest_min_size: int = 0,
+        digest_subject: str = "{count}",
+    ):
+        """
+        Инициализирует этап.
+
+        Args:
+            store: Окно недавно отправленных уведомлений
+            dedup_window: Длина окна дубликатов в секундах (0 - не искать дубликаты)
+            digest_min_size: С какого числа уведомлений получателю в пачке
+                собирать сводку (0 - не собирать)
+            digest_subject: Шаблон темы сводки с полем {count}
+        """
+        self.store = store
+        self.dedup_window = dedup_window
+        self.digest_min_size = digest_min_size
+        self.digest_subject = digest_subject
+
+    def coalesce(self, notifications: list[Notification]) -> list[Notification]:
+        """
+        Убирает дубликаты и собирает сводки.
+
+        Сводки сохраняются в статусе pending с арендой того же владельца, что
+        у исходных уведомлений, объединенные уведомления - в статусе coalesced.
+
+        Args:
+            notifications: Уведомления, ожидающие отправки
+
+        Returns:
+            Уведомления для отправки в порядке создания: оставшиеся исходные
+            и сводки на месте первого объединенного в них уведомления
+        """
+        links = []
+        remaining = []
+        # Хэш закрепляется за самым ранним уведомлением, сводка перечисляет их по порядку
+        for notification in sorted(notifications, key=lambda n: n.created_at):
+            owner = self._find_duplicate(notification)
+            if owner is None:
+                remaining.append(notification)
+            else:
+                links.append(CoalescedNotification(notification=notification, digest_id=owner))
+
+        groups: dict[tuple, list[Notification]] = {}
+        if self.digest_min_size > 1:
+            for notification in remaining:
+                key = (*recipient_key(notification), tuple(notification.channels))
+                groups.setdefault(key, []).append(notification)
+
+        digests = []
+        deliver = []
+        for notification in remaining:
+            members = groups.get((*recipient_key(notification), tuple(notification.channels)))
+            if members is None or len(members) < self.digest_min_size:
+                deliver.append(notification)
+            elif notification is members[0]:
+                digest = self._build_digest(members)
+                digests.append(digest)
+                deliver.append(digest)
+                links += [
+                    CoalescedNotification(notification=member, digest=digest) for member in members
+                ]
+
+        if not links:
+            return notifications
+
+        coalesced = [link.notification for link in links]
+        now = timezone.now()
+        for notification in coalesced:
+            notification.status = Notification.STATUS_COALESCED
+            notification.claimed_by = None
+            notification.lease_expires_at = None
+            notification.next_attempt_at = None
+            notification.updated_at = now
+
+        def save():
+            with transaction.atomic():
+                Notification.objects.bulk_create(digests)
+                Notification.objects.bulk_update(coalesced, COALESCED_FIELDS)
+                CoalescedNotification.objects.bulk_create(links)
+
+        submit_write(save)
+        self._publish(coalesced)
+
+        logger.info(
+            f"Coalesced {len(coalesced)} of {len(notifications)} notifications, "
+            f"created {len(digests)} digests",
+        )
+        return deliver
+
+    def release(self, notifications: list[Notification]) -> None:
+        """
+        Освобождает хэши недоставленных уведомлений.
+
+        Для уведомлений в статусе failed или expired (по значению в памяти)
+        хэш освобождается, если закреплен за ними; для таких сводок -
+        хэши уведомлений, объединенных в них.
+
+        Args:
+            notifications: Уведомления после отправки или истечения срока
+        """
+        if not self.dedup_window:
+            return
+        released = [n for n in notifications if n.status in RELEASED_STATUSES]
+        if not released:
+            return
+        members = Notification.objects.filter(
+            coalesced_into__digest_id__in=[notification.id for notification in released],
+        )
+        for notification in [*released, *members]:
+            self.store.release(content_hash(notification), str(notification.id))
+
+    def _find_duplicate(self, notification: Notification) -> str | None:
+        """Возвращает UUID уведомления, дубликатом которого является это, или None."""
+        if not self.dedup_window:
+            return None
+        notification_id = str(notification.id)
+        owner = self.store.claim(content_hash(notification), notification_id, self.dedup_window)
+        return None if owner == notification_id else owner
+
+    def _build_digest(self, members: list[Notification]) -> Notification:
+        """Создает (не сохраняя) сводку уведомлений одного получателя."""
+        first = members[0]
+        expires_at = [member.expires_at for member in members]
+        return Notification(
+            to_email=first.to_email,
+            to_phone=first.to_phone,
+            to_telegram_chat_id=first.to_telegram_chat_id,
+            subject=self.digest_subject.format(count=len(members)),
+            body="\n\n".join(
+                f"{member.subject}\n{member.body}" if member.subject else member.body
+                for member in members
+            ),
+            channels=first.channels,
+            priority=min((member.priority for member in members), key=PRIORITY_ORDER.index),
+            status=Notification.STATUS_PENDING,
+            claimed_by=first.claimed_by,
+            lease_expires_at=lease_deadline(),
+            # Сводка актуальна, пока актуально хотя бы одно из уведомлений
+            expires_at=None if None in expires_at else max(expires_at),
+        )
+
+    @staticmethod
+    def _publish(notifications: list[Notification]) -> None:
+        """Обновляет кэш статусов и публикует события объединенных уведомлений."""
+        status_cache = get_status_cache()
+        if status_cache is not None:
+            status_cache.update_many([(notification, []) for notification in notifications])
+        get_status_event_broker().publish_many(
+            [build_status_event(notification, []) for notification in notifications],
+        )
+
+
+_memory_store: InMemoryDedupStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_dedup_store() -> DedupStore:
+    """
+    Возвращает окно дубликатов согласно NOTIFICATION_DEDUP_STORE.
+
+    Окно в памяти одно на процесс, чтобы сохранялось между пачками.
+    """
+    global _memory_store
+    if settings.NOTIFICATION_DEDUP_STORE == "cache":
+        return CacheDedupStore(settings.NOTIFICATION_DEDUP_CACHE_ALIAS)
+    with _store_lock:
+        if _memory_store is None:
+            _memory_store = InMemoryDedupStore()
+        return _memory_store
+
+
+def get_notification_coalescer() -> NotificationCoalescer | None:
+    """
+    Возвращает этап объединения уведомлений согласно настройкам.
+
+    Returns:
+        NotificationCoalescer или None, если дубликаты и сводки выключены
+    """
+    if not settings.NOTIFICATION_DEDUP_WINDOW and settings.NOTIFICATION_DIGEST_MIN_SIZE <= 1:
+        return None
+    return NotificationCoalescer(
+        get_dedup_store(),
+        dedup_window=settings.NOTIFICATION_DEDUP_WINDOW,
+        digest_min_size=settings.NOTIFICATION_DIGEST_MIN_SIZE,
+        digest_subject=settings.NOTIFICATION_DIGEST_SUBJECT,
+    )
+
+
+def coalesce_notifications(notifications: list[Notification]) -> list[Notification]:
+    """
+    Пропускает уведомления через этап объединения, если он включен.
+
+    Returns:
+        Уведомления для отправки (см. NotificationCoalescer.coalesce)
+    """
+    coalescer = get_notification_coalescer()
+    if coalescer is None or not notifications:
+        return notifications
+    return coalescer.coalesce(notifications)
+
+
+def release_dedup_claims(notifications: list[Notification]) -> None:
+    """
+    Освобождает хэши уведомлений, завершившихся статусом failed или expired.
+
+    Вызывается после итоговой записи статуса (см. NotificationCoalescer.release).
+    """
+    coalescer = get_notification_coalescer()
+    if coalescer is not None and notifications:
+        coalescer.release(notifications)
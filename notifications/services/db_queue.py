@@ -0,0 +1,196 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notification_service.sqlite import submit_write
+from notifications.models import Notification
+from notifications.services.coalescing import coalesce_notifications, release_dedup_claims
+from notifications.services.leases import lease_deadline
+from notifications.services.notification_service import NotificationService
+from notifications.services.status_cache import get_status_cache
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseNotificationQueue:
+    """
+    Очередь отправки поверх таблицы уведомлений.
+
+    Элемент очереди - уведомление в статусе pending, которое никто не забрал
+    (claimed_by is null). Воркер забирает пачку, проставляя свой токен в
+    claimed_by: на PostgreSQL строки выбираются с FOR UPDATE SKIP LOCKED,
+    на SQLite - условным UPDATE по подзапросу (запись в SQLite и так
+    сериализована). Выборка идет по частичному индексу notification_queue_idx.
+    Захват ставит аренду: если воркер упадет, не начав отправку, reaper
+    вернет уведомление в очередь после lease_expires_at.
+    """
+
+    def __init__(self, batch_size: int = 20):
+        """
+        Инициализирует очередь.
+
+        Args:
+            batch_size: Сколько уведомлений забирается за раз
+        """
+        self.batch_size = batch_size
+
+    def depth(self) -> int:
+        """Количество уведомлений, ожидающих воркера."""
+        return self._available().count()
+
+    def claim(self, worker_id: str) -> list[Notification]:
+        """
+        Забирает пачку уведомлений для воркера.
+
+        Args:
+            worker_id: Идентификатор воркера
+
+        Returns:
+            Забранные уведомления в порядке создания
+        """
+        token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+        lease_expires_at = lease_deadline()
+        batch = self._available().order_by("created_at", "id")
+
+        def claim():
+            if connection.features.has_select_for_update_skip_locked:
+                with transaction.atomic():
+                    ids = list(
+                        batch.select_for_update(skip_locked=True).values_list("id", flat=True)[
+                            : self.batch_size
+                        ],
+                    )
+                    if ids:
+                        Notification.objects.filter(id__in=ids).update(
+                            claimed_by=token,
+                            lease_expires_at=lease_expires_at,
+                        )
+            else:
+                # Повторное условие claimed_by is null делает захват безопасным,
+                # даже если подзапрос увидел строки, забранные конкурентом
+                self._available().filter(
+                    id__in=batch.values("id")[: self.batch_size],
+                ).update(claimed_by=token, lease_expires_at=lease_expires_at)
+
+        submit_write(claim)
+
+        return list(
+            Notification.objects.filter(
+                claimed_by=token,
+                status=Notification.STATUS_PENDING,
+            ).order_by("created_at", "id"),
+        )
+
+    def release(self, notifications: list[Notification]) -> None:
+        """Возвращает в очередь уведомления, которые воркер не начал обрабатывать."""
+        submit_write(
+            lambda: Notification.objects.filter(
+                id__in=[notification.id for notification in notifications],
+                status=Notification.STATUS_PENDING,
+            ).update(claimed_by=None, lease_expires_at=None),
+        )
+
+    def fail(self, notification: Notification) -> None:
+        """Помечает уведомление failed после неожиданной ошибки обработки."""
+        submit_write(
+            lambda: Notification.objects.filter(id=notification.id)
+            .exclude(status__in=Notification.TERMINAL_STATUSES)
+            .update(status=Notification.STATUS_FAILED, lease_expires_at=None),
+        )
+        notification.status = Notification.STATUS_FAILED
+        release_dedup_claims([notification])
+        status_cache = get_status_cache()
+        if status_cache is not None:
+            status_cache.invalidate([notification.id])
+
+    @staticmethod
+    def _available():
+        # Уведомления с запланированным повтором ждут наступления next_attempt_at
+        return Notification.objects.filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()),
+            status=Notification.STATUS_PENDING,
+            claimed_by__isnull=True,
+        )
+
+
+class DeliveryWorker:
+    """
+    Воркер очереди в БД.
+
+    В цикле забирает пачку уведомлений, объединяет дубликаты и уведомления
+    одному получателю (см. notifications.services.coalescing), отправляет каждое
+    через NotificationService.send_notification и при пустой очереди ждет
+    poll_interval секунд. При остановке возвращает в очередь необработанный
+    остаток пачки.
+    """
+
+    def __init__(
+        self,
+        queue: DatabaseNotificationQueue,
+        stop_event: threading.Event,
+        poll_interval: float = 1.0,
+        name: str = "0",
+    ):
+        """
+        Инициализирует воркер.
+
+        Args:
+            queue: Очередь в БД
+            stop_event: Событие остановки
+            poll_interval: Пауза при пустой очереди в секундах
+            name: Номер воркера внутри процесса
+        """
+        self.queue = queue
+        self.stop_event = stop_event
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{name}"
+        self.processed = 0
+
+    def run(self) -> None:
+        """Обрабатывает очередь до остановки."""
+        service = NotificationService()
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    claimed = self.run_once(service)
+                except Exception as e:
+                    # Например, БД временно недоступна или заблокирована
+                    logger.error(f"Delivery worker {self.worker_id} failed: {e}", exc_info=True)
+                    claimed = 0
+                if not claimed:
+                    self.stop_event.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def run_once(self, service: NotificationService | None = None) -> int:
+        """
+        Забирает и обрабатывает одну пачку.
+
+        Returns:
+            Количество забранных уведомлений (0 - очередь пуста)
+        """
+        service = service or NotificationService()
+        claimed = self.queue.claim(self.worker_id)
+        notifications = coalesce_notifications(claimed)
+        for index, notification in enumerate(notifications):
+            if self.stop_event.is_set():
+                self.queue.release(notifications[index:])
+                break
+            try:
+                service.send_notification(notification)
+                release_dedup_claims([notification])
+            except Exception as e:
+                logger.error(
+                    f"Error processing notification {notification.id}: {e}",
+                    exc_info=True,
+                )
+                self.queue.fail(notification)
+            self.processed += 1
+        return len(claimed)
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+
+from notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IdempotencyRecord:
+    """Закэшированное соответствие request_id → уведомление."""
+
+    id: str
+    status: str
+    used_channel: str | None = None
+
+    @classmethod
+    def from_notification(cls, notification: Notification) -> "IdempotencyRecord":
+        """Создает запись по уведомлению."""
+        return cls(
+            id=str(notification.id),
+            status=notification.status,
+            used_channel=notification.used_channel,
+        )
+
+    def to_response(self) -> dict[str, Any]:
+        """Возвращает данные в формате NotificationResponseSerializer."""
+        return {"id": self.id, "status": self.status, "used_channel": self.used_channel}
+
+
+class IdempotencyCache:
+    """
+    Кэш недавних request_id.
+
+    Локальный уровень - ограниченный LRU с TTL в памяти процесса. Опционально
+    используется общий кэш Django (например, Redis), чтобы повтор запроса,
+    попавший на другой процесс API, тоже обслуживался без обращения к БД.
+    """
+
+    KEY_PREFIX = "notifications:idempotency"
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        ttl: float = 300.0,
+        shared_cache_alias: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Инициализирует кэш.
+
+        Args:
+            max_size: Максимальное количество записей в локальном LRU
+            ttl: Время жизни записи в секундах
+            shared_cache_alias: Алиас общего кэша из settings.CACHES (None - без него)
+            clock: Источник времени для локального TTL
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_cache = caches[shared_cache_alias] if shared_cache_alias else None
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, IdempotencyRecord]] = OrderedDict()
+
+    def get(self, request_id: str) -> IdempotencyRecord | None:
+        """
+        Возвращает запись по request_id.
+
+        Args:
+            request_id: Идентификатор запроса
+
+        Returns:
+            IdempotencyRecord или None, если записи нет или она истекла
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(request_id)
+            if entry is not None:
+                expires_at, record = entry
+                if expires_at > now:
+                    self._entries.move_to_end(request_id)
+                    return record
+                del self._entries[request_id]
+
+        if self.shared_cache is None:
+            return None
+
+        record = self.shared_cache.get(f"{self.KEY_PREFIX}:{request_id}")
+        if record is not None:
+            self._set_local(request_id, record)
+        return record
+
+    def set(self, request_id: str, record: IdempotencyRecord) -> None:
+        """Сохраняет запись в локальный и общий кэш."""
+        self._set_local(request_id, record)
+        if self.shared_cache is not None:
+            self.shared_cache.set(f"{self.KEY_PREFIX}:{request_id}", record, timeout=self.ttl)
+
+    def clear(self) -> None:
+        """Очищает локальный кэш."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _set_local(self, request_id: str, record: IdempotencyRecord) -> None:
+        with self._lock:
+            self._entries[request_id] = (self.clock() + self.ttl, record)
+            self._entries.move_to_end(request_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+_cache: IdempotencyCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    """Возвращает кэш request_id текущего процесса."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = IdempotencyCache(
+                max_size=settings.NOTIFICATION_IDEMPOTENCY_CACHE_SIZE,
+                ttl=settings.NOTIFICATION_IDEMPOTENCY_CACHE_TTL,
+                shared_cache_alias=settings.NOTIFICATION_IDEMPOTENCY_CACHE_ALIAS,
+            )
+        return _cache
+
+
+def create_or_get_notification(
+    save: Callable[[], Notification],
+    request_id: str | None,
+) -> tuple[Notification, bool]:
+    """
+    Атомарно создает уведомление или возвращает существующее по request_id.
+
+    Вместо проверки SELECT перед INSERT сразу выполняется INSERT: при конфликте
+    уникального request_id (конкурентный повтор запроса) транзакция
+    откатывается и возвращается уже созданное уведомление.
+
+    Args:
+        save: Функция создания уведомления (например, serializer.save)
+        request_id: Идентификатор запроса для идемпотентности
+
+    Returns:
+        Кортеж (уведомление, создано ли оно этим вызовом)
+    """
+    try:
+        with transaction.atomic():
+            return save(), True
+    except IntegrityError:
+        if not request_id:
+            raise
+        existing = Notification.objects.filter(request_id=request_id).first()
+        if existing is None:
+            raise
+        logger.info(
+            f"Idempotency check: notification with request_id={request_id} "
+            f"created concurrently: {existing.id}",
+        )
+        return existing, False
@@ -0,0 +1,67 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.models import LeaderLease
+from notifications.services.leases import worker_identity
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Выбор лидера через аренду в таблице LeaderLease.
+
+    Захват и продление - один условный UPDATE (строка свободна, истекла или уже
+    наша), поэтому работает на любой БД без блокировок уровня приложения.
+    Лидер должен продлевать аренду чаще, чем раз в ttl; если процесс завис или
+    упал, после истечения аренды лидером станет другой узел.
+    """
+
+    def __init__(self, name: str, ttl: float, owner: str | None = None):
+        """
+        Инициализирует выбор лидера.
+
+        Args:
+            name: Роль, за которую идут выборы
+            ttl: Срок аренды в секундах
+            owner: Идентификатор участника (по умолчанию хост, PID и случайный суффикс)
+        """
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{worker_identity()}:{uuid.uuid4().hex[:8]}"
+
+    def try_acquire(self) -> bool:
+        """
+        Захватывает или продлевает лидерство.
+
+        Returns:
+            True, если этот участник - лидер на следующие ttl секунд
+        """
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.ttl)
+
+        updated = (
+            LeaderLease.objects.filter(name=self.name)
+            .filter(Q(owner=self.owner) | Q(expires_at__lte=now))
+            .update(owner=self.owner, expires_at=expires_at)
+        )
+        if updated:
+            return True
+
+        try:
+            with transaction.atomic():
+                LeaderLease.objects.create(name=self.name, owner=self.owner, expires_at=expires_at)
+        except IntegrityError:
+            # Роль занята действующим лидером
+            return False
+        logger.info(f"{self.owner} became {self.name} leader")
+        return True
+
+    def release(self) -> None:
+        """Отдает лидерство, чтобы другой узел не ждал истечения аренды."""
+        LeaderLease.objects.filter(name=self.name, owner=self.owner).delete()
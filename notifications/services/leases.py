@@ -0,0 +1,22 @@
+import os
+import socket
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def worker_identity() -> str:
+    """Идентификатор текущего процесса-воркера: хост и PID."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def lease_deadline(start: datetime | None = None) -> datetime:
+    """
+    Срок аренды, начинающейся в start (по умолчанию сейчас).
+
+    NOTIFICATION_LEASE_SECONDS должен превышать время полной доставки одного
+    уведомления по всем каналам, иначе reaper вернет в очередь уведомление,
+    которое воркер еще отправляет.
+    """
+    return (start or timezone.now()) + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
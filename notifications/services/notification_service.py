@@ -1,96 +1,433 @@
+import asyncio
 import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TypeVar
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from notifications.channels import EmailChannelSender, SmsChannelSender, TelegramChannelSender
+from notification_service.sqlite import get_sqlite_writer
+from notifications.channels import (
+    ERROR_RATE_LIMITED,
+    ERROR_TRANSIENT,
+    AsyncChannelSender,
+    ChannelResult,
+    ChannelSender,
+    build_channel_senders,
+    send_async,
+)
 from notifications.models import DeliveryAttempt, Notification
+from notifications.services.circuit_breaker import build_circuit_breakers
+from notifications.services.leases import lease_deadline, worker_identity
+from notifications.services.rate_limit import apply_rate_limits
+from notifications.services.retry import RetryPolicy
+from notifications.services.routing import (
+    AdaptiveChannelRouter,
+    get_channel_stats_tracker,
+    publish_channel_stats,
+)
+from notifications.services.status_cache import get_status_cache
+from notifications.services.status_events import build_status_event, get_status_event_broker
+
+T = TypeVar("T")
 
 logger = logging.getLogger(__name__)
 
+# Сообщение для попыток, пропущенных из-за разомкнутой цепи circuit breaker
+CIRCUIT_OPEN_MESSAGE = "circuit_open"
+
+# Функция записи попытки: (notification, channel, success, error_message, status=None)
+AttemptRecorder = Callable[..., object]
+
+# Поля уведомления, которые пишет итог доставки (доставлено, провалено или повтор)
+RESULT_FIELDS = [
+    "status",
+    "used_channel",
+    "retry_count",
+    "next_attempt_at",
+    "claimed_by",
+    "lease_expires_at",
+]
+
+
+def _claimable() -> Q:
+    """
+    Условие захвата: уведомление в pending или в in_progress с истекшей арендой.
+
+    Уведомление в in_progress с действующей арендой обрабатывает другой воркер.
+    """
+    lease_expired = Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=timezone.now())
+    return Q(status=Notification.STATUS_PENDING) | (
+        Q(status=Notification.STATUS_IN_PROGRESS) & lease_expired
+    )
+
+
+@dataclass
+class DeliveryOutcome:
+    """Итог прохода по каналам уведомления."""
+
+    used_channel: str | None = None
+    # Была ли среди неудач временная ошибка, после которой стоит повторить
+    transient_failure: bool = False
+    # Наибольшая подсказка провайдеров, через сколько секунд повторять
+    retry_after: float | None = None
+    # Проход остановлен, потому что истек срок актуальности (expires_at)
+    expired: bool = False
+    # Через сколько секунд повторить, если канал отклонил отправку по лимиту скорости
+    deferred: float | None = None
+
+    def add_failure(self, result: ChannelResult) -> None:
+        """Учитывает неуспешный результат отправки через канал."""
+        if not result.is_transient:
+            return
+        self.transient_failure = True
+        if result.retry_after is not None:
+            self.retry_after = max(self.retry_after or 0, result.retry_after)
+
 
 class NotificationService:
     """Сервис для отправки уведомлений с fallback по каналам."""
 
     DEFAULT_CHANNELS = ["email", "sms", "telegram"]
 
-    def __init__(self):
-        """Инициализирует сервис с адаптерами каналов."""
-        self.channel_senders = {
-            "email": EmailChannelSender(),
-            "sms": SmsChannelSender(),
-            "telegram": TelegramChannelSender(),
-        }
+    PERSISTENCE_IMMEDIATE = "immediate"
+    PERSISTENCE_COALESCED = "coalesced"
+
+    DELIVERY_SEQUENTIAL = "sequential"
+    DELIVERY_HEDGED = "hedged"
+    DELIVERY_BATCHED = "batched"
+
+    ROUTING_STATIC = "static"
+    ROUTING_ADAPTIVE = "adaptive"
+
+    def __init__(
+        self,
+        persistence_mode: str | None = None,
+        delivery_mode: str | None = None,
+        hedge_delay: float | None = None,
+        routing_policy: str | None = None,
+    ):
+        """
+        Инициализирует сервис с адаптерами каналов.
+
+        Args:
+            persistence_mode: Режим записи результатов доставки
+                (по умолчанию NOTIFICATION_PERSISTENCE_MODE)
+            delivery_mode: Режим прохода по каналам: sequential, hedged или batched
+                (по умолчанию NOTIFICATION_DELIVERY_MODE)
+            hedge_delay: Бюджет задержки канала в секундах для режима hedged
+                (по умолчанию NOTIFICATION_HEDGE_DELAY)
+            routing_policy: Порядок каналов для уведомлений без явного списка:
+                static или adaptive (по умолчанию NOTIFICATION_ROUTING_POLICY)
+        """
+        self.persistence_mode = persistence_mode or settings.NOTIFICATION_PERSISTENCE_MODE
+        self.delivery_mode = delivery_mode or settings.NOTIFICATION_DELIVERY_MODE
+        self.hedge_delay = (
+            hedge_delay if hedge_delay is not None else settings.NOTIFICATION_HEDGE_DELAY
+        )
+        self.stats_tracker = get_channel_stats_tracker()
+        self.channel_senders = apply_rate_limits(build_channel_senders(), self.stats_tracker)
+        self.circuit_breakers = build_circuit_breakers(list(self.channel_senders))
+        self.routing_policy = routing_policy or settings.NOTIFICATION_ROUTING_POLICY
+        self.router = AdaptiveChannelRouter(
+            self.stats_tracker,
+            exploration=settings.NOTIFICATION_ROUTING_EXPLORATION,
+        )
+        self.status_cache = get_status_cache()
+        self.status_events = get_status_event_broker()
+        self.writer = get_sqlite_writer()
+        self.lease_owner = worker_identity()
+        self.retry_policy = RetryPolicy.from_settings()
 
     def send_notification(self, notification: Notification) -> None:
         """
         Отправляет уведомление с fallback по каналам.
 
         Логика работы:
-        1. Устанавливает статус in_progress
+        1. Условно захватывает уведомление: статус in_progress и аренда воркера
+           (claimed_by, lease_expires_at), если его не держит другой воркер (см. _claim)
         2. Получает список каналов (из notification.channels или дефолтный)
         3. Для каждого канала последовательно:
+           - Если истек expires_at → статус=expired, остальные каналы не вызываются
            - Проверяет доступность
            - Если недоступен → создает failed attempt, переходит дальше
            - Пытается отправить
            - Если success → создает success attempt, статус=delivered, выходит
            - Если failed → создает failed attempt, переходит к следующему
-        4. Если все каналы провалились → статус=failed
+        4. Если все каналы провалились → статус=failed, а если среди ошибок была
+           временная и политика повторов позволяет - статус=pending с
+           next_attempt_at (повтор планирует вызывающий код, см. dispatch.schedule_retry)
+        5. Итоговая запись снимает аренду. Если воркер упал раньше, аренда
+           истечет и reaper вернет уведомление в очередь
+
+        В режиме coalesced попытки не пишутся по одной, а сохраняются вместе
+        с итоговым статусом одной транзакцией (см. _send_coalesced).
 
         Args:
             notification: Уведомление для отправки
         """
         logger.info(f"Starting notification delivery for {notification.id}")
 
-        # Обновляем статус на in_progress
+        if self.persistence_mode == self.PERSISTENCE_COALESCED:
+            self._send_coalesced(notification)
+            return
+
+        # Условный захват: in_progress и аренда воркера
+        if not self._claim(notification):
+            return
+        self._publish_status(notification)
+
+        outcome = self._deliver(notification, self._create_attempt)
+
+        self._apply_outcome(notification, outcome)
+        self._write(lambda: notification.save(update_fields=RESULT_FIELDS))
+        self._publish_status(notification)
+
+    def _send_coalesced(self, notification: Notification) -> None:
+        """
+        Отправляет уведомление с буферизацией записей в БД.
+
+        Вместо записи in_progress, отдельного INSERT на каждую попытку и
+        финального UPDATE выполняются две записи:
+        1. Условный UPDATE-захват (claim, см. _claim). Если процесс упадет во время
+           отправки, уведомление останется в in_progress до истечения аренды.
+        2. Одна транзакция: bulk_create всех попыток + итоговый статус и used_channel.
+
+        Args:
+            notification: Уведомление для отправки
+        """
+        if not self._claim(notification):
+            return
+
+        attempts: list[DeliveryAttempt] = []
+        self._publish_status(notification)
+        outcome = self._deliver(notification, self._buffer_attempts(attempts))
+        self._apply_outcome(notification, outcome)
+
+        def save_result():
+            with transaction.atomic():
+                DeliveryAttempt.objects.bulk_create(attempts)
+                notification.save(update_fields=[*RESULT_FIELDS, "updated_at"])
+
+        self._write(save_result)
+        self._publish_status(notification, attempts)
+
+    def send_notifications(self, notifications: list[Notification]) -> None:
+        """
+        Отправляет пачку уведомлений с fallback по каналам.
+
+        В отличие от send_notification, изменения в БД пишутся пачкой:
+        один условный UPDATE захватывает (переводит в in_progress с токеном
+        пачки) только уведомления, еще находящиеся в pending, а после
+        прохода по каналам попытки сохраняются одним bulk_create и статусы
+        одним bulk_update в общей транзакции. Уведомления, которые уже
+        захватил другой воркер (повторная доставка сообщения при acks_late,
+        повторная публикация тех же UUID), не отправляются. В режиме batched
+        и отправка идет пачками по каналам (см. _deliver_batch).
+
+        Args:
+            notifications: Уведомления для отправки
+        """
+        if not notifications:
+            return
+
+        logger.info(f"Starting batch delivery for {len(notifications)} notifications")
+
+        notifications = self._claim_batch(notifications)
+        if not notifications:
+            return
+        self._publish_statuses(notifications)
+
+        attempts: list[DeliveryAttempt] = []
+        record_attempt = self._buffer_attempts(attempts)
+
+        if self.delivery_mode == self.DELIVERY_BATCHED:
+            outcomes = self._deliver_batch(notifications, record_attempt)
+        else:
+            outcomes = [
+                self._deliver(notification, record_attempt) for notification in notifications
+            ]
+
+        for notification, outcome in zip(notifications, outcomes, strict=True):
+            self._apply_outcome(notification, outcome)
+            notification.updated_at = timezone.now()
+
+        def save_results():
+            with transaction.atomic():
+                DeliveryAttempt.objects.bulk_create(attempts)
+                Notification.objects.bulk_update(
+                    notifications,
+                    [*RESULT_FIELDS, "updated_at"],
+                )
+
+        self._write(save_results)
+        self._publish_statuses(notifications, attempts)
+
+        logger.info(
+            f"Batch delivery finished: {len(notifications)} notifications, "
+            f"{len(attempts)} attempts",
+        )
+
+    def _claim(self, notification: Notification) -> bool:
+        """
+        Захватывает уведомление условным UPDATE.
+
+        Статус in_progress и аренда ставятся, только если уведомление в pending
+        или его аренда истекла (см. _claimable). Повторно доставленное сообщение
+        (acks_late) или запоздавшая задача повтора не отправят уведомление, пока
+        аренду держит другой воркер.
+
+        Returns:
+            True если уведомление захвачено этим воркером
+        """
+        lease_expires_at = lease_deadline()
+        claimed = self._write(
+            lambda: Notification.objects.filter(_claimable(), id=notification.id).update(
+                status=Notification.STATUS_IN_PROGRESS,
+                # Токен захвата очереди в БД сохраняется, иначе владелец - этот процесс
+                claimed_by=Case(
+                    When(
+                        status=Notification.STATUS_PENDING,
+                        then=Coalesce("claimed_by", Value(self.lease_owner)),
+                    ),
+                    default=Value(self.lease_owner),
+                ),
+                lease_expires_at=lease_expires_at,
+            ),
+        )
+        if not claimed:
+            logger.warning(
+                f"Notification {notification.id} is already claimed or processed, "
+                "skipping delivery",
+            )
+            return False
+
+        if notification.status != Notification.STATUS_PENDING or not notification.claimed_by:
+            notification.claimed_by = self.lease_owner
         notification.status = Notification.STATUS_IN_PROGRESS
-        notification.save(update_fields=["status"])
+        notification.lease_expires_at = lease_expires_at
+        return True
+
+    def _claim_batch(self, notifications: list[Notification]) -> list[Notification]:
+        """
+        Захватывает пачку условным UPDATE и возвращает захваченные уведомления.
+
+        Статус in_progress и токен пачки ставятся только уведомлениям в pending
+        или с истекшей арендой, поэтому из двух воркеров, получивших одни и те же
+        UUID, каждое уведомление захватит один.
+        """
+        token = f"{self.lease_owner}:{uuid.uuid4().hex[:8]}"
+        lease_expires_at = lease_deadline()
+
+        def claim():
+            Notification.objects.filter(
+                _claimable(),
+                id__in=[notification.id for notification in notifications],
+            ).update(
+                status=Notification.STATUS_IN_PROGRESS,
+                claimed_by=token,
+                lease_expires_at=lease_expires_at,
+            )
+            return set(
+                Notification.objects.filter(claimed_by=token).values_list("id", flat=True),
+            )
+
+        claimed_ids = self._write(claim)
+        claimed = [notification for notification in notifications if notification.id in claimed_ids]
+        if len(claimed) < len(notifications):
+            logger.warning(
+                f"Batch delivery: {len(notifications) - len(claimed)} notifications "
+                "are already claimed or processed, skipping",
+            )
+        for notification in claimed:
+            notification.status = Notification.STATUS_IN_PROGRESS
+            notification.claimed_by = token
+            notification.lease_expires_at = lease_expires_at
+        return claimed
+
+    def _deliver(
+        self,
+        notification: Notification,
+        record_attempt: AttemptRecorder,
+    ) -> DeliveryOutcome:
+        """
+        Проходит по каналам уведомления до первой успешной отправки.
+
+        Args:
+            notification: Уведомление для отправки
+            record_attempt: Функция записи попытки доставки
+
+        Returns:
+            Итог доставки: канал, через который доставлено уведомление (или None),
+            и были ли среди ошибок временные
+        """
+        outcome = DeliveryOutcome()
 
         # Получаем список каналов
-        channels = notification.channels if notification.channels else self.DEFAULT_CHANNELS
+        channels = self._resolve_channels(notification)
         logger.info(f"Channels to try: {channels}")
 
+        if self.delivery_mode == self.DELIVERY_HEDGED:
+            if self._check_expired(notification, outcome):
+                return outcome
+            outcome.used_channel = self._deliver_hedged(
+                notification,
+                channels,
+                record_attempt,
+                outcome,
+            )
+            return outcome
+
         # Пробуем каждый канал последовательно
         for channel_name in channels:
-            if channel_name not in self.channel_senders:
-                logger.warning(f"Unknown channel: {channel_name}, skipping")
+            if self._check_expired(notification, outcome):
+                return outcome
+
+            channel_sender = self._get_ready_sender(
+                notification,
+                channel_name,
+                record_attempt,
+                outcome,
+            )
+            if channel_sender is None:
                 continue
 
-            channel_sender = self.channel_senders[channel_name]
             logger.info(f"Attempting channel: {channel_name}")
 
-            # Проверяем доступность канала
-            if not channel_sender.is_available(notification):
-                reason = channel_sender.get_unavailable_reason(notification)
-                logger.warning(f"Channel {channel_name} unavailable: {reason}")
-                self._create_attempt(
-                    notification=notification,
-                    channel=channel_name,
-                    success=False,
-                    error_message=reason,
-                )
-                continue
-
             # Пытаемся отправить
-            result = channel_sender.send(notification)
+            started = time.monotonic()
+            try:
+                result = channel_sender.send(notification)
+            except Exception as e:
+                result = self._exception_result(channel_name, e)
+
+            # Канал исчерпал лимит скорости - откладываем, не переходя к резервным
+            if result.error_class == ERROR_RATE_LIMITED:
+                self._defer(notification, channel_name, result, record_attempt, outcome)
+                return outcome
+
+            self._track_result(channel_name, result, time.monotonic() - started)
 
             # Создаем запись о попытке
-            self._create_attempt(
-                notification=notification,
-                channel=channel_name,
-                success=result.success,
-                error_message=result.error_message,
-            )
+            record_attempt(notification, channel_name, result.success, result.error_message)
 
             # Если успешно - завершаем
             if result.success:
                 logger.info(
                     f"Notification {notification.id} delivered successfully via {channel_name}",
                 )
-                with transaction.atomic():
-                    notification.status = Notification.STATUS_DELIVERED
-                    notification.used_channel = channel_name
-                    notification.save(update_fields=["status", "used_channel"])
-                return
+                outcome.used_channel = channel_name
+                return outcome
+
+            outcome.add_failure(result)
 
             # Если не успешно - продолжаем со следующим каналом
             logger.warning(
@@ -99,40 +436,599 @@ class NotificationService:
             )
 
         # Все каналы провалились
-        logger.error(
-            f"All channels failed for notification {notification.id}, " f"marking as failed",
+        logger.error(f"All channels failed for notification {notification.id}")
+        return outcome
+
+    def _deliver_batch(
+        self,
+        notifications: list[Notification],
+        record_attempt: AttemptRecorder,
+    ) -> list[DeliveryOutcome]:
+        """
+        Проходит по каналам пачки уведомлений, отправляя через send_batch.
+
+        На каждом шаге уведомления группируются по текущему каналу (первому
+        доступному каналу с замкнутой цепью), и каждая группа отправляется одним
+        вызовом send_batch. Уведомления, отправка которых не удалась, переходят
+        к следующему каналу на следующем шаге. Порядок каналов и проверки
+        (expires_at, доступность, circuit breaker) те же, что в
+        последовательном режиме.
+
+        Args:
+            notifications: Уведомления для отправки
+            record_attempt: Функция записи попытки доставки
+
+        Returns:
+            Итоги доставки в порядке уведомлений
+        """
+        outcomes = [DeliveryOutcome() for _ in notifications]
+        # (индекс уведомления, каналы, которые еще не пробовались)
+        active = [
+            (index, deque(self._resolve_channels(notification)))
+            for index, notification in enumerate(notifications)
+        ]
+
+        while active:
+            groups: dict[str, list[tuple[int, deque]]] = {}
+            for index, channels in active:
+                notification, outcome = notifications[index], outcomes[index]
+                while channels and not self._check_expired(notification, outcome):
+                    channel_name = channels.popleft()
+                    sender = self._get_ready_sender(
+                        notification,
+                        channel_name,
+                        record_attempt,
+                        outcome,
+                    )
+                    if sender is not None:
+                        groups.setdefault(channel_name, []).append((index, channels))
+                        break
+
+            active = []
+            for channel_name, members in groups.items():
+                logger.info(f"Attempting channel {channel_name} for {len(members)} notifications")
+                started = time.monotonic()
+                try:
+                    results = self.channel_senders[channel_name].send_batch(
+                        [notifications[index] for index, _ in members],
+                    )
+                except Exception as e:
+                    results = [self._exception_result(channel_name, e)] * len(members)
+                # Статистике каналов передается время отправки в пересчете на уведомление
+                latency = (time.monotonic() - started) / len(members)
+
+                for (index, channels), result in zip(members, results, strict=True):
+                    notification, outcome = notifications[index], outcomes[index]
+                    if result.error_class == ERROR_RATE_LIMITED:
+                        self._defer(notification, channel_name, result, record_attempt, outcome)
+                        continue
+                    self._track_result(channel_name, result, latency)
+                    record_attempt(notification, channel_name, result.success, result.error_message)
+                    if result.success:
+                        outcome.used_channel = channel_name
+                        continue
+                    outcome.add_failure(result)
+                    if channels:
+                        active.append((index, channels))
+
+        for notification, outcome in zip(notifications, outcomes, strict=True):
+            if outcome.used_channel:
+                logger.info(
+                    f"Notification {notification.id} delivered successfully "
+                    f"via {outcome.used_channel}",
+                )
+            elif not outcome.expired and outcome.deferred is None:
+                logger.error(f"All channels failed for notification {notification.id}")
+        return outcomes
+
+    def _deliver_hedged(
+        self,
+        notification: Notification,
+        channels: list[str],
+        record_attempt: AttemptRecorder,
+        outcome: DeliveryOutcome,
+    ) -> str | None:
+        """
+        Проходит по каналам с хеджированием (hedged requests).
+
+        Следующий по приоритету канал запускается, не дожидаясь завершения
+        текущего, если тот не уложился в бюджет hedge_delay или завершился ошибкой.
+        Побеждает первая успешная отправка, остальные незавершенные отправки
+        отменяются и записываются как cancelled. После истечения expires_at
+        новые каналы не запускаются.
+
+        Попытки записываются после завершения цикла событий, так как запись
+        в БД из асинхронного контекста запрещена.
+
+        Args:
+            notification: Уведомление для отправки
+            channels: Каналы в порядке приоритета
+            record_attempt: Функция записи попытки доставки
+            outcome: Итог доставки, в который добавляются ошибки каналов
+
+        Returns:
+            Название канала, через который доставлено уведомление, или None
+        """
+        candidates = []
+        for channel_name in channels:
+            channel_sender = self._get_ready_sender(
+                notification,
+                channel_name,
+                record_attempt,
+                outcome,
+            )
+            if channel_sender is not None:
+                candidates.append((channel_name, channel_sender))
+
+        if not candidates:
+            logger.error(f"No available channels for notification {notification.id}")
+            return None
+
+        winner, outcomes = asyncio.run(self._run_hedged(notification, candidates))
+        # Резервные каналы не запускались, потому что истек срок актуальности
+        outcome.expired = winner is None and len(outcomes) < len(candidates)
+
+        # Каналы, которые так и не были вызваны, возвращают слот пробного вызова
+        launched = {channel_name for channel_name, _, _ in outcomes}
+        for channel_name, _ in candidates:
+            if channel_name not in launched:
+                self._release_probe(channel_name)
+
+        for channel_name, result, latency in outcomes:
+            if result is None:
+                self._release_probe(channel_name)
+                record_attempt(
+                    notification,
+                    channel_name,
+                    False,
+                    f"Cancelled: delivered via {winner}",
+                    status=DeliveryAttempt.STATUS_CANCELLED,
+                )
+            elif result.error_class == ERROR_RATE_LIMITED:
+                self._defer(notification, channel_name, result, record_attempt, outcome)
+            else:
+                self._track_result(channel_name, result, latency)
+                record_attempt(notification, channel_name, result.success, result.error_message)
+                if not result.success:
+                    outcome.add_failure(result)
+
+        if winner:
+            logger.info(f"Notification {notification.id} delivered successfully via {winner}")
+        else:
+            logger.error(f"All channels failed for notification {notification.id}")
+        return winner
+
+    async def _run_hedged(
+        self,
+        notification: Notification,
+        candidates: list[tuple[str, ChannelSender | AsyncChannelSender]],
+    ) -> tuple[str | None, list[tuple[str, ChannelResult | None, float]]]:
+        """
+        Выполняет хеджированную отправку в цикле событий.
+
+        Args:
+            notification: Уведомление для отправки
+            candidates: Доступные каналы (название, адаптер) в порядке приоритета
+
+        Returns:
+            Победивший канал (или None) и результаты по запущенным каналам
+            в порядке запуска: (канал, результат, время отправки);
+            None вместо результата означает отмену
+        """
+        remaining = list(candidates)
+        in_flight: dict[asyncio.Task, str] = {}
+        results: dict[str, ChannelResult | None] = {}
+        latencies: dict[str, float] = {}
+        started: list[str] = []
+        winner = None
+
+        async def timed_send(channel_name, channel_sender):
+            started_at = time.monotonic()
+            try:
+                return await send_async(channel_sender, notification)
+            finally:
+                latencies[channel_name] = time.monotonic() - started_at
+
+        def launch_next():
+            if notification.is_expired():
+                remaining.clear()
+                return
+            channel_name, channel_sender = remaining.pop(0)
+            logger.info(f"Attempting channel: {channel_name}")
+            task = asyncio.create_task(timed_send(channel_name, channel_sender))
+            in_flight[task] = channel_name
+            started.append(channel_name)
+
+        launch_next()
+        while in_flight:
+            done, _ = await asyncio.wait(
+                in_flight.keys(),
+                timeout=self.hedge_delay if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if not done:
+                # Текущие каналы не уложились в бюджет - запускаем следующий
+                logger.info(
+                    f"Hedge delay {self.hedge_delay}s exceeded for notification "
+                    f"{notification.id}, starting next channel",
+                )
+                launch_next()
+                continue
+
+            # Разбираем завершившиеся в порядке запуска, чтобы при одновременном
+            # успехе победил более приоритетный канал
+            for task in sorted(done, key=lambda t: started.index(in_flight[t])):
+                channel_name = in_flight.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    result = self._exception_result(channel_name, e)
+                results[channel_name] = result
+                if result.success and winner is None:
+                    winner = channel_name
+
+            if winner:
+                break
+
+            if remaining:
+                launch_next()
+
+        # Отменяем проигравшие отправки
+        for task, channel_name in in_flight.items():
+            task.cancel()
+            results[channel_name] = None
+        await asyncio.gather(*in_flight.keys(), return_exceptions=True)
+
+        return winner, [
+            (channel_name, results[channel_name], latencies.get(channel_name, 0.0))
+            for channel_name in started
+        ]
+
+    def _resolve_channels(self, notification: Notification) -> list[str]:
+        """
+        Возвращает каналы уведомления в порядке попыток.
+
+        Явно указанный в уведомлении список используется как есть. Иначе берутся
+        DEFAULT_CHANNELS, а при политике adaptive они упорядочиваются по
+        текущей статистике успеха и времени отправки.
+        """
+        if notification.channels:
+            return notification.channels
+        if self.routing_policy == self.ROUTING_ADAPTIVE:
+            return self.router.order(self.DEFAULT_CHANNELS)
+        return self.DEFAULT_CHANNELS
+
+    def _get_ready_sender(
+        self,
+        notification: Notification,
+        channel_name: str,
+        record_attempt: AttemptRecorder,
+        outcome: DeliveryOutcome,
+    ) -> ChannelSender | AsyncChannelSender | None:
+        """
+        Возвращает адаптер канала, если через него можно отправлять.
+
+        Неизвестный канал пропускается без записи. Для недоступного канала
+        записывается failed attempt, для канала с разомкнутой цепью
+        circuit breaker - skipped attempt без вызова адаптера. Разомкнутая цепь
+        считается временной ошибкой, недоступность канала - постоянной.
+
+        Args:
+            notification: Уведомление для отправки
+            channel_name: Название канала
+            record_attempt: Функция записи попытки доставки
+            outcome: Итог доставки, в который добавляются ошибки каналов
+
+        Returns:
+            Адаптер канала или None, если канал нужно пропустить
+        """
+        if channel_name not in self.channel_senders:
+            logger.warning(f"Unknown channel: {channel_name}, skipping")
+            return None
+
+        channel_sender = self.channel_senders[channel_name]
+
+        # Проверяем доступность канала
+        if not channel_sender.is_available(notification):
+            reason = channel_sender.get_unavailable_reason(notification)
+            logger.warning(f"Channel {channel_name} unavailable: {reason}")
+            record_attempt(notification, channel_name, False, reason)
+            return None
+
+        # Проверяем circuit breaker
+        breaker = self.circuit_breakers.get(channel_name)
+        if breaker is not None and not breaker.allow_request():
+            logger.warning(f"Channel {channel_name} circuit is open, skipping")
+            record_attempt(
+                notification,
+                channel_name,
+                False,
+                CIRCUIT_OPEN_MESSAGE,
+                status=DeliveryAttempt.STATUS_SKIPPED,
+            )
+            outcome.add_failure(
+                ChannelResult(
+                    success=False,
+                    error_message=CIRCUIT_OPEN_MESSAGE,
+                    error_class=ERROR_TRANSIENT,
+                ),
+            )
+            return None
+
+        return channel_sender
+
+    def _apply_outcome(self, notification: Notification, outcome: DeliveryOutcome) -> None:
+        """
+        Выставляет итоговые поля уведомления (RESULT_FIELDS) по итогу доставки.
+
+        Уведомление с временной ошибкой возвращается в pending с next_attempt_at,
+        если политика повторов это позволяет. Аренда при этом продлевается до
+        next_attempt_at + NOTIFICATION_LEASE_SECONDS: если запланированный повтор
+        потеряется, reaper вернет уведомление в очередь. Повтор, который
+        наступит после expires_at, не планируется - уведомление сразу expired.
+
+        Уведомление, отложенное лимитом скорости канала, возвращается в pending
+        на outcome.deferred секунд без увеличения retry_count: это не ошибка,
+        и политика повторов к нему не применяется.
+        """
+        notification.used_channel = outcome.used_channel
+        notification.lease_expires_at = None
+        notification.next_attempt_at = None
+
+        if outcome.used_channel:
+            notification.status = Notification.STATUS_DELIVERED
+            return
+
+        if outcome.expired:
+            notification.status = Notification.STATUS_EXPIRED
+            return
+
+        if outcome.deferred is not None:
+            self._apply_deferral(notification, outcome.deferred)
+            return
+
+        delay = None
+        if outcome.transient_failure:
+            delay = self.retry_policy.next_delay(
+                notification.retry_count,
+                # Как и срок актуальности, окно повторов отложенного уведомления
+                # отсчитывается от send_at
+                notification.send_at or notification.created_at,
+                outcome.retry_after,
+            )
+        if delay is None:
+            notification.status = Notification.STATUS_FAILED
+            return
+
+        next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        if notification.is_expired(now=next_attempt_at):
+            logger.warning(f"Notification {notification.id} expires before retry, not retrying")
+            notification.status = Notification.STATUS_EXPIRED
+            return
+
+        notification.status = Notification.STATUS_PENDING
+        notification.retry_count += 1
+        notification.next_attempt_at = next_attempt_at
+        notification.claimed_by = None
+        notification.lease_expires_at = lease_deadline(start=notification.next_attempt_at)
+        logger.warning(
+            f"Notification {notification.id} failed transiently, retry "
+            f"{notification.retry_count} in {delay:.0f}s",
         )
-        notification.status = Notification.STATUS_FAILED
-        notification.save(update_fields=["status"])
 
-    def _create_attempt(
+    def _apply_deferral(self, notification: Notification, delay: float) -> None:
+        """Откладывает уведомление, отклоненное лимитом скорости, на delay секунд."""
+        next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        if notification.is_expired(now=next_attempt_at):
+            logger.warning(f"Notification {notification.id} expires before deferred attempt")
+            notification.status = Notification.STATUS_EXPIRED
+            return
+
+        notification.status = Notification.STATUS_PENDING
+        notification.next_attempt_at = next_attempt_at
+        notification.claimed_by = None
+        notification.lease_expires_at = lease_deadline(start=next_attempt_at)
+        logger.info(f"Notification {notification.id} rate limited, deferred for {delay:.2f}s")
+
+    def _defer(
+        self,
+        notification: Notification,
+        channel_name: str,
+        result: ChannelResult,
+        record_attempt: AttemptRecorder,
+        outcome: DeliveryOutcome,
+    ) -> None:
+        """
+        Учитывает отправку, отклоненную лимитом скорости канала.
+
+        Попытка записывается как skipped. В статистику и circuit breaker канала
+        результат не передается: провайдер не вызывался, поэтому слот пробного
+        вызова half-open возвращается.
+        """
+        self._release_probe(channel_name)
+        record_attempt(
+            notification,
+            channel_name,
+            False,
+            result.error_message,
+            status=DeliveryAttempt.STATUS_SKIPPED,
+        )
+        outcome.deferred = max(outcome.deferred or 0.0, result.retry_after or 0.0)
+
+    def _check_expired(self, notification: Notification, outcome: DeliveryOutcome) -> bool:
+        """
+        Проверяет срок актуальности перед попыткой через очередной канал.
+
+        Returns:
+            True, если уведомление устарело и каналы больше не вызываются
+        """
+        if not notification.is_expired():
+            return False
+        logger.warning(f"Notification {notification.id} expired, skipping remaining channels")
+        outcome.expired = True
+        return True
+
+    def _release_probe(self, channel_name: str) -> None:
+        """Возвращает слот пробного вызова канала, который не был вызван."""
+        breaker = self.circuit_breakers.get(channel_name)
+        if breaker is not None:
+            breaker.release_probe()
+
+    @staticmethod
+    def _exception_result(channel_name: str, error: Exception) -> ChannelResult:
+        """
+        Превращает исключение адаптера во временную ошибку канала.
+
+        Результат проходит обычный путь (статистика, circuit breaker, fallback),
+        поэтому слот пробного вызова half-open не остается занятым.
+        """
+        logger.error(f"Channel {channel_name} raised: {error}", exc_info=True)
+        return ChannelResult(success=False, error_message=str(error), error_class=ERROR_TRANSIENT)
+
+    def _track_result(self, channel_name: str, result: ChannelResult, latency: float) -> None:
+        """Передает результат отправки в статистику и circuit breaker канала."""
+        self.stats_tracker.observe(channel_name, result.success, latency)
+        publish_channel_stats(self.stats_tracker)
+
+        breaker = self.circuit_breakers.get(channel_name)
+        if breaker is None:
+            return
+        if result.success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    def _publish_status(
+        self,
+        notification: Notification,
+        attempts: list[DeliveryAttempt] | None = None,
+    ) -> None:
+        """
+        Обновляет кэш статусов и публикует событие после записи уведомления в БД.
+
+        Args:
+            notification: Уведомление с актуальными полями
+            attempts: Попытки, сохраненные вместе с этим изменением
+        """
+        if self.status_cache is not None:
+            self.status_cache.update(notification, attempts or [])
+        self.status_events.publish(build_status_event(notification, attempts or []))
+
+    def _publish_statuses(
+        self,
+        notifications: list[Notification],
+        attempts: list[DeliveryAttempt] | None = None,
+    ) -> None:
+        """Обновляет кэш статусов и публикует события для пачки уведомлений."""
+        attempts_by_notification: dict = {notification.id: [] for notification in notifications}
+        for attempt in attempts or []:
+            attempts_by_notification[attempt.notification_id].append(attempt)
+        updates = [
+            (notification, attempts_by_notification[notification.id])
+            for notification in notifications
+        ]
+        if self.status_cache is not None:
+            self.status_cache.update_many(updates)
+        self.status_events.publish_many(
+            [
+                build_status_event(notification, new_attempts)
+                for notification, new_attempts in updates
+            ],
+        )
+
+    def _build_attempt(
         self,
         notification: Notification,
         channel: str,
         success: bool,
         error_message: str | None = None,
+        status: str | None = None,
     ) -> DeliveryAttempt:
         """
-        Создает запись о попытке доставки.
+        Создает несохраненную запись о попытке доставки.
 
         Args:
             notification: Уведомление
             channel: Название канала
             success: Успешна ли попытка
             error_message: Сообщение об ошибке (если есть)
+            status: Явный статус попытки (иначе определяется по success)
 
         Returns:
-            Созданная запись DeliveryAttempt
+            Несохраненная запись DeliveryAttempt
         """
-        status = DeliveryAttempt.STATUS_SUCCESS if success else DeliveryAttempt.STATUS_FAILED
-        attempt = DeliveryAttempt.objects.create(
+        if status is None:
+            status = DeliveryAttempt.STATUS_SUCCESS if success else DeliveryAttempt.STATUS_FAILED
+        return DeliveryAttempt(
             notification=notification,
             channel=channel,
             status=status,
             error_message=error_message,
+            attempted_at=timezone.now(),
         )
+
+    def _buffer_attempts(self, attempts: list[DeliveryAttempt]) -> AttemptRecorder:
+        """
+        Возвращает функцию записи попыток в буфер вместо БД.
+
+        Args:
+            attempts: Список, в который складываются несохраненные попытки
+
+        Returns:
+            Функция записи попытки для _deliver
+        """
+
+        def record_attempt(notification, channel, success, error_message=None, status=None):
+            attempts.append(
+                self._build_attempt(notification, channel, success, error_message, status),
+            )
+
+        return record_attempt
+
+    def _write(self, write: Callable[[], T]) -> T:
+        """
+        Выполняет запись в БД.
+
+        В режиме SQLITE_HIGH_CONCURRENCY запись передается писателю процесса
+        и попадает в общий групповой коммит, иначе выполняется сразу.
+
+        Args:
+            write: Функция, выполняющая запросы на запись
+
+        Returns:
+            Результат функции записи
+        """
+        if self.writer is None:
+            return write()
+        return self.writer.submit(write)
+
+    def _create_attempt(
+        self,
+        notification: Notification,
+        channel: str,
+        success: bool,
+        error_message: str | None = None,
+        status: str | None = None,
+    ) -> DeliveryAttempt:
+        """
+        Создает запись о попытке доставки.
+
+        Args:
+            notification: Уведомление
+            channel: Название канала
+            success: Успешна ли попытка
+            error_message: Сообщение об ошибке (если есть)
+            status: Явный статус попытки (иначе определяется по success)
+
+        Returns:
+            Созданная запись DeliveryAttempt
+        """
+        attempt = self._build_attempt(notification, channel, success, error_message, status)
+        self._write(attempt.save)
+        self._publish_status(notification, [attempt])
         logger.debug(
             f"Created delivery attempt: {attempt.id} for notification {notification.id} "
-            f"via {channel} - {status}",
+            f"via {channel} - {attempt.status}",
         )
         return attempt
@@ -0,0 +1,93 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from celery import current_app
+from django.db.models import Count, Min, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LaneLag:
+    """Отставание очереди одного приоритета."""
+
+    priority: str
+    # Уведомлений, ожидающих воркера
+    pending: int
+    # Сколько секунд ждет самое старое из них
+    lag: float
+
+
+def measure_lane_lag(now: datetime | None = None) -> list[LaneLag]:
+    """
+    Измеряет отставание очередей по приоритетам по таблице уведомлений.
+
+    Учитываются уведомления в pending, которые еще не забрал воркер и время
+    отправки которых наступило. Ожидание отсчитывается от момента, когда
+    уведомление стало готово к отправке: времени повтора, send_at или создания.
+
+    Args:
+        now: Момент измерения (по умолчанию сейчас)
+
+    Returns:
+        Отставание для каждого приоритета в порядке PRIORITY_CHOICES
+    """
+    now = now or timezone.now()
+    rows = (
+        Notification.objects.filter(
+            status=Notification.STATUS_PENDING,
+            claimed_by__isnull=True,
+        )
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .values("priority")
+        .annotate(
+            pending=Count("id"),
+            ready_since=Min(Coalesce("next_attempt_at", "send_at", "created_at")),
+        )
+    )
+    by_priority = {row["priority"]: row for row in rows}
+
+    lanes = []
+    for priority, _ in Notification.PRIORITY_CHOICES:
+        row = by_priority.get(priority)
+        if row is None:
+            lanes.append(LaneLag(priority=priority, pending=0, lag=0.0))
+            continue
+        lanes.append(
+            LaneLag(
+                priority=priority,
+                pending=row["pending"],
+                lag=max(0.0, (now - row["ready_since"]).total_seconds()),
+            ),
+        )
+    return lanes
+
+
+def broker_queue_depths(queues: list[str]) -> dict[str, int | None]:
+    """
+    Возвращает число сообщений в очередях брокера.
+
+    Args:
+        queues: Имена очередей
+
+    Returns:
+        Число сообщений по очередям; None, если очередь не найдена
+    """
+    depths: dict[str, int | None] = {}
+    with current_app.connection_for_read() as connection:
+        for queue in queues:
+            # Пассивное объявление отдельным каналом: в AMQP ошибка закрывает канал
+            channel = connection.channel()
+            try:
+                _, depths[queue], _ = channel.queue_declare(queue=queue, passive=True)
+            except Exception as e:
+                logger.debug(f"Queue {queue} not found: {e}")
+                depths[queue] = None
+            finally:
+                channel.close()
+    return depths
@@ -0,0 +1,429 @@
+import hashlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import redis
+from django.conf import settings
+
+from notifications.channels import ERROR_RATE_LIMITED, ChannelResult, ChannelSender
+from notifications.models import Notification
+from notifications.services.routing import ChannelStatsTracker
+
+logger = logging.getLogger(__name__)
+
+# Сообщение для попыток, отложенных из-за лимита канала
+RATE_LIMITED_MESSAGE = "rate_limited"
+
+# Поле адресата уведомления для корзин отдельных получателей
+RECIPIENT_FIELDS = {
+    "email": "to_email",
+    "sms": "to_phone",
+    "telegram": "to_telegram_chat_id",
+}
+
+
+@dataclass(frozen=True)
+class TokenBucket:
+    """Параметры корзины токенов: ключ, скорость пополнения в секунду и емкость."""
+
+    key: str
+    rate: float
+    capacity: float
+
+
+class TokenBucketStore(ABC):
+    """
+    Хранилище корзин токенов.
+
+    Несколько корзин (канала и получателя) проверяются атомарно: токен берется
+    из всех сразу или ни из одной, чтобы отказ одной корзины не тратил токены
+    другой.
+    """
+
+    @abstractmethod
+    def acquire(self, buckets: list[TokenBucket]) -> float:
+        """
+        Берет по токену из каждой корзины.
+
+        Args:
+            buckets: Корзины, из которых нужен токен
+
+        Returns:
+            0, если токены получены, иначе время в секундах, через которое во
+            всех корзинах будет токен (токены при этом не списываются)
+        """
+
+
+class InMemoryTokenBucketStore(TokenBucketStore):
+    """Корзины в памяти процесса: лимит соблюдается в пределах одного узла."""
+
+    # Сколько корзин хранить, прежде чем удалять заполненные (корзины получателей)
+    MAX_BUCKETS = 10000
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Инициализирует пустое хранилище.
+
+        Args:
+            clock: Источник времени в секундах
+        """
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._levels: dict[str, tuple[float, float]] = {}
+
+    def acquire(self, buckets: list[TokenBucket]) -> float:
+        with self._lock:
+            now = self.clock()
+            levels = [self._level(bucket, now) for bucket in buckets]
+            wait = max(
+                ((1 - level) / bucket.rate for bucket, level in zip(buckets, levels, strict=True)),
+                default=0.0,
+            )
+            if wait > 0:
+                return wait
+
+            for bucket, level in zip(buckets, levels, strict=True):
+                self._levels[bucket.key] = (level - 1, now)
+            if len(self._levels) > self.MAX_BUCKETS:
+                self._evict_full(now, buckets)
+            return 0.0
+
+    def _level(self, bucket: TokenBucket, now: float) -> float:
+        """Число токенов в корзине с учетом пополнения с последнего списания."""
+        level, updated_at = self._levels.get(bucket.key, (bucket.capacity, now))
+        return min(bucket.capacity, level + (now - updated_at) * bucket.rate)
+
+    def _evict_full(self, now: float, buckets: list[TokenBucket]) -> None:
+        """Удаляет корзины, которые заведомо успели пополниться до емкости."""
+        # Емкость и скорость известны только для текущих корзин; берем самую
+        # медленную из них как оценку для остальных
+        refill = max(bucket.capacity / bucket.rate for bucket in buckets)
+        self._levels = {
+            key: (level, updated_at)
+            for key, (level, updated_at) in self._levels.items()
+            if now - updated_at < refill
+        }
+
+
+class RedisTokenBucketStore(TokenBucketStore):
+    """
+    Корзины в Redis: лимит общий для всех воркеров.
+
+    Пополнение и списание выполняются одним Lua-скриптом по времени сервера
+    Redis, поэтому расхождение часов воркеров не влияет на лимит. Ключи корзин
+    одного канала содержат hash tag {канал} и в Redis Cluster попадают в один слот.
+    """
+
+    SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local levels = {}
+    local wait = 0
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[2 * i - 1])
+        local capacity = tonumber(ARGV[2 * i])
+        local state = redis.call('HMGET', key, 'tokens', 'ts')
+        local level = tonumber(state[1]) or capacity
+        local updated_at = tonumber(state[2]) or now
+        level = math.min(capacity, level + math.max(0, now - updated_at) * rate)
+        levels[i] = level
+        if level < 1 then
+            wait = math.max(wait, (1 - level) / rate)
+        end
+    end
+    if wait > 0 then
+        return tostring(wait)
+    end
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[2 * i - 1])
+        local capacity = tonumber(ARGV[2 * i])
+        redis.call('HSET', key, 'tokens', levels[i] - 1, 'ts', now)
+        redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+    end
+    return '0'
+    """
+
+    def __init__(self, url: str):
+        """
+        Инициализирует хранилище.
+
+        Args:
+            url: URL Redis
+        """
+        self.client = redis.Redis.from_url(url)
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def acquire(self, buckets: list[TokenBucket]) -> float:
+        args: list[float] = []
+        for bucket in buckets:
+            args += [bucket.rate, bucket.capacity]
+        try:
+            return float(self._script(keys=[bucket.key for bucket in buckets], args=args))
+        except redis.RedisError as e:
+            # Недоступный Redis не должен останавливать доставку: лимит не применяется
+            logger.warning(f"Rate limit check failed, allowing send: {e}")
+            return 0.0
+
+
+class ChannelRateLimiter:
+    """
+    Лимит скорости отправки через канал (token bucket).
+
+    Корзина канала ограничивает общий поток запросов к провайдеру, корзина
+    получателя (если задана) - поток сообщений одному адресату, например
+    лимит Telegram Bot API на сообщения в один чат.
+    """
+
+    KEY_PREFIX = "notifications:ratelimit"
+
+    def __init__(
+        self,
+        channel: str,
+        store: TokenBucketStore,
+        rate: float | None = None,
+        burst: float | None = None,
+        recipient_rate: float | None = None,
+        recipient_burst: float | None = None,
+    ):
+        """
+        Инициализирует лимит.
+
+        Args:
+            channel: Название канала
+            store: Хранилище корзин
+            rate: Отправок в секунду через канал (None - без лимита канала)
+            burst: Емкость корзины канала (по умолчанию rate, не меньше 1)
+            recipient_rate: Отправок в секунду одному получателю (None - без лимита)
+            recipient_burst: Емкость корзины получателя (по умолчанию recipient_rate, не меньше 1)
+        """
+        self.channel = channel
+        self.store = store
+        self.bucket = None
+        if rate:
+            self.bucket = TokenBucket(
+                f"{self.KEY_PREFIX}:{{{channel}}}",
+                rate,
+                max(burst or rate, 1.0),
+            )
+        self.recipient_rate = recipient_rate
+        self.recipient_burst = max(recipient_burst or recipient_rate or 1.0, 1.0)
+
+    def try_acquire(self, notification: Notification) -> float:
+        """
+        Берет разрешение на отправку уведомления.
+
+        Returns:
+            0, если отправлять можно сейчас, иначе время ожидания в секундах
+        """
+        buckets = [self.bucket] if self.bucket else []
+        recipient = self._recipient(notification)
+        if self.recipient_rate and recipient:
+            # Адрес хэшируется, чтобы не хранить персональные данные в ключах
+            digest = hashlib.sha256(recipient.encode()).hexdigest()[:16]
+            buckets.append(
+                TokenBucket(
+                    f"{self.KEY_PREFIX}:{{{self.channel}}}:{digest}",
+                    self.recipient_rate,
+                    self.recipient_burst,
+                ),
+            )
+        if not buckets:
+            return 0.0
+        return self.store.acquire(buckets)
+
+    def _recipient(self, notification: Notification) -> str | None:
+        field = RECIPIENT_FIELDS.get(self.channel)
+        value = getattr(notification, field, None) if field else None
+        return str(value) if value else None
+
+
+class RateLimitedChannelSender(ChannelSender):
+    """
+    Адаптер канала с лимитом скорости.
+
+    Перед отправкой ждет токен не дольше max_wait секунд. Если за это время
+    канал не освободился, адаптер не вызывается и возвращается результат
+    с error_class=rate_limited и retry_after - временем до следующего токена:
+    NotificationService откладывает такое уведомление, а не переходит
+    к резервным каналам. Время ожидания и число отложенных отправок
+    учитываются в статистике каналов.
+    """
+
+    def __init__(
+        self,
+        sender: ChannelSender,
+        limiter: ChannelRateLimiter,
+        max_wait: float = 2.0,
+        tracker: ChannelStatsTracker | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Инициализирует адаптер.
+
+        Args:
+            sender: Адаптер канала
+            limiter: Лимит скорости канала
+            max_wait: Сколько секунд ждать токен, прежде чем отложить уведомление
+            tracker: Трекер статистики каналов для метрик ожидания
+            sleep: Функция ожидания
+        """
+        self.sender = sender
+        self.limiter = limiter
+        self.max_wait = max_wait
+        self.tracker = tracker
+        self.sleep = sleep
+
+    def is_available(self, notification: Notification) -> bool:
+        return self.sender.is_available(notification)
+
+    def get_unavailable_reason(self, notification: Notification) -> str:
+        return self.sender.get_unavailable_reason(notification)
+
+    def send(self, notification: Notification) -> ChannelResult:
+        """Отправляет уведомление, дождавшись токена."""
+        return self.send_batch([notification])[0]
+
+    def send_batch(self, notifications: list[Notification]) -> list[ChannelResult]:
+        """
+        Отправляет пачку уведомлений, на которые удалось получить токены.
+
+        Бюджет ожидания max_wait общий для пачки. Уведомления без токена
+        получают результат rate_limited, остальные отправляются одним вызовом
+        send_batch адаптера.
+        """
+        deadline = time.monotonic() + self.max_wait
+        results: list[ChannelResult | None] = [None] * len(notifications)
+        granted = []
+        for index, notification in enumerate(notifications):
+            wait = self._acquire(notification, deadline)
+            if wait:
+                results[index] = ChannelResult(
+                    success=False,
+                    error_message=RATE_LIMITED_MESSAGE,
+                    error_class=ERROR_RATE_LIMITED,
+                    retry_after=wait,
+                )
+            else:
+                granted.append((index, notification))
+
+        if granted:
+            sent = self.sender.send_batch([notification for _, notification in granted])
+            for (index, _), result in zip(granted, sent, strict=True):
+                results[index] = result
+        return results  # type: ignore[return-value]
+
+    def _acquire(self, notification: Notification, deadline: float) -> float:
+        """
+        Ждет токен до deadline.
+
+        Returns:
+            0, если токен получен, иначе время до следующего токена
+        """
+        started = time.monotonic()
+        while True:
+            wait = self.limiter.try_acquire(notification)
+            if not wait or time.monotonic() + wait > deadline:
+                break
+            self.sleep(wait)
+
+        waited = time.monotonic() - started
+        if self.tracker is not None:
+            self.tracker.observe_rate_limit(self.limiter.channel, waited, deferred=bool(wait))
+        if wait:
+            logger.warning(
+                f"Channel {self.limiter.channel} is rate limited, deferring notification "
+                f"{notification.id} for {wait:.2f}s",
+            )
+        return wait
+
+
+def parse_rate_limits(value: str) -> dict[str, tuple[float, float | None]]:
+    """
+    Разбирает лимиты каналов из строки настроек.
+
+    Формат: "канал=скорость[:емкость],...", например "sms=10:20,telegram=30".
+
+    Returns:
+        Словарь канал → (отправок в секунду, емкость корзины или None)
+    """
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        channel, _, spec = item.partition("=")
+        rate, _, burst = spec.partition(":")
+        limits[channel.strip()] = (float(rate), float(burst) if burst else None)
+    return limits
+
+
+_memory_store: InMemoryTokenBucketStore | None = None
+_redis_store: RedisTokenBucketStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_token_bucket_store() -> TokenBucketStore:
+    """
+    Возвращает хранилище корзин согласно NOTIFICATION_RATE_LIMIT_BACKEND.
+
+    Хранилище одно на процесс, чтобы корзины сохранялись между экземплярами
+    NotificationService.
+    """
+    global _memory_store, _redis_store
+    with _store_lock:
+        if settings.NOTIFICATION_RATE_LIMIT_BACKEND == "redis":
+            if _redis_store is None:
+                _redis_store = RedisTokenBucketStore(settings.NOTIFICATION_RATE_LIMIT_REDIS_URL)
+            return _redis_store
+        if _memory_store is None:
+            _memory_store = InMemoryTokenBucketStore()
+        return _memory_store
+
+
+def apply_rate_limits(
+    senders: dict[str, ChannelSender],
+    tracker: ChannelStatsTracker | None = None,
+) -> dict[str, ChannelSender]:
+    """
+    Оборачивает адаптеры каналов с лимитами из настроек.
+
+    Лимиты канала - NOTIFICATION_RATE_LIMITS, получателя -
+    NOTIFICATION_RECIPIENT_RATE_LIMITS. Каналы без лимитов не оборачиваются.
+
+    Args:
+        senders: Словарь канал → адаптер
+        tracker: Трекер статистики каналов для метрик ожидания
+
+    Returns:
+        Словарь канал → адаптер (с лимитом, где он задан)
+    """
+    channel_limits = parse_rate_limits(settings.NOTIFICATION_RATE_LIMITS)
+    recipient_limits = parse_rate_limits(settings.NOTIFICATION_RECIPIENT_RATE_LIMITS)
+    if not channel_limits and not recipient_limits:
+        return senders
+
+    store = get_token_bucket_store()
+    limited = dict(senders)
+    for channel, sender in senders.items():
+        if channel not in channel_limits and channel not in recipient_limits:
+            continue
+        rate, burst = channel_limits.get(channel, (None, None))
+        recipient_rate, recipient_burst = recipient_limits.get(channel, (None, None))
+        limiter = ChannelRateLimiter(
+            channel,
+            store,
+            rate=rate,
+            burst=burst,
+            recipient_rate=recipient_rate,
+            recipient_burst=recipient_burst,
+        )
+        limited[channel] = RateLimitedChannelSender(
+            sender,
+            limiter,
+            max_wait=settings.NOTIFICATION_RATE_LIMIT_MAX_WAIT,
+            tracker=tracker,
+        )
+    return limited
@@ -0,0 +1,249 @@
+import gzip
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from notifications.models import CoalescedNotification, DeliveryAttempt, Notification
+from notifications.services.status_cache import get_status_cache
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_NDJSON = "ndjson"
+ARCHIVE_PARQUET = "parquet"
+
+# Архивируются все столбцы, чтобы строку можно было восстановить целиком
+NOTIFICATION_ARCHIVE_FIELDS = [field.attname for field in Notification._meta.concrete_fields]
+ATTEMPT_ARCHIVE_FIELDS = [
+    field.attname for field in DeliveryAttempt._meta.concrete_fields if field.name != "notification"
+]
+
+
+class ArchiveWriter(ABC):
+    """
+    Запись пачек архивируемых уведомлений в файлы.
+
+    Имя файла определяется ключом первой строки пачки, а файл пишется через
+    временный файл и переименование. Если процесс упал после записи архива, но
+    до удаления, повторный запуск начнет с той же строки и перезапишет тот же
+    файл, поэтому строки в архиве не дублируются.
+    """
+
+    extension = ""
+
+    def __init__(self, directory: str | Path):
+        """
+        Инициализирует writer.
+
+        Args:
+            directory: Каталог архива (создается при необходимости)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rows: list[dict]) -> Path:
+        """
+        Записывает пачку в отдельный файл.
+
+        Args:
+            rows: Строки уведомлений с вложенными попытками
+
+        Returns:
+            Путь к файлу архива
+        """
+        first = rows[0]
+        stamp = first["created_at"].replace(":", "").replace("-", "").replace("+", "_")
+        path = self.directory / f"notifications-{stamp}-{first['id']}{self.extension}"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        self._write_file(tmp_path, rows)
+        os.replace(tmp_path, path)
+        return path
+
+    @abstractmethod
+    def _write_file(self, path: Path, rows: list[dict]) -> None:
+        """Записывает строки пачки в файл path."""
+
+
+class NdjsonArchiveWriter(ArchiveWriter):
+    """Архив в NDJSON, сжатом gzip: одна строка JSON на уведомление."""
+
+    extension = ".ndjson.gz"
+
+    def _write_file(self, path: Path, rows: list[dict]) -> None:
+        with gzip.open(path, "wt", encoding="utf-8") as archive:
+            for row in rows:
+                archive.write(json.dumps(row, ensure_ascii=False))
+                archive.write("\n")
+
+
+class ParquetArchiveWriter(ArchiveWriter):
+    """Колоночный архив Parquet (zstd). Требует установленного pyarrow."""
+
+    extension = ".parquet"
+
+    def __init__(self, directory: str | Path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Parquet archive requires pyarrow: pip install pyarrow") from e
+        super().__init__(directory)
+
+    def _write_file(self, path: Path, rows: list[dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(rows), path, compression="zstd")
+
+
+ARCHIVE_WRITERS: dict[str, type[ArchiveWriter]] = {
+    ARCHIVE_NDJSON: NdjsonArchiveWriter,
+    ARCHIVE_PARQUET: ParquetArchiveWriter,
+}
+
+
+class NotificationPruner:
+    """
+    Удаление старых завершенных уведомлений пачками.
+
+    Пачка выбирается по индексу (created_at, id) от старых к новым и удаляется
+    в своей транзакции вместе с попытками доставки, поэтому блокировки держатся
+    недолго, а в памяти никогда не больше batch_size уведомлений. Прогресс
+    хранится в самой таблице: удаленные строки не выбираются повторно, и
+    прерванный запуск продолжается с того же места.
+
+    Уведомление, в которое объединены еще не удаляемые дубликаты, остается:
+    иначе каскад удалил бы их связи CoalescedNotification.
+    """
+
+    def __init__(
+        self,
+        older_than: datetime,
+        batch_size: int = 1000,
+        max_rows_per_second: float = 0,
+        archive: ArchiveWriter | None = None,
+        statuses: list[str] | None = None,
+    ):
+        """
+        Инициализирует удаление.
+
+        Args:
+            older_than: Удаляются уведомления, созданные раньше этого момента
+            batch_size: Уведомлений в одной транзакции
+            max_rows_per_second: Ограничение скорости удаления (0 - без ограничения)
+            archive: Writer архива; без него строки удаляются без сохранения
+            statuses: Удаляемые статусы (по умолчанию терминальные)
+        """
+        self.older_than = older_than
+        self.batch_size = batch_size
+        self.max_rows_per_second = max_rows_per_second
+        self.archive = archive
+        self.statuses = statuses or Notification.TERMINAL_STATUSES
+        self._last_key: tuple[datetime, object] | None = None
+
+    def run(self) -> int:
+        """
+        Удаляет все подходящие уведомления.
+
+        Returns:
+            Количество удаленных уведомлений
+        """
+        total = 0
+        while True:
+            started = time.monotonic()
+            deleted = self.prune_batch()
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+            self._throttle(deleted, time.monotonic() - started)
+
+    def prune_batch(self) -> int:
+        """
+        Архивирует (если задан архив) и удаляет одну пачку.
+
+        Returns:
+            Количество удаленных уведомлений
+        """
+        retained_duplicates = CoalescedNotification.objects.filter(digest=OuterRef("pk")).exclude(
+            notification__created_at__lt=self.older_than,
+            notification__status__in=self.statuses,
+        )
+        queryset = (
+            Notification.objects.filter(
+                created_at__lt=self.older_than,
+                status__in=self.statuses,
+            )
+            .exclude(Exists(retained_duplicates))
+            .order_by("created_at", "id")
+        )
+        if self._last_key is not None:
+            # Строки до ключа уже удалены; условие не дает индексу заново
+            # проходить по ним, пока их место не освобождено VACUUM
+            created_at, last_id = self._last_key
+            queryset = queryset.filter(created_at__gte=created_at).filter(
+                Q(created_at__gt=created_at) | Q(id__gt=last_id),
+            )
+
+        fields = NOTIFICATION_ARCHIVE_FIELDS if self.archive is not None else ["id", "created_at"]
+
+        with transaction.atomic():
+            notifications = list(queryset.values(*fields)[: self.batch_size])
+            if not notifications:
+                return 0
+            ids = [notification["id"] for notification in notifications]
+
+            if self.archive is not None:
+                path = self.archive.write(self._archive_rows(notifications))
+                logger.info(f"Archived {len(ids)} notifications to {path}")
+
+            # Попытки удаляются одним DELETE по индексу notification_id, чтобы
+            # каскад уведомлений не загружал их в память
+            DeliveryAttempt.objects.filter(notification_id__in=ids).delete()
+            Notification.objects.filter(id__in=ids).delete()
+
+        # Иначе GET удаленного уведомления отдавал бы 200 из кэша до конца TTL
+        status_cache = get_status_cache()
+        if status_cache is not None:
+            status_cache.invalidate(ids)
+        self._last_key = (notifications[-1]["created_at"], ids[-1])
+        return len(ids)
+
+    def _archive_rows(self, notifications: list[dict]) -> list[dict]:
+        attempts = defaultdict(list)
+        for attempt in DeliveryAttempt.objects.filter(
+            notification_id__in=[notification["id"] for notification in notifications],
+        ).values("notification_id", *ATTEMPT_ARCHIVE_FIELDS):
+            notification_id = attempt.pop("notification_id")
+            attempts[notification_id].append(_to_json(attempt))
+
+        return [
+            {**_to_json(notification), "attempts": attempts[notification["id"]]}
+            for notification in notifications
+        ]
+
+    def _throttle(self, deleted: int, elapsed: float) -> None:
+        if self.max_rows_per_second <= 0:
+            return
+        pause = deleted / self.max_rows_per_second - elapsed
+        if pause > 0:
+            time.sleep(pause)
+
+
+def _to_json(row: dict) -> dict:
+    """Приводит UUID и даты строки к строкам для архива."""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else _to_str(value)
+        for key, value in row.items()
+    }
+
+
+def _to_str(value):
+    if value is None or isinstance(value, str | int | float | bool | list | dict):
+        return value
+    return str(value)
@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class RetryPolicy:
+    """
+    Политика повторной отправки уведомления после временных ошибок.
+
+    Повторяется вся цепочка каналов. Пауза перед повтором растет
+    экспоненциально (base_delay * 2^n, не больше max_delay) со случайным
+    разбросом в верхней половине интервала (equal jitter), чтобы уведомления,
+    упавшие на одном сбое провайдера, не вернулись к нему одновременно.
+    Подсказка retry_after от провайдера увеличивает паузу. Повторов нет,
+    если исчерпан max_attempts или повтор не успевает до deadline от начала
+    доставки (send_at отложенного уведомления, иначе время создания).
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 30.0,
+        max_delay: float = 1800.0,
+        deadline: float = 86400.0,
+    ):
+        """
+        Инициализирует политику.
+
+        Args:
+            max_attempts: Максимум прогонов цепочки каналов, включая первый
+            base_delay: Пауза перед первым повтором в секундах
+            max_delay: Максимальная пауза между повторами в секундах
+            deadline: Время от начала доставки, после которого повторов нет, сек
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        """Создает политику из настроек NOTIFICATION_RETRY_*."""
+        return cls(
+            max_attempts=settings.NOTIFICATION_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.NOTIFICATION_RETRY_BASE_DELAY,
+            max_delay=settings.NOTIFICATION_RETRY_MAX_DELAY,
+            deadline=settings.NOTIFICATION_RETRY_DEADLINE,
+        )
+
+    def next_delay(
+        self,
+        retry_count: int,
+        started_at: datetime,
+        retry_after: float | None = None,
+    ) -> float | None:
+        """
+        Возвращает паузу перед следующим повтором.
+
+        Args:
+            retry_count: Сколько повторов уже было
+            started_at: Начало доставки: send_at или время создания уведомления
+            retry_after: Подсказка провайдера в секундах
+
+        Returns:
+            Пауза в секундах или None, если повторять больше нельзя
+        """
+        if retry_count + 1 >= self.max_attempts:
+            return None
+
+        delay = min(self.max_delay, self.base_delay * 2**retry_count)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        if timezone.now() + timedelta(seconds=delay) > started_at + timedelta(
+            seconds=self.deadline,
+        ):
+            return None
+        return delay
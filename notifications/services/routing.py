@@ -0,0 +1,194 @@
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChannelStats:
+    """Экспоненциально сглаженная статистика канала."""
+
+    success_rate: float
+    latency: float
+    samples: float = 0.0
+    # Сглаженное время ожидания лимита скорости канала в секундах
+    rate_limit_wait: float = 0.0
+    # Число отправок, отложенных из-за лимита скорости
+    deferred: int = 0
+
+
+class ChannelStatsTracker:
+    """
+    Трекер статистики каналов доставки.
+
+    Для каждого канала хранит экспоненциально сглаженные (EWMA) долю успешных
+    отправок и время отправки. Обновление - O(1) под блокировкой, поэтому
+    трекер можно вызывать на каждой отправке.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.05,
+        prior_success_rate: float = 0.8,
+        prior_latency: float = 1.0,
+    ):
+        """
+        Инициализирует трекер.
+
+        Args:
+            alpha: Вес нового наблюдения в EWMA
+            prior_success_rate: Начальная оценка доли успешных отправок
+            prior_latency: Начальная оценка времени отправки в секундах
+        """
+        self.alpha = alpha
+        self.prior_success_rate = prior_success_rate
+        self.prior_latency = prior_latency
+        self._lock = threading.Lock()
+        self._stats: dict[str, ChannelStats] = {}
+
+    def observe(self, channel: str, success: bool, latency: float) -> None:
+        """
+        Учитывает результат отправки.
+
+        Args:
+            channel: Название канала
+            success: Успешна ли отправка
+            latency: Время отправки в секундах
+        """
+        with self._lock:
+            stats = self._stats.get(channel)
+            if stats is None:
+                stats = ChannelStats(self.prior_success_rate, self.prior_latency)
+                self._stats[channel] = stats
+            stats.success_rate += self.alpha * (float(success) - stats.success_rate)
+            stats.latency += self.alpha * (latency - stats.latency)
+            stats.samples = stats.samples * (1 - self.alpha) + 1
+
+    def observe_rate_limit(self, channel: str, waited: float, deferred: bool) -> None:
+        """
+        Учитывает ожидание лимита скорости канала.
+
+        Args:
+            channel: Название канала
+            waited: Время ожидания токена в секундах
+            deferred: Отправка отложена, потому что токен не получен вовремя
+        """
+        with self._lock:
+            stats = self._stats.get(channel)
+            if stats is None:
+                stats = ChannelStats(self.prior_success_rate, self.prior_latency)
+                self._stats[channel] = stats
+            stats.rate_limit_wait += self.alpha * (waited - stats.rate_limit_wait)
+            stats.deferred += int(deferred)
+
+    def get(self, channel: str) -> ChannelStats:
+        """Возвращает копию статистики канала (или априорную оценку)."""
+        with self._lock:
+            stats = self._stats.get(channel)
+            if stats is None:
+                return ChannelStats(self.prior_success_rate, self.prior_latency)
+            return replace(stats)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Возвращает статистику всех каналов для просмотра."""
+        with self._lock:
+            return {channel: asdict(stats) for channel, stats in self._stats.items()}
+
+
+class AdaptiveChannelRouter:
+    """
+    Адаптивный выбор порядка каналов.
+
+    При последовательном fallback ожидаемое время до доставки минимально,
+    если каналы упорядочены по возрастанию latency / success_rate. Чтобы
+    каналы с малым числом наблюдений не застревали в конце очереди,
+    к оценке успеха добавляется бонус исследования в духе UCB.
+    """
+
+    def __init__(self, tracker: ChannelStatsTracker, exploration: float = 0.3):
+        """
+        Инициализирует роутер.
+
+        Args:
+            tracker: Трекер статистики каналов
+            exploration: Вес бонуса исследования (0 - только эксплуатация)
+        """
+        self.tracker = tracker
+        self.exploration = exploration
+
+    def score(self, channel: str) -> float:
+        """Ожидаемая стоимость канала: чем меньше, тем раньше он в очереди."""
+        stats = self.tracker.get(channel)
+        bonus = self.exploration / math.sqrt(stats.samples + 1)
+        success_rate = min(1.0, stats.success_rate + bonus)
+        return max(stats.latency, 1e-6) / max(success_rate, 1e-6)
+
+    def order(self, channels: list[str]) -> list[str]:
+        """
+        Упорядочивает каналы по ожидаемой стоимости.
+
+        Args:
+            channels: Каналы в исходном порядке (используется при равных оценках)
+
+        Returns:
+            Каналы в порядке попыток
+        """
+        return sorted(channels, key=self.score)
+
+
+_tracker: ChannelStatsTracker | None = None
+_tracker_lock = threading.Lock()
+_last_published = 0.0
+
+
+def get_channel_stats_tracker() -> ChannelStatsTracker:
+    """Возвращает трекер статистики каналов текущего процесса."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ChannelStatsTracker(alpha=settings.NOTIFICATION_ROUTING_EWMA_ALPHA)
+        return _tracker
+
+
+CHANNEL_STATS_CACHE_KEY = "notifications:routing:stats"
+
+
+def publish_channel_stats(tracker: ChannelStatsTracker, force: bool = False) -> None:
+    """
+    Публикует статистику каналов в кэш для просмотра через API.
+
+    Публикация выполняется не чаще NOTIFICATION_ROUTING_STATS_PUBLISH_INTERVAL
+    секунд. Каждый воркер перезаписывает общий ключ своим снимком.
+
+    Args:
+        tracker: Трекер статистики каналов
+        force: Опубликовать независимо от интервала
+    """
+    global _last_published
+    now = time.time()
+    if not force and now - _last_published < settings.NOTIFICATION_ROUTING_STATS_PUBLISH_INTERVAL:
+        return
+    _last_published = now
+
+    caches["default"].set(
+        CHANNEL_STATS_CACHE_KEY,
+        {
+            "worker": f"{socket.gethostname()}:{os.getpid()}",
+            "updated_at": now,
+            "channels": tracker.snapshot(),
+        },
+        timeout=None,
+    )
+
+
+def get_published_channel_stats() -> dict | None:
+    """Возвращает последний опубликованный снимок статистики каналов."""
+    return caches["default"].get(CHANNEL_STATS_CACHE_KEY)
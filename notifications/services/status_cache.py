@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from notifications.models import DeliveryAttempt, Notification
+from notifications.serializers import DeliveryAttemptSerializer, NotificationDetailSerializer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedStatus:
+    """Готовое представление уведомления для GET /api/notifications/{id}/."""
+
+    payload: dict[str, Any]
+    etag: str
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> "CachedStatus":
+        """Создает запись, вычисляя сильный ETag по содержимому."""
+        body = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder)
+        return cls(payload=payload, etag=f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"')
+
+
+def render_notification_status(
+    notification: Notification,
+    attempts: list[dict[str, Any]] | None = None,
+) -> CachedStatus:
+    """
+    Сериализует уведомление в формате NotificationDetailSerializer.
+
+    Args:
+        notification: Уведомление
+        attempts: Уже сериализованные попытки (None - загрузить из БД)
+
+    Returns:
+        CachedStatus с данными и ETag
+    """
+    context = {"attempts": attempts} if attempts is not None else {}
+    data = NotificationDetailSerializer(notification, context=context).data
+    return CachedStatus.from_payload(
+        {**data, "attempts": [dict(attempt) for attempt in data["attempts"]]},
+    )
+
+
+class NotificationStatusCache:
+    """
+    Write-through кэш статусов уведомлений.
+
+    Воркер обновляет запись при каждом изменении статуса и новой попытке
+    доставки, поэтому API отдает детальный статус без запросов к БД. Новые
+    попытки дописываются к закэшированному списку; если записи нет, она
+    строится заново по данным из БД.
+
+    Ошибки кэша не прерывают доставку: запись истекает через ttl, а API при
+    промахе читает БД.
+    """
+
+    KEY_PREFIX = "notifications:status"
+
+    def __init__(self, cache_alias: str = "default", ttl: float = 3600.0):
+        """
+        Инициализирует кэш.
+
+        Args:
+            cache_alias: Алиас кэша из settings.CACHES
+            ttl: Время жизни записи в секундах
+        """
+        self.cache = caches[cache_alias]
+        self.ttl = ttl
+
+    def get(self, notification_id) -> CachedStatus | None:
+        """Возвращает закэшированный статус уведомления или None."""
+        try:
+            return self.cache.get(self._key(notification_id))
+        except Exception as e:
+            logger.warning(f"Status cache read failed for {notification_id}: {e}")
+            return None
+
+    def populate(
+        self,
+        notification: Notification,
+        attempts: list[dict[str, Any]] | None = None,
+    ) -> CachedStatus:
+        """
+        Строит запись и кладет ее в кэш, если записи еще нет.
+
+        Используется API при промахе и при создании уведомления. add вместо set
+        не дает затереть более свежую запись, которую воркер успел сохранить
+        после чтения из БД.
+
+        Args:
+            notification: Уведомление
+            attempts: Уже сериализованные попытки (None - загрузить из БД)
+        """
+        status = render_notification_status(notification, attempts)
+        try:
+            self.cache.add(self._key(notification.id), status, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Status cache write failed for {notification.id}: {e}")
+        return status
+
+    def update(
+        self,
+        notification: Notification,
+        new_attempts: Iterable[DeliveryAttempt] = (),
+    ) -> None:
+        """
+        Обновляет запись после изменения уведомления.
+
+        Args:
+            notification: Уведомление с актуальными полями
+            new_attempts: Попытки, сохраненные после предыдущего обновления
+        """
+        self.update_many([(notification, list(new_attempts))])
+
+    def update_many(self, updates: list[tuple[Notification, list[DeliveryAttempt]]]) -> None:
+        """
+        Обновляет записи пачки уведомлений за одно чтение и одну запись в кэш.
+
+        Для уведомлений без записи в кэше попытки загружаются из БД одним запросом.
+
+        Args:
+            updates: Пары (уведомление, новые попытки)
+        """
+        if not updates:
+            return
+
+        keys = {notification.id: self._key(notification.id) for notification, _ in updates}
+        try:
+            cached = self.cache.get_many(list(keys.values()))
+        except Exception as e:
+            logger.warning(f"Status cache read failed: {e}")
+            return
+
+        missing = [
+            notification.id for notification, _ in updates if keys[notification.id] not in cached
+        ]
+        stored_attempts: dict[Any, list[DeliveryAttempt]] = defaultdict(list)
+        if missing:
+            for attempt in DeliveryAttempt.objects.filter(notification_id__in=missing):
+                stored_attempts[attempt.notification_id].append(attempt)
+
+        values = {}
+        for notification, new_attempts in updates:
+            previous = cached.get(keys[notification.id])
+            if previous is None:
+                attempts = self._serialize_attempts(stored_attempts[notification.id])
+            else:
+                attempts = previous.payload["attempts"] + self._serialize_attempts(new_attempts)
+            values[keys[notification.id]] = render_notification_status(notification, attempts)
+
+        try:
+            self.cache.set_many(values, timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Status cache write failed: {e}")
+
+    def invalidate(self, notification_ids: Iterable) -> None:
+        """Удаляет записи уведомлений, измененных в обход сервиса."""
+        try:
+            self.cache.delete_many(
+                [self._key(notification_id) for notification_id in notification_ids]
+            )
+        except Exception as e:
+            logger.warning(f"Status cache invalidation failed: {e}")
+
+    def _key(self, notification_id) -> str:
+        return f"{self.KEY_PREFIX}:{notification_id}"
+
+    @staticmethod
+    def _serialize_attempts(attempts: list[DeliveryAttempt]) -> list[dict[str, Any]]:
+        return [dict(data) for data in DeliveryAttemptSerializer(attempts, many=True).data]
+
+
+def get_status_cache() -> NotificationStatusCache | None:
+    """
+    Возвращает кэш статусов согласно NOTIFICATION_STATUS_CACHE_ALIAS.
+
+    Returns:
+        NotificationStatusCache или None, если кэш статусов выключен
+    """
+    if not settings.NOTIFICATION_STATUS_CACHE_ALIAS:
+        return None
+    return NotificationStatusCache(
+        settings.NOTIFICATION_STATUS_CACHE_ALIAS,
+        ttl=settings.NOTIFICATION_STATUS_CACHE_TTL,
+    )
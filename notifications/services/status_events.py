@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from typing import Any
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from notifications.models import DeliveryAttempt, Notification
+from notifications.serializers import DeliveryAttemptSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def build_status_event(
+    notification: Notification,
+    attempts: Iterable[DeliveryAttempt] = (),
+) -> dict[str, Any]:
+    """
+    Формирует событие изменения уведомления.
+
+    Args:
+        notification: Уведомление с актуальными полями
+        attempts: Новые попытки доставки
+
+    Returns:
+        Событие: статус, канал доставки и новые попытки
+    """
+    return {
+        "id": str(notification.id),
+        "status": notification.status,
+        "used_channel": notification.used_channel,
+        "attempts": [dict(data) for data in DeliveryAttemptSerializer(attempts, many=True).data],
+    }
+
+
+class StatusSubscription:
+    """Подписка на события одного уведомления в цикле событий подписчика."""
+
+    def __init__(self, broker: "StatusEventBroker", notification_id: str):
+        """
+        Инициализирует подписку.
+
+        Args:
+            broker: Брокер, из которого приходят события
+            notification_id: UUID уведомления
+        """
+        self.broker = broker
+        self.notification_id = notification_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def get(self, timeout: float | None = None) -> dict[str, Any] | None:
+        """
+        Ожидает следующее событие.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            Событие или None, если время ожидания истекло
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    def put(self, event: dict[str, Any]) -> None:
+        """Передает событие в цикл событий подписчика (потокобезопасно)."""
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            # Цикл событий подписчика уже закрыт
+            self.close()
+
+    def close(self) -> None:
+        """Отменяет подписку."""
+        self.broker.unsubscribe(self)
+
+
+class StatusEventBroker(ABC):
+    """
+    Pub/sub для событий изменения статуса уведомлений.
+
+    Воркер публикует события синхронно, ASGI-процесс API раздает их подпискам
+    ожидающих клиентов. Подписки процесса хранятся локально, поэтому на один
+    процесс API нужен один канал к брокеру независимо от числа клиентов.
+    """
+
+    def __init__(self):
+        """Инициализирует реестр подписок."""
+        self._lock = threading.Lock()
+        self._subscriptions: dict[str, set[StatusSubscription]] = {}
+
+    def subscribe(self, notification_id: str) -> StatusSubscription:
+        """
+        Подписывается на события уведомления.
+
+        Вызывается из асинхронного кода; подписку нужно закрыть через close().
+
+        Args:
+            notification_id: UUID уведомления
+        """
+        subscription = StatusSubscription(self, str(notification_id))
+        with self._lock:
+            self._subscriptions.setdefault(subscription.notification_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription) -> None:
+        """Удаляет подписку."""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.notification_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.notification_id]
+
+    def publish(self, event: dict[str, Any]) -> None:
+        """Публикует одно событие."""
+        self.publish_many([event])
+
+    @abstractmethod
+    def publish_many(self, events: list[dict[str, Any]]) -> None:
+        """
+        Публикует события.
+
+        Args:
+            events: События, сформированные build_status_event
+        """
+
+    def dispatch(self, event: dict[str, Any]) -> None:
+        """Раздает полученное событие локальным подпискам."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(event["id"], ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+class InMemoryStatusEventBroker(StatusEventBroker):
+    """
+    Брокер в памяти процесса.
+
+    События видны только подпискам того же процесса: подходит для тестов и
+    запуска воркера в режиме eager.
+    """
+
+    def publish_many(self, events: list[dict[str, Any]]) -> None:
+        for event in events:
+            self.dispatch(event)
+
+
+class RedisStatusEventBroker(StatusEventBroker):
+    """
+    Брокер на Redis Pub/Sub.
+
+    Процесс API держит одну подписку на шаблон каналов всех уведомлений в
+    фоновом потоке и раздает события локальным подпискам.
+    """
+
+    CHANNEL_PREFIX = "notifications:events"
+
+    def __init__(self, url: str):
+        """
+        Инициализирует брокер.
+
+        Args:
+            url: URL Redis
+        """
+        super().__init__()
+        self.client = redis.Redis.from_url(url)
+        self._listener: threading.Thread | None = None
+
+    def publish_many(self, events: list[dict[str, Any]]) -> None:
+        try:
+            with self.client.pipeline(transaction=False) as pipe:
+                for event in events:
+                    pipe.publish(
+                        f"{self.CHANNEL_PREFIX}:{event['id']}",
+                        json.dumps(event, cls=DjangoJSONEncoder),
+                    )
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to publish status events: {e}")
+
+    def subscribe(self, notification_id: str) -> StatusSubscription:
+        self._ensure_listener()
+        return super().subscribe(notification_id)
+
+    def _ensure_listener(self) -> None:
+        """
+        Запускает фоновый поток чтения Pub/Sub при первой подписке.
+
+        Подписка на шаблон оформляется до возврата, чтобы события, опубликованные
+        сразу после subscribe, не терялись.
+        """
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{self.CHANNEL_PREFIX}:*")
+            self._listener = threading.Thread(
+                target=self._listen,
+                args=(pubsub,),
+                name="notification-status-events",
+                daemon=True,
+            )
+            self._listener.start()
+
+    def _listen(self, pubsub) -> None:
+        try:
+            for message in pubsub.listen():
+                try:
+                    self.dispatch(json.loads(message["data"]))
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Malformed status event: {e}")
+        except Exception as e:
+            logger.error(f"Status event listener stopped: {e}", exc_info=True)
+        finally:
+            pubsub.close()
+
+
+_broker: StatusEventBroker | None = None
+_broker_lock = threading.Lock()
+
+
+def get_status_event_broker() -> StatusEventBroker:
+    """Возвращает брокер событий текущего процесса согласно NOTIFICATION_STATUS_EVENTS_BACKEND."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            if settings.NOTIFICATION_STATUS_EVENTS_BACKEND == "redis":
+                _broker = RedisStatusEventBroker(settings.NOTIFICATION_STATUS_EVENTS_REDIS_URL)
+            else:
+                _broker = InMemoryStatusEventBroker()
+        return _broker
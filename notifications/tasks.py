@@ -1,9 +1,14 @@
 import logging
 
 from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
 
+from notification_service.sqlite import submit_write
 from notifications.models import Notification
 from notifications.services import NotificationService
+from notifications.services.coalescing import coalesce_notifications, release_dedup_claims
+from notifications.services.status_cache import get_status_cache
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +18,25 @@ def send_notification_task(notification_id: str) -> None:
     """
     Асинхронная задача для отправки уведомления.
 
+    Задачи подтверждаются после выполнения (acks_late), поэтому при падении
+    воркера сообщение будет доставлено повторно. Уже доставленные или
+    проваленные уведомления при этом пропускаются, а устаревшие (expires_at
+    в прошлом) помечаются expired без вызова каналов. Дубликаты недавних
+    уведомлений не отправляются (см. NOTIFICATION_DEDUP_WINDOW).
+
     Args:
         notification_id: UUID уведомления
     """
     try:
         notification = Notification.objects.get(id=notification_id)
+        if notification.status in Notification.TERMINAL_STATUSES:
+            logger.warning(f"Notification {notification_id} is already processed, skipping")
+            return
+        if notification.is_expired():
+            _expire_notifications([notification])
+            return
+        if not coalesce_notifications([notification]):
+            return
         logger.info(f"Processing notification {notification_id} in Celery task")
         service = NotificationService()
         service.send_notification(notification)
@@ -30,7 +49,136 @@ def send_notification_task(notification_id: str) -> None:
         try:
             notification = Notification.objects.get(id=notification_id)
             notification.status = Notification.STATUS_FAILED
-            notification.save(update_fields=["status"])
+            notification.lease_expires_at = None
+            submit_write(
+                lambda: notification.save(update_fields=["status", "lease_expires_at"]),
+            )
+            release_dedup_claims([notification])
         except Notification.DoesNotExist:
             pass
+        _invalidate_status_cache([notification_id])
         raise
+
+    release_dedup_claims([notification])
+    _schedule_retries([notification])
+
+
+@shared_task
+def send_notifications_batch_task(notification_ids: list[str]) -> None:
+    """
+    Асинхронная задача для пакетной отправки уведомлений.
+
+    Загружает все уведомления одним запросом и отправляет их через
+    NotificationService.send_notifications, который пишет попытки и статусы пачкой.
+    Уведомления, которые уже не в статусе pending, пропускаются, устаревшие
+    помечаются expired без отправки. Дубликаты и уведомления одному получателю
+    объединяются до отправки (см. notifications.services.coalescing).
+
+    Args:
+        notification_ids: UUID уведомлений
+    """
+    notifications = list(
+        Notification.objects.filter(
+            id__in=notification_ids,
+            status=Notification.STATUS_PENDING,
+        ),
+    )
+    skipped = len(notification_ids) - len(notifications)
+    if skipped:
+        logger.warning(f"Batch task: {skipped} notifications not found or not pending, skipping")
+
+    now = timezone.now()
+    expired = [notification for notification in notifications if notification.is_expired(now)]
+    if expired:
+        _expire_notifications(expired)
+        notifications = [
+            notification for notification in notifications if not notification.is_expired(now)
+        ]
+    notifications = coalesce_notifications(notifications)
+
+    logger.info(f"Processing batch of {len(notifications)} notifications in Celery task")
+    try:
+        service = NotificationService()
+        service.send_notifications(notifications)
+    except Exception as e:
+        logger.error(f"Error processing notification batch: {e}", exc_info=True)
+        # Обновляем статус на failed для уведомлений, оставшихся в обработке
+        submit_write(
+            lambda: Notification.objects.filter(
+                id__in=[notification.id for notification in notifications],
+                status=Notification.STATUS_IN_PROGRESS,
+            ).update(status=Notification.STATUS_FAILED, lease_expires_at=None),
+        )
+        for notification in notifications:
+            if notification.status == Notification.STATUS_IN_PROGRESS:
+                notification.status = Notification.STATUS_FAILED
+        release_dedup_claims(notifications)
+        _invalidate_status_cache([notification.id for notification in notifications])
+        raise
+
+    release_dedup_claims(notifications)
+    _schedule_retries(notifications)
+
+
+@shared_task
+def reap_expired_leases_task() -> int:
+    """
+    Периодическая задача (Celery beat): возвращает в очередь уведомления
+    с истекшей арендой пачками по NOTIFICATION_LEASE_REAPER_BATCH_SIZE.
+
+    Returns:
+        Количество возвращенных в очередь уведомлений
+    """
+    # Импорт внутри функции: dispatch импортирует задачи этого модуля
+    from notifications.dispatch import reap_expired_leases
+
+    total = 0
+    for _ in range(settings.NOTIFICATION_LEASE_REAPER_MAX_BATCHES):
+        reaped = reap_expired_leases()
+        total += reaped
+        if reaped < settings.NOTIFICATION_LEASE_REAPER_BATCH_SIZE:
+            break
+    return total
+
+
+def _schedule_retries(notifications: list[Notification]) -> None:
+    """Планирует повтор уведомлений, вернувшихся в pending после временных ошибок."""
+    # Импорт внутри функции: dispatch импортирует задачи этого модуля
+    from notifications.dispatch import schedule_retries
+
+    schedule_retries(notifications)
+
+
+def _expire_notifications(notifications: list[Notification]) -> None:
+    """
+    Помечает устаревшие уведомления статусом expired, не вызывая каналы.
+
+    UPDATE условный: уведомление, которое за это время обработал другой
+    воркер, не перезаписывается.
+    """
+    expired = submit_write(
+        lambda: Notification.objects.filter(
+            id__in=[notification.id for notification in notifications],
+            expires_at__lte=timezone.now(),
+        )
+        .exclude(status__in=Notification.TERMINAL_STATUSES)
+        .update(
+            status=Notification.STATUS_EXPIRED,
+            claimed_by=None,
+            lease_expires_at=None,
+            next_attempt_at=None,
+        ),
+    )
+    logger.warning(f"Expired {expired} stale notifications without delivery")
+    # Хэш мог быть закреплен при первой попытке отправки, до повтора
+    for notification in notifications:
+        notification.status = Notification.STATUS_EXPIRED
+    release_dedup_claims(notifications)
+    _invalidate_status_cache([notification.id for notification in notifications])
+
+
+def _invalidate_status_cache(notification_ids: list) -> None:
+    """Сбрасывает кэш статусов уведомлений, измененных в обход сервиса."""
+    status_cache = get_status_cache()
+    if status_cache is not None:
+        status_cache.invalidate(notification_ids)
@@ -0,0 +1,309 @@
+"""
+Локальные заглушки внешних провайдеров для тестов и бенчмарков.
+
+Серверы работают в фоновом потоке на 127.0.0.1 и случайном порту.
+"""
+
+import json
+import socketserver
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from email import message_from_bytes
+from email.message import Message
+from http.server import BaseHTTPRequestHandler
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Сессия SMTP: минимальное подмножество RFC 5321, достаточное для smtplib."""
+
+    server: "_LocalServer._Server"
+
+    def handle(self):
+        server = self.server.owner
+        server._session_started(self.connection)
+        try:
+            self._reply("220 localhost ESMTP")
+            self._serve(server)
+        except OSError:
+            pass
+        finally:
+            server._session_finished(self.connection)
+
+    def _serve(self, server: "LocalSMTPServer"):
+        mail_from = None
+        recipients: list[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode().rstrip("\r\n").partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                self._reply("250-localhost", "250-AUTH PLAIN", "250 8BITMIME")
+            elif command == "HELO":
+                self._reply("250 localhost")
+            elif command == "AUTH":
+                self._reply("235 Authentication successful")
+            elif command == "MAIL":
+                mail_from, recipients = argument[5:].strip("<>"), []
+                self._reply("250 OK")
+            elif command == "RCPT":
+                recipient = argument[3:].split()[0].strip("<>")
+                if recipient in server.rejected_recipients:
+                    self._reply("550 No such user")
+                else:
+                    recipients.append(recipient)
+                    self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = self._read_data()
+                if data is None:
+                    return
+                server._message_received(mail_from, recipients, data)
+                mail_from, recipients = None, []
+                self._reply("250 OK")
+            elif command in ("RSET", "NOOP"):
+                mail_from, recipients = None, []
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _read_data(self) -> bytes | None:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            if line == b".\r\n":
+                return b"".join(lines)
+            lines.append(line[1:] if line.startswith(b"..") else line)
+
+    def _reply(self, *lines: str):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+
+class _LocalServer:
+    """Фоновый TCP-сервер на 127.0.0.1 со счетчиком и обрывом сессий."""
+
+    class _Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+        # Очередь входящих соединений для одновременных подключений клиентов
+        request_queue_size = 128
+        owner: "_LocalServer"
+
+    handler_class: type[socketserver.BaseRequestHandler]
+
+    def __init__(self, handshake_delay: float = 0.0):
+        """
+        Инициализирует сервер.
+
+        Args:
+            handshake_delay: Задержка установки сессии в секундах
+                (имитирует TLS и AUTH реального сервера)
+        """
+        self.handshake_delay = handshake_delay
+        self.sessions = 0
+        self._lock = threading.Lock()
+        self._active: set = set()
+        self._server = self._Server(("127.0.0.1", 0), self.handler_class)
+        self._server.owner = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        """Запускает сервер."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер и закрывает открытые сессии."""
+        self._server.shutdown()
+        self.disconnect_all()
+        self._server.server_close()
+
+    def disconnect_all(self) -> None:
+        """Обрывает все открытые сессии (имитация рестарта сервера)."""
+        with self._lock:
+            active = list(self._active)
+        for connection in active:
+            try:
+                connection.shutdown(2)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _session_started(self, connection) -> None:
+        with self._lock:
+            self.sessions += 1
+            self._active.add(connection)
+        # Имитация стоимости установки сессии на реальном сервере
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+
+    def _session_finished(self, connection) -> None:
+        with self._lock:
+            self._active.discard(connection)
+
+
+class LocalSMTPServer(_LocalServer):
+    """
+    Локальный SMTP-сервер в фоновом потоке.
+
+    Принимает любые письма, кроме адресатов из rejected_recipients (550),
+    и сохраняет их в messages. sessions - число установленных SMTP-сессий,
+    по нему проверяется переиспользование соединений.
+    """
+
+    handler_class = _SMTPHandler
+
+    def __init__(self, handshake_delay: float = 0.0):
+        super().__init__(handshake_delay)
+        self.rejected_recipients: set[str] = set()
+        self.messages: list[Message] = []
+
+    def _message_received(self, mail_from: str, recipients: list[str], data: bytes) -> None:
+        message = message_from_bytes(data)
+        message["X-Envelope-From"] = mail_from
+        message["X-Envelope-To"] = ", ".join(recipients)
+        with self._lock:
+            self.messages.append(message)
+
+
+@dataclass
+class ProviderRequest:
+    """Запрос, принятый LocalHTTPProvider."""
+
+    method: str
+    path: str
+    headers: dict[str, str]
+    json: object | None
+
+
+@dataclass
+class ProviderResponse:
+    """Заготовленный ответ LocalHTTPProvider."""
+
+    status: int = 200
+    json: object | None = field(default_factory=lambda: {"ok": True})
+    headers: dict[str, str] = field(default_factory=dict)
+    # Оборвать соединение на середине тела (провайдер обработал запрос, но упал)
+    truncate: bool = False
+
+
+class _HTTPProviderHandler(BaseHTTPRequestHandler):
+    """Соединение HTTP/1.1 с keep-alive к имитации API провайдера."""
+
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело пишутся отдельно; без TCP_NODELAY тело ждет ACK клиента
+    disable_nagle_algorithm = True
+    server: "_LocalServer._Server"
+
+    def setup(self):
+        super().setup()
+        self.server.owner._session_started(self.connection)
+
+    def handle(self):
+        try:
+            super().handle()
+        except OSError:
+            pass
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.owner._session_finished(self.connection)
+
+    def do_POST(self):
+        provider = self.server.owner
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        response = provider._request_received(
+            ProviderRequest(
+                method=self.command,
+                path=self.path,
+                headers={name.lower(): value for name, value in self.headers.items()},
+                json=json.loads(body) if body else None,
+            ),
+        )
+        if provider.response_delay:
+            time.sleep(provider.response_delay)
+
+        payload = json.dumps(response.json).encode()
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if response.truncate:
+            self.wfile.write(payload[: len(payload) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalHTTPProvider(_LocalServer):
+    """
+    Имитация HTTP API провайдера SMS или Telegram в фоновом потоке.
+
+    Отвечает 200 {"ok": true} на любой запрос и сохраняет запросы в requests;
+    ответы из responses (например, 429 или 500) отдаются первыми по очереди,
+    а responder, если задан, строит ответ по запросу (например, для batch API).
+    Соединения держатся открытыми (HTTP/1.1 keep-alive); sessions - число
+    установленных TCP-соединений.
+    """
+
+    handler_class = _HTTPProviderHandler
+
+    def __init__(self, handshake_delay: float = 0.0, response_delay: float = 0.0):
+        """
+        Инициализирует сервер.
+
+        Args:
+            handshake_delay: Задержка установки соединения в секундах (имитирует TLS)
+            response_delay: Время обработки запроса провайдером в секундах
+        """
+        super().__init__(handshake_delay)
+        self.response_delay = response_delay
+        self.requests: list[ProviderRequest] = []
+        self.responses: list[ProviderResponse] = []
+        self.responder: Callable[[ProviderRequest], ProviderResponse] | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _request_received(self, request: ProviderRequest) -> ProviderResponse:
+        with self._lock:
+            self.requests.append(request)
+            if self.responses:
+                return self.responses.pop(0)
+        if self.responder is not None:
+            return self.responder(request)
+        return ProviderResponse()
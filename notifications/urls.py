@@ -6,5 +6,12 @@ app_name = "notifications"
 
 urlpatterns = [
     path("notifications/", views.create_notification, name="create"),
-    path("notifications/<uuid:notification_id>/", views.get_notification, name="detail"),
+    path("notifications/bulk/", views.create_notifications_bulk, name="bulk-create"),
+    path("notifications/<uuid:notification_id>/", views.notification_detail, name="detail"),
+    path(
+        "notifications/<uuid:notification_id>/events/",
+        views.stream_notification_events,
+        name="events",
+    ),
+    path("channels/stats/", views.get_channel_stats, name="channel-stats"),
 ]
@@ -1,62 +1,412 @@
+import asyncio
+import json
 import logging
+from contextlib import nullcontext
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from notification_service.db_router import pin_to_primary, read_from_replica
+from notifications.dispatch import (
+    add_to_outbox,
+    enqueue_notification,
+    enqueue_routed,
+    notification_queue,
+    uses_outbox,
+)
 from notifications.models import Notification
+from notifications.pagination import NotificationKeysetPagination
 from notifications.serializers import (
     NotificationCreateSerializer,
-    NotificationDetailSerializer,
+    NotificationListQuerySerializer,
+    NotificationListSerializer,
     NotificationResponseSerializer,
 )
-from notifications.tasks import send_notification_task
+from notifications.services import BulkItemResult, BulkNotificationIngestService
+from notifications.services.idempotency import (
+    IdempotencyRecord,
+    create_or_get_notification,
+    get_idempotency_cache,
+)
+from notifications.services.routing import get_published_channel_stats
+from notifications.services.status_cache import (
+    CachedStatus,
+    get_status_cache,
+    render_notification_status,
+)
+from notifications.services.status_events import StatusSubscription, get_status_event_broker
 
 logger = logging.getLogger(__name__)
 
 
-@api_view(["POST"])
+@api_view(["GET", "POST"])
 def create_notification(request):
     """
     Создает и отправляет уведомление.
 
     POST /api/notifications/
+
+    GET на тот же адрес возвращает список уведомлений (см. list_notifications).
     """
+    if request.method == "GET":
+        return list_notifications(request)
+
     serializer = NotificationCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
-    # Проверка идемпотентности
+    # Проверка идемпотентности: повтор запроса обслуживается из кэша без БД
     request_id = serializer.validated_data.get("request_id")
+    idempotency_cache = get_idempotency_cache()
     if request_id:
-        existing_notification = Notification.objects.filter(request_id=request_id).first()
-        if existing_notification:
+        cached = idempotency_cache.get(request_id)
+        if cached:
             logger.info(
                 f"Idempotency check: notification with request_id={request_id} "
-                f"already exists: {existing_notification.id}",
+                f"already exists: {cached.id} (cached)",
             )
-            response_serializer = NotificationResponseSerializer(existing_notification)
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+            return Response(cached.to_response(), status=status.HTTP_200_OK)
 
-    # Создаем уведомление
-    notification = serializer.save(status=Notification.STATUS_PENDING)
+    # Создаем уведомление (или получаем созданное конкурентным повтором).
+    # В режиме outbox запись в outbox делается в той же транзакции.
+    # Уведомление с send_at в будущем опубликует планировщик run_scheduler
+    initial_status = Notification.initial_status(serializer.validated_data.get("send_at"))
+    dispatch_now = initial_status == Notification.STATUS_PENDING
+    outbox = uses_outbox()
 
-    # Запускаем асинхронную задачу отправки
-    send_notification_task.delay(str(notification.id))
-    logger.info(f"Created notification {notification.id}, task queued")
+    def save():
+        notification = serializer.save(status=initial_status)
+        if outbox and dispatch_now:
+            add_to_outbox([notification.id])
+        return notification
+
+    notification, created = create_or_get_notification(save, request_id)
+    if request_id:
+        idempotency_cache.set(request_id, IdempotencyRecord.from_notification(notification))
 
-    # Возвращаем ответ с pending статусом
     response_serializer = NotificationResponseSerializer(notification)
+    if not created:
+        return Response(response_serializer.data, status=status.HTTP_200_OK)
+
+    # Статус нового уведомления какое-то время читается с основной БД
+    pin_to_primary([str(notification.id)])
+
+    # Новое уведомление без попыток: кэш статусов заполняется без запроса к БД
+    status_cache = get_status_cache()
+    if status_cache is not None:
+        status_cache.populate(notification, attempts=[])
+
+    # Запускаем асинхронную задачу отправки (в режиме outbox ее опубликует relay_outbox)
+    if dispatch_now and not outbox:
+        enqueue_notification(
+            str(notification.id),
+            queue=notification_queue(notification.priority, notification.channels),
+        )
+    logger.info(f"Created notification {notification.id} ({notification.status})")
+
+    # Возвращаем ответ с pending (или scheduled) статусом
     return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
+def list_notifications(request):
+    """
+    Возвращает список уведомлений с keyset-пагинацией.
+
+    GET /api/notifications/?status=&used_channel=&created_after=&created_before=
+        &recipient=&include_body=&page_size=&cursor=
+
+    Уведомления отдаются от новых к старым. Ответ содержит ссылку next на
+    следующую страницу (null для последней) без подсчета общего количества.
+    """
+    query = NotificationListQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+
+    queryset = Notification.objects.all()
+    if "status" in params:
+        queryset = queryset.filter(status=params["status"])
+    if "used_channel" in params:
+        queryset = queryset.filter(used_channel=params["used_channel"])
+    if "created_after" in params:
+        queryset = queryset.filter(created_at__gte=params["created_after"])
+    if "created_before" in params:
+        queryset = queryset.filter(created_at__lt=params["created_before"])
+    if "recipient" in params:
+        recipient = params["recipient"]
+        queryset = queryset.filter(
+            Q(to_email=recipient) | Q(to_phone=recipient) | Q(to_telegram_chat_id=recipient),
+        )
+    if not params["include_body"]:
+        queryset = queryset.defer("body")
+
+    paginator = NotificationKeysetPagination(
+        page_size=params.get("page_size", settings.NOTIFICATION_LIST_PAGE_SIZE),
+    )
+    with read_from_replica():
+        page = paginator.paginate_queryset(queryset, request)
+    serializer = NotificationListSerializer(
+        page,
+        many=True,
+        context={"include_body": params["include_body"]},
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(["POST"])
+def create_notifications_bulk(request):
+    """
+    Создает уведомления пакетом.
+
+    POST /api/notifications/bulk/
+
+    Каждый элемент обрабатывается независимо: невалидный элемент или дубликат
+    по request_id не отклоняют весь пакет. В ответе возвращается результат
+    (created / duplicate / invalid) для каждого элемента в исходном порядке.
+    """
+    serializer = NotificationCreateSerializer(data=request.data, many=True)
+    serializer.is_valid(raise_exception=True)
+
+    outbox = uses_outbox()
+    service = BulkNotificationIngestService(write_outbox=outbox)
+    results = service.ingest(serializer.validated_data, serializer.item_errors)
+
+    # Публикуем задачи только для созданных уведомлений без отложенной отправки,
+    # пачками по очередям приоритетов
+    created = [item for item in results if item.result == BulkItemResult.RESULT_CREATED]
+    pin_to_primary([item.id for item in created])
+    queued = [
+        (
+            item.id,
+            serializer.validated_data[item.index].get("priority"),
+            serializer.validated_data[item.index].get("channels"),
+        )
+        for item in created
+        if item.status == Notification.STATUS_PENDING
+    ]
+    if not outbox:
+        enqueue_routed(queued)
+    logger.info(
+        f"Bulk create: {len(created)} of {len(results)} notifications created, "
+        f"{len(queued)} queued",
+    )
+
+    summary = {
+        result: sum(1 for item in results if item.result == result)
+        for result in (
+            BulkItemResult.RESULT_CREATED,
+            BulkItemResult.RESULT_DUPLICATE,
+            BulkItemResult.RESULT_INVALID,
+        )
+    }
+    return Response(
+        {"summary": summary, "results": [item.to_dict() for item in results]},
+        status=status.HTTP_207_MULTI_STATUS,
+    )
+
+
 @api_view(["GET"])
 def get_notification(request, notification_id):
     """
     Получает статус уведомления и историю попыток доставки.
 
     GET /api/notifications/{id}/
+
+    Данные берутся из кэша статусов, который обновляют воркеры; при промахе -
+    из БД. Ответ содержит сильный ETag: если он совпадает с If-None-Match,
+    возвращается 304 без тела.
+    """
+    current = load_notification_status(notification_id)
+    headers = {"ETag": current.etag}
+    if _etag_matches(request, current.etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(current.payload, headers=headers)
+
+
+async def notification_detail(request, notification_id):
+    """
+    Детальный статус уведомления с поддержкой long-poll.
+
+    GET /api/notifications/{id}/?wait=30
+
+    Без параметра wait запрос обрабатывается get_notification. С wait ответ
+    задерживается до wait секунд (не больше NOTIFICATION_LONG_POLL_MAX_WAIT):
+    - с If-None-Match - пока представление не изменится, по таймауту 304;
+    - без него - пока уведомление не перейдет в терминальный статус.
+    Ожидание не опрашивает БД: процесс получает события от воркеров через pub/sub.
+    """
+    if request.method != "GET" or "wait" not in request.GET:
+        return await sync_to_async(get_notification)(request, notification_id)
+
+    try:
+        wait = min(max(float(request.GET["wait"]), 0.0), settings.NOTIFICATION_LONG_POLL_MAX_WAIT)
+    except ValueError:
+        return JsonResponse({"wait": ["A valid number is required."]}, status=400)
+
+    subscription = get_status_event_broker().subscribe(notification_id)
+    try:
+        current = await sync_to_async(load_notification_status)(notification_id)
+        conditional = "If-None-Match" in request.headers
+        if conditional:
+            should_wait = _etag_matches(request, current.etag)
+        else:
+            should_wait = current.payload["status"] not in Notification.TERMINAL_STATUSES
+
+        if should_wait and await _wait_for_change(subscription, wait, any_event=conditional):
+            # После события воркера читаем основную БД: реплика может отставать
+            current = await sync_to_async(load_notification_status)(
+                notification_id,
+                replica=False,
+            )
+    except Http404:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    finally:
+        subscription.close()
+
+    headers = {"ETag": current.etag}
+    if _etag_matches(request, current.etag):
+        return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JsonResponse(current.payload, headers=headers)
+
+
+async def stream_notification_events(request, notification_id):
+    """
+    Поток изменений уведомления (server-sent events).
+
+    GET /api/notifications/{id}/events/
+
+    Первым отправляется событие snapshot с текущим представлением уведомления,
+    затем события status с новым статусом и новыми попытками доставки. Поток
+    закрывается после терминального статуса или через
+    NOTIFICATION_STATUS_STREAM_TIMEOUT секунд (клиент SSE переподключится сам).
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    subscription = get_status_event_broker().subscribe(notification_id)
+    try:
+        current = await sync_to_async(load_notification_status)(notification_id)
+    except Http404:
+        subscription.close()
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    response = StreamingHttpResponse(
+        _status_event_stream(subscription, current),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def load_notification_status(notification_id, replica: bool = True) -> CachedStatus:
+    """
+    Возвращает представление уведомления из кэша статусов или из БД.
+
+    Args:
+        notification_id: UUID уведомления
+        replica: Разрешить чтение с реплики (если уведомление не закреплено
+            за основной БД после создания)
+
+    Raises:
+        Http404: Уведомление не найдено
+    """
+    status_cache = get_status_cache()
+    cached = status_cache.get(notification_id) if status_cache is not None else None
+    if cached is not None:
+        return cached
+
+    with (
+        read_from_replica(pin_key=str(notification_id)) if replica else nullcontext(False)
+    ) as on_replica:
+        notification = get_object_or_404(Notification, id=notification_id)
+        # Отстающая реплика могла вернуть устаревший статус: в кэш на весь TTL
+        # попадают только чтения с основной БД
+        if status_cache is not None and not on_replica:
+            return status_cache.populate(notification)
+        return render_notification_status(notification)
+
+
+def _etag_matches(request, etag: str) -> bool:
+    """Проверяет, совпадает ли ETag с заголовком If-None-Match (слабое сравнение)."""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = [value.removeprefix("W/") for value in parse_etags(if_none_match)]
+    return "*" in etags or etag in etags
+
+
+async def _wait_for_change(subscription: StatusSubscription, wait: float, any_event: bool) -> bool:
+    """
+    Ожидает событие уведомления.
+
+    Args:
+        subscription: Подписка на события уведомления
+        wait: Максимальное время ожидания в секундах
+        any_event: Завершать ожидание на любом событии, а не только на терминальном статусе
+
+    Returns:
+        True если дождались события, False по таймауту
+    """
+    deadline = asyncio.get_running_loop().time() + wait
+    while (remaining := deadline - asyncio.get_running_loop().time()) > 0:
+        event = await subscription.get(remaining)
+        if event is None:
+            return False
+        if any_event or event["status"] in Notification.TERMINAL_STATUSES:
+            return True
+    return False
+
+
+async def _status_event_stream(subscription: StatusSubscription, current: CachedStatus):
+    """Формирует поток SSE для уведомления."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.NOTIFICATION_STATUS_STREAM_TIMEOUT
+    try:
+        yield _format_sse("snapshot", current.payload)
+        notification_status = current.payload["status"]
+        while notification_status not in Notification.TERMINAL_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            event = await subscription.get(
+                min(settings.NOTIFICATION_STATUS_STREAM_KEEPALIVE, remaining),
+            )
+            if event is None:
+                # Комментарий SSE не дает прокси закрыть неактивное соединение
+                yield ": keepalive\n\n"
+                continue
+            notification_status = event["status"]
+            yield _format_sse("status", event)
+    finally:
+        subscription.close()
+
+
+def _format_sse(event: str, data: dict) -> str:
+    """Форматирует событие SSE."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+@api_view(["GET"])
+def get_channel_stats(request):
+    """
+    Возвращает статистику каналов доставки, опубликованную воркерами.
+
+    GET /api/channels/stats/
     """
-    notification = get_object_or_404(Notification, id=notification_id)
-    serializer = NotificationDetailSerializer(notification)
-    return Response(serializer.data)
+    stats = get_published_channel_stats()
+    if stats is None:
+        return Response({"worker": None, "updated_at": None, "channels": {}})
+    return Response(stats)
@@ -1,12 +1,19 @@
 import json
+import unittest
 import uuid
+from datetime import timedelta
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from notifications.models import Notification
+from notifications.services.idempotency import get_idempotency_cache
 
 
 class NotificationAPITest(TestCase):
@@ -15,6 +22,7 @@ class NotificationAPITest(TestCase):
     def setUp(self):
         """Подготовка тестовых данных."""
         self.client = APIClient()
+        get_idempotency_cache().clear()
 
     def test_create_notification_success(self):
         """Тест успешного создания уведомления."""
@@ -117,3 +125,176 @@ class NotificationAPITest(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class NotificationBulkAPITest(TestCase):
+    """Тесты для пакетного создания уведомлений."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.client = APIClient()
+        get_idempotency_cache().clear()
+        self.url = reverse("notifications:bulk-create")
+
+    def _post(self, data):
+        return self.client.post(self.url, data=json.dumps(data), content_type="application/json")
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_bulk_create_per_item_results(self, mock_enqueue):
+        """Тест: невалидный элемент не отклоняет весь пакет."""
+        existing = Notification.objects.create(
+            request_id="existing",
+            to_email="old@example.com",
+            body="Old message",
+        )
+        data = [
+            {"to_email": "a@example.com", "body": "First", "request_id": "new-1"},
+            {"body": "No contacts"},
+            {"to_phone": "+1234567890", "body": "Dup", "request_id": "existing"},
+            {"to_email": "b@example.com", "body": "Repeat", "request_id": "new-1"},
+        ]
+
+        response = self._post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data["results"]
+        self.assertEqual(
+            [item["result"] for item in results],
+            ["created", "invalid", "duplicate", "duplicate"],
+        )
+        self.assertIn("non_field_errors", results[1]["errors"])
+        self.assertEqual(results[2]["id"], str(existing.id))
+        self.assertEqual(results[3]["id"], results[0]["id"])
+        self.assertEqual(response.data["summary"], {"created": 1, "duplicate": 2, "invalid": 1})
+
+        self.assertEqual(Notification.objects.count(), 2)
+        mock_enqueue.assert_called_once_with([results[0]["id"]], queue=None)
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_bulk_create_uses_constant_number_of_queries(self, mock_enqueue):
+        """Тест: количество запросов не зависит от размера пакета."""
+        data = [
+            {"to_email": f"user{i}@example.com", "body": "Hi", "request_id": f"req-{i}"}
+            for i in range(50)
+        ]
+
+        # SELECT существующих request_id, INSERT, SELECT победителей (+ savepoint)
+        with self.assertNumQueries(5):
+            response = self._post(data)
+
+        self.assertEqual(response.data["summary"]["created"], 50)
+        self.assertEqual(len(mock_enqueue.call_args.args[0]), 50)
+
+    def test_bulk_create_rejects_non_list(self):
+        """Тест: тело запроса должно быть списком."""
+        response = self._post({"to_email": "a@example.com", "body": "Hi"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(NOTIFICATION_BULK_MAX_ITEMS=2)
+    def test_bulk_create_rejects_too_many_items(self):
+        """Тест: ограничение на размер пакета."""
+        data = [{"to_email": "a@example.com", "body": "Hi"}] * 3
+
+        response = self._post(data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Notification.objects.count(), 0)
+
+
+class NotificationListAPITest(TestCase):
+    """Тесты для списка уведомлений с keyset-пагинацией."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.client = APIClient()
+        self.url = reverse("notifications:create")
+        self.notifications = [
+            Notification.objects.create(to_email=f"user{i}@example.com", body=f"Body {i}")
+            for i in range(5)
+        ]
+
+    def test_pages_cover_all_rows_with_equal_created_at(self):
+        """Тест: страницы не теряют и не повторяют строки с одинаковым created_at."""
+        Notification.objects.update(created_at=timezone.now())
+
+        ids = []
+        url = f"{self.url}?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+
+        expected = sorted((str(n.id) for n in self.notifications), key=uuid.UUID, reverse=True)
+        self.assertEqual(ids, expected)
+
+    def test_page_does_not_count_rows(self):
+        """Тест: страница выбирается одним запросом, без COUNT(*)."""
+        first = self.client.get(self.url, {"page_size": 2})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(first.data["next"])
+
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_filters(self):
+        """Тест: фильтры по статусу, каналу, получателю и дате создания."""
+        delivered = self.notifications[0]
+        delivered.status = Notification.STATUS_DELIVERED
+        delivered.used_channel = "email"
+        delivered.save()
+        Notification.objects.filter(id=self.notifications[1].id).update(
+            created_at=timezone.now() - timedelta(days=2),
+        )
+
+        by_status = self.client.get(self.url, {"status": "delivered", "used_channel": "email"})
+        by_recipient = self.client.get(self.url, {"recipient": "user2@example.com"})
+        by_date = self.client.get(
+            self.url,
+            {"created_before": (timezone.now() - timedelta(days=1)).isoformat()},
+        )
+
+        self.assertEqual([item["id"] for item in by_status.data["results"]], [str(delivered.id)])
+        self.assertEqual(
+            [item["id"] for item in by_recipient.data["results"]],
+            [str(self.notifications[2].id)],
+        )
+        self.assertEqual(
+            [item["id"] for item in by_date.data["results"]],
+            [str(self.notifications[1].id)],
+        )
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "план запроса в формате SQLite")
+    def test_filters_use_indexes(self):
+        """Тест: фильтры по каналу и получателю не читают всю таблицу."""
+        for params in ({"used_channel": "email"}, {"recipient": "user2@example.com"}):
+            with self.subTest(params=params), CaptureQueriesContext(connection) as queries:
+                self.client.get(self.url, params)
+
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {queries[0]['sql']}")
+                    plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+
+                self.assertIn("USING INDEX", plan)
+                self.assertNotIn("SCAN notifications_notification", plan)
+
+    def test_body_only_when_requested(self):
+        """Тест: body выводится только с include_body=true."""
+        slim = self.client.get(self.url)
+        full = self.client.get(self.url, {"include_body": "true"})
+
+        self.assertNotIn("body", slim.data["results"][0])
+        self.assertIn("body", full.data["results"][0])
+        self.assertIsNone(slim.data["next"])
+
+    def test_invalid_params(self):
+        """Тест: неверный фильтр или курсор отклоняются."""
+        self.assertEqual(
+            self.client.get(self.url, {"status": "unknown"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(self.url, {"cursor": "garbage"}).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
@@ -0,0 +1,221 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from notifications.channels import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    ChannelResult,
+    EmailChannelSender,
+    HttpSmsChannelSender,
+    HTTPTransport,
+)
+from notifications.models import DeliveryAttempt, Notification
+from notifications.services import NotificationService
+from notifications.testing import LocalHTTPProvider, ProviderResponse
+
+
+class ChannelSenderBatchTest(TestCase):
+    """Тесты send_batch базового адаптера."""
+
+    def test_default_batch_sends_one_by_one(self):
+        """Тест: по умолчанию send_batch вызывает send для каждого уведомления."""
+        sender = EmailChannelSender()
+        notifications = [
+            Notification.objects.create(to_email=f"user{i}@example.com", body="Test")
+            for i in range(3)
+        ]
+
+        with patch.object(sender, "send", return_value=ChannelResult(success=True)) as mock_send:
+            results = sender.send_batch(notifications)
+
+        self.assertEqual(mock_send.call_count, 3)
+        self.assertEqual(len(results), 3)
+
+
+class BatchedDeliveryTest(TestCase):
+    """Тесты режима batched: отправка пачками по текущему каналу."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.service = NotificationService(delivery_mode=NotificationService.DELIVERY_BATCHED)
+
+    def _notifications(self, count, **fields):
+        return [
+            Notification.objects.create(
+                to_email=f"user{i}@example.com",
+                to_phone=f"+1555000{i:04d}",
+                body="Test",
+                channels=["sms", "email"],
+                **fields,
+            )
+            for i in range(count)
+        ]
+
+    def test_failures_fall_back_to_next_channel_in_one_batch(self):
+        """Тест: неудачи пачки SMS уходят одной пачкой в email."""
+        notifications = self._notifications(3)
+        sms_results = [
+            ChannelResult(success=True),
+            ChannelResult(success=False, error_message="throttled", error_class=ERROR_TRANSIENT),
+            ChannelResult(success=False, error_message="invalid", error_class=ERROR_PERMANENT),
+        ]
+
+        with (
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send_batch",
+                return_value=sms_results,
+            ) as mock_sms,
+            patch.object(
+                self.service.channel_senders["email"],
+                "send_batch",
+                side_effect=lambda batch: [ChannelResult(success=True) for _ in batch],
+            ) as mock_email,
+        ):
+            self.service.send_notifications(notifications)
+
+        mock_sms.assert_called_once_with(notifications)
+        mock_email.assert_called_once_with(notifications[1:])
+        for notification, channel in zip(notifications, ["sms", "email", "email"], strict=True):
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.STATUS_DELIVERED)
+            self.assertEqual(notification.used_channel, channel)
+        self.assertEqual(DeliveryAttempt.objects.count(), 5)
+
+    def test_groups_by_current_channel(self):
+        """Тест: уведомления без телефона сразу попадают в пачку email."""
+        with_phone = self._notifications(2)
+        without_phone = Notification.objects.create(
+            to_email="nophone@example.com",
+            body="Test",
+            channels=["sms", "email"],
+        )
+        batch = [with_phone[0], without_phone, with_phone[1]]
+
+        with (
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send_batch",
+                side_effect=lambda batch: [ChannelResult(success=True) for _ in batch],
+            ) as mock_sms,
+            patch.object(
+                self.service.channel_senders["email"],
+                "send_batch",
+                side_effect=lambda batch: [ChannelResult(success=True) for _ in batch],
+            ) as mock_email,
+        ):
+            self.service.send_notifications(batch)
+
+        mock_sms.assert_called_once_with(with_phone)
+        mock_email.assert_called_once_with([without_phone])
+        self.assertEqual(
+            DeliveryAttempt.objects.filter(
+                notification=without_phone,
+                channel="sms",
+                status=DeliveryAttempt.STATUS_FAILED,
+            ).count(),
+            1,
+        )
+
+    def test_all_channels_fail_schedules_retry(self):
+        """Тест: временные ошибки всех каналов приводят к повтору, как в sequential."""
+        notification = self._notifications(1)[0]
+        failure = ChannelResult(success=False, error_message="down", error_class=ERROR_TRANSIENT)
+
+        with (
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send_batch",
+                return_value=[failure],
+            ),
+            patch.object(
+                self.service.channel_senders["email"],
+                "send_batch",
+                return_value=[failure],
+            ),
+        ):
+            self.service.send_notifications([notification])
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_PENDING)
+        self.assertEqual(notification.retry_count, 1)
+
+
+class HttpSmsBatchTest(TestCase):
+    """Тесты batch API адаптера SMS."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.provider = LocalHTTPProvider().start()
+        self.addCleanup(self.provider.stop)
+        self.transport = HTTPTransport()
+        self.addCleanup(self.transport.close)
+        self.sender = HttpSmsChannelSender(
+            transport=self.transport,
+            base_url=self.provider.base_url,
+            batch_size=2,
+        )
+
+    def test_batch_requests_and_per_item_results(self):
+        """Тест: сообщения уходят пачками по batch_size, ошибки разбираются по сообщениям."""
+
+        def respond(request):
+            return ProviderResponse(
+                json={
+                    "results": [
+                        (
+                            {"status": 400, "error": "invalid number"}
+                            if message["to"] == "+10000000001"
+                            else {"status": 202}
+                        )
+                        for message in request.json["messages"]
+                    ],
+                },
+            )
+
+        self.provider.responder = respond
+        notifications = [
+            Notification.objects.create(to_phone=f"+1000000000{i}", body=f"Code {i}")
+            for i in range(3)
+        ]
+        notifications.insert(1, Notification.objects.create(to_email="a@example.com", body="x"))
+
+        results = self.sender.send_batch(notifications)
+
+        self.assertEqual([result.success for result in results], [True, False, False, True])
+        self.assertEqual(results[1].error_class, ERROR_PERMANENT)
+        self.assertEqual(results[2].error_class, ERROR_PERMANENT)
+        self.assertIn("invalid number", results[2].error_message)
+        self.assertEqual(len(self.provider.requests), 2)
+        self.assertEqual(self.provider.requests[0].path, "/messages/batch")
+        self.assertEqual(
+            self.provider.requests[0].json["messages"][0]["id"],
+            str(notifications[0].id),
+        )
+
+    def test_failed_batch_request_fails_every_message(self):
+        """Тест: ошибка всего запроса - временная ошибка каждого сообщения пачки."""
+        self.provider.responses = [ProviderResponse(status=503, json={})]
+        notifications = [
+            Notification.objects.create(to_phone=f"+1000000000{i}", body="Code") for i in range(2)
+        ]
+
+        results = self.sender.send_batch(notifications)
+
+        self.assertEqual([result.error_class for result in results], [ERROR_TRANSIENT] * 2)
+
+    def test_malformed_items_are_transient(self):
+        """Тест: некорректный элемент ответа - временная ошибка только этого сообщения."""
+        self.provider.responses = [
+            ProviderResponse(json={"results": [{"status": 202}, "accepted"]}),
+            ProviderResponse(json={"results": [{"status": "queued"}, None]}),
+        ]
+        notifications = [
+            Notification.objects.create(to_phone=f"+1000000000{i}", body="Code") for i in range(4)
+        ]
+
+        results = self.sender.send_batch(notifications)
+
+        self.assertTrue(results[0].success)
+        self.assertEqual([result.error_class for result in results[1:]], [ERROR_TRANSIENT] * 3)
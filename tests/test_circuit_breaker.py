@@ -0,0 +1,288 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from notifications.channels.base import ChannelResult
+from notifications.models import DeliveryAttempt, Notification
+from notifications.services import (
+    CacheCircuitStateStore,
+    CircuitBreaker,
+    InMemoryCircuitStateStore,
+    NotificationService,
+)
+
+
+class FakeClock:
+    """Управляемый источник времени."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTestMixin:
+    """Общие тесты переходов состояний для любого хранилища."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            "sms",
+            self.make_store(),
+            failure_rate_threshold=0.5,
+            min_requests=4,
+            window=60,
+            open_duration=30,
+            half_open_probes=1,
+            clock=self.clock,
+        )
+
+    def test_opens_after_failure_rate_threshold(self):
+        """Тест: цепь размыкается при доле ошибок выше порога."""
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_CLOSED)
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_old_failures_leave_sliding_window(self):
+        """Тест: ошибки за пределами окна не учитываются."""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 120
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_CLOSED)
+
+    def test_half_open_probe_closes_circuit(self):
+        """Тест: после open_duration пропускается один пробный вызов."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 31
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_probe_reopens_circuit(self):
+        """Тест: ошибка пробного вызова снова размыкает цепь."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_released_probe_can_be_taken_again(self):
+        """Тест: слот невыполненного пробного вызова возвращается."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.release_probe()
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+
+class InMemoryCircuitBreakerTest(CircuitBreakerTestMixin, TestCase):
+    """Тесты circuit breaker с хранилищем в памяти."""
+
+    def make_store(self):
+        return InMemoryCircuitStateStore(clock=self.clock)
+
+    def test_probe_slot_expires(self):
+        """Тест: слот пробного вызова без результата освобождается через ttl."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.clock.now += 31
+
+        self.assertTrue(self.breaker.allow_request())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class CacheCircuitBreakerTest(CircuitBreakerTestMixin, TestCase):
+    """Тесты circuit breaker с хранилищем в кэше Django."""
+
+    def make_store(self):
+        store = CacheCircuitStateStore()
+        store.cache.clear()
+        return store
+
+    def test_state_is_shared_between_breakers(self):
+        """Тест: экземпляры в разных воркерах видят одно состояние."""
+        other = CircuitBreaker("sms", CacheCircuitStateStore(), min_requests=4, clock=self.clock)
+
+        for _ in range(4):
+            self.breaker.record_failure()
+
+        self.assertFalse(other.allow_request())
+
+    def _worker(self, clock):
+        return CircuitBreaker(
+            "sms",
+            CacheCircuitStateStore(),
+            min_requests=4,
+            open_duration=30,
+            half_open_probes=1,
+            clock=clock,
+        )
+
+    def test_single_probe_across_workers(self):
+        """Тест: воркеры, одновременно увидевшие истекшее open, делят один слот пробы."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        opened = self.breaker.store.get_state("sms")
+        first = self._worker(FakeClock(self.clock.now + 31))
+        second = self._worker(FakeClock(self.clock.now + 32))
+
+        self.assertTrue(first.allow_request())
+        # Второй воркер прочитал состояние до перехода первого в half-open
+        with patch.object(second.store, "get_state", return_value=opened):
+            self.assertFalse(second.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_stale_worker_does_not_reopen_probing(self):
+        """Тест: воркер, увидевший истекшее open, не перезаписывает замкнутую цепь."""
+        for _ in range(4):
+            self.breaker.record_failure()
+        _, opened_at = self.breaker.store.get_state("sms")
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+
+        self.assertFalse(CacheCircuitStateStore().begin_half_open("sms", opened_at, ttl=30))
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_CLOSED)
+
+
+class NotificationServiceCircuitBreakerTest(TestCase):
+    """Тесты интеграции circuit breaker с NotificationService."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.service = NotificationService()
+        self.breaker = CircuitBreaker("email", InMemoryCircuitStateStore(), min_requests=1)
+        self.service.circuit_breakers = {"email": self.breaker}
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            body="Test message",
+            channels=["email", "sms"],
+        )
+
+    def test_open_circuit_skips_channel_without_calling_sender(self):
+        """Тест: канал с разомкнутой цепью пропускается с отметкой skipped."""
+        self.breaker.record_failure()
+
+        with (
+            patch.object(self.service.channel_senders["email"], "send") as mock_email,
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            self.service.send_notification(self.notification)
+
+        mock_email.assert_not_called()
+        attempts = self.notification.attempts.all()
+        self.assertEqual(attempts[0].channel, "email")
+        self.assertEqual(attempts[0].status, DeliveryAttempt.STATUS_SKIPPED)
+        self.assertEqual(attempts[1].status, DeliveryAttempt.STATUS_SUCCESS)
+
+    def test_send_results_feed_breaker(self):
+        """Тест: ошибка канала учитывается в circuit breaker."""
+        with (
+            patch.object(
+                self.service.channel_senders["email"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="Email failed"),
+            ),
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            self.service.send_notification(self.notification)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_OPEN)
+
+    def _open_to_half_open(self):
+        clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            "email",
+            InMemoryCircuitStateStore(),
+            min_requests=1,
+            clock=clock,
+        )
+        self.service.circuit_breakers = {"email": self.breaker}
+        self.breaker.record_failure()
+        clock.now += self.breaker.open_duration + 1
+
+    def test_raising_sender_records_probe_failure(self):
+        """Тест: исключение адаптера в пробном вызове снова размыкает цепь."""
+        self._open_to_half_open()
+
+        with (
+            patch.object(
+                self.service.channel_senders["email"],
+                "send",
+                side_effect=RuntimeError("boom"),
+            ),
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            self.service.send_notification(self.notification)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_DELIVERED)
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_OPEN)
+
+    def test_hedged_unlaunched_probe_released(self):
+        """Тест: пробный слот резервного канала, который не запускался, возвращается."""
+        self._open_to_half_open()
+        self.notification.channels = ["sms", "email"]
+        self.service.delivery_mode = NotificationService.DELIVERY_HEDGED
+
+        with patch.object(
+            self.service.channel_senders["sms"],
+            "send",
+            return_value=ChannelResult(success=True),
+        ):
+            self.service.send_notification(self.notification)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.STATE_HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+    @override_settings(NOTIFICATION_CIRCUIT_BREAKER_ENABLED=False)
+    def test_disabled_by_default(self):
+        """Тест: без настройки circuit breaker не создается."""
+        self.assertEqual(NotificationService().circuit_breakers, {})
@@ -0,0 +1,204 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from notifications.channels import ChannelResult, EmailChannelSender
+from notifications.models import CoalescedNotification, Notification
+from notifications.serializers import NotificationDetailSerializer
+from notifications.services.coalescing import (
+    InMemoryDedupStore,
+    NotificationCoalescer,
+    get_notification_coalescer,
+)
+from notifications.tasks import send_notifications_batch_task
+
+
+class FakeClock:
+    """Управляемое время для окна дубликатов."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class InMemoryDedupStoreTest(SimpleTestCase):
+    """Тесты окна дубликатов в памяти."""
+
+    def test_window_expires(self):
+        """Тест: хэш закреплен за первым уведомлением до конца окна."""
+        clock = FakeClock()
+        store = InMemoryDedupStore(clock=clock)
+
+        self.assertEqual(store.claim("hash", "first", ttl=60), "first")
+        self.assertEqual(store.claim("hash", "second", ttl=60), "first")
+        self.assertEqual(store.claim("hash", "first", ttl=60), "first")
+
+        clock.now = 61
+
+        self.assertEqual(store.claim("hash", "second", ttl=60), "second")
+
+    def test_max_size_evicts_oldest(self):
+        """Тест: при переполнении вытесняются самые старые хэши."""
+        store = InMemoryDedupStore(max_size=2)
+        for key in ("a", "b", "c"):
+            store.claim(key, key, ttl=60)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.claim("a", "new", ttl=60), "new")
+
+    def test_release_only_by_owner(self):
+        """Тест: хэш освобождает только уведомление, за которым он закреплен."""
+        store = InMemoryDedupStore()
+        store.claim("hash", "first", ttl=60)
+
+        store.release("hash", "second")
+        self.assertEqual(store.claim("hash", "second", ttl=60), "first")
+
+        store.release("hash", "first")
+        self.assertEqual(store.claim("hash", "second", ttl=60), "second")
+
+
+class NotificationCoalescerTest(TestCase):
+    """Тесты объединения дубликатов и сводок."""
+
+    def _notification(self, email="user@example.com", body="Disk is full", **fields):
+        return Notification.objects.create(to_email=email, body=body, channels=["email"], **fields)
+
+    def test_drops_exact_duplicates(self):
+        """Тест: дубликат в пределах окна не отправляется и связан с первым уведомлением."""
+        coalescer = NotificationCoalescer(InMemoryDedupStore(), dedup_window=60)
+        first, duplicate = self._notification(), self._notification()
+        other = self._notification(body="CPU is hot")
+
+        deliver = coalescer.coalesce([first, duplicate, other])
+
+        self.assertEqual(deliver, [first, other])
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.status, Notification.STATUS_COALESCED)
+        self.assertEqual(duplicate.coalesced_into.digest_id, first.id)
+
+    def test_duplicate_across_batches_and_retry(self):
+        """Тест: окно действует между пачками, повтор того же уведомления не дубликат."""
+        coalescer = NotificationCoalescer(InMemoryDedupStore(), dedup_window=60)
+        first = self._notification()
+        coalescer.coalesce([first])
+
+        self.assertEqual(coalescer.coalesce([first]), [first])
+        self.assertEqual(coalescer.coalesce([self._notification()]), [])
+
+    def test_failed_original_releases_hash(self):
+        """Тест: после неудачи первого уведомления такое же снова отправляется."""
+        coalescer = NotificationCoalescer(InMemoryDedupStore(), dedup_window=60)
+        first = self._notification()
+        coalescer.coalesce([first])
+
+        first.status = Notification.STATUS_FAILED
+        coalescer.release([first])
+        retry = self._notification()
+
+        self.assertEqual(coalescer.coalesce([retry]), [retry])
+
+    def test_failed_digest_releases_member_hashes(self):
+        """Тест: неудача сводки освобождает хэши уведомлений, объединенных в нее."""
+        coalescer = NotificationCoalescer(
+            InMemoryDedupStore(),
+            dedup_window=60,
+            digest_min_size=2,
+        )
+        members = [self._notification(body=f"Alert {i}") for i in range(2)]
+        digest = coalescer.coalesce(members)[0]
+
+        digest.status = Notification.STATUS_EXPIRED
+        coalescer.release([digest])
+        again = self._notification(body="Alert 0")
+
+        self.assertEqual(coalescer.coalesce([again]), [again])
+
+    def test_merges_notifications_into_digest(self):
+        """Тест: уведомления одному получателю заменяются сводкой."""
+        coalescer = NotificationCoalescer(
+            InMemoryDedupStore(),
+            digest_min_size=3,
+            digest_subject="{count} alerts",
+        )
+        members = [
+            self._notification(body=f"Alert {i}", subject="Disk" if i == 0 else None)
+            for i in range(3)
+        ]
+        other = self._notification(email="other@example.com")
+        members[2].priority = Notification.PRIORITY_CRITICAL
+
+        deliver = coalescer.coalesce([members[0], other, members[1], members[2]])
+
+        digest = deliver[0]
+        self.assertEqual(deliver[1:], [other])
+        digest.refresh_from_db()
+        self.assertEqual(digest.status, Notification.STATUS_PENDING)
+        self.assertEqual(digest.to_email, "user@example.com")
+        self.assertEqual(digest.subject, "3 alerts")
+        self.assertEqual(digest.body, "Disk\nAlert 0\n\nAlert 1\n\nAlert 2")
+        self.assertEqual(digest.priority, Notification.PRIORITY_CRITICAL)
+        self.assertEqual(
+            set(digest.coalesced.values_list("notification_id", flat=True)),
+            {member.id for member in members},
+        )
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.STATUS_COALESCED).count(),
+            3,
+        )
+
+    def test_small_groups_not_merged(self):
+        """Тест: меньше digest_min_size уведомлений отправляются как есть."""
+        coalescer = NotificationCoalescer(InMemoryDedupStore(), digest_min_size=3)
+        notifications = [self._notification(body=f"Alert {i}") for i in range(2)]
+
+        self.assertEqual(coalescer.coalesce(notifications), notifications)
+        self.assertFalse(CoalescedNotification.objects.exists())
+
+    def test_detail_shows_digest(self):
+        """Тест: в статусе объединенного уведомления есть UUID доставленного вместо него."""
+        coalescer = NotificationCoalescer(InMemoryDedupStore(), dedup_window=60)
+        first, duplicate = self._notification(), self._notification()
+        coalescer.coalesce([first, duplicate])
+
+        self.assertEqual(NotificationDetailSerializer(duplicate).data["digest"], str(first.id))
+        self.assertIsNone(NotificationDetailSerializer(first).data["digest"])
+
+    def test_disabled_by_default(self):
+        """Тест: без настроек этап объединения выключен."""
+        self.assertIsNone(get_notification_coalescer())
+
+
+@override_settings(NOTIFICATION_DEDUP_WINDOW=60, NOTIFICATION_DIGEST_MIN_SIZE=2)
+class CoalescedBatchTaskTest(TestCase):
+    """Тесты объединения в пакетной задаче отправки."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        store_patcher = patch(
+            "notifications.services.coalescing._memory_store",
+            InMemoryDedupStore(),
+        )
+        store_patcher.start()
+        self.addCleanup(store_patcher.stop)
+
+    @patch.object(EmailChannelSender, "send", return_value=ChannelResult(success=True))
+    def test_batch_task_delivers_digest(self, mock_send):
+        """Тест: дубликаты отброшены, остальное доставлено одной сводкой."""
+        notifications = [
+            Notification.objects.create(to_email="user@example.com", body=body, channels=["email"])
+            for body in ("Disk is full", "Disk is full", "CPU is hot")
+        ]
+
+        send_notifications_batch_task([str(notification.id) for notification in notifications])
+
+        self.assertEqual(mock_send.call_count, 1)
+        digest = Notification.objects.get(coalesced__notification=notifications[0])
+        self.assertEqual(digest.status, Notification.STATUS_DELIVERED)
+        self.assertEqual(digest.body, "Disk is full\n\nCPU is hot")
+        for notification in notifications:
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.STATUS_COALESCED)
+        self.assertEqual(notifications[1].coalesced_into.digest_id, notifications[0].id)
@@ -0,0 +1,100 @@
+import threading
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from notifications.channels.base import ChannelResult
+from notifications.dispatch import enqueue_notification
+from notifications.models import Notification
+from notifications.services import DatabaseNotificationQueue, DeliveryWorker, NotificationService
+
+
+class DatabaseNotificationQueueTest(TestCase):
+    """Тесты очереди уведомлений в БД."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.queue = DatabaseNotificationQueue(batch_size=2)
+        self.notifications = [
+            Notification.objects.create(to_email="test@example.com", body=f"Test {i}")
+            for i in range(3)
+        ]
+
+    def test_claim_takes_oldest_unclaimed(self):
+        """Тест: воркеры забирают непересекающиеся пачки в порядке создания."""
+        first = self.queue.claim("worker-1")
+        second = self.queue.claim("worker-2")
+
+        self.assertEqual([n.id for n in first], [n.id for n in self.notifications[:2]])
+        self.assertEqual([n.id for n in second], [self.notifications[2].id])
+        self.assertEqual(self.queue.claim("worker-3"), [])
+        self.assertEqual(self.queue.depth(), 0)
+
+    def test_release_returns_to_queue(self):
+        """Тест: освобожденные уведомления снова доступны."""
+        claimed = self.queue.claim("worker-1")
+
+        self.queue.release(claimed)
+
+        self.assertEqual(self.queue.depth(), 3)
+
+    def test_terminal_notifications_are_not_claimed(self):
+        """Тест: уведомления не в статусе pending в очередь не попадают."""
+        Notification.objects.update(status=Notification.STATUS_DELIVERED)
+
+        self.assertEqual(self.queue.claim("worker-1"), [])
+
+
+class DeliveryWorkerTest(TestCase):
+    """Тесты воркера очереди в БД."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            channels=["email"],
+        )
+        self.worker = DeliveryWorker(DatabaseNotificationQueue(), threading.Event())
+
+    def test_run_once_delivers_claimed_notifications(self):
+        """Тест: воркер отправляет забранное уведомление через NotificationService."""
+        service = NotificationService()
+        with patch.object(
+            service.channel_senders["email"],
+            "send",
+            return_value=ChannelResult(success=True),
+        ):
+            claimed = self.worker.run_once(service)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(claimed, 1)
+        self.assertEqual(self.notification.status, Notification.STATUS_DELIVERED)
+        self.assertTrue(self.notification.claimed_by.startswith(self.worker.worker_id))
+
+    def test_unexpected_error_marks_failed(self):
+        """Тест: неожиданная ошибка обработки помечает уведомление failed."""
+        service = NotificationService()
+        with patch.object(service, "send_notification", side_effect=RuntimeError("boom")):
+            self.worker.run_once(service)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_FAILED)
+
+    def test_stop_releases_unprocessed(self):
+        """Тест: при остановке необработанные уведомления возвращаются в очередь."""
+        self.worker.stop_event.set()
+
+        self.worker.run_once(NotificationService())
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_PENDING)
+        self.assertIsNone(self.notification.claimed_by)
+
+    @override_settings(NOTIFICATION_DISPATCH_MODE="database")
+    @patch("notifications.dispatch.send_notification_task.delay")
+    def test_database_mode_does_not_publish(self, mock_delay):
+        """Тест: в режиме database задача в брокер не публикуется."""
+        enqueue_notification(str(self.notification.id))
+
+        mock_delay.assert_not_called()
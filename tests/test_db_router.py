@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.db import connections
+from django.test import SimpleTestCase
+
+from notification_service.db_router import (
+    REPLICA_DB_ALIAS,
+    PrimaryReplicaRouter,
+    pin_to_primary,
+    read_from_replica,
+)
+from notifications.models import Notification
+
+
+@patch("notification_service.db_router.replica_configured", return_value=True)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    """Тесты роутера основной БД и реплики."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        caches["default"].clear()
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_use_primary_by_default(self, mock_configured):
+        """Тест: вне read_from_replica чтения идут в основную БД."""
+        self.assertIsNone(self.router.db_for_read(Notification))
+        self.assertEqual(self.router.db_for_write(Notification), "default")
+
+    def test_reads_inside_block_use_replica(self, mock_configured):
+        """Тест: внутри read_from_replica чтения идут на реплику."""
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Notification), REPLICA_DB_ALIAS)
+            self.assertEqual(self.router.db_for_write(Notification), "default")
+
+    def test_pinned_key_reads_primary(self, mock_configured):
+        """Тест: после создания статус уведомления читается с основной БД."""
+        pin_to_primary(["created"])
+
+        with read_from_replica(pin_key="created"):
+            self.assertIsNone(self.router.db_for_read(Notification))
+        with read_from_replica(pin_key="other"):
+            self.assertEqual(self.router.db_for_read(Notification), REPLICA_DB_ALIAS)
+
+    def test_reads_inside_transaction_use_primary(self, mock_configured):
+        """Тест: в транзакции на основной БД реплика не используется."""
+        with patch.object(connections["default"], "in_atomic_block", True), read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Notification))
+
+    def test_replica_is_not_migrated(self, mock_configured):
+        """Тест: миграции на реплику не применяются."""
+        self.assertFalse(self.router.allow_migrate(REPLICA_DB_ALIAS, "notifications"))
+        self.assertIsNone(self.router.allow_migrate("default", "notifications"))
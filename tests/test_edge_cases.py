@@ -61,14 +61,19 @@ class EdgeCasesTest(TestCase):
         )
 
         # Сервис должен обработать (валидация на уровне API)
-        # Но если все каналы упадут случайно, статус будет failed
+        # Но если все каналы упадут случайно, статус будет failed или pending
+        # (временная ошибка имитации отправки планирует повтор)
         self.service.send_notification(notification)
 
         notification.refresh_from_db()
-        # Проверяем, что была попытка доставки (статус может быть delivered или failed)
+        # Проверяем, что была попытка доставки
         self.assertIn(
             notification.status,
-            [Notification.STATUS_DELIVERED, Notification.STATUS_FAILED],
+            [
+                Notification.STATUS_DELIVERED,
+                Notification.STATUS_FAILED,
+                Notification.STATUS_PENDING,
+            ],
         )
         # Проверяем, что попытки были созданы
         attempts = notification.attempts.all()
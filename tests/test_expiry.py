@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from notifications.channels import ERROR_TRANSIENT, ChannelResult
+from notifications.models import Notification
+from notifications.serializers import NotificationCreateSerializer
+from notifications.services import NotificationService
+from notifications.tasks import send_notification_task, send_notifications_batch_task
+
+
+class ExpirySerializerTest(TestCase):
+    """Тесты задания срока актуальности при создании уведомления."""
+
+    def test_ttl_seconds_from_send_at(self):
+        """Тест: ttl_seconds отсчитывается от send_at и сохраняется как expires_at."""
+        send_at = timezone.now() + timedelta(hours=1)
+        serializer = NotificationCreateSerializer(
+            data={
+                "to_email": "test@example.com",
+                "body": "Code",
+                "send_at": send_at,
+                "ttl_seconds": 60,
+            },
+        )
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data["expires_at"], send_at + timedelta(seconds=60))
+        self.assertNotIn("ttl_seconds", serializer.validated_data)
+
+    def test_expires_at_and_ttl_are_exclusive(self):
+        """Тест: нельзя указать одновременно expires_at и ttl_seconds."""
+        serializer = NotificationCreateSerializer(
+            data={
+                "to_email": "test@example.com",
+                "body": "Code",
+                "expires_at": timezone.now() + timedelta(minutes=5),
+                "ttl_seconds": 60,
+            },
+        )
+
+        self.assertFalse(serializer.is_valid())
+
+    def test_expires_at_before_send_at(self):
+        """Тест: expires_at должен быть позже send_at."""
+        send_at = timezone.now() + timedelta(hours=1)
+        serializer = NotificationCreateSerializer(
+            data={
+                "to_email": "test@example.com",
+                "body": "Code",
+                "send_at": send_at,
+                "expires_at": send_at - timedelta(minutes=1),
+            },
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("expires_at", serializer.errors)
+
+
+class ExpiredDeliveryTest(TestCase):
+    """Тесты отказа от отправки устаревших уведомлений."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            body="Code",
+            channels=["email", "sms"],
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+    @patch("notifications.tasks.NotificationService")
+    def test_task_expires_without_delivery(self, mock_service_class):
+        """Тест: задача помечает устаревшее уведомление expired, не создавая сервис."""
+        send_notification_task(str(self.notification.id))
+
+        mock_service_class.assert_not_called()
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_EXPIRED)
+
+    @patch("notifications.tasks.NotificationService")
+    def test_batch_task_sends_only_fresh(self, mock_service_class):
+        """Тест: пакетная задача отправляет только актуальные уведомления."""
+        fresh = Notification.objects.create(to_email="fresh@example.com", body="Hi")
+
+        send_notifications_batch_task([str(self.notification.id), str(fresh.id)])
+
+        sent = mock_service_class.return_value.send_notifications.call_args[0][0]
+        self.assertEqual([n.id for n in sent], [fresh.id])
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_EXPIRED)
+
+    def test_service_checks_expiry_before_each_channel(self):
+        """Тест: если срок истек во время отправки, резервные каналы не вызываются."""
+        self.notification.expires_at = timezone.now() + timedelta(minutes=1)
+        self.notification.save()
+        service = NotificationService()
+
+        def expire(notification):
+            notification.expires_at = timezone.now() - timedelta(seconds=1)
+            return ChannelResult(
+                success=False,
+                error_message="timeout",
+                error_class=ERROR_TRANSIENT,
+            )
+
+        for mode in (NotificationService.DELIVERY_SEQUENTIAL, NotificationService.DELIVERY_HEDGED):
+            with self.subTest(mode=mode):
+                service.delivery_mode = mode
+                Notification.objects.filter(id=self.notification.id).update(
+                    status=Notification.STATUS_PENDING,
+                )
+                with (
+                    patch.object(service.channel_senders["email"], "send", side_effect=expire),
+                    patch.object(service.channel_senders["sms"], "send") as mock_sms,
+                ):
+                    service.send_notification(self.notification)
+
+                mock_sms.assert_not_called()
+                self.notification.refresh_from_db()
+                self.assertEqual(self.notification.status, Notification.STATUS_EXPIRED)
+                self.notification.expires_at = timezone.now() + timedelta(minutes=1)
+
+    def test_retry_after_expiry_is_not_scheduled(self):
+        """Тест: повтор, который наступил бы после expires_at, не планируется."""
+        self.notification.expires_at = timezone.now() + timedelta(seconds=5)
+        self.notification.save()
+        service = NotificationService()
+        transient = ChannelResult(
+            success=False,
+            error_message="timeout",
+            error_class=ERROR_TRANSIENT,
+        )
+
+        with (
+            patch.object(service.channel_senders["email"], "send", return_value=transient),
+            patch.object(service.channel_senders["sms"], "send", return_value=transient),
+        ):
+            service.send_notification(self.notification)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_EXPIRED)
+        self.assertIsNone(self.notification.next_attempt_at)
@@ -0,0 +1,231 @@
+import asyncio
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from notifications.channels import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    AsyncHTTPTransport,
+    HttpSmsChannelSender,
+    HttpTelegramChannelSender,
+    HTTPTransport,
+    SmsChannelSender,
+)
+from notifications.channels.http_transport import TRANSPORT_ERRORS
+from notifications.models import Notification
+from notifications.services import NotificationService
+from notifications.testing import LocalHTTPProvider, ProviderResponse
+
+
+class HTTPTransportTest(SimpleTestCase):
+    """Тесты пула keep-alive HTTP-соединений."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.provider = LocalHTTPProvider().start()
+        self.addCleanup(self.provider.stop)
+        self.transport = HTTPTransport(max_connections_per_host=2, read_timeout=2)
+        self.addCleanup(self.transport.close)
+
+    def test_reuses_connection(self):
+        """Тест: последовательные запросы идут через одно соединение."""
+        for i in range(5):
+            response = self.transport.request(
+                "POST",
+                f"{self.provider.base_url}/send",
+                json={"i": i},
+            )
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.json(), {"ok": True})
+
+        self.assertEqual(self.provider.sessions, 1)
+        self.assertEqual([request.json for request in self.provider.requests][-1], {"i": 4})
+
+    def test_retries_on_connection_closed_by_server(self):
+        """Тест: соединение, закрытое сервером по простою, заменяется новым."""
+        self.transport.request("POST", f"{self.provider.base_url}/send")
+        self.provider.disconnect_all()
+
+        response = self.transport.request("POST", f"{self.provider.base_url}/send")
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.provider.sessions, 2)
+        self.assertEqual(len(self.provider.requests), 2)
+
+    def test_broken_response_is_not_resent(self):
+        """Тест: обрыв после начала ответа не повторяет запрос - провайдер мог его обработать."""
+        self.transport.request("POST", f"{self.provider.base_url}/send")
+        self.provider.responses = [ProviderResponse(json={"ok": True, "id": 1}, truncate=True)]
+
+        with self.assertRaises(TRANSPORT_ERRORS):
+            self.transport.request("POST", f"{self.provider.base_url}/send")
+
+        self.assertEqual(len(self.provider.requests), 2)
+
+    def test_async_broken_response_is_not_resent(self):
+        """Тест: асинхронный клиент тоже не повторяет запрос после начала ответа."""
+
+        async def run():
+            async with AsyncHTTPTransport() as transport:
+                await transport.request("POST", f"{self.provider.base_url}/send")
+                self.provider.responses = [
+                    ProviderResponse(json={"ok": True, "id": 1}, truncate=True),
+                ]
+                with self.assertRaises(TRANSPORT_ERRORS):
+                    await transport.request("POST", f"{self.provider.base_url}/send")
+                self.provider.disconnect_all()
+                return await transport.request("POST", f"{self.provider.base_url}/send")
+
+        response = asyncio.run(run())
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(self.provider.requests), 3)
+
+    def test_idle_timeout_closes_connection(self):
+        """Тест: соединение, простоявшее дольше idle_timeout, не переиспользуется."""
+        self.transport.idle_timeout = 0
+        self.transport.request("POST", f"{self.provider.base_url}/send")
+        self.transport.request("POST", f"{self.provider.base_url}/send")
+
+        self.assertEqual(self.provider.sessions, 2)
+
+    def test_read_timeout(self):
+        """Тест: медленный ответ прерывается по read_timeout."""
+        self.provider.response_delay = 0.5
+        transport = HTTPTransport(read_timeout=0.1)
+        self.addCleanup(transport.close)
+
+        with self.assertRaises(TimeoutError):
+            transport.request("POST", f"{self.provider.base_url}/send")
+
+    def test_async_transport_reuses_connections(self):
+        """Тест: асинхронный клиент держит не больше лимита соединений к хосту."""
+
+        async def run():
+            async with AsyncHTTPTransport(max_connections_per_host=2) as transport:
+                responses = await asyncio.gather(
+                    *(
+                        transport.request("POST", f"{self.provider.base_url}/send", json={"i": i})
+                        for i in range(6)
+                    ),
+                )
+                return responses, transport.connections_opened
+
+        responses, opened = asyncio.run(run())
+
+        self.assertTrue(all(response.status == 200 for response in responses))
+        self.assertEqual(opened, 2)
+        self.assertEqual(self.provider.sessions, 2)
+        self.assertEqual(len(self.provider.requests), 6)
+
+
+class HttpProviderSenderTest(TestCase):
+    """Тесты адаптеров SMS и Telegram через HTTP API."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.provider = LocalHTTPProvider().start()
+        self.addCleanup(self.provider.stop)
+        self.transport = HTTPTransport()
+        self.addCleanup(self.transport.close)
+        self.notification = Notification.objects.create(
+            to_phone="+1234567890",
+            to_telegram_chat_id="123456789",
+            body="Your code is 1234",
+        )
+
+    def test_sms_request(self):
+        """Тест: SMS отправляется POST /messages с ключом и ключом идемпотентности."""
+        sender = HttpSmsChannelSender(
+            transport=self.transport,
+            base_url=f"{self.provider.base_url}/v1/",
+            api_key="secret",
+        )
+
+        result = sender.send(self.notification)
+
+        self.assertTrue(result.success)
+        request = self.provider.requests[0]
+        self.assertEqual(request.path, "/v1/messages")
+        self.assertEqual(request.json, {"to": "+1234567890", "text": "Your code is 1234"})
+        self.assertEqual(request.headers["authorization"], "Bearer secret")
+        self.assertEqual(request.headers["idempotency-key"], str(self.notification.id))
+
+    def test_sms_error_classes(self):
+        """Тест: 429 и 5xx - временные ошибки, остальные 4xx - постоянные."""
+        sender = HttpSmsChannelSender(transport=self.transport, base_url=self.provider.base_url)
+        self.provider.responses = [
+            ProviderResponse(status=429, json={}, headers={"Retry-After": "7"}),
+            ProviderResponse(status=503, json={}),
+            ProviderResponse(status=400, json={"error": "invalid number"}),
+        ]
+
+        throttled, unavailable, rejected = (sender.send(self.notification) for _ in range(3))
+
+        self.assertEqual(throttled.error_class, ERROR_TRANSIENT)
+        self.assertEqual(throttled.retry_after, 7)
+        self.assertEqual(unavailable.error_class, ERROR_TRANSIENT)
+        self.assertEqual(rejected.error_class, ERROR_PERMANENT)
+        self.assertIn("invalid number", rejected.error_message)
+
+    def test_unreachable_provider_is_transient(self):
+        """Тест: недоступный провайдер - временная ошибка."""
+        self.provider.stop()
+        sender = HttpSmsChannelSender(transport=self.transport, base_url=self.provider.base_url)
+
+        result = sender.send(self.notification)
+
+        self.assertFalse(result.success)
+        self.assertEqual(result.error_class, ERROR_TRANSIENT)
+
+    def test_telegram_request_and_retry_after(self):
+        """Тест: Telegram вызывает sendMessage и берет retry_after из ответа 429."""
+        sender = HttpTelegramChannelSender(
+            transport=self.transport,
+            base_url=self.provider.base_url,
+            bot_token="42:token",
+        )
+        self.provider.responses = [
+            ProviderResponse(
+                status=429,
+                json={"ok": False, "error_code": 429, "parameters": {"retry_after": 15}},
+            ),
+        ]
+
+        throttled = sender.send(self.notification)
+        delivered = sender.send(self.notification)
+
+        self.assertEqual(throttled.error_class, ERROR_TRANSIENT)
+        self.assertEqual(throttled.retry_after, 15)
+        self.assertTrue(delivered.success)
+        request = self.provider.requests[-1]
+        self.assertEqual(request.path, "/bot42:token/sendMessage")
+        self.assertEqual(request.json, {"chat_id": "123456789", "text": "Your code is 1234"})
+        self.assertEqual(self.provider.sessions, 1)
+
+    def test_telegram_malformed_parameters(self):
+        """Тест: некорректные parameters в ответе Telegram не ломают разбор ошибки."""
+        sender = HttpTelegramChannelSender(
+            transport=self.transport,
+            base_url=self.provider.base_url,
+            bot_token="42:token",
+        )
+        self.provider.responses = [
+            ProviderResponse(status=429, json={"ok": False, "parameters": ["retry_after"]}),
+            ProviderResponse(status=429, json={"ok": False, "parameters": {"retry_after": "x"}}),
+        ]
+
+        results = [sender.send(self.notification) for _ in range(2)]
+
+        self.assertEqual([result.error_class for result in results], [ERROR_TRANSIENT] * 2)
+        self.assertEqual([result.retry_after for result in results], [None, None])
+
+    def test_senders_chosen_by_settings(self):
+        """Тест: NOTIFICATION_SMS_SENDER и NOTIFICATION_TELEGRAM_SENDER включают HTTP API."""
+        self.assertIs(type(NotificationService().channel_senders["sms"]), SmsChannelSender)
+
+        with override_settings(NOTIFICATION_SMS_SENDER="http", NOTIFICATION_TELEGRAM_SENDER="http"):
+            senders = NotificationService().channel_senders
+
+        self.assertIsInstance(senders["sms"], HttpSmsChannelSender)
+        self.assertIsInstance(senders["telegram"], HttpTelegramChannelSender)
@@ -0,0 +1,137 @@
+import json
+from unittest.mock import patch
+
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+from notifications.services.idempotency import (
+    IdempotencyCache,
+    IdempotencyRecord,
+    create_or_get_notification,
+    get_idempotency_cache,
+)
+
+
+class FakeClock:
+    """Управляемый источник времени."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class IdempotencyCacheTest(TestCase):
+    """Тесты для кэша request_id."""
+
+    def test_lru_evicts_least_recently_used(self):
+        """Тест: при переполнении вытесняется давно не использованная запись."""
+        cache = IdempotencyCache(max_size=2, ttl=60)
+        cache.set("a", IdempotencyRecord(id="1", status="pending"))
+        cache.set("b", IdempotencyRecord(id="2", status="pending"))
+        cache.get("a")
+
+        cache.set("c", IdempotencyRecord(id="3", status="pending"))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire_after_ttl(self):
+        """Тест: запись истекает по TTL."""
+        clock = FakeClock()
+        cache = IdempotencyCache(ttl=10, clock=clock)
+        cache.set("a", IdempotencyRecord(id="1", status="pending"))
+
+        clock.now = 11
+
+        self.assertIsNone(cache.get("a"))
+
+    def test_shared_cache_serves_other_process(self):
+        """Тест: запись из общего кэша видна другому процессу."""
+        writer = IdempotencyCache(shared_cache_alias="default")
+        reader = IdempotencyCache(shared_cache_alias="default")
+        record = IdempotencyRecord(id="1", status="pending")
+
+        writer.set("shared-request", record)
+
+        self.assertEqual(reader.get("shared-request"), record)
+
+
+class CreateOrGetNotificationTest(TestCase):
+    """Тесты для атомарного insert-or-fetch."""
+
+    def test_conflict_returns_existing(self):
+        """Тест: конфликт request_id возвращает уже созданное уведомление."""
+        existing = Notification.objects.create(
+            request_id="race",
+            to_email="test@example.com",
+            body="Test",
+        )
+
+        notification, created = create_or_get_notification(
+            lambda: Notification.objects.create(
+                request_id="race",
+                to_email="test@example.com",
+                body="Test",
+            ),
+            "race",
+        )
+
+        self.assertFalse(created)
+        self.assertEqual(notification.id, existing.id)
+
+    def test_conflict_without_request_id_is_raised(self):
+        """Тест: IntegrityError без request_id не подавляется."""
+
+        def save():
+            raise IntegrityError("other constraint")
+
+        with self.assertRaises(IntegrityError):
+            create_or_get_notification(save, None)
+
+
+class IdempotencyAPITest(TestCase):
+    """Тесты идемпотентности API."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.client = APIClient()
+        self.url = reverse("notifications:create")
+        get_idempotency_cache().clear()
+
+    def _post(self, data):
+        return self.client.post(self.url, data=json.dumps(data), content_type="application/json")
+
+    @patch("notifications.views.enqueue_notification")
+    def test_retry_served_from_cache_without_queries(self, mock_enqueue):
+        """Тест: повтор запроса обслуживается без обращения к БД."""
+        data = {"request_id": "retry-1", "to_email": "test@example.com", "body": "Test"}
+        first = self._post(data)
+
+        with self.assertNumQueries(0):
+            second = self._post(data)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["id"], first.data["id"])
+        mock_enqueue.assert_called_once()
+
+    @patch("notifications.views.enqueue_notification")
+    def test_concurrent_duplicate_does_not_fail(self, mock_enqueue):
+        """Тест: дубликат, вставленный конкурентно, не приводит к 500."""
+        existing = Notification.objects.create(
+            request_id="race",
+            to_email="test@example.com",
+            body="Test",
+        )
+
+        response = self._post({"request_id": "race", "to_email": "test@example.com", "body": "Hi"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], str(existing.id))
+        mock_enqueue.assert_not_called()
@@ -0,0 +1,246 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.channels import ChannelResult
+from notifications.dispatch import reap_expired_leases
+from notifications.models import Notification, OutboxMessage
+from notifications.services import NotificationService
+from notifications.services.leases import worker_identity
+from notifications.services.status_cache import get_status_cache
+from notifications.tasks import reap_expired_leases_task, send_notification_task
+
+
+class NotificationLeaseTest(TestCase):
+    """Тесты аренды уведомления воркером."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            channels=["email"],
+        )
+
+    def _send(self, persistence_mode):
+        service = NotificationService(persistence_mode=persistence_mode)
+        leases = []
+
+        def send(notification):
+            leases.append(
+                Notification.objects.values_list("claimed_by", "lease_expires_at").get(
+                    id=notification.id,
+                ),
+            )
+            return ChannelResult(success=True)
+
+        with patch.object(service.channel_senders["email"], "send", side_effect=send):
+            service.send_notification(self.notification)
+        return leases[0]
+
+    def test_lease_held_during_delivery_and_released_after(self):
+        """Тест: во время отправки у уведомления есть владелец и срок аренды."""
+        for mode in (NotificationService.PERSISTENCE_IMMEDIATE, "coalesced"):
+            with self.subTest(mode=mode):
+                Notification.objects.filter(id=self.notification.id).update(
+                    status=Notification.STATUS_PENDING,
+                    claimed_by=None,
+                )
+                self.notification.refresh_from_db()
+
+                owner, lease_expires_at = self._send(mode)
+
+                self.notification.refresh_from_db()
+                self.assertEqual(owner, worker_identity())
+                self.assertGreater(lease_expires_at, timezone.now())
+                self.assertEqual(self.notification.status, Notification.STATUS_DELIVERED)
+                self.assertIsNone(self.notification.lease_expires_at)
+
+
+class ReapExpiredLeasesTest(TestCase):
+    """Тесты возврата в очередь уведомлений с истекшей арендой."""
+
+    def _create(self, status, lease_delta):
+        return Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            status=status,
+            claimed_by="dead-worker",
+            lease_expires_at=timezone.now() + lease_delta,
+        )
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_expired_leases_are_reset_and_enqueued(self, mock_enqueue):
+        """Тест: просроченные аренды возвращаются в очередь, остальные не трогаются."""
+        stuck = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+        claimed = self._create(Notification.STATUS_PENDING, timedelta(minutes=-1))
+        alive = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=5))
+        done = self._create(Notification.STATUS_DELIVERED, timedelta(minutes=-5))
+
+        reaped = reap_expired_leases()
+
+        self.assertEqual(reaped, 2)
+        mock_enqueue.assert_called_once_with([stuck.id, claimed.id], queue=None)
+        for notification in (stuck, claimed):
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.STATUS_PENDING)
+            self.assertIsNone(notification.claimed_by)
+            self.assertIsNone(notification.lease_expires_at)
+        alive.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual(alive.status, Notification.STATUS_IN_PROGRESS)
+        self.assertEqual(done.status, Notification.STATUS_DELIVERED)
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_notification_finished_before_reset_is_not_enqueued(self, mock_enqueue):
+        """Тест: уведомление, завершенное воркером между выборкой и сбросом, не публикуется."""
+        stuck = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+        finished = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-4))
+        update = QuerySet.update
+
+        def finish_then_update(queryset, **kwargs):
+            update(
+                Notification.objects.filter(id=finished.id),
+                status=Notification.STATUS_DELIVERED,
+                lease_expires_at=None,
+            )
+            return update(queryset, **kwargs)
+
+        with patch.object(QuerySet, "update", autospec=True, side_effect=finish_then_update):
+            reaped = reap_expired_leases()
+
+        self.assertEqual(reaped, 1)
+        mock_enqueue.assert_called_once_with([stuck.id], queue=None)
+        finished.refresh_from_db()
+        self.assertEqual(finished.status, Notification.STATUS_DELIVERED)
+
+    @override_settings(NOTIFICATION_STATUS_CACHE_ALIAS="default")
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_reaped_status_invalidated(self, mock_enqueue):
+        """Тест: кэш статусов не отдает in_progress для возвращенного в очередь уведомления."""
+        caches["default"].clear()
+        stuck = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+        get_status_cache().populate(stuck)
+
+        reap_expired_leases()
+
+        self.assertIsNone(get_status_cache().get(stuck.id))
+
+    @patch("notifications.dispatch.enqueue_notifications", side_effect=ConnectionError("down"))
+    def test_broker_failure_keeps_lease(self, mock_enqueue):
+        """Тест: при недоступном брокере сброс откатывается и будет повторен."""
+        stuck = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+
+        with self.assertRaises(ConnectionError):
+            reap_expired_leases()
+
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, Notification.STATUS_IN_PROGRESS)
+
+    @override_settings(NOTIFICATION_DISPATCH_MODE="outbox")
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_outbox_mode_writes_outbox(self, mock_enqueue):
+        """Тест: в режиме outbox уведомления возвращаются через outbox."""
+        stuck = self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+
+        reap_expired_leases()
+
+        mock_enqueue.assert_not_called()
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("notification_id", flat=True)),
+            [stuck.id],
+        )
+
+    @override_settings(
+        NOTIFICATION_LEASE_REAPER_BATCH_SIZE=2,
+        NOTIFICATION_LEASE_REAPER_MAX_BATCHES=2,
+    )
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_task_reaps_bounded_number_of_batches(self, mock_enqueue):
+        """Тест: периодическая задача обрабатывает не больше MAX_BATCHES пачек."""
+        for _ in range(5):
+            self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+
+        self.assertEqual(reap_expired_leases_task(), 4)
+        self.assertEqual(mock_enqueue.call_count, 2)
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_command_reaps_all_expired(self, mock_enqueue):
+        """Тест: команда reap_expired_leases --once обрабатывает все просроченные аренды."""
+        for _ in range(3):
+            self._create(Notification.STATUS_IN_PROGRESS, timedelta(minutes=-5))
+        out = StringIO()
+
+        call_command("reap_expired_leases", "--once", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Re-enqueued 3 notifications", out.getvalue())
+
+
+class RedeliveredTaskTest(TestCase):
+    """Тесты повторной доставки задачи (acks_late)."""
+
+    @patch("notifications.tasks.NotificationService")
+    def test_processed_notification_is_skipped(self, mock_service_class):
+        """Тест: повторно доставленная задача не отправляет завершенное уведомление."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            status=Notification.STATUS_DELIVERED,
+        )
+
+        send_notification_task(str(notification.id))
+
+        mock_service_class.assert_not_called()
+
+    def test_notification_leased_by_other_worker_is_skipped(self):
+        """Тест: повторная задача не отправляет уведомление, пока аренду держит другой воркер."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            channels=["email"],
+            status=Notification.STATUS_IN_PROGRESS,
+            claimed_by="other-host:123",
+            lease_expires_at=timezone.now() + timedelta(minutes=4),
+        )
+
+        for mode in (NotificationService.PERSISTENCE_IMMEDIATE, "coalesced"):
+            with (
+                self.subTest(mode=mode),
+                override_settings(NOTIFICATION_PERSISTENCE_MODE=mode),
+                patch(
+                    "notifications.channels.EmailChannelSender.send",
+                    return_value=ChannelResult(success=True),
+                ) as mock_send,
+            ):
+                send_notification_task(str(notification.id))
+
+                mock_send.assert_not_called()
+                notification.refresh_from_db()
+                self.assertEqual(notification.status, Notification.STATUS_IN_PROGRESS)
+                self.assertEqual(notification.claimed_by, "other-host:123")
+
+    def test_expired_lease_can_be_taken_over(self):
+        """Тест: уведомление с истекшей арендой захватывает новый воркер."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            channels=["email"],
+            status=Notification.STATUS_IN_PROGRESS,
+            claimed_by="dead-worker",
+            lease_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        with patch(
+            "notifications.channels.EmailChannelSender.send",
+            return_value=ChannelResult(success=True),
+        ):
+            send_notification_task(str(notification.id))
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_DELIVERED)
@@ -0,0 +1,114 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from notifications.dispatch import relay_outbox
+from notifications.models import Notification, OutboxMessage
+from notifications.services.idempotency import get_idempotency_cache
+
+
+@override_settings(NOTIFICATION_DISPATCH_MODE="outbox")
+class OutboxAPITest(TestCase):
+    """Тесты записи в outbox при создании уведомлений."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.client = APIClient()
+        get_idempotency_cache().clear()
+
+    def _post(self, url_name, data):
+        return self.client.post(
+            reverse(url_name),
+            data=json.dumps(data),
+            content_type="application/json",
+        )
+
+    @patch("notifications.views.enqueue_notification")
+    def test_create_writes_outbox_without_publishing(self, mock_enqueue):
+        """Тест: API пишет outbox в БД и не обращается к брокеру."""
+        response = self._post(
+            "notifications:create",
+            {"request_id": "outbox-1", "to_email": "test@example.com", "body": "Test"},
+        )
+        self._post(
+            "notifications:create",
+            {"request_id": "outbox-1", "to_email": "test@example.com", "body": "Test"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("notification_id", flat=True)),
+            [Notification.objects.get().id],
+        )
+        mock_enqueue.assert_not_called()
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_bulk_create_writes_outbox_for_created_only(self, mock_enqueue):
+        """Тест: в outbox попадают только созданные уведомления пакета."""
+        existing = Notification.objects.create(
+            request_id="dup",
+            to_email="test@example.com",
+            body="Test",
+        )
+
+        response = self._post(
+            "notifications:bulk-create",
+            [
+                {"request_id": "dup", "to_email": "a@example.com", "body": "Hi"},
+                {"request_id": "new", "to_email": "b@example.com", "body": "Hi"},
+                {"to_email": "c@example.com", "body": "Hi"},
+            ],
+        )
+
+        self.assertEqual(response.data["summary"]["created"], 2)
+        outbox_ids = set(OutboxMessage.objects.values_list("notification_id", flat=True))
+        self.assertEqual(len(outbox_ids), 2)
+        self.assertNotIn(existing.id, outbox_ids)
+        mock_enqueue.assert_not_called()
+
+
+class RelayOutboxTest(TestCase):
+    """Тесты публикации outbox."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notifications = [
+            Notification.objects.create(to_email="test@example.com", body="Test") for _ in range(3)
+        ]
+        OutboxMessage.objects.bulk_create(
+            [OutboxMessage(notification=notification) for notification in self.notifications],
+        )
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_relay_publishes_batch_in_order_and_deletes_rows(self, mock_enqueue):
+        """Тест: relay публикует пачку в порядке создания и удаляет ее из outbox."""
+        relayed = relay_outbox(batch_size=2)
+
+        self.assertEqual(relayed, 2)
+        mock_enqueue.assert_called_once_with([n.id for n in self.notifications[:2]], queue=None)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    @patch("notifications.dispatch.enqueue_notifications", side_effect=ConnectionError("down"))
+    def test_relay_failure_keeps_rows(self, mock_enqueue):
+        """Тест: при недоступном брокере записи остаются в outbox."""
+        with self.assertRaises(ConnectionError):
+            relay_outbox()
+
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_command_drains_outbox(self, mock_enqueue):
+        """Тест: команда relay_outbox --once публикует весь outbox."""
+        out = StringIO()
+
+        call_command("relay_outbox", "--once", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(mock_enqueue.call_count, 2)
+        self.assertEqual(OutboxMessage.objects.count(), 0)
+        self.assertIn("Relayed 3 notifications", out.getvalue())
@@ -0,0 +1,184 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, call, patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.dispatch import (
+    add_to_outbox,
+    enqueue_routed,
+    notification_queue,
+    notification_queues,
+    relay_outbox,
+    schedule_retries,
+)
+from notifications.models import Notification
+from notifications.services.idempotency import get_idempotency_cache
+from notifications.services.queue_lag import measure_lane_lag
+
+
+class NotificationQueueTest(TestCase):
+    """Тесты выбора очереди Celery для уведомления."""
+
+    def test_default_queue_when_lanes_disabled(self):
+        """Тест: без настроек очередей задачи идут в очередь по умолчанию."""
+        self.assertIsNone(notification_queue(Notification.PRIORITY_CRITICAL, ["email"]))
+        self.assertEqual(notification_queues(), [])
+
+    @override_settings(NOTIFICATION_PRIORITY_QUEUES=True)
+    def test_priority_queues(self):
+        """Тест: очередь определяется приоритетом, по умолчанию normal."""
+        self.assertEqual(
+            notification_queue(Notification.PRIORITY_CRITICAL, ["telegram"]),
+            "notifications.critical",
+        )
+        self.assertEqual(notification_queue(None), "notifications.normal")
+        self.assertEqual(
+            notification_queues(),
+            ["notifications.critical", "notifications.normal", "notifications.bulk"],
+        )
+
+    @override_settings(NOTIFICATION_PRIORITY_QUEUES=True, NOTIFICATION_CHANNEL_QUEUES=True)
+    def test_channel_queues(self):
+        """Тест: очередь приоритета делится по основному каналу уведомления."""
+        self.assertEqual(
+            notification_queue(Notification.PRIORITY_BULK, ["telegram", "email"]),
+            "notifications.bulk.telegram",
+        )
+        self.assertEqual(notification_queue(Notification.PRIORITY_BULK, []), "notifications.bulk")
+        self.assertEqual(len(notification_queues()), 12)
+
+
+@override_settings(NOTIFICATION_PRIORITY_QUEUES=True)
+class PriorityRoutingTest(TestCase):
+    """Тесты публикации задач в очереди приоритетов."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        get_idempotency_cache().clear()
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_enqueue_routed_groups_by_queue(self, mock_enqueue):
+        """Тест: уведомления публикуются пачками по очередям."""
+        enqueue_routed(
+            [
+                ("a", Notification.PRIORITY_BULK, ["email"]),
+                ("b", Notification.PRIORITY_CRITICAL, ["sms"]),
+                ("c", Notification.PRIORITY_BULK, []),
+            ],
+        )
+
+        mock_enqueue.assert_has_calls(
+            [
+                call(["a", "c"], queue="notifications.bulk"),
+                call(["b"], queue="notifications.critical"),
+            ],
+            any_order=True,
+        )
+
+    @patch("notifications.views.enqueue_notification")
+    def test_create_api_routes_by_priority(self, mock_enqueue):
+        """Тест: API публикует срочное уведомление в очередь critical."""
+        response = APIClient().post(
+            reverse("notifications:create"),
+            data=json.dumps(
+                {"to_email": "test@example.com", "body": "Code", "priority": "critical"},
+            ),
+            content_type="application/json",
+        )
+
+        mock_enqueue.assert_called_once_with(response.data["id"], queue="notifications.critical")
+        self.assertEqual(
+            Notification.objects.get(id=response.data["id"]).priority,
+            Notification.PRIORITY_CRITICAL,
+        )
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_relay_outbox_routes_by_priority(self, mock_enqueue):
+        """Тест: relay_outbox берет приоритет уведомления и публикует в его очередь."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Promo",
+            priority=Notification.PRIORITY_BULK,
+        )
+        add_to_outbox([notification.id])
+
+        relay_outbox()
+
+        mock_enqueue.assert_called_once_with([notification.id], queue="notifications.bulk")
+
+    @patch("notifications.dispatch.send_notification_task")
+    def test_retry_keeps_priority_queue(self, mock_task):
+        """Тест: повтор после временной ошибки публикуется в очередь приоритета."""
+        mock_task.app.producer_or_acquire.return_value.__enter__.return_value = MagicMock()
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Code",
+            priority=Notification.PRIORITY_CRITICAL,
+            next_attempt_at=timezone.now() + timedelta(minutes=1),
+        )
+
+        schedule_retries([notification])
+
+        self.assertEqual(mock_task.apply_async.call_args[1]["queue"], "notifications.critical")
+
+
+class QueueLagTest(TestCase):
+    """Тесты измерения отставания очередей."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        now = timezone.now()
+        for _ in range(3):
+            Notification.objects.create(
+                to_email="test@example.com",
+                body="Promo",
+                priority=Notification.PRIORITY_BULK,
+            )
+        Notification.objects.filter(priority=Notification.PRIORITY_BULK).update(
+            created_at=now - timedelta(minutes=10),
+        )
+        Notification.objects.create(
+            to_email="test@example.com",
+            body="Code",
+            priority=Notification.PRIORITY_CRITICAL,
+        )
+        # Уведомления в обработке и ожидающие повтора не учитываются
+        Notification.objects.create(
+            to_email="test@example.com",
+            body="Code",
+            priority=Notification.PRIORITY_CRITICAL,
+            status=Notification.STATUS_IN_PROGRESS,
+        )
+        Notification.objects.create(
+            to_email="test@example.com",
+            body="Code",
+            priority=Notification.PRIORITY_CRITICAL,
+            next_attempt_at=now + timedelta(minutes=5),
+        )
+
+    def test_measure_lane_lag(self):
+        """Тест: отставание считается по самому старому готовому уведомлению приоритета."""
+        lanes = {lane.priority: lane for lane in measure_lane_lag()}
+
+        self.assertEqual(lanes["bulk"].pending, 3)
+        self.assertGreaterEqual(lanes["bulk"].lag, 600)
+        self.assertEqual(lanes["critical"].pending, 1)
+        self.assertLess(lanes["critical"].lag, 60)
+        self.assertEqual(lanes["normal"].pending, 0)
+
+    def test_command_fails_when_lag_exceeded(self):
+        """Тест: check_queue_lag завершается ошибкой, если порог превышен."""
+        out = StringIO()
+
+        call_command("check_queue_lag", "--max-lag", "critical=60", stdout=out)
+        self.assertIn("bulk: 3 pending", out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, "bulk lag"):
+            call_command("check_queue_lag", "--max-lag", "bulk=60", stdout=StringIO())
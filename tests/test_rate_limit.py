@@ -0,0 +1,213 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from notifications.channels import ERROR_RATE_LIMITED, ChannelResult, SmsChannelSender
+from notifications.models import DeliveryAttempt, Notification
+from notifications.services import (
+    ChannelRateLimiter,
+    ChannelStatsTracker,
+    InMemoryTokenBucketStore,
+    NotificationService,
+    RateLimitedChannelSender,
+)
+from notifications.services.rate_limit import TokenBucket, parse_rate_limits
+
+
+class FakeClock:
+    """Управляемое время для корзин токенов."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketStoreTest(SimpleTestCase):
+    """Тесты корзин токенов в памяти."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.clock = FakeClock()
+        self.store = InMemoryTokenBucketStore(clock=self.clock)
+        self.bucket = TokenBucket("channel", rate=2, capacity=3)
+
+    def test_burst_then_refill(self):
+        """Тест: емкость расходуется сразу, дальше токены приходят со скоростью rate."""
+        self.assertEqual([self.store.acquire([self.bucket]) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(self.store.acquire([self.bucket]), 0.5)
+
+        self.clock.sleep(0.5)
+
+        self.assertEqual(self.store.acquire([self.bucket]), 0)
+
+    def test_all_buckets_or_none(self):
+        """Тест: пустая корзина получателя не расходует токены канала."""
+        recipient = TokenBucket("recipient", rate=1, capacity=1)
+        self.assertEqual(self.store.acquire([self.bucket, recipient]), 0)
+
+        self.assertAlmostEqual(self.store.acquire([self.bucket, recipient]), 1.0)
+        self.assertEqual(self.store.acquire([self.bucket]), 0)
+        self.assertEqual(self.store.acquire([self.bucket]), 0)
+        self.assertGreater(self.store.acquire([self.bucket]), 0)
+
+    def test_parse_rate_limits(self):
+        """Тест: лимиты задаются строкой канал=скорость[:емкость]."""
+        self.assertEqual(
+            parse_rate_limits("sms=10:20, telegram=0.5"),
+            {"sms": (10.0, 20.0), "telegram": (0.5, None)},
+        )
+        self.assertEqual(parse_rate_limits(""), {})
+
+
+class RateLimitedChannelSenderTest(TestCase):
+    """Тесты адаптера канала с лимитом скорости."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.clock = FakeClock()
+        self.store = InMemoryTokenBucketStore(clock=self.clock)
+        self.tracker = ChannelStatsTracker()
+        self.inner = SmsChannelSender()
+        self.notification = Notification.objects.create(to_phone="+1234567890", body="Test")
+
+    def _sender(self, max_wait, **limits):
+        return RateLimitedChannelSender(
+            self.inner,
+            ChannelRateLimiter("sms", self.store, **limits),
+            max_wait=max_wait,
+            tracker=self.tracker,
+            sleep=self.clock.sleep,
+        )
+
+    def test_waits_for_token_within_budget(self):
+        """Тест: короткое ожидание токена - отправка после паузы."""
+        sender = self._sender(max_wait=2, rate=1)
+
+        with patch.object(self.inner, "send", return_value=ChannelResult(success=True)):
+            results = [sender.send(self.notification) for _ in range(2)]
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertAlmostEqual(self.clock.now, 1.0)
+        self.assertGreater(self.tracker.get("sms").rate_limit_wait, 0)
+
+    def test_defers_beyond_budget(self):
+        """Тест: если токена нет дольше max_wait, адаптер не вызывается."""
+        sender = self._sender(max_wait=0.5, rate=0.1)
+
+        with patch.object(self.inner, "send", return_value=ChannelResult(success=True)) as mock:
+            sender.send(self.notification)
+            result = sender.send(self.notification)
+
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(result.error_class, ERROR_RATE_LIMITED)
+        self.assertAlmostEqual(result.retry_after, 10.0)
+        self.assertEqual(self.tracker.snapshot()["sms"]["deferred"], 1)
+
+    def test_recipient_limit(self):
+        """Тест: лимит получателя не мешает отправке другим адресатам."""
+        sender = self._sender(max_wait=0, recipient_rate=1)
+        other = Notification.objects.create(to_phone="+1987654321", body="Test")
+
+        with patch.object(self.inner, "send", return_value=ChannelResult(success=True)):
+            results = [sender.send(n) for n in (self.notification, self.notification, other)]
+
+        self.assertEqual([result.success for result in results], [True, False, True])
+
+    def test_batch_sends_only_granted(self):
+        """Тест: в пачке отправляются уведомления, получившие токен."""
+        sender = self._sender(max_wait=0, rate=1, burst=2)
+        notifications = [self.notification] * 3
+
+        with patch.object(
+            self.inner,
+            "send_batch",
+            side_effect=lambda batch: [ChannelResult(success=True) for _ in batch],
+        ) as mock:
+            results = sender.send_batch(notifications)
+
+        mock.assert_called_once_with(notifications[:2])
+        self.assertEqual(
+            [result.error_class for result in results],
+            [None, None, ERROR_RATE_LIMITED],
+        )
+
+
+@override_settings(
+    NOTIFICATION_RATE_LIMITS="sms=1:1",
+    NOTIFICATION_RATE_LIMIT_MAX_WAIT=0,
+)
+class RateLimitedDeliveryTest(TestCase):
+    """Тесты отложенной доставки при исчерпанном лимите канала."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        store_patcher = patch(
+            "notifications.services.rate_limit._memory_store",
+            InMemoryTokenBucketStore(),
+        )
+        store_patcher.start()
+        self.addCleanup(store_patcher.stop)
+
+    def _notifications(self, count):
+        return [
+            Notification.objects.create(
+                to_phone=f"+1555000{i:04d}",
+                to_email=f"user{i}@example.com",
+                body="Test",
+                channels=["sms", "email"],
+            )
+            for i in range(count)
+        ]
+
+    def _assert_deferred(self, notification):
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_PENDING)
+        self.assertEqual(notification.retry_count, 0)
+        self.assertIsNotNone(notification.next_attempt_at)
+        self.assertEqual(
+            list(notification.attempts.values_list("channel", "status")),
+            [("sms", DeliveryAttempt.STATUS_SKIPPED)],
+        )
+
+    def test_saturated_channel_defers_instead_of_fallback(self):
+        """Тест: уведомление сверх лимита откладывается, а не уходит в email."""
+        service = NotificationService()
+        first, second = self._notifications(2)
+        inner = service.channel_senders["sms"].sender
+
+        with patch.object(inner, "send", return_value=ChannelResult(success=True)):
+            service.send_notification(first)
+            service.send_notification(second)
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, Notification.STATUS_DELIVERED)
+        self._assert_deferred(second)
+
+    def test_batched_mode_defers(self):
+        """Тест: в режиме batched отклоненные лимитом уведомления тоже откладываются."""
+        service = NotificationService(delivery_mode=NotificationService.DELIVERY_BATCHED)
+        notifications = self._notifications(2)
+        inner = service.channel_senders["sms"].sender
+
+        with patch.object(
+            inner,
+            "send_batch",
+            side_effect=lambda batch: [ChannelResult(success=True) for _ in batch],
+        ):
+            service.send_notifications(notifications)
+
+        notifications[0].refresh_from_db()
+        self.assertEqual(notifications[0].status, Notification.STATUS_DELIVERED)
+        self._assert_deferred(notifications[1])
+
+    def test_unlimited_channels_not_wrapped(self):
+        """Тест: каналы без лимита используются без адаптера лимита."""
+        senders = NotificationService().channel_senders
+
+        self.assertIsInstance(senders["sms"], RateLimitedChannelSender)
+        self.assertNotIsInstance(senders["email"], RateLimitedChannelSender)
@@ -0,0 +1,151 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.models import CoalescedNotification, DeliveryAttempt, Notification
+from notifications.services.retention import NdjsonArchiveWriter, NotificationPruner
+from notifications.services.status_cache import get_status_cache
+
+
+class NotificationPrunerTest(TestCase):
+    """Тесты удаления и архивации старых уведомлений."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.cutoff = timezone.now() - timedelta(days=30)
+        self.old = [self._create(Notification.STATUS_DELIVERED, days_ago=40 + i) for i in range(5)]
+        self.old_pending = self._create(Notification.STATUS_PENDING, days_ago=40)
+        self.recent = self._create(Notification.STATUS_FAILED, days_ago=1)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive_dir = Path(tmp.name)
+
+    def _create(self, status, days_ago):
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Тест",
+            status=status,
+        )
+        DeliveryAttempt.objects.create(
+            notification=notification,
+            channel="email",
+            status=DeliveryAttempt.STATUS_SUCCESS,
+        )
+        Notification.objects.filter(id=notification.id).update(
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+        return notification
+
+    def test_deletes_old_terminal_notifications_in_batches(self):
+        """Тест: удаляются только старые завершенные уведомления, пачками."""
+        pruner = NotificationPruner(older_than=self.cutoff, batch_size=2)
+
+        with patch.object(pruner, "prune_batch", wraps=pruner.prune_batch) as mock_batch:
+            deleted = pruner.run()
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(mock_batch.call_count, 3)
+        self.assertEqual(
+            set(Notification.objects.values_list("id", flat=True)),
+            {self.old_pending.id, self.recent.id},
+        )
+        self.assertEqual(DeliveryAttempt.objects.count(), 2)
+
+    def test_keeps_original_of_retained_duplicate(self):
+        """Тест: уведомление с неудаляемым дубликатом остается вместе со связью."""
+        original, pruned_original = self.old[0], self.old[1]
+        duplicate = self._create(Notification.STATUS_COALESCED, days_ago=1)
+        old_duplicate = self._create(Notification.STATUS_COALESCED, days_ago=35)
+        CoalescedNotification.objects.create(notification=duplicate, digest=original)
+        CoalescedNotification.objects.create(notification=old_duplicate, digest=pruned_original)
+
+        deleted = NotificationPruner(older_than=self.cutoff, batch_size=2).run()
+
+        self.assertEqual(deleted, 5)
+        self.assertTrue(Notification.objects.filter(id=original.id).exists())
+        self.assertFalse(Notification.objects.filter(id=pruned_original.id).exists())
+        self.assertEqual(
+            list(CoalescedNotification.objects.values_list("notification_id", "digest_id")),
+            [(duplicate.id, original.id)],
+        )
+
+    @override_settings(NOTIFICATION_STATUS_CACHE_ALIAS="default")
+    def test_pruned_status_invalidated(self):
+        """Тест: удаленное уведомление больше не отдается из кэша статусов."""
+        caches["default"].clear()
+        get_status_cache().populate(self.old[0])
+
+        NotificationPruner(older_than=self.cutoff, batch_size=10).run()
+
+        self.assertIsNone(get_status_cache().get(self.old[0].id))
+
+    def test_archives_batch_before_delete(self):
+        """Тест: пачка с попытками записывается в сжатый NDJSON до удаления."""
+        pruner = NotificationPruner(
+            older_than=self.cutoff,
+            batch_size=10,
+            archive=NdjsonArchiveWriter(self.archive_dir),
+        )
+
+        pruner.run()
+
+        files = list(self.archive_dir.glob("*.ndjson.gz"))
+        self.assertEqual(len(files), 1)
+        with gzip.open(files[0], "rt", encoding="utf-8") as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual({row["id"] for row in rows}, {str(n.id) for n in self.old})
+        self.assertEqual(rows[0]["body"], "Тест")
+        self.assertEqual(rows[0]["attempts"][0]["channel"], "email")
+        # В архиве все столбцы уведомления, включая добавленные позже
+        self.assertEqual(rows[0]["priority"], Notification.PRIORITY_NORMAL)
+        self.assertEqual(rows[0]["retry_count"], 0)
+        self.assertIn("expires_at", rows[0])
+
+    def test_rerun_after_failed_delete_overwrites_archive(self):
+        """Тест: после сбоя удаления повторный запуск перезаписывает тот же файл архива."""
+        archive = NdjsonArchiveWriter(self.archive_dir)
+        pruner = NotificationPruner(older_than=self.cutoff, batch_size=10, archive=archive)
+
+        with patch.object(
+            DeliveryAttempt.objects,
+            "filter",
+            side_effect=[DeliveryAttempt.objects.none(), RuntimeError("db gone")],
+        ):
+            with self.assertRaises(RuntimeError):
+                pruner.prune_batch()
+        self.assertEqual(Notification.objects.count(), 7)
+
+        NotificationPruner(older_than=self.cutoff, batch_size=10, archive=archive).run()
+
+        self.assertEqual(len(list(self.archive_dir.iterdir())), 1)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_command(self):
+        """Тест: команда prune_notifications удаляет и архивирует уведомления."""
+        out = StringIO()
+
+        call_command(
+            "prune_notifications",
+            "--older-than",
+            "30d",
+            "--archive-dir",
+            str(self.archive_dir),
+            stdout=out,
+        )
+
+        self.assertIn("Deleted 5 notifications", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_command_rejects_invalid_duration(self):
+        """Тест: некорректная длительность отклоняется."""
+        with self.assertRaises(CommandError):
+            call_command("prune_notifications", "--older-than", "month")
@@ -0,0 +1,183 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.channels import ERROR_PERMANENT, ERROR_TRANSIENT, ChannelResult
+from notifications.dispatch import schedule_retries
+from notifications.models import Notification
+from notifications.services import DatabaseNotificationQueue, NotificationService
+from notifications.services.retry import RetryPolicy
+from notifications.tasks import send_notification_task
+
+
+class RetryPolicyTest(TestCase):
+    """Тесты политики повторов."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.policy = RetryPolicy(max_attempts=4, base_delay=10, max_delay=30, deadline=3600)
+        self.created_at = timezone.now()
+
+    def test_exponential_backoff_with_jitter(self):
+        """Тест: пауза растет экспоненциально, разброс в верхней половине интервала."""
+        for retry_count, ceiling in ((0, 10), (1, 20), (2, 30)):
+            delay = self.policy.next_delay(retry_count, self.created_at)
+            self.assertGreaterEqual(delay, ceiling / 2)
+            self.assertLessEqual(delay, ceiling)
+
+    def test_no_retry_after_max_attempts(self):
+        """Тест: после max_attempts прогонов повторов нет."""
+        self.assertIsNone(self.policy.next_delay(3, self.created_at))
+
+    def test_no_retry_past_deadline(self):
+        """Тест: повтор, не успевающий до deadline, не планируется."""
+        created_at = timezone.now() - timedelta(seconds=3595)
+
+        self.assertIsNone(self.policy.next_delay(0, created_at))
+
+    def test_retry_after_hint_extends_delay(self):
+        """Тест: подсказка провайдера увеличивает паузу."""
+        self.assertEqual(self.policy.next_delay(0, self.created_at, retry_after=120), 120)
+
+
+class TransientFailureTest(TestCase):
+    """Тесты обработки временных и постоянных ошибок сервисом."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            body="Test",
+            channels=["email", "sms"],
+        )
+        self.service = NotificationService()
+
+    def _send(self, email_result, sms_result):
+        with (
+            patch.object(self.service.channel_senders["email"], "send", return_value=email_result),
+            patch.object(self.service.channel_senders["sms"], "send", return_value=sms_result),
+        ):
+            self.service.send_notification(self.notification)
+        self.notification.refresh_from_db()
+
+    def test_transient_failure_schedules_retry(self):
+        """Тест: временная ошибка возвращает уведомление в pending с временем повтора."""
+        self._send(
+            ChannelResult(success=False, error_message="timeout", error_class=ERROR_TRANSIENT),
+            ChannelResult(success=False, error_message="rejected", error_class=ERROR_PERMANENT),
+        )
+
+        self.assertEqual(self.notification.status, Notification.STATUS_PENDING)
+        self.assertEqual(self.notification.retry_count, 1)
+        self.assertGreater(self.notification.next_attempt_at, timezone.now())
+        self.assertIsNone(self.notification.claimed_by)
+        self.assertGreater(self.notification.lease_expires_at, self.notification.next_attempt_at)
+        self.assertEqual(self.notification.attempts.count(), 2)
+
+    def test_permanent_failure_is_not_retried(self):
+        """Тест: только постоянные ошибки сразу завершают уведомление статусом failed."""
+        self._send(
+            ChannelResult(success=False, error_message="bad address", error_class=ERROR_PERMANENT),
+            ChannelResult(success=False, error_message="unclassified"),
+        )
+
+        self.assertEqual(self.notification.status, Notification.STATUS_FAILED)
+        self.assertIsNone(self.notification.next_attempt_at)
+
+    def test_scheduled_notification_deadline_from_send_at(self):
+        """Тест: окно повторов отложенного уведомления отсчитывается от send_at."""
+        Notification.objects.filter(id=self.notification.id).update(
+            created_at=timezone.now() - timedelta(days=2),
+            send_at=timezone.now() - timedelta(minutes=1),
+        )
+        self.notification.refresh_from_db()
+
+        self._send(
+            ChannelResult(success=False, error_message="timeout", error_class=ERROR_TRANSIENT),
+            ChannelResult(success=False, error_message="rejected", error_class=ERROR_PERMANENT),
+        )
+
+        self.assertEqual(self.notification.status, Notification.STATUS_PENDING)
+        self.assertEqual(self.notification.retry_count, 1)
+
+    @override_settings(NOTIFICATION_RETRY_MAX_ATTEMPTS=2)
+    def test_exhausted_retries_fail(self):
+        """Тест: после исчерпания повторов уведомление получает статус failed."""
+        self.service = NotificationService()
+        transient = ChannelResult(
+            success=False,
+            error_message="timeout",
+            error_class=ERROR_TRANSIENT,
+        )
+
+        self._send(transient, transient)
+        self._send(transient, transient)
+
+        self.assertEqual(self.notification.status, Notification.STATUS_FAILED)
+        self.assertEqual(self.notification.retry_count, 1)
+
+    def test_success_on_retry_clears_schedule(self):
+        """Тест: успешный повтор доставляет уведомление и сбрасывает время повтора."""
+        transient = ChannelResult(
+            success=False,
+            error_message="timeout",
+            error_class=ERROR_TRANSIENT,
+        )
+        self._send(transient, transient)
+
+        self._send(ChannelResult(success=True), transient)
+
+        self.assertEqual(self.notification.status, Notification.STATUS_DELIVERED)
+        self.assertIsNone(self.notification.next_attempt_at)
+
+
+class RetrySchedulingTest(TestCase):
+    """Тесты планирования повторов."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            status=Notification.STATUS_PENDING,
+            next_attempt_at=timezone.now() + timedelta(minutes=1),
+        )
+
+    @patch("notifications.dispatch.send_notification_task")
+    def test_retry_published_with_eta(self, mock_task):
+        """Тест: повтор публикуется задачей с ETA = next_attempt_at."""
+        mock_task.app.producer_or_acquire.return_value.__enter__.return_value = MagicMock()
+
+        self.assertEqual(schedule_retries([self.notification]), 1)
+
+        args, kwargs = mock_task.apply_async.call_args
+        self.assertEqual(args[0], (str(self.notification.id),))
+        self.assertEqual(kwargs["eta"], self.notification.next_attempt_at)
+
+    @override_settings(NOTIFICATION_DISPATCH_MODE="database")
+    @patch("notifications.dispatch.send_notification_task")
+    def test_database_queue_waits_for_retry_time(self, mock_task):
+        """Тест: в режиме database повтор не публикуется, а очередь ждет next_attempt_at."""
+        queue = DatabaseNotificationQueue()
+
+        schedule_retries([self.notification])
+
+        mock_task.apply_async.assert_not_called()
+        self.assertEqual(queue.claim("worker"), [])
+
+        Notification.objects.filter(id=self.notification.id).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual([n.id for n in queue.claim("worker")], [self.notification.id])
+
+    @patch("notifications.dispatch.schedule_retries")
+    @patch("notifications.tasks.NotificationService")
+    def test_task_schedules_retry(self, mock_service_class, mock_schedule):
+        """Тест: задача отправки передает уведомление на планирование повтора."""
+        send_notification_task(str(self.notification.id))
+
+        mock_schedule.assert_called_once()
+        self.assertEqual(mock_schedule.call_args[0][0][0].id, self.notification.id)
@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from notifications.channels.base import ChannelResult
+from notifications.models import Notification
+from notifications.services import AdaptiveChannelRouter, ChannelStatsTracker, NotificationService
+from notifications.services.routing import publish_channel_stats
+
+
+class ChannelStatsTrackerTest(TestCase):
+    """Тесты для трекера статистики каналов."""
+
+    def test_ewma_moves_towards_observations(self):
+        """Тест: оценки сдвигаются к наблюдениям."""
+        tracker = ChannelStatsTracker(alpha=0.5, prior_success_rate=0.8, prior_latency=1.0)
+
+        tracker.observe("sms", success=False, latency=3.0)
+
+        stats = tracker.get("sms")
+        self.assertAlmostEqual(stats.success_rate, 0.4)
+        self.assertAlmostEqual(stats.latency, 2.0)
+        self.assertEqual(tracker.snapshot()["sms"]["samples"], 1.0)
+
+    def test_unknown_channel_returns_prior(self):
+        """Тест: для канала без наблюдений возвращается априорная оценка."""
+        tracker = ChannelStatsTracker(prior_success_rate=0.7, prior_latency=2.0)
+
+        stats = tracker.get("telegram")
+
+        self.assertEqual((stats.success_rate, stats.latency), (0.7, 2.0))
+
+
+class AdaptiveChannelRouterTest(TestCase):
+    """Тесты для адаптивного порядка каналов."""
+
+    def test_orders_by_expected_time_to_delivery(self):
+        """Тест: быстрый и надежный канал ставится первым."""
+        tracker = ChannelStatsTracker(alpha=0.5)
+        for _ in range(20):
+            tracker.observe("email", success=False, latency=2.0)
+            tracker.observe("sms", success=True, latency=0.1)
+            tracker.observe("telegram", success=True, latency=1.0)
+
+        router = AdaptiveChannelRouter(tracker, exploration=0)
+
+        self.assertEqual(router.order(["email", "sms", "telegram"]), ["sms", "telegram", "email"])
+
+    def test_keeps_original_order_without_statistics(self):
+        """Тест: без статистики сохраняется исходный порядок."""
+        router = AdaptiveChannelRouter(ChannelStatsTracker())
+
+        self.assertEqual(router.order(["email", "sms", "telegram"]), ["email", "sms", "telegram"])
+
+
+class NotificationServiceRoutingTest(TestCase):
+    """Тесты адаптивной маршрутизации в NotificationService."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.service = NotificationService(routing_policy=NotificationService.ROUTING_ADAPTIVE)
+        self.service.stats_tracker = ChannelStatsTracker(alpha=0.5)
+        self.service.router = AdaptiveChannelRouter(self.service.stats_tracker, exploration=0)
+        for _ in range(10):
+            self.service.stats_tracker.observe("email", success=False, latency=1.0)
+            self.service.stats_tracker.observe("sms", success=True, latency=0.1)
+
+    def test_adaptive_order_for_unpinned_channels(self):
+        """Тест: для уведомления без channels используется адаптивный порядок."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            body="Test message",
+        )
+
+        with (
+            patch.object(self.service.channel_senders["email"], "send") as mock_email,
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            self.service.send_notification(notification)
+
+        mock_email.assert_not_called()
+        notification.refresh_from_db()
+        self.assertEqual(notification.used_channel, "sms")
+
+    def test_pinned_channels_are_not_reordered(self):
+        """Тест: явно указанный порядок каналов не меняется."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            body="Test message",
+            channels=["email", "sms"],
+        )
+
+        self.assertEqual(self.service._resolve_channels(notification), ["email", "sms"])
+
+
+class ChannelStatsAPITest(TestCase):
+    """Тесты для просмотра статистики каналов."""
+
+    def test_published_stats_are_exposed(self):
+        """Тест: опубликованная воркером статистика доступна через API."""
+        cache.clear()
+        tracker = ChannelStatsTracker()
+        tracker.observe("email", success=True, latency=0.2)
+        publish_channel_stats(tracker, force=True)
+
+        response = APIClient().get(reverse("notifications:channel-stats"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.data["channels"])
+        self.assertIsNotNone(response.data["worker"])
@@ -0,0 +1,195 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from notifications.dispatch import dispatch_due_notifications
+from notifications.models import LeaderLease, Notification, OutboxMessage
+from notifications.services.idempotency import get_idempotency_cache
+from notifications.services.leader import LeaderElection
+
+
+class ScheduledCreateTest(TestCase):
+    """Тесты создания уведомлений с отложенной отправкой."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.client = APIClient()
+        get_idempotency_cache().clear()
+
+    def test_initial_status(self):
+        """Тест: только send_at в будущем откладывает отправку."""
+        now = timezone.now()
+
+        self.assertEqual(Notification.initial_status(None), Notification.STATUS_PENDING)
+        self.assertEqual(
+            Notification.initial_status(now - timedelta(seconds=1)),
+            Notification.STATUS_PENDING,
+        )
+        self.assertEqual(
+            Notification.initial_status(now + timedelta(hours=1)),
+            Notification.STATUS_SCHEDULED,
+        )
+
+    @patch("notifications.views.enqueue_notification")
+    def test_future_send_at_is_not_enqueued(self, mock_enqueue):
+        """Тест: уведомление с send_at в будущем получает статус scheduled и не публикуется."""
+        data = {
+            "to_email": "test@example.com",
+            "body": "Later",
+            "send_at": (timezone.now() + timedelta(hours=1)).isoformat(),
+        }
+
+        response = self.client.post(
+            reverse("notifications:create"),
+            data=json.dumps(data),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["status"], Notification.STATUS_SCHEDULED)
+        mock_enqueue.assert_not_called()
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_bulk_enqueues_only_immediate(self, mock_enqueue):
+        """Тест: в пакетном создании публикуются только уведомления без отложенной отправки."""
+        data = [
+            {"to_email": "a@example.com", "body": "Now", "request_id": "now"},
+            {
+                "to_email": "b@example.com",
+                "body": "Later",
+                "request_id": "later",
+                "send_at": (timezone.now() + timedelta(hours=1)).isoformat(),
+            },
+        ]
+
+        response = self.client.post(
+            reverse("notifications:bulk-create"),
+            data=json.dumps(data),
+            content_type="application/json",
+        )
+
+        results = response.data["results"]
+        self.assertEqual(
+            Notification.objects.get(id=results[1]["id"]).status,
+            Notification.STATUS_SCHEDULED,
+        )
+        mock_enqueue.assert_called_once_with([results[0]["id"]], queue=None)
+
+
+class DispatchDueNotificationsTest(TestCase):
+    """Тесты публикации наступивших отложенных уведомлений."""
+
+    def _create(self, send_at_delta):
+        return Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            status=Notification.STATUS_SCHEDULED,
+            send_at=timezone.now() + send_at_delta,
+        )
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_due_notifications_are_enqueued(self, mock_enqueue):
+        """Тест: наступившие уведомления переходят в pending, будущие остаются scheduled."""
+        later_due = self._create(timedelta(minutes=-1))
+        first_due = self._create(timedelta(minutes=-5))
+        future = self._create(timedelta(hours=1))
+
+        self.assertEqual(dispatch_due_notifications(), 2)
+
+        mock_enqueue.assert_called_once_with([first_due.id, later_due.id], queue=None)
+        for notification in (first_due, later_due):
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.STATUS_PENDING)
+        future.refresh_from_db()
+        self.assertEqual(future.status, Notification.STATUS_SCHEDULED)
+
+    @patch("notifications.dispatch.enqueue_notifications", side_effect=ConnectionError("down"))
+    def test_broker_failure_keeps_scheduled(self, mock_enqueue):
+        """Тест: при недоступном брокере уведомление остается scheduled."""
+        due = self._create(timedelta(minutes=-1))
+
+        with self.assertRaises(ConnectionError):
+            dispatch_due_notifications()
+
+        due.refresh_from_db()
+        self.assertEqual(due.status, Notification.STATUS_SCHEDULED)
+
+    @override_settings(NOTIFICATION_DISPATCH_MODE="outbox")
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_outbox_mode_writes_outbox(self, mock_enqueue):
+        """Тест: в режиме outbox наступившие уведомления пишутся в outbox."""
+        due = self._create(timedelta(minutes=-1))
+
+        dispatch_due_notifications()
+
+        mock_enqueue.assert_not_called()
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("notification_id", flat=True)),
+            [due.id],
+        )
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_command_dispatches_all_due(self, mock_enqueue):
+        """Тест: команда run_scheduler --once публикует все наступившие уведомления."""
+        for _ in range(3):
+            self._create(timedelta(minutes=-1))
+        out = StringIO()
+
+        call_command("run_scheduler", "--once", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Dispatched 3 scheduled notifications", out.getvalue())
+        self.assertFalse(LeaderLease.objects.exists())
+
+    @patch("notifications.dispatch.enqueue_notifications")
+    def test_command_waits_for_leader(self, mock_enqueue):
+        """Тест: планировщик не публикует уведомления, пока лидер - другой узел."""
+        self._create(timedelta(minutes=-1))
+        LeaderElection("scheduler", ttl=60, owner="other-node").try_acquire()
+        out = StringIO()
+
+        call_command("run_scheduler", "--once", stdout=out)
+
+        self.assertIn("Another scheduler is the leader", out.getvalue())
+        mock_enqueue.assert_not_called()
+
+
+class LeaderElectionTest(TestCase):
+    """Тесты выбора лидера."""
+
+    def test_single_leader(self):
+        """Тест: лидерство получает один участник, лидер может его продлевать."""
+        first = LeaderElection("role", ttl=60, owner="first")
+        second = LeaderElection("role", ttl=60, owner="second")
+
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+        self.assertTrue(first.try_acquire())
+
+    def test_takeover_after_expiry(self):
+        """Тест: после истечения аренды лидером становится другой участник."""
+        first = LeaderElection("role", ttl=60, owner="first")
+        second = LeaderElection("role", ttl=60, owner="second")
+        first.try_acquire()
+        LeaderLease.objects.filter(name="role").update(
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.assertTrue(second.try_acquire())
+        self.assertFalse(first.try_acquire())
+
+    def test_release(self):
+        """Тест: после release лидерство сразу доступно другим."""
+        first = LeaderElection("role", ttl=60, owner="first")
+        first.try_acquire()
+
+        first.release()
+
+        self.assertTrue(LeaderElection("role", ttl=60, owner="second").try_acquire())
@@ -1,8 +1,12 @@
+import asyncio
+import time
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.test import TestCase
+from django.utils import timezone
 
-from notifications.channels.base import ChannelResult
+from notifications.channels.base import AsyncChannelSender, ChannelResult
 from notifications.models import DeliveryAttempt, Notification
 from notifications.services import NotificationService
 
@@ -130,3 +134,245 @@ class NotificationServiceTest(TestCase):
         self.assertEqual(notification.status, Notification.STATUS_DELIVERED)
         # Проверяем, что использовался email (первый в дефолтном списке)
         self.assertEqual(notification.used_channel, "email")
+
+    def test_send_notifications_batch_writes_in_bulk(self):
+        """Тест: пакетная отправка пишет попытки и статусы пачкой."""
+        notifications = [
+            Notification.objects.create(
+                to_email=f"user{i}@example.com",
+                to_phone="+1234567890",
+                body="Test message",
+                channels=["email", "sms"],
+            )
+            for i in range(10)
+        ]
+
+        with (
+            patch.object(
+                self.service.channel_senders["email"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="Email failed"),
+            ),
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            # claim UPDATE, SELECT захваченных, savepoint, INSERT попыток,
+            # UPDATE статусов, release
+            with self.assertNumQueries(6):
+                self.service.send_notifications(notifications)
+
+        for notification in notifications:
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.STATUS_DELIVERED)
+            self.assertEqual(notification.used_channel, "sms")
+            attempts = notification.attempts.all()
+            self.assertEqual([a.channel for a in attempts], ["email", "sms"])
+            self.assertEqual(attempts[0].status, DeliveryAttempt.STATUS_FAILED)
+            self.assertEqual(attempts[1].status, DeliveryAttempt.STATUS_SUCCESS)
+
+    def test_send_notifications_skips_claimed(self):
+        """Тест: уведомления, уже захваченные другим воркером, в пачке не отправляются."""
+        pending, claimed, delivered = (
+            Notification.objects.create(
+                to_email=f"user{i}@example.com",
+                body="Test message",
+                channels=["email"],
+                status=status,
+                claimed_by="other-host:123" if status == Notification.STATUS_IN_PROGRESS else None,
+                lease_expires_at=timezone.now() + timedelta(minutes=4),
+            )
+            for i, status in enumerate(
+                [
+                    Notification.STATUS_PENDING,
+                    Notification.STATUS_IN_PROGRESS,
+                    Notification.STATUS_DELIVERED,
+                ],
+            )
+        )
+
+        with patch.object(
+            self.service.channel_senders["email"],
+            "send",
+            return_value=ChannelResult(success=True),
+        ) as mock_send:
+            self.service.send_notifications([pending, claimed, delivered])
+
+        mock_send.assert_called_once_with(pending)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, Notification.STATUS_IN_PROGRESS)
+        self.assertFalse(claimed.attempts.exists())
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, Notification.STATUS_DELIVERED)
+
+
+class CoalescedPersistenceTest(TestCase):
+    """Тесты для режима буферизованной записи результатов доставки."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.service = NotificationService(
+            persistence_mode=NotificationService.PERSISTENCE_COALESCED,
+        )
+
+    def test_fallback_persisted_in_single_transaction(self):
+        """Тест: попытки и итоговый статус пишутся одной транзакцией."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            to_telegram_chat_id="123456789",
+            body="Test message",
+            channels=["email", "sms", "telegram"],
+        )
+
+        with (
+            patch.object(
+                self.service.channel_senders["email"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="Email failed"),
+            ),
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="SMS failed"),
+            ),
+            patch.object(
+                self.service.channel_senders["telegram"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            # claim UPDATE, savepoint, INSERT попыток, UPDATE статуса, release
+            with self.assertNumQueries(5):
+                self.service.send_notification(notification)
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_DELIVERED)
+        self.assertEqual(notification.used_channel, "telegram")
+        attempts = notification.attempts.all()
+        self.assertEqual([a.channel for a in attempts], ["email", "sms", "telegram"])
+        self.assertEqual(attempts[2].status, DeliveryAttempt.STATUS_SUCCESS)
+
+    def test_terminal_notification_is_not_claimed(self):
+        """Тест: уже обработанное уведомление повторно не отправляется."""
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test message",
+            status=Notification.STATUS_DELIVERED,
+            used_channel="email",
+        )
+
+        with patch.object(self.service.channel_senders["email"], "send") as mock_send:
+            self.service.send_notification(notification)
+
+        mock_send.assert_not_called()
+        self.assertEqual(notification.attempts.count(), 0)
+
+
+class FakeAsyncSender:
+    """Асинхронный адаптер канала с заданной задержкой и результатом."""
+
+    def __init__(self, delay, result):
+        self.delay = delay
+        self.result = result
+        self.cancelled = False
+
+    def is_available(self, notification):
+        return True
+
+    def get_unavailable_reason(self, notification):
+        return "unavailable"
+
+    async def send(self, notification):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+
+
+class HedgedDeliveryTest(TestCase):
+    """Тесты для хеджированной отправки по каналам."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.service = NotificationService(
+            delivery_mode=NotificationService.DELIVERY_HEDGED,
+            hedge_delay=0.05,
+        )
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+1234567890",
+            body="Test message",
+            channels=["email", "sms"],
+        )
+
+    def test_async_sender_matches_protocol(self):
+        """Тест: асинхронный адаптер соответствует протоколу AsyncChannelSender."""
+        self.assertIsInstance(FakeAsyncSender(0, ChannelResult(success=True)), AsyncChannelSender)
+
+    def test_slow_channel_is_hedged_and_cancelled(self):
+        """Тест: медленный канал не задерживает fallback и отменяется."""
+        slow_email = FakeAsyncSender(5, ChannelResult(success=True))
+        fast_sms = FakeAsyncSender(0, ChannelResult(success=True))
+        self.service.channel_senders["email"] = slow_email
+        self.service.channel_senders["sms"] = fast_sms
+
+        started = time.monotonic()
+        self.service.send_notification(self.notification)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(slow_email.cancelled)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_DELIVERED)
+        self.assertEqual(self.notification.used_channel, "sms")
+        attempts = self.notification.attempts.all()
+        self.assertEqual(
+            [(a.channel, a.status) for a in attempts],
+            [
+                ("email", DeliveryAttempt.STATUS_CANCELLED),
+                ("sms", DeliveryAttempt.STATUS_SUCCESS),
+            ],
+        )
+
+    def test_fast_failure_starts_next_channel_immediately(self):
+        """Тест: ошибка канала сразу запускает следующий, как при обычном fallback."""
+        self.service.hedge_delay = 5
+        self.service.channel_senders["email"] = FakeAsyncSender(
+            0,
+            ChannelResult(success=False, error_message="Email failed"),
+        )
+        self.service.channel_senders["sms"] = FakeAsyncSender(0, ChannelResult(success=True))
+
+        started = time.monotonic()
+        self.service.send_notification(self.notification)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.used_channel, "sms")
+        attempts = self.notification.attempts.all()
+        self.assertEqual(attempts[0].status, DeliveryAttempt.STATUS_FAILED)
+        self.assertEqual(attempts[0].error_message, "Email failed")
+
+    def test_sync_senders_are_supported(self):
+        """Тест: синхронные адаптеры выполняются в пуле потоков."""
+        with (
+            patch.object(
+                self.service.channel_senders["email"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="Email failed"),
+            ),
+            patch.object(
+                self.service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="SMS failed"),
+            ),
+        ):
+            self.service.send_notification(self.notification)
+
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.status, Notification.STATUS_FAILED)
+        self.assertEqual(self.notification.attempts.count(), 2)
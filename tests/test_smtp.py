@@ -0,0 +1,134 @@
+from django.test import TestCase, override_settings
+
+from notifications.channels import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    EmailChannelSender,
+    SMTPConnectionPool,
+    SmtpEmailChannelSender,
+)
+from notifications.models import Notification
+from notifications.services import NotificationService
+from notifications.testing import LocalSMTPServer
+
+
+class SmtpEmailChannelSenderTest(TestCase):
+    """Тесты отправки email через пул SMTP-соединений."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.server = LocalSMTPServer().start()
+        self.addCleanup(self.server.stop)
+        self.pool = SMTPConnectionPool(
+            self.server.host,
+            self.server.port,
+            max_connections=2,
+            max_messages_per_connection=3,
+        )
+        self.addCleanup(self.pool.close)
+        self.sender = SmtpEmailChannelSender(pool=self.pool, from_email="noreply@example.com")
+
+    def _notifications(self, count):
+        return [
+            Notification.objects.create(
+                to_email=f"user{i}@example.com",
+                subject="Code",
+                body=f"Your code is {i}",
+            )
+            for i in range(count)
+        ]
+
+    def test_send_reuses_connection(self):
+        """Тест: письма отправляются через одну постоянную сессию."""
+        notifications = self._notifications(2)
+
+        results = [self.sender.send(notification) for notification in notifications]
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(self.server.sessions, 1)
+        message = self.server.messages[0]
+        self.assertEqual(message["To"], "user0@example.com")
+        self.assertEqual(message["Message-ID"], f"<{notifications[0].id}@example.com>")
+        self.assertIn("Your code is 0", message.get_payload())
+
+    def test_batch_rotates_connection_after_message_limit(self):
+        """Тест: после max_messages_per_connection писем сессия пересоздается."""
+        results = self.sender.send_batch(self._notifications(7))
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len(self.server.messages), 7)
+        self.assertEqual(self.server.sessions, 3)
+
+    def test_rejected_recipient_is_permanent(self):
+        """Тест: отказ в адресате не прерывает пачку и считается постоянной ошибкой."""
+        notifications = self._notifications(3)
+        self.server.rejected_recipients.add("user1@example.com")
+
+        results = self.sender.send_batch(notifications)
+
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertEqual(results[1].error_class, ERROR_PERMANENT)
+        self.assertEqual(self.server.sessions, 1)
+
+    def test_reconnects_after_server_drops_connection(self):
+        """Тест: после обрыва сессии письмо отправляется в новой сессии."""
+        first, second = self._notifications(2)
+        self.sender.send(first)
+
+        self.server.disconnect_all()
+        result = self.sender.send(second)
+
+        self.assertTrue(result.success)
+        self.assertEqual(self.server.sessions, 2)
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_health_check_replaces_dead_idle_connection(self):
+        """Тест: простаивавшая сессия проверяется NOOP и пересоздается."""
+        self.pool.health_check_interval = 0
+        first, second = self._notifications(2)
+        self.sender.send(first)
+        self.server.disconnect_all()
+
+        with self.pool.connection() as connection:
+            self.assertTrue(connection.is_alive())
+
+        self.assertEqual(self.sender.send(second).success, True)
+        self.assertEqual(self.server.sessions, 2)
+
+    def test_unreachable_server_is_transient(self):
+        """Тест: недоступный сервер - временная ошибка."""
+        self.server.stop()
+        sender = SmtpEmailChannelSender(
+            pool=SMTPConnectionPool(self.server.host, self.server.port, timeout=1),
+        )
+
+        result = sender.send(self._notifications(1)[0])
+
+        self.assertFalse(result.success)
+        self.assertEqual(result.error_class, ERROR_TRANSIENT)
+
+    def test_missing_email_is_permanent(self):
+        """Тест: уведомление без email не отправляется."""
+        notification = Notification.objects.create(to_phone="+1234567890", body="Test")
+
+        result = self.sender.send(notification)
+
+        self.assertEqual(result.error_class, ERROR_PERMANENT)
+        self.assertEqual(self.server.sessions, 0)
+
+
+class EmailSenderSettingTest(TestCase):
+    """Тесты выбора адаптера email по настройкам."""
+
+    def test_stub_by_default(self):
+        """Тест: по умолчанию используется имитация отправки."""
+        service = NotificationService()
+
+        self.assertIs(type(service.channel_senders["email"]), EmailChannelSender)
+
+    @override_settings(NOTIFICATION_EMAIL_SENDER="smtp")
+    def test_smtp_sender(self):
+        """Тест: NOTIFICATION_EMAIL_SENDER=smtp включает SMTP с пулом процесса."""
+        service = NotificationService()
+
+        self.assertIsInstance(service.channel_senders["email"], SmtpEmailChannelSender)
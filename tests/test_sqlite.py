@@ -0,0 +1,157 @@
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from notification_service.sqlite import SQLiteWriter, configure_sqlite_connection, get_sqlite_writer
+from notifications.models import DeliveryAttempt, Notification
+from notifications.services import NotificationService
+from notifications.services.db_queue import DatabaseNotificationQueue
+
+
+class ConfigureSQLiteConnectionTest(SimpleTestCase):
+    """Тесты настройки соединений SQLite."""
+
+    def _pragmas(self, enabled):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        raw = sqlite3.connect(Path(tmp.name) / "test.sqlite3")
+        self.addCleanup(raw.close)
+        wrapper = MagicMock(vendor="sqlite")
+        wrapper.cursor.return_value.__enter__.return_value = raw.cursor()
+        with override_settings(
+            SQLITE_HIGH_CONCURRENCY=enabled,
+            SQLITE_BUSY_TIMEOUT_MS=1234,
+            SQLITE_MMAP_SIZE=4096,
+        ):
+            configure_sqlite_connection(sender=None, connection=wrapper)
+        return {
+            name: raw.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size")
+        }
+
+    def test_pragmas_applied_in_high_concurrency_mode(self):
+        """Тест: в режиме высокой конкурентности выставляются PRAGMA соединения."""
+        # synchronous: 1 = NORMAL
+        self.assertEqual(
+            self._pragmas(enabled=True),
+            {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 1234, "mmap_size": 4096},
+        )
+
+    def test_pragmas_untouched_by_default(self):
+        """Тест: по умолчанию соединение не меняется."""
+        pragmas = self._pragmas(enabled=False)
+
+        self.assertEqual(pragmas["journal_mode"], "delete")
+        self.assertEqual(pragmas["synchronous"], 2)
+
+
+class SQLiteWriterTest(TransactionTestCase):
+    """Тесты писателя с групповым коммитом."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.writer = SQLiteWriter(max_batch=50, max_delay=0.05)
+        self.notifications = [
+            Notification.objects.create(to_email="test@example.com", body="Test") for _ in range(5)
+        ]
+
+    def test_concurrent_writes_share_commit(self):
+        """Тест: записи нескольких потоков попадают в общие коммиты."""
+        commits = []
+        barrier = threading.Barrier(len(self.notifications))
+
+        def write(notification):
+            barrier.wait()
+            self.writer.submit(
+                lambda: DeliveryAttempt.objects.create(
+                    notification=notification,
+                    channel="email",
+                    status=DeliveryAttempt.STATUS_SUCCESS,
+                ),
+            )
+
+        original_commit = self.writer._commit
+
+        def counting_commit(batch):
+            commits.append(len(batch))
+            original_commit(batch)
+
+        with patch.object(self.writer, "_commit", counting_commit):
+            threads = [threading.Thread(target=write, args=(n,)) for n in self.notifications]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(DeliveryAttempt.objects.count(), 5)
+        self.assertEqual(sum(commits), 5)
+        self.assertLess(len(commits), 5)
+
+    def test_failed_write_does_not_roll_back_batch(self):
+        """Тест: ошибка одной записи возвращается вызывающему, остальные сохраняются."""
+        batch = []
+        for index, notification in enumerate(self.notifications[:2]):
+            future = MagicMock()
+            batch.append(
+                (
+                    (lambda: 1 / 0) if index == 0 else (lambda n=notification: n.delete()),
+                    future,
+                ),
+            )
+
+        self.writer._commit(batch)
+
+        self.assertIsInstance(batch[0][1].set_exception.call_args[0][0], ZeroDivisionError)
+        batch[1][1].set_result.assert_called_once()
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_write_inside_transaction_runs_inline(self):
+        """Тест: внутри транзакции запись выполняется сразу, без потока писателя."""
+        with patch.object(connection, "in_atomic_block", True):
+            self.assertEqual(self.writer.submit(lambda: 42), 42)
+        self.assertIsNone(self.writer._thread)
+
+    @override_settings(SQLITE_HIGH_CONCURRENCY=True)
+    def test_service_routes_writes_through_writer(self):
+        """Тест: в режиме высокой конкурентности сервис пишет через писатель процесса."""
+        service = NotificationService(persistence_mode=NotificationService.PERSISTENCE_IMMEDIATE)
+        notification = Notification.objects.create(
+            to_email="test@example.com",
+            body="Test",
+            channels=["email"],
+        )
+        service.channel_senders["email"] = MagicMock()
+        service.channel_senders["email"].send.return_value = MagicMock(
+            success=True,
+            error_message=None,
+        )
+
+        with patch.object(
+            service.writer,
+            "submit",
+            side_effect=service.writer.submit,
+        ) as mock_submit:
+            service.send_notification(notification)
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_DELIVERED)
+        self.assertEqual(mock_submit.call_count, 3)
+
+    @override_settings(SQLITE_HIGH_CONCURRENCY=True)
+    def test_queue_writes_go_through_writer(self):
+        """Тест: захват и возврат очереди в БД тоже пишутся через писатель процесса."""
+        writer = get_sqlite_writer()
+        queue = DatabaseNotificationQueue(batch_size=2)
+
+        with patch.object(writer, "submit", side_effect=writer.submit) as mock_submit:
+            claimed = queue.claim("worker")
+            queue.release(claimed)
+
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(mock_submit.call_count, 2)
+        self.assertFalse(Notification.objects.filter(claimed_by__isnull=False).exists())
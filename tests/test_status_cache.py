@@ -0,0 +1,150 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from notifications.channels.base import ChannelResult
+from notifications.models import Notification
+from notifications.services import NotificationService
+from notifications.services.status_cache import get_status_cache, render_notification_status
+
+
+@override_settings(NOTIFICATION_STATUS_CACHE_ALIAS="default")
+class StatusCacheWriteThroughTest(TestCase):
+    """Тесты обновления кэша статусов воркером."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        caches["default"].clear()
+        self.notifications = [
+            Notification.objects.create(
+                to_email="test@example.com",
+                to_phone="+79991234567",
+                body="Test",
+                channels=["email", "sms"],
+            )
+            for _ in range(2)
+        ]
+
+    def _deliver(self, service, send):
+        with (
+            patch.object(
+                service.channel_senders["email"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="SMTP error"),
+            ),
+            patch.object(
+                service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            send()
+
+    def _assert_cache_matches_db(self, notification):
+        cached = get_status_cache().get(notification.id)
+        expected = render_notification_status(Notification.objects.get(id=notification.id))
+        self.assertEqual(cached.payload, expected.payload)
+        self.assertEqual(cached.etag, expected.etag)
+        self.assertEqual(cached.payload["status"], Notification.STATUS_DELIVERED)
+        self.assertEqual(len(cached.payload["attempts"]), 2)
+
+    def test_immediate_mode_writes_through(self):
+        """Тест: режим immediate обновляет кэш при каждой записи."""
+        service = NotificationService(persistence_mode=NotificationService.PERSISTENCE_IMMEDIATE)
+        notification = self.notifications[0]
+
+        self._deliver(service, lambda: service.send_notification(notification))
+
+        self._assert_cache_matches_db(notification)
+
+    def test_coalesced_mode_writes_through(self):
+        """Тест: режим coalesced обновляет кэш после транзакции."""
+        service = NotificationService(persistence_mode=NotificationService.PERSISTENCE_COALESCED)
+        notification = self.notifications[0]
+        get_status_cache().populate(notification)
+
+        self._deliver(service, lambda: service.send_notification(notification))
+
+        self._assert_cache_matches_db(notification)
+
+    def test_batch_writes_through(self):
+        """Тест: пакетная отправка обновляет кэш всех уведомлений."""
+        service = NotificationService()
+
+        self._deliver(service, lambda: service.send_notifications(self.notifications))
+
+        for notification in self.notifications:
+            self._assert_cache_matches_db(notification)
+
+
+class NotificationDetailETagTest(TestCase):
+    """Тесты ETag для GET /api/notifications/{id}/."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        caches["default"].clear()
+        self.client = APIClient()
+        self.notification = Notification.objects.create(to_email="test@example.com", body="Test")
+        self.url = reverse(
+            "notifications:detail",
+            kwargs={"notification_id": self.notification.id},
+        )
+
+    @override_settings(NOTIFICATION_STATUS_CACHE_ALIAS="default")
+    def test_cached_poll_does_not_query_db(self):
+        """Тест: повторный опрос обслуживается из кэша, совпадающий ETag дает 304."""
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], first["ETag"])
+
+    @override_settings(NOTIFICATION_STATUS_CACHE_ALIAS="default")
+    def test_etag_changes_with_status(self):
+        """Тест: после изменения статуса воркером ETag меняется."""
+        first = self.client.get(self.url)
+
+        service = NotificationService()
+        with patch.object(
+            service.channel_senders["email"],
+            "send",
+            return_value=ChannelResult(success=True),
+        ):
+            service.send_notification(self.notification)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Notification.STATUS_DELIVERED)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    @override_settings(NOTIFICATION_STATUS_CACHE_ALIAS="default")
+    @patch("notification_service.db_router.replica_configured", return_value=True)
+    def test_replica_read_not_cached(self, mock_configured):
+        """Тест: статус, прочитанный с реплики, не записывается в кэш статусов."""
+        with patch(
+            "notification_service.db_router.PrimaryReplicaRouter.db_for_read",
+            return_value=None,
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(get_status_cache().get(self.notification.id))
+
+    def test_etag_without_status_cache(self):
+        """Тест: без кэша статусов ETag и 304 тоже поддерживаются."""
+        first = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", {first["ETag"]}')
+
+        self.assertIsNone(get_status_cache())
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from notifications.channels.base import ChannelResult
+from notifications.models import Notification
+from notifications.services import NotificationService
+from notifications.services.status_events import (
+    InMemoryStatusEventBroker,
+    build_status_event,
+    get_status_event_broker,
+)
+
+
+class InMemoryStatusEventBrokerTest(TestCase):
+    """Тесты брокера событий в памяти."""
+
+    async def test_event_delivered_only_to_subscribers_of_notification(self):
+        """Тест: событие получает только подписка на это уведомление."""
+        broker = InMemoryStatusEventBroker()
+        subscription = broker.subscribe("a")
+        other = broker.subscribe("b")
+
+        broker.publish({"id": "a", "status": "delivered"})
+
+        self.assertEqual(await subscription.get(1), {"id": "a", "status": "delivered"})
+        self.assertIsNone(await other.get(0.01))
+
+        subscription.close()
+        other.close()
+        broker.publish({"id": "a", "status": "failed"})
+        self.assertIsNone(await subscription.get(0.01))
+
+
+class NotificationStatusStreamTest(TestCase):
+    """Тесты SSE и long-poll для статуса уведомления."""
+
+    def setUp(self):
+        """Подготовка тестовых данных."""
+        self.notification = Notification.objects.create(
+            to_email="test@example.com",
+            to_phone="+79991234567",
+            body="Test",
+            channels=["email", "sms"],
+        )
+        self.url = reverse(
+            "notifications:detail",
+            kwargs={"notification_id": self.notification.id},
+        )
+        self.events_url = reverse(
+            "notifications:events",
+            kwargs={"notification_id": self.notification.id},
+        )
+
+    def _deliver(self):
+        service = NotificationService()
+        with (
+            patch.object(
+                service.channel_senders["email"],
+                "send",
+                return_value=ChannelResult(success=False, error_message="SMTP error"),
+            ),
+            patch.object(
+                service.channel_senders["sms"],
+                "send",
+                return_value=ChannelResult(success=True),
+            ),
+        ):
+            service.send_notification(self.notification)
+
+    async def _wait_for_subscriber(self):
+        broker = get_status_event_broker()
+        for _ in range(100):
+            if str(self.notification.id) in broker._subscriptions:
+                return
+            await asyncio.sleep(0.01)
+        self.fail("View did not subscribe to status events")
+
+    async def test_long_poll_returns_on_terminal_status(self):
+        """Тест: long-poll отвечает, как только уведомление доставлено."""
+        request = asyncio.create_task(self.async_client.get(self.url, {"wait": "5"}))
+        await self._wait_for_subscriber()
+
+        await sync_to_async(self._deliver)()
+        response = await request
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(data["status"], Notification.STATUS_DELIVERED)
+        self.assertEqual(data["used_channel"], "sms")
+        self.assertEqual(len(data["attempts"]), 2)
+
+    async def test_long_poll_times_out_with_not_modified(self):
+        """Тест: если представление не изменилось за wait, возвращается 304."""
+        first = await self.async_client.get(self.url)
+
+        response = await self.async_client.get(
+            self.url,
+            {"wait": "0.05"},
+            headers={"If-None-Match": first["ETag"]},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_long_poll_invalid_wait(self):
+        """Тест: нечисловой wait отклоняется."""
+        response = await self.async_client.get(self.url, {"wait": "soon"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_stream_pushes_transitions_until_terminal_status(self):
+        """Тест: SSE отправляет snapshot, переходы статуса и попытки, затем закрывается."""
+        response = await self.async_client.get(self.events_url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+
+        snapshot = await anext(stream)
+        self.assertIn(b"event: snapshot", snapshot)
+
+        await sync_to_async(self._deliver)()
+        chunks = [chunk async for chunk in stream]
+
+        events = [json.loads(chunk.split(b"data: ", 1)[1]) for chunk in chunks]
+        self.assertEqual(
+            [event["status"] for event in events],
+            ["in_progress", "in_progress", "in_progress", "delivered"],
+        )
+        self.assertEqual(
+            [attempt["channel"] for event in events for attempt in event["attempts"]],
+            ["email", "sms"],
+        )
+
+    async def test_stream_not_found(self):
+        """Тест: поток для несуществующего уведомления возвращает 404."""
+        url = reverse(
+            "notifications:events",
+            kwargs={"notification_id": "00000000-0000-0000-0000-000000000000"},
+        )
+
+        response = await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_build_status_event(self):
+        """Тест: событие содержит статус и новые попытки."""
+        event = build_status_event(self.notification)
+
+        self.assertEqual(
+            event,
+            {
+                "id": str(self.notification.id),
+                "status": Notification.STATUS_PENDING,
+                "used_channel": None,
+                "attempts": [],
+            },
+        )
@@ -1,9 +1,15 @@
+import threading
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
+from notifications.dispatch import (
+    NotificationBatchAccumulator,
+    enqueue_notifications,
+    flush_batch_accumulators,
+)
 from notifications.models import Notification
-from notifications.tasks import send_notification_task
+from notifications.tasks import send_notification_task, send_notifications_batch_task
 
 
 class CeleryTasksTest(TestCase):
@@ -57,3 +63,134 @@ class CeleryTasksTest(TestCase):
         # Проверяем, что статус обновлен на failed
         notification.refresh_from_db()
         self.assertEqual(notification.status, Notification.STATUS_FAILED)
+
+
+class EnqueueNotificationsTest(TestCase):
+    """Тесты для пакетной публикации задач."""
+
+    @override_settings(NOTIFICATION_ENQUEUE_CHUNK_SIZE=2)
+    @patch("notifications.dispatch.send_notification_task")
+    def test_enqueue_in_chunks_with_shared_producer(self, mock_task):
+        """Тест: задачи одной пачки публикуются через один producer."""
+        producer_cm = mock_task.app.producer_or_acquire.return_value
+
+        count = enqueue_notifications(["a", "b", "c"])
+
+        self.assertEqual(count, 3)
+        # 3 задачи при размере пачки 2 → два захвата producer
+        self.assertEqual(mock_task.app.producer_or_acquire.call_count, 2)
+        producer = producer_cm.__enter__.return_value
+        mock_task.apply_async.assert_any_call(("a",), producer=producer, queue=None)
+        self.assertEqual(mock_task.apply_async.call_count, 3)
+
+    @override_settings(NOTIFICATION_BATCH_MAX_SIZE=2)
+    @patch("notifications.dispatch.send_notifications_batch_task")
+    def test_enqueue_packs_ids_into_batch_tasks(self, mock_task):
+        """Тест: при включенной пакетной обработке UUID упаковываются в пачки."""
+        enqueue_notifications(["a", "b", "c"])
+
+        producer = mock_task.app.producer_or_acquire.return_value.__enter__.return_value
+        mock_task.apply_async.assert_any_call((["a", "b"],), producer=producer, queue=None)
+        mock_task.apply_async.assert_any_call((["c"],), producer=producer, queue=None)
+
+
+class SendNotificationsBatchTaskTest(TestCase):
+    """Тесты для пакетной задачи отправки."""
+
+    @patch("notifications.tasks.NotificationService")
+    def test_batch_task_loads_only_pending(self, mock_service_class):
+        """Тест: задача загружает уведомления одним запросом и пропускает не pending."""
+        pending = Notification.objects.create(to_email="a@example.com", body="Test")
+        delivered = Notification.objects.create(
+            to_email="b@example.com",
+            body="Test",
+            status=Notification.STATUS_DELIVERED,
+        )
+
+        with self.assertNumQueries(1):
+            send_notifications_batch_task([str(pending.id), str(delivered.id)])
+
+        mock_service_class.return_value.send_notifications.assert_called_once_with([pending])
+
+    @patch("notifications.tasks.NotificationService")
+    def test_batch_task_exception_marks_in_progress_failed(self, mock_service_class):
+        """Тест: при неожиданной ошибке зависшие уведомления помечаются failed."""
+        notification = Notification.objects.create(to_email="a@example.com", body="Test")
+
+        def fail(notifications):
+            Notification.objects.filter(id=notification.id).update(
+                status=Notification.STATUS_IN_PROGRESS,
+            )
+            raise RuntimeError("Test error")
+
+        mock_service_class.return_value.send_notifications.side_effect = fail
+
+        with self.assertRaises(RuntimeError):
+            send_notifications_batch_task([str(notification.id)])
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.STATUS_FAILED)
+
+
+class NotificationBatchAccumulatorTest(TestCase):
+    """Тесты для накопителя пачек на стороне продюсера."""
+
+    def test_flush_on_max_size(self):
+        """Тест: пачка публикуется при достижении размера."""
+        published = []
+        accumulator = NotificationBatchAccumulator(max_size=2, max_age=60, publish=published.append)
+
+        accumulator.add("a")
+        self.assertEqual(published, [])
+        accumulator.add("b")
+
+        self.assertEqual(published, [["a", "b"]])
+        self.assertEqual(len(accumulator), 0)
+
+    def test_flush_on_max_age(self):
+        """Тест: неполная пачка публикуется по таймеру."""
+        flushed = threading.Event()
+        published = []
+
+        def publish(batch):
+            published.append(batch)
+            flushed.set()
+
+        accumulator = NotificationBatchAccumulator(max_size=100, max_age=0.01, publish=publish)
+        accumulator.add("a")
+
+        self.assertTrue(flushed.wait(timeout=2))
+        self.assertEqual(published, [["a"]])
+
+    def test_failed_publish_is_rebuffered(self):
+        """Тест: пачка, которую не удалось опубликовать, возвращается в накопитель."""
+        published = []
+        failures = [ConnectionError("broker is down")]
+
+        def publish(batch):
+            if failures:
+                raise failures.pop()
+            published.append(batch)
+
+        accumulator = NotificationBatchAccumulator(max_size=2, max_age=60, publish=publish)
+        accumulator.add("a")
+        accumulator.add("b")
+
+        self.assertEqual(len(accumulator), 2)
+
+        accumulator.add("c")
+        self.assertEqual(published, [["a", "b", "c"]])
+
+    def test_shutdown_flushes_accumulators(self):
+        """Тест: при завершении процесса накопленные пачки публикуются."""
+        published = []
+        accumulator = NotificationBatchAccumulator(
+            max_size=100, max_age=60, publish=published.append
+        )
+        accumulator.add("a")
+
+        with patch.dict("notifications.dispatch._accumulators", {None: accumulator}):
+            flush_batch_accumulators()
+
+        self.assertEqual(published, [["a"]])
+        self.assertEqual(len(accumulator), 0)